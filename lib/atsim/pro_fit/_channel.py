@@ -1,3 +1,4 @@
+import collections
 import logging
 import uuid
 import itertools
@@ -22,6 +23,107 @@ class ChannelCallback(object):
         return
 
 
+# Message types that carry little or no data. They are not counted towards the bytes awaiting a response
+# on a channel and are sent through the channel with the least data queued ahead of them.
+CONTROL_MESSAGES = frozenset(["MKDIR", "MKDIRS", "LIST", "KEEP_ALIVE"])
+
+
+def message_bytes(msg, chunk_size=None):
+    """Estimate the amount of file data that will be transferred as a result of sending `msg`.
+
+  Args:
+      msg (dict): Request sent through channel.
+      chunk_size (int, optional): Chunk size negotiated for channel, used as the size of `DOWNLOAD_FILE` requests.
+
+  Returns:
+      int : Number of bytes.
+  """
+    try:
+        mtype = msg.get("msg", None)
+    except AttributeError:
+        return 0
+    if mtype in CONTROL_MESSAGES:
+        return 0
+    if "file_data" in msg:
+        return len(msg["file_data"])
+    if mtype == "DOWNLOAD_CHUNK":
+        return msg.get("length", 0)
+    if mtype == "DOWNLOAD_FILE":
+        return chunk_size or 0
+    return 0
+
+
+class ChannelLoad(object):
+    """Tracks the requests sent through a channel that are still awaiting a response.
+
+  The remote end of a file transfer channel handles requests one at a time, in the order they were sent,
+  replying to each with a message having the same `id`. The number of requests and bytes waiting on a channel
+  therefore describe how long a new request sent through it will be queued for."""
+
+    def __init__(self):
+        self._pending = collections.deque()
+        self.pending_bytes = 0
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.max_pending_messages = 0
+
+    @property
+    def pending_messages(self):
+        return len(self._pending)
+
+    def sent(self, msg, nbytes):
+        """Record that request `msg`, expected to transfer `nbytes` of file data, has been sent"""
+        try:
+            msgid = msg.get("id", None)
+        except AttributeError:
+            return
+        if msgid is None:
+            return
+        self._pending.append((msgid, nbytes))
+        self.pending_bytes += nbytes
+        self.sent_messages += 1
+        self.sent_bytes += nbytes
+        self.max_pending_messages = max(
+            self.max_pending_messages, len(self._pending)
+        )
+
+    def received(self, msg):
+        """Record receipt of `msg`, releasing the request it responds to.
+
+    `ERROR` messages do not always carry the `id` of the request that caused them, these release
+    the oldest pending request."""
+        try:
+            msgid = msg.get("id", None)
+            mtype = msg.get("msg", None)
+        except AttributeError:
+            return
+
+        if msgid is None:
+            if mtype == "ERROR" and self._pending:
+                self._release(0)
+            return
+
+        for i, (pendingid, _nbytes) in enumerate(self._pending):
+            if pendingid == msgid:
+                self._release(i)
+                return
+
+    def _release(self, idx):
+        _msgid, nbytes = self._pending[idx]
+        del self._pending[idx]
+        self.pending_bytes -= nbytes
+
+    def metrics(self):
+        """Returns dictionary containing current queue depth and totals for channel"""
+        return dict(
+            pending_messages=self.pending_messages,
+            pending_bytes=self.pending_bytes,
+            max_pending_messages=self.max_pending_messages,
+            sent_messages=self.sent_messages,
+            sent_bytes=self.sent_bytes,
+        )
+
+
 class ChannelException(Exception):
     def __init__(self, message, wiremsg=None):
         super(ChannelException, self).__init__(message)
@@ -60,6 +162,8 @@ class AbstractChannel(object):
             self._channel_id = channel_id
 
         self._callback = None
+        # ChannelLoad instance, set when the channel is managed by a MultiChannel.
+        self.load = None
         self._logger.info("Starting channel, id='%s'", self.channel_id)
         self._channel = self._startChannel(
             execnet_gw, channel_remote_exec, connection_timeout
@@ -137,10 +241,15 @@ class AbstractChannel(object):
     def setcallback(self, callback):
         if self._callback is None:
             self._callback = ChannelCallback(callback)
-            self._channel.setcallback(self._callback)
+            self._channel.setcallback(self._received)
         else:
             self._callback.callback = callback
 
+    def _received(self, msg):
+        if self.load is not None:
+            self.load.received(msg)
+        return self._callback(msg)
+
     def getcallback(self):
         if self._callback is None:
             return None
@@ -162,6 +271,10 @@ class AbstractChannel(object):
             ch.send(msg)
 
     def send(self, msg):
+        if self.load is not None:
+            self.load.sent(
+                msg, message_bytes(msg, getattr(self, "chunk_size", None))
+            )
         return self._send(self._channel, msg)
 
     def __len__(self):
@@ -187,8 +300,12 @@ class MultiChannel(object):
         """Factory class and container for managing multiple Download/UploadChannel instances.
 
     This class implements a subset of the BaseChannel methods. Importantly, the send() method is not implemented.
-    To send a message, the client must first obtain a channel instance by iterating over this MultiChannel instance
-    (for instance, by calling next() ).
+    To send a message, the client must first obtain a channel instance by calling `select()` or by iterating over this
+    MultiChannel instance (for instance, by calling next() ).
+
+    Channels are handed out least-loaded first: the requests sent through each channel are tracked
+    (see `ChannelLoad`) and the channel with the fewest bytes, then fewest requests, awaiting a response is returned.
+    This stops a large transfer from delaying requests that would otherwise have been assigned, in turn, to the same channel.
 
     Args:
         execnet_gw (execnet.Gateway): Gateway used to create execnet channels.
@@ -210,7 +327,9 @@ class MultiChannel(object):
         self._channels = self._start_channels(
             execnet_gw, channel_factory, num_channels
         )
-        self._iter = itertools.cycle(self._channels)
+        # Order in which channels were last selected, used to break ties between equally loaded channels.
+        self._last_selected = list(range(len(self._channels)))
+        self._selection_count = itertools.count(len(self._channels))
         self._callback = None
 
     def _start_channels(self, execnet_gw, channel_factory, num_channels):
@@ -218,14 +337,50 @@ class MultiChannel(object):
         for i in range(num_channels):
             chan_id = "_".join([str(self._channel_id), str(i)])
             ch = channel_factory.createChannel(execnet_gw, chan_id)
+            ch.load = ChannelLoad()
             channels.append(ch)
         return channels
 
+    def select(self, mtype=None):
+        """Returns the channel through which the next request should be sent.
+
+    Args:
+        mtype (str, optional): Type of message that will be sent. Control messages (see `CONTROL_MESSAGES`) are
+          sent through the channel with the least data waiting, regardless of the number of requests it holds.
+
+    Returns:
+        Channel instance.
+    """
+        control = mtype in CONTROL_MESSAGES
+
+        def key(i):
+            load = self._channels[i].load
+            if control:
+                return (load.pending_bytes, self._last_selected[i])
+            return (load.pending_bytes, load.pending_messages, self._last_selected[i])
+
+        idx = min(range(len(self._channels)), key=key)
+        self._last_selected[idx] = next(self._selection_count)
+        return self._channels[idx]
+
+    def metrics(self):
+        """Per-channel queue depths and transfer totals.
+
+    Returns:
+        list : Dictionary for each channel, as returned by `ChannelLoad.metrics()` with an additional `channel_id` key.
+    """
+        metrics = []
+        for ch in self._channels:
+            m = ch.load.metrics()
+            m["channel_id"] = ch.channel_id
+            metrics.append(m)
+        return metrics
+
     def __iter__(self):
-        return self._iter
+        return self
 
     def __next__(self):
-        return next(self._iter)
+        return self.select()
 
     def setcallback(self, callback):
         self._callback = callback
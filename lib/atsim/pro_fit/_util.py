@@ -2,6 +2,8 @@ import csv
 import functools
 import operator
 import itertools
+import os
+import shutil
 import threading
 import gevent
 import gevent.event
@@ -286,3 +288,89 @@ def cmp(x, y):
     """
 
     return (x > y) - (x < y)
+
+
+FILE_LINK_MODES = ["copy", "hardlink", "reflink", "symlink"]
+
+# ioctl request number for FICLONE (linux/fs.h)
+_FICLONE = 0x40049409
+
+_link_logger = logging.getLogger("atsim.pro_fit.link_file")
+
+
+def _reflink(src, dst):
+    import fcntl
+
+    with open(src, "rb") as infile, open(dst, "wb") as outfile:
+        fcntl.ioctl(outfile.fileno(), _FICLONE, infile.fileno())
+    shutil.copymode(src, dst)
+
+
+def _hardlink(src, dst):
+    os.link(src, dst)
+
+
+def _symlink(src, dst):
+    os.symlink(os.path.realpath(src), dst)
+
+
+_linkers = {"hardlink": _hardlink, "reflink": _reflink, "symlink": _symlink}
+
+
+def link_file(src, dst, link_mode="copy", copy_function=shutil.copy2):
+    """Place file `src` at `dst` using the method given by `link_mode`.
+
+  `link_mode` is one of the values in `FILE_LINK_MODES`:
+
+    * ``copy``: call `copy_function`.
+    * ``hardlink``: create a hard link to `src`.
+    * ``reflink``: create copy-on-write clone of `src` on filesystems that support it (e.g. btrfs, XFS, APFS).
+    * ``symlink``: create symbolic link pointing at absolute path of `src`.
+
+  If the link cannot be created (for instance `dst` is on a different filesystem, or
+  reflinks are not supported) then the file is copied using `copy_function`.
+
+  :param src: Source path
+  :param dst: Destination path
+  :param link_mode: Link mode.
+  :param copy_function: Function with signature `copy_function(src, dst)` used for copying.
+
+  :return: `dst`"""
+    if link_mode != "copy":
+        try:
+            if os.path.lexists(dst):
+                os.unlink(dst)
+            _linkers[link_mode](src, dst)
+            return dst
+        except (OSError, ImportError) as e:
+            _link_logger.debug(
+                "Could not %s '%s' to '%s' (%s), falling back to copy.",
+                link_mode,
+                src,
+                dst,
+                e,
+            )
+            if os.path.lexists(dst):
+                os.unlink(dst)
+    copy_function(src, dst)
+    return dst
+
+
+def link_tree(src, dst, link_mode="copy", ignore=None):
+    """Equivalent of `shutil.copytree` in which files are placed in `dst` using `link_file()`.
+
+  :param src: Source directory.
+  :param dst: Destination directory (must not exist).
+  :param link_mode: One of `FILE_LINK_MODES`
+  :param ignore: Passed to `shutil.copytree` to select files that are not copied.
+
+  :return: `dst`"""
+    if link_mode == "copy":
+        return shutil.copytree(src, dst, ignore=ignore)
+
+    def copy_function(s, d):
+        return link_file(s, d, link_mode)
+
+    return shutil.copytree(
+        src, dst, ignore=ignore, copy_function=copy_function
+    )
@@ -4,4 +4,5 @@ from ._metadata import getMetadata
 from ._fitting import Fitting
 from ._tabulated import IterationSeriesTable, BadFilterCombinationException
 from ._tableserialize import serializeTableForR, serializeTableForGNUPlot
-from ._validate import validate
+from ._validate import validate, missingIndexes, upgrade
+from ._resume import ResumeState, ResumeCandidate, loadResumeState
@@ -1,8 +1,11 @@
-import math
 import re
 import operator
 import contextlib
 import functools
+import threading
+import weakref
+
+import numpy as np
 import sqlalchemy as sa
 from ._util import calculatePercentageDifference
 from atsim.pro_fit._util import cmp
@@ -13,35 +16,46 @@ from ._metadata import getMetadata
 _metadata = getMetadata()
 
 
+def _min(data):
+    """Calculate minimum of values in data.
+
+  @param data numpy array of numbers.
+  @return Minimum of data"""
+    return float(np.min(data))
+
+
+def _max(data):
+    """Calculate maximum of values in data.
+
+  @param data numpy array of numbers.
+  @return Maximum of data"""
+    return float(np.max(data))
+
+
 def _mean(data):
     """Calculate mean of values in data.
 
-  @param data List of numbers for which mean should be calculated.
+  @param data numpy array of numbers for which mean should be calculated.
   @return Mean of data"""
-    return sum(data) / float(len(data))
+    return float(np.mean(data))
 
 
 def _median(data):
     """Calculate the median of values in data.
 
-  @param data List of numbers for which median should be determined.
-  @return Median of data"""
-    data = sorted(data)
-    # Even length
-    if len(data) % 2 == 0:
-        idx = len(data) // 2
-        v1 = data[idx]
-        v2 = data[idx - 1]
-        return (v1 + v2) / float(2.0)
-    # Odd length
-    else:
-        return data[len(data) // 2]
+  @param data numpy array of numbers for which median should be determined.
+  @return Median of data (None if data is empty)"""
+    if not len(data):
+        return None
+    return float(np.median(data))
 
 
 def _quartile(data, q):
     """Calculate quartiles.
 
-  @param data Data for which quartile should be calculated.
+  Quartiles 1 and 3 are the medians of the values below and above the median respectively.
+
+  @param data numpy array of data for which quartile should be calculated.
   @param q Number of quartile to be calculated. One of 1,2,3"""
 
     if not q in [1, 2, 3]:
@@ -49,27 +63,97 @@ def _quartile(data, q):
 
     m = _median(data)
     if q == 1:
-        return _median([v for v in data if v < m])
+        return _median(data[data < m])
 
     if q == 2:
         return m
 
     if q == 3:
-        return _median([v for v in data if v > m])
+        return _median(data[data > m])
 
 
 def _stdev(data):
-    """Calculate the standard deviation of values in data.
+    """Calculate the (population) standard deviation of values in data.
 
-  @param data List of data for which standard deviation should be calculated.
+  @param data numpy array of data for which standard deviation should be calculated.
   @return Standard deviation of data."""
-    m = _mean(data)
-    sd = 0.0
-    for v in data:
-        sd += (v - m) ** 2.0
-    sd /= float(len(data))
-    sd = math.sqrt(sd)
-    return sd
+    return float(np.std(data))
+
+
+def _groupByIteration(rows):
+    """Split (iteration_number, value) rows, ordered by iteration_number, into per-iteration arrays.
+
+  @param rows Sequence of (iteration_number, value) pairs.
+  @return List of (iteration_number, numpy array) pairs."""
+    if not rows:
+        return []
+    iterations = np.array([row[0] for row in rows])
+    values = np.array([row[1] for row in rows], dtype=float)
+    boundaries = np.flatnonzero(np.diff(iterations)) + 1
+    firsts = np.concatenate(([0], boundaries))
+    return list(
+        zip(iterations[firsts].tolist(), np.split(values, boundaries))
+    )
+
+
+class _StatisticsCache(object):
+    """Population statistics, keyed by (iteration_number, column key), for iterations
+  that have finished. One instance is shared by all the tables created for an engine.
+
+  The cache is cleared if the database appears to have been replaced (i.e. the number of candidates
+  or iterations it contains has decreased)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watermark = None
+        self._statistics = {}
+
+    def refresh(self, conn):
+        """Check database against cached state.
+
+    @param conn SQLAlchemy connection.
+    @return Number of last iteration in database (-1 if the database is empty)"""
+        candidates = _metadata.tables["candidates"]
+        maxId, lastIteration = conn.execute(
+            sa.select(
+                [
+                    sa.func.max(candidates.c.id),
+                    sa.func.max(candidates.c.iteration_number),
+                ]
+            )
+        ).first()
+        watermark = (maxId or 0, -1 if lastIteration is None else lastIteration)
+
+        with self._lock:
+            if self._watermark is not None and (
+                watermark[0] < self._watermark[0]
+                or watermark[1] < self._watermark[1]
+            ):
+                self._statistics.clear()
+            self._watermark = watermark
+        return watermark[1]
+
+    def get(self, iterationNumber, columnKey):
+        with self._lock:
+            return self._statistics.get((iterationNumber, columnKey), None)
+
+    def put(self, iterationNumber, columnKey, statistics):
+        with self._lock:
+            self._statistics[(iterationNumber, columnKey)] = statistics
+
+
+_statisticsCaches = weakref.WeakKeyDictionary()
+_statisticsCachesLock = threading.Lock()
+
+
+def _statisticsCache(engine):
+    """@return _StatisticsCache for engine"""
+    with _statisticsCachesLock:
+        cache = _statisticsCaches.get(engine, None)
+        if cache is None:
+            cache = _StatisticsCache()
+            _statisticsCaches[engine] = cache
+        return cache
 
 
 class _RunningFilter(object):
@@ -348,12 +432,15 @@ class _EvaluatorColumnProvider(object):
 
 
 class _StatColumnProvider(object):
-    """Class responsible for fetching column of data for a particular iteration and
-  then applying different statistical calculations to it."""
+    """Class responsible for calculating population statistics for each iteration.
+
+  The primary column's values for every iteration in the series are fetched with a single query,
+  grouped by iteration and then reduced using numpy. Statistics for finished iterations are cached
+  (see `_StatisticsCache`)."""
 
     _calculators = {
-        "stat:min": min,
-        "stat:max": max,
+        "stat:min": _min,
+        "stat:max": _max,
         "stat:mean": _mean,
         "stat:median": _median,
         "stat:std_dev": _stdev,
@@ -362,42 +449,78 @@ class _StatColumnProvider(object):
         "stat:quartile3": functools.partial(_quartile, q=3),
     }
 
-    def __init__(self, conn, columnKey, columnLabels):
+    def __init__(self, conn, tempMeta, columnKey, columnLabels):
         """@param conn SQLAlchemy conn
+       @param tempMeta MetaData containing temp_iterationseries table describing iterations in series.
        @param columnKey Column for which stats will be generated
        @param columnLabels List of strings identifying stats to be applied"""
 
         self.conn = conn
+        self.tempMeta = tempMeta
         self.columnKey = columnKey
-        self.calculators = self._createCalculators(columnLabels)
+        self.columnLabels = self._checkColumnLabels(columnLabels)
+        self._iterationStatistics = None
 
-    def _createCalculators(self, columnLabels):
-        outlist = []
+    def _checkColumnLabels(self, columnLabels):
         for cn in columnLabels:
-            outlist.append((cn, self._calculators[cn]))
-        return outlist
+            if not cn in self._calculators:
+                raise KeyError("Unknown column label: %s" % cn)
+        return list(columnLabels)
+
+    def _calculate(self, values):
+        """@return Dictionary of all statistics for values"""
+        return dict(
+            [(cn, calc(values)) for (cn, calc) in self._calculators.items()]
+        )
 
-    def __call__(self, iterationNumber, candidateNumber, rowDict):
+    def _calculateIterationStatistics(self):
+        """@return Dictionary mapping iteration_number to statistics dictionary for each iteration in series"""
         candidates = _metadata.tables["candidates"]
-        query = sa.select(
-            [
-                candidates.c.iteration_number,
-                candidates.c.candidate_number,
-                candidates.c.merit_value,
-            ]
-        ).where(candidates.c.iteration_number == iterationNumber)
-
-        results = self.conn.execute(query)
-        whichcol = [
-            i for (i, cn) in enumerate(results.keys()) if cn == self.columnKey
-        ][0]
-        values = [row[whichcol] for row in results]
-
-        outlist = []
-        for cn, calc in self.calculators:
-            v = calc(values)
-            outlist.append((cn, v))
-        return outlist
+        tt = self.tempMeta.tables["temp_iterationseries"]
+
+        cache = _statisticsCache(self.conn.engine)
+        lastIteration = cache.refresh(self.conn)
+
+        seriesIterations = sa.select([tt.c.iteration_number]).distinct()
+        statistics = {}
+        uncached = []
+        for (iterationNumber,) in self.conn.execute(seriesIterations):
+            cached = cache.get(iterationNumber, self.columnKey)
+            if cached is None:
+                uncached.append(iterationNumber)
+            else:
+                statistics[iterationNumber] = cached
+
+        if not uncached:
+            return statistics
+
+        column = candidates.c[self.columnKey]
+        query = (
+            sa.select([candidates.c.iteration_number, column])
+            .where(candidates.c.iteration_number.in_(seriesIterations))
+            .where(candidates.c.iteration_number >= min(uncached))
+            .order_by(candidates.c.iteration_number)
+        )
+        rows = self.conn.execute(query).fetchall()
+
+        for iterationNumber, values in _groupByIteration(rows):
+            if iterationNumber in statistics:
+                continue
+            iterationStatistics = self._calculate(values)
+            statistics[iterationNumber] = iterationStatistics
+            if iterationNumber < lastIteration:
+                cache.put(iterationNumber, self.columnKey, iterationStatistics)
+        return statistics
+
+    def __call__(self, iterationNumber, candidateNumber, rowDict):
+        if not self.columnLabels:
+            return []
+
+        if self._iterationStatistics is None:
+            self._iterationStatistics = self._calculateIterationStatistics()
+
+        iterationStatistics = self._iterationStatistics[iterationNumber]
+        return [(cn, iterationStatistics[cn]) for cn in self.columnLabels]
 
     @classmethod
     def validKeys(cls, engine):
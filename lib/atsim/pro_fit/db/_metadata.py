@@ -26,6 +26,11 @@ def _createMetaData():
             nullable=False,
         ),
         sa.Column("value", sa.Float),
+        sa.Index(
+            "ix_variables_candidate_id_variable_name",
+            "candidate_id",
+            "variable_name",
+        ),
     )
 
     # variable_keys
@@ -49,6 +54,11 @@ def _createMetaData():
         sa.Column("iteration_number", sa.Integer),
         sa.Column("candidate_number", sa.Integer),
         sa.Column("merit_value", sa.Integer),
+        sa.Index(
+            "ix_candidates_iteration_number_candidate_number",
+            "iteration_number",
+            "candidate_number",
+        ),
     )
 
     # jobas
@@ -63,6 +73,7 @@ def _createMetaData():
             nullable=False,
         ),
         sa.Column("job_name", sa.String),
+        sa.Index("ix_jobs_candidate_id", "candidate_id"),
     )
 
     # evaluators
@@ -85,6 +96,12 @@ def _createMetaData():
             sa.ForeignKey("evaluatorerror.id"),
             nullable=True,
         ),
+        sa.Index(
+            "ix_evaluated_job_id_evaluator_name_value_name",
+            "job_id",
+            "evaluator_name",
+            "value_name",
+        ),
     )
 
     # evaluatorerror
@@ -104,4 +121,20 @@ def _createMetaData():
         sa.Column("runstatus", sa.Enum("Running", "Finished", "Error")),
     )
 
+    # merit_cache (see atsim.pro_fit.merit.MeritCache)
+    sa.Table(
+        "merit_cache",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("configuration_hash", sa.String),
+        sa.Column("candidate_key", sa.String),
+        sa.Column("merit_value", sa.Float),
+        sa.Column("jobs", sa.LargeBinary),
+        sa.Index(
+            "ix_merit_cache_configuration_hash_candidate_key",
+            "configuration_hash",
+            "candidate_key",
+        ),
+    )
+
     return metadata
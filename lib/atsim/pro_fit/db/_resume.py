@@ -0,0 +1,93 @@
+import collections
+
+import sqlalchemy as sa
+
+from . import _metadata
+
+metadata = _metadata.getMetadata()
+
+ResumeCandidate = collections.namedtuple(
+    "ResumeCandidate", ["meritValue", "variables"]
+)
+
+
+class ResumeState(object):
+    """Progress of a fitting run recovered from `fitting_run.db`, used to continue an interrupted run.
+
+    Attributes:
+        iterationNumber (int): Last iteration recorded in the database.
+        fitKeys (list): Names of the variables changed during the fitting run.
+        population (list): `ResumeCandidate` for each candidate of the last iteration, in candidate order.
+        best (ResumeCandidate): Candidate with the lowest merit value recorded during the run.
+    """
+
+    def __init__(self, iterationNumber, fitKeys, population, best):
+        self.iterationNumber = iterationNumber
+        self.fitKeys = fitKeys
+        self.population = population
+        self.best = best
+
+
+def _candidateVariables(conn, candidateIds):
+    table = metadata.tables["variables"]
+    query = sa.select(
+        [table.c.candidate_id, table.c.variable_name, table.c.value]
+    ).where(table.c.candidate_id.in_(candidateIds))
+
+    variables = dict([(cid, {}) for cid in candidateIds])
+    for cid, name, value in conn.execute(query):
+        variables[cid][name] = value
+    return variables
+
+
+def loadResumeState(engine):
+    """Read the state needed to resume the fitting run stored in the database referred to by `engine`.
+
+    Args:
+        engine (sqlalchemy.Engine): Database engine for `fitting_run.db`
+
+    Returns:
+        ResumeState: State of the run or `None` if the database does not contain any candidates.
+    """
+    candidates = metadata.tables["candidates"]
+    variableKeys = metadata.tables["variable_keys"]
+
+    with engine.connect() as conn:
+        lastIteration = conn.execute(
+            sa.select([sa.func.max(candidates.c.iteration_number)])
+        ).scalar()
+        if lastIteration is None:
+            return None
+
+        fitKeys = [
+            row[0]
+            for row in conn.execute(
+                sa.select([variableKeys.c.variable_name])
+                .where(variableKeys.c.fit_flag == True)  # noqa
+                .order_by(variableKeys.c.id)
+            )
+        ]
+
+        rows = conn.execute(
+            sa.select([candidates.c.id, candidates.c.merit_value])
+            .where(candidates.c.iteration_number == lastIteration)
+            .order_by(candidates.c.candidate_number)
+        ).fetchall()
+
+        bestRow = conn.execute(
+            sa.select([candidates.c.id, candidates.c.merit_value])
+            .where(candidates.c.merit_value != None)  # noqa
+            .order_by(candidates.c.merit_value, candidates.c.id)
+            .limit(1)
+        ).fetchone()
+
+        candidateIds = [cid for (cid, _mv) in rows]
+        if bestRow is not None:
+            candidateIds.append(bestRow[0])
+        variables = _candidateVariables(conn, candidateIds)
+
+    population = [ResumeCandidate(mv, variables[cid]) for (cid, mv) in rows]
+    best = None
+    if bestRow is not None:
+        best = ResumeCandidate(bestRow[1], variables[bestRow[0]])
+    return ResumeState(lastIteration, fitKeys, population, best)
@@ -91,7 +91,10 @@ def _createColumnProviders(conn, tempMeta, primaryColumnKey, columnLabels):
             raise KeyError("Unknown column label: %s" % cl)
 
     # Create _StatColumnProvider
-    outlist.append(_StatColumnProvider(conn, primaryColumnKey, statcols))
+    if statcols:
+        outlist.append(
+            _StatColumnProvider(conn, tempMeta, primaryColumnKey, statcols)
+        )
     return outlist
 
 
@@ -24,7 +24,61 @@ def validate(engine):
         return False
 
     for tn in actual_table_names:
+        # Ignore tables maintained by sqlite itself (e.g. sqlite_stat1 created by ANALYZE).
+        if tn and tn.startswith("sqlite_"):
+            continue
         if tn and not tn in tablenames:
             print(tn)
             return False
     return True
+
+
+def missingIndexes(engine):
+    """Find the indexes defined by the pprofit database schema that are not present in the
+    database referred to by `engine`.
+
+    Databases created by earlier versions of pprofit do not contain secondary indexes.
+
+    Args:
+        engine (sqlalchemy.Engine): Database engine for `fitting_run.db`
+
+    Returns:
+        list: `sqlalchemy.Index` objects absent from the database.
+    """
+    md = getMetadata()
+    inspector = inspect(engine)
+    actual_table_names = set(inspector.get_table_names())
+
+    missing = []
+    for table in md.sorted_tables:
+        if not table.name in actual_table_names:
+            continue
+        existing = set(idx["name"] for idx in inspector.get_indexes(table.name))
+        for index in sorted(table.indexes, key=lambda idx: idx.name):
+            if not index.name in existing:
+                missing.append(index)
+    return missing
+
+
+def upgrade(engine):
+    """Upgrade the database referred to by `engine`, in place, to the current pprofit schema.
+
+    Creates any missing indexes (see `missingIndexes()`) and then refreshes the statistics used
+    by the sqlite query planner. Databases that are already up to date are not modified.
+
+    Args:
+        engine (sqlalchemy.Engine): Database engine for `fitting_run.db`
+
+    Returns:
+        list: Names of the indexes that were created.
+    """
+    missing = missingIndexes(engine)
+    if not missing:
+        return []
+
+    with engine.begin() as conn:
+        for index in missing:
+            index.create(conn, checkfirst=True)
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+    return [index.name for index in missing]
@@ -1,5 +1,7 @@
 import os
 
+import numpy as np
+
 from atsim.pro_fit.exceptions import ConfigException
 
 from . import _dlpoly_parse
@@ -10,6 +12,53 @@ class DLPOLY_STATISEvaluatorException(Exception):
     pass
 
 
+class _STATISReducer(object):
+    """Keeps running sums of selected values from STATIS blocks.
+
+  Values are copied into a fixed size buffer which is summed each time it is full, memory use
+  therefore doesn't depend on the length of the STATIS file."""
+
+    def __init__(self, indices, bufferSize=4096):
+        """@param indices Positions within block values (see _dlpoly_parse.statisKeyIndices()) of values to be summed
+       @param bufferSize Number of blocks held before they are added to sums"""
+        self._indices = np.array(indices, dtype=int)
+        self._minLength = max(indices) + 1 if indices else 0
+        self._buffer = np.zeros((bufferSize, len(indices)))
+        self._numBuffered = 0
+        self._sums = np.zeros(len(indices))
+        self.count = 0
+        # Flags indices that lie beyond the end of any block.
+        self.missing = np.zeros(len(indices), dtype=bool)
+
+    def add(self, values):
+        """Add block values to sums
+
+    @param values Numpy array of block values"""
+        if len(values) >= self._minLength:
+            self._buffer[self._numBuffered] = values[self._indices]
+        else:
+            present = self._indices < len(values)
+            self.missing |= ~present
+            self._buffer[self._numBuffered] = 0.0
+            self._buffer[self._numBuffered, present] = values[
+                self._indices[present]
+            ]
+
+        self._numBuffered += 1
+        self.count += 1
+        if self._numBuffered == len(self._buffer):
+            self._flush()
+
+    def _flush(self):
+        self._sums += self._buffer[: self._numBuffered].sum(axis=0)
+        self._numBuffered = 0
+
+    def averages(self):
+        """@return List of the average of each value"""
+        self._flush()
+        return [float(v) for v in self._sums / float(self.count)]
+
+
 class DLPOLY_STATISEvaluator(object):
     """Evaluator used for extracting property time averages from a DL_POLY STATIS file.
 
@@ -25,6 +74,11 @@ class DLPOLY_STATISEvaluator(object):
         self._startTime = startTime
         self._keyExpectTriples = keyExpectTriples
 
+    @property
+    def requiredOutputFiles(self):
+        """Glob patterns for the job output files read by this evaluator"""
+        return ["CONFIG", "CONTROL", "STATIS"]
+
     def __call__(self, job):
         """Returns list of RMSEvaluatorRecord instances, one per property, for dlpoly job found in job.path
 
@@ -41,40 +95,58 @@ class DLPOLY_STATISEvaluator(object):
                 config = _dlpoly_parse.parseCONFIG(configfile)
             with open(controlFilename, "r") as controlfile:
                 nptflag = self._isNPT(controlfile)
+            keyIndices = _dlpoly_parse.statisKeyIndices(config, nptflag)
             with open(statisFilename, "r") as statisfile:
-                statisIterator = _dlpoly_parse.parseSTATIS(
-                    statisfile, config, nptflag
+                averages = self._extractValues(
+                    _dlpoly_parse.parseSTATISBlocks(statisfile), keyIndices
                 )
-                rows = self._extractValues(statisIterator)
-                return self._makeRecords(rows)
+                return self._makeRecords(averages)
         except Exception as exc:
             return self._makeErrorRecords(exc)
 
-    def _extractValues(self, statisIterator):
-        rows = []
-        for row in statisIterator:
-            if row["time"] >= self._startTime:
-                rows.append(row)
-        if row["time"] < self._startTime:
+    def _extractValues(self, statisBlocks, keyIndices):
+        """Average the requested keys over the blocks with time >= startTime.
+
+    @param statisBlocks Iterator as returned by _dlpoly_parse.parseSTATISBlocks()
+    @param keyIndices Dictionary as returned by _dlpoly_parse.statisKeyIndices()
+    @return Dictionary mapping each requested key to its average or to the exception explaining why it couldn't be calculated"""
+        averages = {}
+        keys = []
+        for k, _e, _w in self._keyExpectTriples:
+            if k in keyIndices:
+                keys.append(k)
+            else:
+                averages[k] = KeyError(k)
+
+        reducer = _STATISReducer([keyIndices[k] for k in keys])
+        time = None
+        for _timestep, time, values in statisBlocks:
+            if time >= self._startTime:
+                reducer.add(values)
+
+        if time is None:
+            raise DLPOLY_STATISEvaluatorException("STATIS file contains no data")
+
+        if time < self._startTime:
             raise DLPOLY_STATISEvaluatorException(
                 "Maximum time in STATIS file < start_time"
             )
-        return rows
 
-    def _calculateAverage(self, k, rows):
-        values = [r[k] for r in rows]
-        a = sum(values) / float(len(values))
-        return a
+        for k, average, missing in zip(keys, reducer.averages(), reducer.missing):
+            if missing:
+                averages[k] = KeyError(k)
+            else:
+                averages[k] = average
+        return averages
 
-    def _makeRecords(self, rows):
+    def _makeRecords(self, averages):
         records = []
         for k, e, w in self._keyExpectTriples:
-            try:
-                r = RMSEvaluatorRecord(
-                    k, e, self._calculateAverage(k, rows), w
-                )
-            except Exception as exc:
-                r = ErrorEvaluatorRecord(k, e, exc, w)
+            average = averages[k]
+            if isinstance(average, Exception):
+                r = ErrorEvaluatorRecord(k, e, average, w)
+            else:
+                r = RMSEvaluatorRecord(k, e, average, w)
             r.evaluatorName = self.name
             records.append(r)
         return records
@@ -1,5 +1,7 @@
 import re
 
+import numpy as np
+
 
 def parseCONFIG(infile):
     """Reads the dl_poly CONFIG file contained in 'configfilename' """
@@ -165,18 +167,20 @@ statisColumnKeys = [
 ]
 
 
-def _parseSTATISInternal(infile):
+def parseSTATISBlocks(infile):
+    """Parse the data blocks of a STATIS file without building a dictionary per block.
+
+  @param infile Python file in which STATIS file is contained.
+  @return Iterator returning (timestep, time, values) tuples, where values is a numpy array
+          containing the block's values. Use statisKeyIndices() to find the position of a key
+          within values."""
     # Skip Title line
     next(infile)
     # Skip Energy units
     next(infile)
 
-    keys = statisColumnKeys
-
     for line in infile:
-        # line = next(infile)
         line = line[:-1].strip()
-        block = []
         try:
             timestep, time, nument = line.split()
         except ValueError:
@@ -191,15 +195,36 @@ def _parseSTATISInternal(infile):
                     return
         nument = int(nument)
         # Read block
-        while len(block) < nument:
-            line = next(infile)[:-1]
-            lineitems = [float(item) for item in line.split()]
-            block.extend(lineitems)
+        tokens = []
+        while len(tokens) < nument:
+            tokens.extend(next(infile).split())
+        yield int(timestep), float(time), np.array(tokens, dtype=float)
+
+
+def statisKeyIndices(config=None, npt=False):
+    """Position of each of the keys described in parseSTATIS() within the values of a STATIS block.
+
+  @param config Parsed CONFIG file, as for parseSTATIS().
+  @param npt If True include cell keys, as for parseSTATIS().
+  @return Dictionary mapping keys to indices of block values returned by parseSTATISBlocks()"""
+    if npt == True and config == None:
+        raise ParseSTATISBadOptionsException("npt=True but config=None")
+
+    keys = list(statisColumnKeys)
+    if config != None:
+        keys.extend(_extraFieldKeys(_extractSpeciesNames(config), npt))
+    return dict([(k, i) for (i, k) in enumerate(keys)])
+
+
+def _parseSTATISInternal(infile):
+    keys = statisColumnKeys
 
+    for timestep, time, values in parseSTATISBlocks(infile):
+        block = values.tolist()
         # Convert block to a dictionary
         blockdict = dict(list(zip(keys, block[: len(keys)])))
-        blockdict["timestep"] = int(timestep)
-        blockdict["time"] = float(time)
+        blockdict["timestep"] = timestep
+        blockdict["time"] = time
 
         # Stick any extra items in here
         blockdict["extra_items"] = block[len(keys):]
@@ -217,7 +242,7 @@ def _extractSpeciesNames(config):
     return species
 
 
-def _extraFieldDictIterator(statisIterator, speciesNames, nptFlag):
+def _extraFieldKeys(speciesNames, nptFlag):
     extrafieldkeys = []
     if speciesNames != None:
         extrafieldkeys = [
@@ -253,6 +278,11 @@ def _extraFieldDictIterator(statisIterator, speciesNames, nptFlag):
             ]
         )
 
+    return extrafieldkeys
+
+
+def _extraFieldDictIterator(statisIterator, speciesNames, nptFlag):
+    extrafieldkeys = _extraFieldKeys(speciesNames, nptFlag)
     for b in statisIterator:
         extra_items = b["extra_items"][: len(extrafieldkeys)]
 
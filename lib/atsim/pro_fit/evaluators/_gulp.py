@@ -1,4 +1,5 @@
 import collections
+import glob
 import inspect
 import logging
 import math
@@ -79,6 +80,11 @@ class Gulp_DRVEvaluator(object):
         self._configItems = configitems
         self._evaluatorname = evaluatorName
 
+    @property
+    def requiredOutputFiles(self):
+        """Glob patterns for the job output files read by this evaluator"""
+        return [glob.escape(self._filename)]
+
     def _vectorMagnitude(self, vector):
         sqmag = sum([float(v) ** 2.0 for v in vector])
         return math.sqrt(sqmag)
@@ -217,17 +223,13 @@ class _GulpSubEvaluatorBase(object):
     def getAllowedFields():
         return []
 
-    def __call__(self, gulpEvaluator, job):
-        outputpath = os.path.join(
-            job.outputPath, gulpEvaluator.gulpOutputFilename
+    def __call__(self, gulpOutput):
+        actual = self.extractValue(gulpOutput)
+        return FractionalDifferenceEvaluatorRecord(
+            self._name, self._expect, actual, self._weight
         )
-        with open(outputpath) as infile:
-            actual = self.extractValue(infile)
-            return FractionalDifferenceEvaluatorRecord(
-                self._name, self._expect, actual, self._weight
-            )
 
-    def extractValue(self, infile):
+    def extractValue(self, gulpOutput):
         raise NotImplementedError()
 
 
@@ -240,8 +242,8 @@ class _GulpElasticSubEvaluator(_GulpSubEvaluatorBase):
         c = int(key[-1]) - 1
         self._row, self._col = r, c
 
-    def extractValue(self, infile):
-        mat = _gulp_parse.parseElasticConstantMatrix(infile)
+    def extractValue(self, gulpOutput):
+        mat = gulpOutput.elasticConstantMatrix()
         return mat[self._row][self._col]
 
     @staticmethod
@@ -263,8 +265,8 @@ class _GulpBulkModulusSubEvaluator(_GulpSubEvaluatorBase):
         tokens = key.split("_")
         self._modtype = tokens[1]
 
-    def extractValue(self, infile):
-        mechanicalproperties = _gulp_parse.parseMechanicalProperties(infile)
+    def extractValue(self, gulpOutput):
+        mechanicalproperties = gulpOutput.mechanicalProperties()
         return mechanicalproperties["bulkModulus"][self._modtype]
 
     @staticmethod
@@ -280,8 +282,8 @@ class _GulpShearModulusSubEvaluator(_GulpSubEvaluatorBase):
         tokens = key.split("_")
         self._modtype = tokens[1]
 
-    def extractValue(self, infile):
-        mechanicalproperties = _gulp_parse.parseMechanicalProperties(infile)
+    def extractValue(self, gulpOutput):
+        mechanicalproperties = gulpOutput.mechanicalProperties()
         return mechanicalproperties["shearModulus"][self._modtype]
 
     @staticmethod
@@ -308,8 +310,8 @@ class _GulpCellSubEvaluator(_GulpSubEvaluatorBase):
     def parseKey(self, key):
         self._key = self._keyTranslate[key]
 
-    def extractValue(self, infile):
-        celldict = _gulp_parse.parseFinalCellParametersAndDerivatives(infile)
+    def extractValue(self, gulpOutput):
+        celldict = gulpOutput.finalCellParametersAndDerivatives()
         return celldict[self._key]
 
     @staticmethod
@@ -320,10 +322,8 @@ class _GulpCellSubEvaluator(_GulpSubEvaluatorBase):
 class _GulpEnergySubEvaluator(_GulpSubEvaluatorBase):
     """Extracts energy from gulp output """
 
-    def extractValue(self, infile):
-        energydict = _gulp_parse.parseComponentsOfEnergy(infile)[
-            "componentsOfEnergyAtEnd"
-        ]
+    def extractValue(self, gulpOutput):
+        energydict = gulpOutput.componentsOfEnergy()["componentsOfEnergyAtEnd"]
         return energydict["totalLatticeEnergy"]
 
     @staticmethod
@@ -334,8 +334,8 @@ class _GulpEnergySubEvaluator(_GulpSubEvaluatorBase):
 class _GulpEnergyAtStartSubEvaluator(_GulpSubEvaluatorBase):
     """Extracts energy from gulp output """
 
-    def extractValue(self, infile):
-        gulpdict = _gulp_parse.parseComponentsOfEnergy(infile)
+    def extractValue(self, gulpOutput):
+        gulpdict = gulpOutput.componentsOfEnergy()
         energydict = gulpdict["componentsOfEnergyAtStart"]
         return energydict["totalLatticeEnergy"]
 
@@ -361,19 +361,11 @@ class _GulpOptimisationPenaltySubEvaluator(object):
         self._expect = 0.0
         self._name = key
 
-    def __call__(self, gulpEvaluator, job):
-        outputpath = os.path.join(
-            job.outputPath, gulpEvaluator.gulpOutputFilename
-        )
-        with open(outputpath) as infile:
-            _find(infile, "*  Output for configuration")
-            _find(infile, "  Start of bulk optimisation :")
-            line = _find(infile, "  **** ")
-
-            if line.strip() == "**** Optimisation achieved ****":
-                penalty = 0.0
-            else:
-                penalty = 1.0
+    def __call__(self, gulpOutput):
+        if gulpOutput.section("optimisationAchieved", self._achieved):
+            penalty = 0.0
+        else:
+            penalty = 1.0
         return EvaluatorRecord(
             "optimisation_penalty",
             0.0,
@@ -382,6 +374,14 @@ class _GulpOptimisationPenaltySubEvaluator(object):
             penalty * self._weight,
         )
 
+    @staticmethod
+    def _achieved(gulpOutput):
+        infile = iter(gulpOutput.lines)
+        _find(infile, "*  Output for configuration")
+        _find(infile, "  Start of bulk optimisation :")
+        line = _find(infile, "  **** ")
+        return line.strip() == "**** Optimisation achieved ****"
+
     @staticmethod
     def getAllowedFields():
         return ["optimisation_penalty"]
@@ -395,23 +395,11 @@ class _GulpNegativePhononPenaltySubEvaluator(object):
         self._expect = 0.0
         self._name = key
 
-    def __call__(self, gulpEvaluator, job):
-        outputpath = os.path.join(
-            job.outputPath, gulpEvaluator.gulpOutputFilename
-        )
-        with open(outputpath) as infile:
-            _find(infile, "*  Output for configuration")
-            _find(infile, "  Phonon Calculation :")
-            line = _find(
-                infile, "  Number of k points for this configuration ="
-            )
-            tokens = line.split("=")
-            numpoints = int(tokens[1].strip())
-            line = _find(infile, "  K point")
-            if self._anyNegative(numpoints, infile):
-                penalty = 1.0
-            else:
-                penalty = 0.0
+    def __call__(self, gulpOutput):
+        if gulpOutput.section("negativePhonons", self._negativePhonons):
+            penalty = 1.0
+        else:
+            penalty = 0.0
         return EvaluatorRecord(
             "negative_phonon_penalty",
             0.0,
@@ -420,7 +408,19 @@ class _GulpNegativePhononPenaltySubEvaluator(object):
             self._weight * penalty,
         )
 
-    def _anyNegative(self, numblocks, infile):
+    @classmethod
+    def _negativePhonons(cls, gulpOutput):
+        infile = iter(gulpOutput.lines)
+        _find(infile, "*  Output for configuration")
+        _find(infile, "  Phonon Calculation :")
+        line = _find(infile, "  Number of k points for this configuration =")
+        tokens = line.split("=")
+        numpoints = int(tokens[1].strip())
+        line = _find(infile, "  K point")
+        return cls._anyNegative(numpoints, infile)
+
+    @staticmethod
+    def _anyNegative(numblocks, infile):
         for i in range(numblocks):
             next(infile)
             next(infile)
@@ -455,11 +455,20 @@ class GulpEvaluator(object):
         self.gulpOutputFilename = gulpOutputFilename
         self._subEvaluators = self._createSubEvaluators(keyExpectPairs)
 
+    @property
+    def requiredOutputFiles(self):
+        """Glob patterns for the job output files read by this evaluator"""
+        return [glob.escape(self.gulpOutputFilename)]
+
     def _subevaluate(self, job):
+        # Output file is read and each of its sections parsed once, whatever the number of sub-evaluators.
+        gulpOutput = _gulp_parse.GulpOutput(
+            os.path.join(job.outputPath, self.gulpOutputFilename)
+        )
         subevalled = []
         for e in self._subEvaluators:
             try:
-                subval = e(self, job)
+                subval = e(gulpOutput)
             except Exception as exc:
                 subval = ErrorEvaluatorRecord(
                     e._name, e._expect, exc, e._weight
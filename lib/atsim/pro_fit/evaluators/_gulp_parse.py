@@ -1,5 +1,3 @@
-import io
-
 """Slices for use with columnSplitGenerator() that can split up matrix lines"""
 matrixSlices = [
     (float, slice(8, 20)),
@@ -35,9 +33,8 @@ class ParseException(Exception):
         return "ParseException:" + str(self.value)
 
 
-def chunkIterator(glpFile):
-    """Wraps a file object to produce and iterator that returns
-  (chunk_name, chunk_file) tuples.
+def chunkIndex(lines):
+    """Find the chunks a gulp output file is split into, without copying any lines.
 
   The gulp file is basically split into different sections delimited by lines
   of the form:
@@ -46,12 +43,18 @@ def chunkIterator(glpFile):
   *  Chunk_name     ...*
   ******************...*
 
-  the iterator splits the file to the sections between these delimiters.
-  Each chunk (chunk_file) fulfils the python file protocol."""
+  The first chunk (following the file header) has an empty name.
+
+  @param lines List of the lines of a gulp output file
+  @return List of (chunk_name, start, end) tuples where lines[start:end] are the chunk's lines"""
 
     # Skip the header  by getting to the fourth delimLine
+    numLines = len(lines)
+    i = 0
     inHeader = False
-    for line in glpFile:
+    while i < numLines:
+        line = lines[i]
+        i += 1
         if not inHeader and line[0] == "*":
             inHeader = True
         elif inHeader and line[0] != "*":
@@ -60,57 +63,63 @@ def chunkIterator(glpFile):
 
     delimLine = 80 * "*"
 
-    def makeChunk():
-        # Read to the
-        nextLine = None
-        chunkLines = []
-        for line in glpFile:
-            if line[:-1] == delimLine:
-                nextLine = next(glpFile)
+    index = []
+    chunkName = ""
+    while True:
+        start = i
+        headerLine = None
+        while i < numLines:
+            line = lines[i]
+            i += 1
+            if line[:-1] == delimLine and i < numLines:
+                nextLine = lines[i]
+                i += 1
                 if nextLine.startswith("*") and nextLine[:-1] != delimLine:
+                    headerLine = nextLine
                     break
-                else:
-                    chunkLines.append(line)
-                    chunkLines.append(nextLine)
-                    nextLine = None
-            else:
-                chunkLines.append(line)
-        return nextLine, io.StringIO("".join(chunkLines))
 
-    # Yield the first untitled chunk
-    headerLine, chunk = makeChunk()
-    yield ("", chunk)
+        if headerLine is None:
+            index.append((chunkName, start, i))
+            break
 
-    def readChunkHeader(line):
-        if not line:
-            return None
+        index.append((chunkName, start, i - 2))
+        chunkName = headerLine[3:-2]
+        if not chunkName:
+            break
 
-        if line[0] != "*":
+        if i >= numLines or lines[i][:-1] != delimLine:
             raise ParseException(
-                "Was expecting chunk header line instead got '%s'" % line[:-1]
+                "Was expecting delimiter line after chunk header '%s'"
+                % headerLine[:-1]
             )
+        i += 1
+    return index
 
-        chunkName = line[3:-2]
-        line = next(glpFile)[:-1]
-        assert line == delimLine
-        return chunkName
 
-    while True:
-        chunkName = readChunkHeader(headerLine)
-        if not chunkName:
-            break
+def chunkIterator(glpFile):
+    """Wraps a file object to produce and iterator that returns
+  (chunk_name, chunk_lines) tuples.
+
+  See chunkIndex() for how the file is split into chunks. Each chunk (chunk_lines)
+  is an iterator over the lines belonging to that chunk."""
+    lines = list(glpFile)
+    for chunkName, start, end in chunkIndex(lines):
+        yield (chunkName, iter(lines[start:end]))
 
-        headerLine, chunk = makeChunk()
-        yield (chunkName, chunk)
+
+def _firstOutputConfigurationChunkIndex(index):
+    for entry in index:
+        if entry[0].startswith("Output for configuration"):
+            return entry
+    return index[-1]
 
 
 def _getFirstOutputConfigurationChunk(glpFile):
-    chunkIt = chunkIterator(glpFile)
-    for chunkName, chunk in chunkIt:
-        if not chunkName.startswith("Output for configuration"):
-            continue
-        break
-    return chunk
+    lines = list(glpFile)
+    _chunkName, start, end = _firstOutputConfigurationChunkIndex(
+        chunkIndex(lines)
+    )
+    return iter(lines[start:end])
 
 
 def skip(fileObj, n):
@@ -212,7 +221,12 @@ def parseMechanicalProperties(glpFile):
 
   @param outputChunk Python file object
   @return Dictionary of the form described above"""
-    chunk = _getFirstOutputConfigurationChunk(glpFile)
+    return _parseMechanicalProperties(
+        _getFirstOutputConfigurationChunk(glpFile)
+    )
+
+
+def _parseMechanicalProperties(chunk):
     findStart = makeFindStart(" Mechanical properties :")
 
     basecoldefs = [
@@ -274,8 +288,12 @@ def parseFinalCellParametersAndDerivatives(glpFile):
 
     @param glpFile Python file object containing gulp output
     @return Dictionary of form described above"""
-    outputChunk = _getFirstOutputConfigurationChunk(glpFile)
+    return _parseFinalCellParametersAndDerivatives(
+        _getFirstOutputConfigurationChunk(glpFile)
+    )
+
 
+def _parseFinalCellParametersAndDerivatives(outputChunk):
     findStart = makeFindStart("  Final cell parameters and derivatives :")
 
     def extractFields(kA, kB, line):
@@ -374,7 +392,10 @@ def parseComponentsOfEnergy(glpFile):
 
   @param glpFile Python file object
   @return Dictionary of form described above"""
-    outputChunk = _getFirstOutputConfigurationChunk(glpFile)
+    return _parseComponentsOfEnergy(_getFirstOutputConfigurationChunk(glpFile))
+
+
+def _parseComponentsOfEnergy(outputChunk):
     outputDict = {}
 
     findStart = makeFindStart("  Components of energy :")
@@ -432,3 +453,95 @@ def parseComponentsOfEnergy(glpFile):
         if findStart(outputChunk):
             outputDict["componentsOfEnergyAtEnd"] = readEnergy()
     return outputDict
+
+
+class GulpOutput(object):
+    """Model of a gulp output file shared by everything extracting values from it.
+
+  The file is read once, its chunks are only indexed (see chunkIndex()) when first needed and
+  each section is parsed at most once, later requests for the same section return the memoised result
+  (or raise the exception raised when it was first parsed)."""
+
+    def __init__(self, filename):
+        """@param filename Path of gulp output file"""
+        self.filename = filename
+        self._lines = None
+        self._index = None
+        self._sections = {}
+
+    @property
+    def lines(self):
+        """List of the lines of the gulp output file"""
+        if self._lines is None:
+            with open(self.filename) as infile:
+                self._lines = infile.readlines()
+        return self._lines
+
+    @property
+    def chunks(self):
+        """List of (chunk_name, start, end) tuples as returned by chunkIndex()"""
+        if self._index is None:
+            self._index = chunkIndex(self.lines)
+        return self._index
+
+    def firstOutputConfigurationChunk(self):
+        """@return Iterator over the lines of the first 'Output for configuration' chunk"""
+        _chunkName, start, end = _firstOutputConfigurationChunkIndex(
+            self.chunks
+        )
+        return iter(self.lines[start:end])
+
+    def section(self, key, parser):
+        """Return memoised result of `parser(self)`.
+
+    @param key Key under which result is memoised
+    @param parser Callable accepting this object and returning parsed section
+    @return Value returned by `parser`"""
+        try:
+            isException, value = self._sections[key]
+        except KeyError:
+            try:
+                value = parser(self)
+                isException = False
+            except Exception as e:
+                value = e
+                isException = True
+            self._sections[key] = (isException, value)
+
+        if isException:
+            raise value
+        return value
+
+    def elasticConstantMatrix(self):
+        """@return 6x6 lists containing elastic constants (see parseElasticConstantMatrix())"""
+        return self.section(
+            "elasticConstantMatrix",
+            lambda o: parseElasticConstantMatrix(iter(o.lines)),
+        )
+
+    def mechanicalProperties(self):
+        """@return Dictionary as returned by parseMechanicalProperties()"""
+        return self.section(
+            "mechanicalProperties",
+            lambda o: _parseMechanicalProperties(
+                o.firstOutputConfigurationChunk()
+            ),
+        )
+
+    def finalCellParametersAndDerivatives(self):
+        """@return Dictionary as returned by parseFinalCellParametersAndDerivatives()"""
+        return self.section(
+            "finalCellParametersAndDerivatives",
+            lambda o: _parseFinalCellParametersAndDerivatives(
+                o.firstOutputConfigurationChunk()
+            ),
+        )
+
+    def componentsOfEnergy(self):
+        """@return Dictionary as returned by parseComponentsOfEnergy()"""
+        return self.section(
+            "componentsOfEnergy",
+            lambda o: _parseComponentsOfEnergy(
+                o.firstOutputConfigurationChunk()
+            ),
+        )
@@ -1,6 +1,8 @@
 import re
 import collections
+import glob
 import os
+import warnings
 
 import logging
 
@@ -37,39 +39,27 @@ class _RegexSubEvaluator(object):
 
     def __call__(self, job):
         outputfilename = os.path.join(job.outputPath, self._outputFilename)
+        return _RegexFileScan([self])(outputfilename)[0]
 
-        foundinstance = None
+    def _record(self, m, line):
+        _logger.debug(
+            "Found match using '%s' within line '%s'"
+            % (self._variableRegex.pattern, line)
+        )
         try:
-            with open(outputfilename, "r") as infile:
-                for line in infile:
-                    line = line[:-1]
-                    m = self._variableRegex.search(line)
-                    if m:
-                        _logger.debug(
-                            "Found match using '%s' within line '%s'"
-                            % (self._variableRegex.pattern, line)
-                        )
-                        if foundinstance == None:
-                            foundinstance = 0
-                        else:
-                            foundinstance += 1
-
-                        if foundinstance == self.fileInstance:
-                            v = m.groups()[self.groupNum]
-                            _logger.debug(
-                                "Converting value to float: '%s'" % v
-                            )
-                            v = float(v)
-                            return RMSEvaluatorRecord(
-                                self.name, self.expectedValue, v, self.weight
-                            )
-            raise RegexEvaluatorException(
-                "Regular expression did not match file contents or did not match sufficient times"
+            v = m.groups()[self.groupNum]
+            _logger.debug("Converting value to float: '%s'" % v)
+            v = float(v)
+            return RMSEvaluatorRecord(
+                self.name, self.expectedValue, v, self.weight
             )
         except Exception as e:
-            return ErrorEvaluatorRecord(
-                self.name, self.expectedValue, e, self.weight
-            )
+            return self._errorRecord(e)
+
+    def _errorRecord(self, e):
+        return ErrorEvaluatorRecord(
+            self.name, self.expectedValue, e, self.weight
+        )
 
     def _configure(self, configstring):
         tokens = configstring.split()
@@ -131,6 +121,84 @@ class _RegexSubEvaluator(object):
             raise ConfigException("Group number cannot be  <1")
 
 
+# Back-references refer to group numbers that change once patterns are combined.
+_backReferenceRegex = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class _RegexFileScan(object):
+    """Evaluates several `_RegexSubEvaluator` against the same file in a single pass.
+
+  Each line is first tested against the alternation of all the sub-evaluator patterns, only lines
+  it matches are given to the individual patterns. Reading stops as soon as the requested
+  `fileInstance` of every pattern has been found."""
+
+    def __init__(self, subevaluators):
+        """@param subevaluators List of `_RegexSubEvaluator` reading the same file"""
+        self._subevaluators = subevaluators
+        self._prefilter = self._createPrefilter(
+            [s._variableRegex.pattern for s in subevaluators]
+        )
+
+    @staticmethod
+    def _createPrefilter(patterns):
+        if len(patterns) < 2:
+            return None
+        if any(_backReferenceRegex.search(p) for p in patterns):
+            return None
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                return re.compile("|".join(["(?:%s)" % p for p in patterns]))
+        except (re.error, Warning):
+            # e.g. duplicate group names or global flags, patterns are then just applied to each line.
+            return None
+
+    def __call__(self, filename):
+        """Scan `filename`.
+
+    @param filename Path of file to be scanned
+    @return List containing EvaluatorRecord for each sub-evaluator (in the same order as the sub-evaluators)"""
+        subevaluators = self._subevaluators
+        records = [None] * len(subevaluators)
+        foundinstances = [-1] * len(subevaluators)
+        pending = list(range(len(subevaluators)))
+        prefilter = self._prefilter
+
+        try:
+            with open(filename, "r") as infile:
+                for line in infile:
+                    line = line[:-1]
+                    if prefilter is not None and not prefilter.search(line):
+                        continue
+
+                    stillpending = []
+                    for i in pending:
+                        subeval = subevaluators[i]
+                        m = subeval._variableRegex.search(line)
+                        if m:
+                            foundinstances[i] += 1
+                            if foundinstances[i] == subeval.fileInstance:
+                                records[i] = subeval._record(m, line)
+                                continue
+                        stillpending.append(i)
+
+                    pending = stillpending
+                    if not pending:
+                        break
+        except Exception as e:
+            for i in pending:
+                records[i] = subevaluators[i]._errorRecord(e)
+            return records
+
+        for i in pending:
+            records[i] = subevaluators[i]._errorRecord(
+                RegexEvaluatorException(
+                    "Regular expression did not match file contents or did not match sufficient times"
+                )
+            )
+        return records
+
+
 class RegexEvaluator(object):
     """Evaluator that searches through files and, based on regular expressions, returns EvaluatorRecords
   from matched values"""
@@ -142,12 +210,34 @@ class RegexEvaluator(object):
         self.evaluatorName = name
         self._subevalList = variables
 
+        # Sub-evaluators reading the same file share one scan of it.
+        byfilename = collections.OrderedDict()
+        for subeval in variables:
+            byfilename.setdefault(subeval._outputFilename, []).append(subeval)
+        self._scans = [
+            (filename, _RegexFileScan(subevals))
+            for (filename, subevals) in byfilename.items()
+        ]
+
+    @property
+    def requiredOutputFiles(self):
+        """Glob patterns for the job output files read by this evaluator"""
+        return sorted(
+            set(glob.escape(subeval._outputFilename) for subeval in self._subevalList)
+        )
+
     def __call__(self, job):
+        evaluated = {}
+        for filename, scan in self._scans:
+            records = scan(os.path.join(job.outputPath, filename))
+            for subeval, record in zip(scan._subevaluators, records):
+                evaluated[id(subeval)] = record
+
         output = []
         for subeval in self._subevalList:
-            evaluated = subeval(job)
-            evaluated.evaluatorName = self.evaluatorName
-            output.append(evaluated)
+            record = evaluated[id(subeval)]
+            record.evaluatorName = self.evaluatorName
+            output.append(record)
         return output
 
     @staticmethod
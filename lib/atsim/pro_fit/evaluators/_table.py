@@ -1,10 +1,16 @@
+import collections
+import collections.abc
 import csv
+import functools
+import glob
 import itertools
 import logging
 import math
 import os
+import re
 
 import cexprtk
+import numpy as np
 
 from atsim.pro_fit._util import SkipWhiteSpaceDictReader
 from atsim.pro_fit.exceptions import ConfigException
@@ -95,6 +101,39 @@ class TableEvaluator(object):
         self._weightColumn = weight_column
         self._expect_value = expect_value
 
+        # When row_compare can be evaluated with numpy, whole columns are compared at once.
+        self._vectorCompare = _VectorRowComparator.create(self._rowCompare)
+        self._expectArrays = None
+        if self._vectorCompare is not None:
+            self._expectArrays = self._createExpectArrays()
+
+    def _createExpectArrays(self):
+        """:return _ExpectArrays: expect table values needed by vectorised comparison or ``None``
+      if they can't all be converted to floats (rows are then compared one at a time)."""
+        try:
+            columns = {}
+            for var in self._rowCompare._expectVariables:
+                columns["e_" + var] = np.array(
+                    [float(row[var]) for row in self._expectedTable],
+                    dtype=float,
+                )
+            expect = np.array(
+                [self._getExpectValue(row) for row in self._expectedTable],
+                dtype=float,
+            )
+            weight = np.array(
+                [self._getRowWeight(i) for i in range(len(self._expectedTable))],
+                dtype=float,
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+        return _ExpectArrays(columns, expect, weight)
+
+    @property
+    def requiredOutputFiles(self):
+        """Glob patterns for the job output files read by this evaluator"""
+        return [glob.escape(self._resultsFilename)]
+
     def __call__(self, job):
         resultsFilename = os.path.join(job.outputPath, self._resultsFilename)
         self._logger.debug(
@@ -149,6 +188,11 @@ class TableEvaluator(object):
                 )
             ]
 
+        if self._expectArrays is not None and set(
+            self._rowCompare._resultsVariables
+        ).issubset(resultsTable.fieldnames):
+            return self._processRowsVectorised(resultsTable, job)
+
         rowRecords = []
         for rowid, (expectRow, resultsRow) in enumerate(
             itertools.zip_longest(self._expectedTable, resultsTable)
@@ -171,6 +215,69 @@ class TableEvaluator(object):
             rowRecords.append(rowrecord)
         return rowRecords
 
+    def _processRowsVectorised(self, resultsTable, job):
+        """Compare tables column-wise using numpy.
+
+    Rows that can't be handled this way (values that can't be converted to float, comparisons
+    that aren't finite or rows beyond the end of the shorter table) are passed through the same
+    row-by-row code as non-vectorised comparison, so give the same evaluator records.
+
+    :return _TableRowRecords: Array backed sequence of row evaluator records."""
+        fieldnames = resultsTable.fieldnames
+        resultsRows = [row for row in resultsTable.reader if row != []]
+
+        numExpect = len(self._expectedTable)
+        numRows = min(numExpect, len(resultsRows))
+        columnIndices = dict([(name, i) for (i, name) in enumerate(fieldnames)])
+
+        columns = {}
+        needsRowCompare = np.zeros(numRows, dtype=bool)
+        for var in self._rowCompare._resultsVariables:
+            j = columnIndices[var]
+            values, bad = _floatColumn(
+                [row[j] if j < len(row) else None for row in resultsRows[:numRows]]
+            )
+            columns["r_" + var] = values
+            needsRowCompare |= bad
+
+        for var, values in self._expectArrays.columns.items():
+            columns[var] = values[:numRows]
+
+        extracted = self._vectorCompare.compare(columns, numRows)
+        needsRowCompare |= ~np.isfinite(extracted)
+
+        records = {}
+        for rowid in np.flatnonzero(needsRowCompare):
+            rowid = int(rowid)
+            records[rowid] = self._compareRow(
+                rowid,
+                self._getRowLabel(rowid),
+                self._expectedTable[rowid],
+                _resultsRowDict(fieldnames, resultsRows[rowid]),
+                job,
+            )
+
+        # Rows without a partner in the other table.
+        for rowid in range(numRows, max(numExpect, len(resultsRows))):
+            expectRow = None
+            resultsRow = None
+            if rowid < numExpect:
+                expectRow = self._expectedTable[rowid]
+            if rowid < len(resultsRows):
+                resultsRow = _resultsRowDict(fieldnames, resultsRows[rowid])
+            records[rowid] = self._handleTableLengthErrors(
+                rowid, self._getRowLabel(rowid), expectRow, resultsRow, job
+            )
+
+        return _TableRowRecords(
+            self,
+            self._expectArrays.expect[:numRows],
+            extracted,
+            self._expectArrays.weight[:numRows],
+            records,
+            max(numExpect, len(resultsRows)),
+        )
+
     def _getRowLabel(self, rowidx):
         if self._labelColumn:
             return (
@@ -272,7 +379,11 @@ class TableEvaluator(object):
 
     def _makeReturnRecords(self, rowRecords, job):
         """Check for errors and either return ErrorEvaluatorRecord or sum of individual rows"""
-        retrows = list(rowRecords)
+        if isinstance(rowRecords, _TableRowRecords):
+            # Row records are only created for the rows that are returned.
+            retrows = rowRecords
+        else:
+            retrows = list(rowRecords)
 
         # If rowRecords has one entry and that is 'table_sum' then an error ocurred
         # before iteration over rows occurred in processRows(). Use the table_sum evaluator record
@@ -334,7 +445,10 @@ class TableEvaluator(object):
                 return errorRecord
 
         # Sum over the meritValues of the individual row evaluator records
-        meritValue = sum([r.meritValue for r in rowRecords])
+        if isinstance(rowRecords, _TableRowRecords):
+            meritValue = rowRecords.sumMeritValues()
+        else:
+            meritValue = sum([r.meritValue for r in rowRecords])
         overallRecord = EvaluatorRecord(
             "table_sum",
             0.0,  # Expected value
@@ -346,6 +460,8 @@ class TableEvaluator(object):
         return overallRecord
 
     def _getFirstErrorRecord(self, rowRecords):
+        if isinstance(rowRecords, _TableRowRecords):
+            return rowRecords.firstErrorRecord()
         for record in rowRecords:
             if record.errorFlag:
                 return record
@@ -797,3 +913,311 @@ class _RowComparator(object):
                 raise UnknownVariableException(self.expressionString, [varkey])
 
             self._expression.symbol_table.variables[varkey] = val
+
+
+_ExpectArrays = collections.namedtuple(
+    "_ExpectArrays", ["columns", "expect", "weight"]
+)
+
+
+def _floatColumn(values):
+    """Convert list of strings into array of floats.
+
+  :param list values: Strings (or ``None``) to be converted.
+  :return tuple: ``(array, bad)`` where ``bad`` is a boolean array flagging values that could not be
+    converted (these are ``nan`` in ``array``)."""
+    try:
+        return (
+            np.array([float(v) for v in values], dtype=float),
+            np.zeros(len(values), dtype=bool),
+        )
+    except (TypeError, ValueError):
+        pass
+
+    array = np.empty(len(values), dtype=float)
+    bad = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        try:
+            array[i] = float(v)
+        except (TypeError, ValueError):
+            array[i] = np.nan
+            bad[i] = True
+    return array, bad
+
+
+def _resultsRowDict(fieldnames, row):
+    """:return dict: ``row`` (list of values from ``csv.reader``) as it would have been returned by
+  ``SkipWhiteSpaceDictReader``"""
+    d = {}
+    for i, k in enumerate(fieldnames):
+        if i < len(row):
+            d[k] = row[i].strip()
+        else:
+            d[k] = None
+    if len(row) > len(fieldnames):
+        d[None] = row[len(fieldnames) :]
+    return d
+
+
+class _TableRowRecords(collections.abc.Sequence):
+    """Row evaluator records from vectorised table comparison.
+
+  Values are held in arrays and ``RMSEvaluatorRecord`` instances are only created for the
+  rows that are accessed. Rows that were compared individually are held as records."""
+
+    def __init__(self, evaluator, expect, extracted, weight, records, numRecords):
+        """:param TableEvaluator evaluator: Evaluator that made comparison.
+    :param numpy.ndarray expect: Expected value of each row.
+    :param numpy.ndarray extracted: Value of ``row_compare`` expression for each row.
+    :param numpy.ndarray weight: Weight of each row.
+    :param dict records: Map of row index to evaluator records for rows that were compared individually.
+    :param int numRecords: Total number of rows."""
+        self._evaluator = evaluator
+        self._expect = expect
+        self._extracted = extracted
+        self._weight = weight
+        self._records = records
+        self._numRecords = numRecords
+
+    def __len__(self):
+        return self._numRecords
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+
+        record = self._records.get(index, None)
+        if record is None:
+            record = RMSEvaluatorRecord(
+                self._evaluator._getRowLabel(index),
+                float(self._expect[index]),
+                float(self._extracted[index]),
+                weight=float(self._weight[index]),
+                evaluatorName=self._evaluator._name,
+            )
+        return record
+
+    def firstErrorRecord(self):
+        """:return ErrorEvaluatorRecord: Error record with lowest row index or ``None`` if there were no errors"""
+        for index in sorted(self._records):
+            if self._records[index].errorFlag:
+                return self._records[index]
+        return None
+
+    def sumMeritValues(self):
+        """:return float: Sum of the merit values of all rows (in row order)"""
+        with np.errstate(all="ignore"):
+            meritValues = (
+                np.sqrt((self._extracted - self._expect) ** 2.0) * self._weight
+            ).tolist()
+        for index, record in self._records.items():
+            if index < len(meritValues):
+                meritValues[index] = record.meritValue
+            else:
+                meritValues.append(record.meritValue)
+        return sum(meritValues)
+
+
+class _UnsupportedExpressionException(Exception):
+    """Raised for ``row_compare`` expressions that can't be evaluated by ``_VectorRowComparator``"""
+
+    pass
+
+
+class _VectorRowComparator(object):
+    """Evaluates ``row_compare`` expressions over whole table columns using numpy.
+
+  Only a subset of the cexprtk expression language is supported: numbers, ``r_`` and ``e_``
+  variables, the ``+ - * / % ^`` operators, parentheses, the ``pi`` constant and the functions
+  in ``_functions``. Use :meth:`create` which checks results agree with cexprtk and returns ``None``
+  for any other expression."""
+
+    _tokenRegex = re.compile(
+        r"\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|(?P<name>[A-Za-z_]\w*)|(?P<op>[-+*/%^(),]))"
+    )
+
+    _binaryOperators = {
+        "+": np.add,
+        "-": np.subtract,
+        "*": np.multiply,
+        "/": np.true_divide,
+        "%": np.fmod,
+        "^": np.power,
+    }
+
+    _functions = {
+        "abs": np.abs,
+        "sqrt": np.sqrt,
+        "exp": np.exp,
+        "log": np.log,
+        "log10": np.log10,
+        "sin": np.sin,
+        "cos": np.cos,
+        "tan": np.tan,
+        "min": lambda *args: functools.reduce(np.minimum, args),
+        "max": lambda *args: functools.reduce(np.maximum, args),
+    }
+
+    def __init__(self, expression, variables):
+        """:param str expression: row_compare expression
+    :param list variables: Names (including prefix) of the variables used in the expression.
+    :raises _UnsupportedExpressionException: if ``expression`` is not part of supported subset."""
+        self.expressionString = expression
+        self._variables = set(variables)
+        self._tokens = self._tokenize(expression)
+        self._pos = 0
+        self._evaluate = self._parseSum()
+        if self._peek() is not None:
+            raise _UnsupportedExpressionException(self._peek())
+        del self._tokens
+
+    @classmethod
+    def create(cls, rowComparator):
+        """Create ``_VectorRowComparator`` for the expression used by ``rowComparator``.
+
+    :param _RowComparator rowComparator: cexprtk based comparator.
+    :return _VectorRowComparator: Comparator or ``None`` if the expression can't be vectorised."""
+        variables = ["e_" + v for v in rowComparator._expectVariables]
+        variables.extend(["r_" + v for v in rowComparator._resultsVariables])
+        try:
+            comparator = cls(rowComparator.expressionString, variables)
+            if not comparator._agreesWith(rowComparator):
+                return None
+        except (_UnsupportedExpressionException, TypeError, ValueError):
+            return None
+        return comparator
+
+    def compare(self, columns, numRows):
+        """Evaluate expression for every row.
+
+    :param dict columns: Map of variable names (with ``r_`` or ``e_`` prefix) to arrays of values.
+    :param int numRows: Number of rows.
+    :return numpy.ndarray: Expression value for each row. Values may be ``inf`` or ``nan``."""
+        with np.errstate(all="ignore"):
+            values = self._evaluate(columns)
+        return np.zeros(numRows, dtype=float) + values
+
+    def _agreesWith(self, rowComparator, numSamples=8):
+        # Guards against differences between cexprtk and numpy semantics.
+        names = sorted(self._variables)
+        samples = np.random.RandomState(1).uniform(
+            0.5, 2.0, size=(numSamples, len(names))
+        )
+        columns = dict([(n, samples[:, i]) for (i, n) in enumerate(names)])
+        vectorValues = self.compare(columns, numSamples)
+
+        expression = rowComparator._expression
+        for row, vectorValue in zip(samples, vectorValues):
+            for n, v in zip(names, row):
+                expression.symbol_table.variables[n] = float(v)
+            v = expression.value()
+            if math.isnan(v) and math.isnan(vectorValue):
+                continue
+            if not (
+                v == vectorValue or math.isclose(v, vectorValue, rel_tol=1e-12)
+            ):
+                return False
+        return True
+
+    def _tokenize(self, expression):
+        tokens = []
+        pos = 0
+        expression = expression.rstrip()
+        while pos < len(expression):
+            m = self._tokenRegex.match(expression, pos)
+            if not m:
+                raise _UnsupportedExpressionException(expression[pos:])
+            tokens.append((m.lastgroup, m.group(m.lastgroup)))
+            pos = m.end()
+        return tokens
+
+    def _peek(self):
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise _UnsupportedExpressionException("unexpected end of expression")
+        self._pos += 1
+        return token
+
+    def _expect(self, op):
+        if self._next() != ("op", op):
+            raise _UnsupportedExpressionException("expecting '%s'" % op)
+
+    def _binary(self, op, lhs, rhs):
+        func = self._binaryOperators[op]
+        return lambda c: func(lhs(c), rhs(c))
+
+    def _parseSum(self):
+        lhs = self._parseProduct()
+        while self._peek() in (("op", "+"), ("op", "-")):
+            op = self._next()[1]
+            lhs = self._binary(op, lhs, self._parseProduct())
+        return lhs
+
+    def _parseProduct(self):
+        lhs = self._parseUnary()
+        while self._peek() in (("op", "*"), ("op", "/"), ("op", "%")):
+            op = self._next()[1]
+            lhs = self._binary(op, lhs, self._parseUnary())
+        return lhs
+
+    def _parseUnary(self):
+        # As for cexprtk, -a^b == -(a^b)
+        if self._peek() == ("op", "-"):
+            self._next()
+            operand = self._parseUnary()
+            return lambda c: np.negative(operand(c))
+        elif self._peek() == ("op", "+"):
+            self._next()
+            return self._parseUnary()
+        return self._parsePower()
+
+    def _parsePower(self):
+        base = self._parseAtom()
+        if self._peek() == ("op", "^"):
+            self._next()
+            # Right associative: a^b^c == a^(b^c)
+            return self._binary("^", base, self._parseUnary())
+        return base
+
+    def _parseAtom(self):
+        kind, value = self._next()
+        if kind == "number":
+            number = float(value)
+            return lambda c: number
+        elif kind == "name":
+            if self._peek() == ("op", "("):
+                return self._parseFunction(value)
+            elif value in self._variables:
+                return lambda c: c[value]
+            elif value == "pi":
+                return lambda c: math.pi
+            raise _UnsupportedExpressionException(value)
+        elif (kind, value) == ("op", "("):
+            inner = self._parseSum()
+            self._expect(")")
+            return inner
+        raise _UnsupportedExpressionException(value)
+
+    def _parseFunction(self, name):
+        try:
+            func = self._functions[name]
+        except KeyError:
+            raise _UnsupportedExpressionException(name)
+
+        self._expect("(")
+        args = [self._parseSum()]
+        while self._peek() == ("op", ","):
+            self._next()
+            args.append(self._parseSum())
+        self._expect(")")
+        return lambda c: func(*[a(c) for a in args])
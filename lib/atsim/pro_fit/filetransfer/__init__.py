@@ -1,5 +1,6 @@
 from ._download import DownloadChannel, DownloadChannels
 from ._download import DownloadDirectory, DownloadHandler
+from ._download import DownloadFilter
 from ._download import DirectoryDownloadException
 from ._download import DownloadCancelledException
 from atsim.pro_fit._channel import ChannelException
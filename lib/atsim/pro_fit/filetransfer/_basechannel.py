@@ -4,6 +4,52 @@ import logging
 import itertools
 
 from atsim.pro_fit._keepalive import KeepAlive
+from .remote_exec.file_transfer_remote_exec import available_codecs, load_codec
+
+# Files larger than this (in bytes) are transferred in chunks of this size.
+DEFAULT_CHUNK_SIZE = 1048576
+
+# Maximum number of chunks of a single file that may be in flight at any one time.
+DEFAULT_WINDOW = 4
+
+# Compression codecs offered to the remote when starting a channel, in order of preference.
+DEFAULT_COMPRESSION = ["zstd", "lz4", "zlib"]
+
+
+class CompressionStats(object):
+    """Records the effect of compression on file data sent or received through channels"""
+
+    def __init__(self):
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+        self.compressed_count = 0
+        self.uncompressed_count = 0
+
+    def record(self, raw_bytes, wire_bytes, compressed):
+        """Record transfer of `raw_bytes` of file data as `wire_bytes`.
+
+    Args:
+        raw_bytes (int): Size of file data.
+        wire_bytes (int): Size of data as sent through channel.
+        compressed (bool): True if data was compressed.
+    """
+        self.raw_bytes += raw_bytes
+        self.wire_bytes += wire_bytes
+        if compressed:
+            self.compressed_count += 1
+        else:
+            self.uncompressed_count += 1
+
+    @property
+    def bytes_saved(self):
+        return self.raw_bytes - self.wire_bytes
+
+    @property
+    def ratio(self):
+        """Ratio of file data size to size on the wire"""
+        if not self.wire_bytes:
+            return 1.0
+        return self.raw_bytes / float(self.wire_bytes)
 
 
 class BaseChannel(AbstractChannel):
@@ -19,6 +65,8 @@ class BaseChannel(AbstractChannel):
         channel_id=None,
         connection_timeout=60,
         keepAlive=10,
+        chunk_size=None,
+        compression=None,
     ):
         """Create an execnet channel (which is wrapped in this object) using the `_file_transfer_remote_exec` as its
     code.
@@ -30,11 +78,18 @@ class BaseChannel(AbstractChannel):
         channel_id (None, optional): Channel id - if not specified a uuid will be generated.
         connection_timeout (int, optional): Timeout in seconds after which connection will fail if 'READY' message not received.
         keepAlive (int, optional): Send a `KEEP_ALIVE` message to the server every `keepAlive` seconds. If `None` do not send `KEEP_ALIVE` messages.
+        chunk_size (int, optional): Request that files larger than `chunk_size` bytes are transferred in chunks. If `None` files are sent in a single message.
+        compression (list, optional): Names of compression codecs that may be used for file data, in order of preference.
+          Those available locally are offered to the remote, which selects the first it also supports. If `None` data is not compressed.
     """
         from .remote_exec import file_transfer_remote_exec
 
         self._startmsg = startmsg
         self._remote_path = remote_path
+        self._requested_chunk_size = chunk_size
+        self.chunk_size = None
+        self._requested_compression = compression
+        self.codec = None
         super(BaseChannel, self).__init__(
             execnet_gw,
             file_transfer_remote_exec,
@@ -51,15 +106,34 @@ class BaseChannel(AbstractChannel):
             self._keepAlive.start()
 
     def make_start_message(self):
-        return {
+        msg = {
             "msg": self._startmsg,
             "channel_id": self.channel_id,
             "remote_path": self.remote_path,
         }
+        if self._requested_chunk_size:
+            msg["chunk_size"] = self._requested_chunk_size
+        if self._requested_compression:
+            codecs = available_codecs(self._requested_compression)
+            if codecs:
+                msg["compression"] = codecs
+        return msg
 
     def ready(self, msg):
         self._channel_id = msg.get("channel_id", self.channel_id)
         self._remote_path = msg.get("remote_path", self.remote_path)
+        # Chunked transfer and compression are only used if the remote agreed to them.
+        self.chunk_size = msg.get("chunk_size", None)
+        compression = msg.get("compression", None)
+        if compression:
+            self.codec = load_codec(compression)
+
+    @property
+    def compression(self):
+        """Name of compression codec negotiated for this channel or None"""
+        if self.codec is None:
+            return None
+        return self.codec[0]
 
     @property
     def remote_path(self):
@@ -79,12 +153,13 @@ class BaseChannel(AbstractChannel):
 class ChannelFactory(object):
     """Factory class for use with MultiChannel"""
 
-    def __init__(self, channelClass, remotePath, keepAlive):
+    def __init__(self, channelClass, remotePath, keepAlive, **kwargs):
         self.remotePath = remotePath
         self.channelClass = channelClass
         self.keepAlive = keepAlive
+        self.kwargs = kwargs
 
     def createChannel(self, execnet_gw, channel_id):
         return self.channelClass(
-            execnet_gw, self.remotePath, channel_id, self.keepAlive
+            execnet_gw, self.remotePath, channel_id, self.keepAlive, **self.kwargs
         )
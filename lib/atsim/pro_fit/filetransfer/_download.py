@@ -1,5 +1,7 @@
 import collections
+import fnmatch
 import logging
+import posixpath
 import uuid
 import os
 
@@ -12,7 +14,10 @@ import itertools
 
 from atsim.pro_fit._channel import MultiChannel
 from ._basechannel import BaseChannel, ChannelFactory
+from ._basechannel import DEFAULT_CHUNK_SIZE, DEFAULT_WINDOW
+from ._basechannel import DEFAULT_COMPRESSION, CompressionStats
 from .remote_exec.file_transfer_remote_exec import FILE, DIR
+from .remote_exec.file_transfer_remote_exec import decompress_file_data
 from atsim.pro_fit._util import MultiCallback, NamedEvent
 
 _DirectoryRecord = collections.namedtuple(
@@ -28,13 +33,100 @@ class DownloadCancelledException(DirectoryDownloadException):
     pass
 
 
+class DownloadFilter(object):
+    """Selects the files and directories fetched by `DownloadDirectory`.
+
+  Patterns are `fnmatch` style globs matched against paths relative to the root of the download,
+  using '/' as separator. Note that `*` also matches '/'."""
+
+    def __init__(self, include=None, exclude=None):
+        """
+    Args:
+        include (list, optional): Only files matching one of these patterns are downloaded. If `None` all files are included.
+        exclude (list, optional): Files and directories matching any of these patterns are not downloaded.
+    """
+        self.include = None if include is None else list(include)
+        self.exclude = list(exclude or [])
+
+    def _excluded(self, rel_path):
+        return any(fnmatch.fnmatchcase(rel_path, p) for p in self.exclude)
+
+    def include_file(self, rel_path):
+        """Returns True if file at `rel_path` should be downloaded"""
+        if self._excluded(rel_path):
+            return False
+        if self.include is None:
+            return True
+        return any(fnmatch.fnmatchcase(rel_path, p) for p in self.include)
+
+    def include_directory(self, rel_path):
+        """Returns True if directory at `rel_path` should be created and listed.
+
+    Directories are pruned if they are excluded or no include pattern could match a path below them."""
+        if self._excluded(rel_path):
+            return False
+        if self.include is None:
+            return True
+        return any(_could_match_below(p, rel_path) for p in self.include)
+
+    def copytree_ignore(self, root):
+        """Returns callable, suitable for the `ignore` argument of `shutil.copytree()`, that applies this filter
+    to the directory tree at `root`"""
+
+        def ignore(dirpath, names):
+            rel_dir = os.path.relpath(dirpath, root)
+            ignored = []
+            for name in names:
+                rel_path = name if rel_dir == os.curdir else posixpath.join(
+                    rel_dir.replace(os.sep, "/"), name
+                )
+                if os.path.isdir(os.path.join(dirpath, name)):
+                    keep = self.include_directory(rel_path)
+                else:
+                    keep = self.include_file(rel_path)
+                if not keep:
+                    ignored.append(name)
+            return ignored
+
+        return ignore
+
+    def __repr__(self):
+        return "DownloadFilter(include=%r, exclude=%r)" % (
+            self.include,
+            self.exclude,
+        )
+
+
+def _could_match_below(pattern, rel_dir):
+    """Returns True if `pattern` could match a path within directory `rel_dir`"""
+    pattern_parts = pattern.split("/")
+    for i, dir_part in enumerate(rel_dir.split("/")):
+        if i >= len(pattern_parts) - 1:
+            # Only the final component of pattern remains, as `*` matches '/' it could still match deeper paths.
+            return "*" in pattern_parts[-1]
+        pattern_part = pattern_parts[i]
+        if "*" in pattern_part:
+            return True
+        if not fnmatch.fnmatchcase(dir_part, pattern_part):
+            return False
+    return True
+
+
 class DownloadChannel(BaseChannel):
 
     _logger = logging.getLogger(
         "atsim.pro_fit.runners._file_transfer_client.DownloadChannel"
     )
 
-    def __init__(self, execnet_gw, remote_path, channel_id=None, keepAlive=10):
+    def __init__(
+        self,
+        execnet_gw,
+        remote_path,
+        channel_id=None,
+        keepAlive=10,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ):
         """Create a channel object for use with `DownloadDirectory`
 
     Args:
@@ -42,6 +134,8 @@ class DownloadChannel(BaseChannel):
         remote_path (str): Path defining root of remote download tree.
         channel_id (None, optional): ID of this channel (auto generated if not specified)
         keepAlive (int, optional): Send a `KEEP_ALIVE` message to the server every `keepAlive` seconds. If `None` do not send `KEEP_ALIVE` messages.
+        chunk_size (int, optional): Files larger than `chunk_size` bytes are received in chunks of this size. If `None` files are sent in a single message.
+        compression (list, optional): Compression codecs, in order of preference, that may be negotiated with the remote. If `None` file data is sent uncompressed.
     """
         super(DownloadChannel, self).__init__(
             execnet_gw,
@@ -49,6 +143,8 @@ class DownloadChannel(BaseChannel):
             remote_path,
             channel_id,
             keepAlive,
+            chunk_size=chunk_size,
+            compression=compression,
         )
 
 
@@ -66,11 +162,23 @@ class DownloadChannels(MultiChannel):
         num_channels=1,
         channel_id=None,
         keepAlive=10,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        window=DEFAULT_WINDOW,
+        compression=DEFAULT_COMPRESSION,
     ):
-        factory = ChannelFactory(DownloadChannel, remote_path, keepAlive)
+        factory = ChannelFactory(
+            DownloadChannel,
+            remote_path,
+            keepAlive,
+            chunk_size=chunk_size,
+            compression=compression,
+        )
         super(DownloadChannels, self).__init__(
             execnet_gw, factory, num_channels, channel_id
         )
+        # Maximum number of outstanding DOWNLOAD_CHUNK requests for each file being downloaded.
+        self.window = window
+        self.compression_stats = CompressionStats()
 
 
 class DownloadHandler(object):
@@ -114,6 +222,29 @@ class DownloadHandler(object):
             outfile.write(filedata)
         os.chmod(local_path, mode)
 
+    def writechunk(self, msg):
+        """Write chunk of a file being downloaded in several messages. `msg['offset']` gives the
+    position of `msg['file_data']` within the file, the file is created when `offset` is zero.
+    File mode is set once the chunk with `msg['final']` set to `True` has been written."""
+        local_path = self.rewrite_file_path(msg)
+        offset = msg.get("offset", 0)
+        self._logger.debug(
+            "writing chunk at offset %d of file with path: '%s'",
+            offset,
+            local_path,
+        )
+        filedata = msg["file_data"]
+
+        if type(filedata) == str:
+            filedata = filedata.encode("ascii")
+
+        with open(local_path, "wb" if offset == 0 else "r+b") as outfile:
+            outfile.seek(offset)
+            outfile.write(filedata)
+
+        if msg.get("final", False):
+            os.chmod(local_path, msg["mode"])
+
     def rewrite_directory_path(self, msg):
         """Called by mkdir to translage msg['remote_path'] into a local filesystem path.
     In this implementation this calls self.rewrite_path()"""
@@ -167,7 +298,12 @@ class DownloadDirectory(object):
     )
 
     def __init__(
-        self, dlchannels, remote_path, dest_path, download_handler=None
+        self,
+        dlchannels,
+        remote_path,
+        dest_path,
+        download_handler=None,
+        download_filter=None,
     ):
         """Specify execnet channels and the source (remote) and destination (local)
     paths for the directory download.
@@ -176,9 +312,12 @@ class DownloadDirectory(object):
         dlchannels (DownloadChannel): DownloadChannel instance.
         remote_path (str): Path to directory to be copied (must be within the root path used when creating the execnet channels)
         dest_path (str): Path on local drive into which files will be copied.
+        download_handler (DownloadHandler, optional): Handler used to write files. If `None` a `DownloadHandler` is created.
+        download_filter (DownloadFilter, optional): Only files and directories selected by this filter are downloaded. If `None` the entire tree is downloaded.
     """
         self.remote_path = remote_path
         self.dest_path = dest_path
+        self.download_filter = download_filter
         self.transaction_id = str(uuid.uuid4())
 
         self.exception = None
@@ -266,6 +405,21 @@ class DownloadDirectory(object):
         return self._callback.cancel()
 
 
+class _ChunkedDownload(object):
+    """State of a file being received in chunks by `_DownloadCallback`"""
+
+    def __init__(self, remote_path, size):
+        self.remote_path = remote_path
+        self.size = size
+        # Chunk size is taken from the size of the first chunk sent by the remote.
+        self.chunk_size = None
+        # Offset of next chunk to be requested.
+        self.offset = 0
+        self.received = 0
+        self.in_flight = 0
+        self.compress = True
+
+
 class _DownloadCallback(object):
     _logger = DownloadDirectory._logger.getChild("DownloadCallback")
 
@@ -282,6 +436,9 @@ class _DownloadCallback(object):
         self.enabled = False
         self._exc = None
 
+        # Files being received in chunks, keyed by file id.
+        self._chunked_downloads = {}
+
     def _is_msg_relevant(self, msg):
         msgid = msg["id"]
 
@@ -363,6 +520,8 @@ class _DownloadCallback(object):
             self._process_list_dir_response(msg)
         elif mtype == "DOWNLOAD_FILE":
             self._process_download_file_response(msg)
+        elif mtype == "DOWNLOAD_CHUNK":
+            self._process_download_chunk_response(msg)
 
     def _error(self, msg):
         try:
@@ -433,16 +592,19 @@ class _DownloadCallback(object):
     def _transId(self, path):
         return (self.parent.transaction_id, path)
 
-    def _get_channel(self):
-        ch = next(self.channel_iter)
-        return ch
+    def _get_channel(self, mtype=None):
+        """Returns least loaded channel for a request of type `mtype` (see `MultiChannel.select()`)"""
+        select = getattr(self.channel_iter, "select", None)
+        if select is None:
+            return next(self.channel_iter)
+        return select(mtype)
 
     def _channel_send(self, msg, transid, **kwargs):
         log = self._logger.getChild("_channel_send")
         msgdict = dict(msg=msg, id=transid)
         msgdict.update(kwargs)
         log.debug("Sending request: '%s'", msgdict)
-        ch = self._get_channel()
+        ch = self._get_channel(msg)
         ch.send(msgdict)
 
     def _list_dir_request(self, transid, remotepath):
@@ -452,6 +614,22 @@ class _DownloadCallback(object):
         )
         self._channel_send("LIST", transid, remote_path=remotepath)
 
+    def _download_chunk_request(
+        self, transid, remotepath, offset, length, compress=True
+    ):
+        """Performs the DOWNLOAD_CHUNK request"""
+        kwargs = {}
+        if not compress:
+            kwargs["compress"] = False
+        self._channel_send(
+            "DOWNLOAD_CHUNK",
+            transid,
+            remote_path=remotepath,
+            offset=offset,
+            length=length,
+            **kwargs
+        )
+
     def _download_file_request(self, transid, remotepath):
         """Performs the DOWNLOAD_FILE request"""
         self._logger.getChild("_download_file_request").debug(
@@ -485,6 +663,7 @@ class _DownloadCallback(object):
         self._donext()
 
     def _skip_file(self, fileid):
+        self._chunked_downloads.pop(fileid, None)
         self.file_q_wait.discard(fileid)
         self._donext()
 
@@ -505,7 +684,12 @@ class _DownloadCallback(object):
 
         self.dir_q_wait.discard(transid)
 
+        download_filter = self.parent.download_filter
         for f in msg["files"]:
+            if download_filter is not None and not self._filter_allows(
+                download_filter, f
+            ):
+                continue
             if f["type"] is FILE:
                 self._register_file(transid, f["remote_path"])
             elif f["type"] is DIR:
@@ -513,6 +697,20 @@ class _DownloadCallback(object):
                 self._write_dir(f)
         self._donext()
 
+    def _filter_allows(self, download_filter, f):
+        rel_path = posixpath.relpath(f["remote_path"], self.parent.remote_path)
+        if f["type"] is DIR:
+            allowed = download_filter.include_directory(rel_path)
+        else:
+            allowed = download_filter.include_file(rel_path)
+        if not allowed:
+            self._logger.debug(
+                "Callback ID: '%s'. Skipping '%s', excluded by download filter.",
+                self.parent.transaction_id,
+                f["remote_path"],
+            )
+        return allowed
+
     def _process_download_file_response(self, msg):
         """Used by callback when DOWNLOAD_FILE is received"""
         transid = msg.get("id", None)
@@ -522,9 +720,94 @@ class _DownloadCallback(object):
                 transid,
             )
 
+        compressed = self._decompress(msg)
+
+        if msg.get("chunked", False):
+            # Only the first chunk has been sent, request the remainder.
+            download = _ChunkedDownload(msg["remote_path"], msg["size"])
+            # Don't ask remote to compress remaining chunks if first chunk was incompressible.
+            download.compress = compressed
+            self._chunked_downloads[transid] = download
+            self._write_chunk(msg, download)
+            self._request_chunks(transid, download)
+            return
+
         # Write the file to disc.
         self._write_file(msg)
+        self._file_complete(transid)
+
+    def _process_download_chunk_response(self, msg):
+        """Used by callback when DOWNLOAD_CHUNK is received"""
+        transid = msg.get("id", None)
+        download = self._chunked_downloads.get(transid, None)
+        if download is None:
+            raise DirectoryDownloadException(
+                "Unexpected 'DOWNLOAD_CHUNK' response received for '%s'",
+                transid,
+            )
+
+        download.in_flight -= 1
+        self._decompress(msg)
+        self._write_chunk(msg, download)
+        if download.received >= download.size:
+            self._chunked_downloads.pop(transid)
+            self._file_complete(transid)
+        elif download.offset >= download.size and download.in_flight == 0:
+            raise DirectoryDownloadException(
+                "File was truncated during download: '%s'"
+                % download.remote_path
+            )
+        else:
+            self._request_chunks(transid, download)
+
+    def _request_chunks(self, transid, download):
+        """Make DOWNLOAD_CHUNK requests for `download` until the window is full. As the size of each
+    request is limited, requests for other files are interleaved with those of large files"""
+        window = getattr(self.channel_iter, "window", DEFAULT_WINDOW)
+        while download.offset < download.size and download.in_flight < window:
+            length = min(download.chunk_size, download.size - download.offset)
+            self._download_chunk_request(
+                transid,
+                download.remote_path,
+                download.offset,
+                length,
+                download.compress,
+            )
+            download.offset += length
+            download.in_flight += 1
+
+    def _decompress(self, msg):
+        """Replace `msg['file_data']` with its decompressed form and record compression statistics.
+
+    Returns:
+        bool : True if file data had been compressed.
+    """
+        wire_bytes = len(msg["file_data"])
+        compressed = bool(msg.get("compressed", None))
+        if compressed:
+            msg["file_data"] = decompress_file_data(msg)
+            del msg["compressed"]
+
+        stats = getattr(self.channel_iter, "compression_stats", None)
+        if stats is not None:
+            stats.record(len(msg["file_data"]), wire_bytes, compressed)
+        return compressed
+
+    def _write_chunk(self, msg, download):
+        download.received += len(msg["file_data"])
+        if download.chunk_size is None:
+            download.chunk_size = len(msg["file_data"])
+            download.offset = download.chunk_size
+        msg["final"] = download.received >= download.size
+        log = self._logger.getChild("_write_chunk")
+        log.debug(
+            "writing chunk at offset %d for file: %s",
+            msg.get("offset", 0),
+            msg["remote_path"],
+        )
+        self.parent.download_handler.writechunk(msg)
 
+    def _file_complete(self, transid):
         # Remove the file from the outstanding files.
         self.file_q_wait.discard(transid)
 
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import os
 import uuid
@@ -9,7 +10,10 @@ import gevent.queue
 
 from atsim.pro_fit._channel import MultiChannel
 from ._basechannel import BaseChannel, ChannelFactory
+from ._basechannel import DEFAULT_CHUNK_SIZE, DEFAULT_WINDOW
+from ._basechannel import DEFAULT_COMPRESSION, CompressionStats
 from .remote_exec.file_transfer_remote_exec import FILE, DIR
+from .remote_exec.file_transfer_remote_exec import compress_file_data
 from atsim.pro_fit._util import MultiCallback, NamedEvent
 
 
@@ -31,7 +35,17 @@ class UploadChannel(BaseChannel):
         "atsim.pro_fit.runners._file_transfer_client.UploadChannel"
     )
 
-    def __init__(self, execnet_gw, remote_path, channel_id=None, keepAlive=10):
+    def __init__(
+        self,
+        execnet_gw,
+        remote_path,
+        channel_id=None,
+        keepAlive=10,
+        blob_store=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        compression=DEFAULT_COMPRESSION,
+        blob_store_max_size=None,
+    ):
         """Create a channel object for use with `DownloadDirectory`
 
     Args:
@@ -39,15 +53,38 @@ class UploadChannel(BaseChannel):
         remote_path (str): Path defining root of remote upload destination tree.
         channel_id (None, optional): ID of this channel (auto generated if not specified)
         keepAlive (int, optional): Send a `KEEP_ALIVE` message to the server every `keepAlive` seconds. If `None` do not send `KEEP_ALIVE` messages.
+        blob_store (None, optional): Remote directory (within `remote_path`) used to store uploaded file contents by digest. When given, files whose
+          content has already been uploaded are hard linked from the store rather than being sent again. If `None` deduplication is disabled.
+        chunk_size (int, optional): Files larger than `chunk_size` bytes are sent in chunks of this size. If `None` files are sent in a single message.
+        compression (list, optional): Compression codecs, in order of preference, that may be negotiated with the remote. If `None` file data is sent uncompressed.
+        blob_store_max_size (int, optional): Maximum total size, in bytes, of files kept in the blob store that are no longer used by any uploaded file. If `None` the remote's default is used.
     """
+        self._requested_blob_store = blob_store
+        self._blob_store_max_size = blob_store_max_size
+        self.blob_store = None
         super(UploadChannel, self).__init__(
             execnet_gw,
             "START_UPLOAD_CHANNEL",
             remote_path,
             channel_id,
             keepAlive,
+            chunk_size=chunk_size,
+            compression=compression,
         )
 
+    def make_start_message(self):
+        msg = super(UploadChannel, self).make_start_message()
+        if self._requested_blob_store:
+            msg["blob_store"] = self._requested_blob_store
+            if self._blob_store_max_size is not None:
+                msg["blob_store_max_size"] = self._blob_store_max_size
+        return msg
+
+    def ready(self, msg):
+        super(UploadChannel, self).ready(msg)
+        # Remote only returns blob_store if it was able to create it.
+        self.blob_store = msg.get("blob_store", None)
+
 
 class UploadChannels(MultiChannel):
     """MultiChannel instance for managing UploadChannel instances"""
@@ -63,11 +100,32 @@ class UploadChannels(MultiChannel):
         num_channels=1,
         channel_id=None,
         keepAlive=10,
+        blob_store=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        window=DEFAULT_WINDOW,
+        compression=DEFAULT_COMPRESSION,
+        blob_store_max_size=None,
     ):
-        factory = ChannelFactory(UploadChannel, remote_path, keepAlive)
+        factory = ChannelFactory(
+            UploadChannel,
+            remote_path,
+            keepAlive,
+            blob_store=blob_store,
+            chunk_size=chunk_size,
+            compression=compression,
+            blob_store_max_size=blob_store_max_size,
+        )
         super(UploadChannels, self).__init__(
             execnet_gw, factory, num_channels, channel_id
         )
+        # Maximum number of unacknowledged chunks for each file being uploaded.
+        self.window = window
+        self.compression_stats = CompressionStats()
+        # Maps digests of files sent through these channels to the remote path they were first
+        # uploaded to. Content is only offered to the remote by digest once it has been seen before,
+        # the remote then adds the earlier upload to its blob store. Files with unique content are
+        # sent directly and aren't added to the blob store.
+        self.digests_seen = {}
 
 
 class UploadHandler(object):
@@ -259,6 +317,43 @@ class UploadDirectory(object):
         return self._callback.cancel()
 
 
+def _file_digest(path):
+    """Returns sha256 hex digest of file at `path`, read in blocks to bound memory use"""
+    h = hashlib.sha256()
+    with open(path, "rb") as infile:
+        for block in iter(lambda: infile.read(DEFAULT_CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class _ChunkedUpload(object):
+    """State of a file being sent in chunks by `_UploadCallback`"""
+
+    def __init__(
+        self,
+        infile,
+        channel,
+        remote_path,
+        size,
+        chunk_size,
+        offset,
+        final_msg,
+        compress,
+    ):
+        self.infile = infile
+        self.channel = channel
+        self.remote_path = remote_path
+        self.size = size
+        self.chunk_size = chunk_size
+        self.offset = offset
+        # Fields added to the final UPLOAD_CHUNK request.
+        self.final_msg = final_msg
+        # Compression is only attempted for later chunks if the first chunk compressed well.
+        self.compress = compress
+        # The initial UPLOAD request is awaiting acknowledgement.
+        self.in_flight = 1
+
+
 class _UploadCallback(object):
     _logger = UploadDirectory._logger.getChild("_UploadCallback")
 
@@ -272,6 +367,12 @@ class _UploadCallback(object):
         self.enabled = False
         self._exc = None
 
+        # UPLOAD_DIGEST requests awaiting a reply, keyed by transaction id.
+        self._digest_requests = {}
+
+        # Files being sent in chunks, keyed by transaction id.
+        self._chunked_uploads = {}
+
     def _is_msg_relevant(self, msg):
         msgid = msg["id"]
 
@@ -332,7 +433,13 @@ class _UploadCallback(object):
                 return
 
             if mtype == "UPLOADED":
+                self._digest_requests.pop(msg["id"], None)
+                self._close_chunked_upload(msg["id"])
                 self._donext(msg)
+            elif mtype == "UPLOAD_CHUNK":
+                self._chunk_acknowledged(msg)
+            elif mtype == "BLOB_REQUIRED":
+                self._send_blob(msg)
             elif mtype == "MKDIR":
                 self._donext(msg)
             elif mtype == "MKDIRS":
@@ -414,6 +521,8 @@ class _UploadCallback(object):
             return
         self._finished = True
         self.enabled = False
+        for transid in list(self._chunked_uploads.keys()):
+            self._close_chunked_upload(transid)
         self._unregister_callback()
         self.parent.exception = self._exc
         self.event.set()
@@ -447,11 +556,13 @@ class _UploadCallback(object):
         files (list): List of the files in `root_path` that should be uploaded.
     """
         for f in files:
-            msgdict = self._makeupload_request(root_path, f)
+            ch = self._get_channel("UPLOAD")
+            msgdict = self._makeupload_request(root_path, f, ch)
             transid = msgdict["id"]
-            self._channel_send(msgdict)
             # Add the msg id to the upload wait set
             self._upload_wait.add(transid)
+            self._channel_send(msgdict, ch)
+            self._send_chunks(transid)
 
     def _makedirectory_request(self, root_path, directory):
         """Constructs MKDIR request to be sent through UploadChannel.
@@ -478,17 +589,27 @@ class _UploadCallback(object):
         msgdict = self.parent.upload_handler.mkdir(msgdict)
         return msgdict
 
-    def _makeupload_request(self, root_path, f):
+    def _makeupload_request(self, root_path, f, channel=None):
         """Constructs UPLOAD request to be sent through UploadChannel.
 
+    If `channel` has a blob store, files whose digest has already been seen by the UploadChannels
+    are offered using an UPLOAD_DIGEST request that does not contain the file data. This gives the
+    remote path of the earlier upload as `previous_path`, allowing the remote to add it to the blob
+    store without the content being sent again. The remote will reply with `BLOB_REQUIRED` if
+    it cannot obtain the content, see `_send_blob()`.
+
+    Files larger than the channel's negotiated `chunk_size` are sent in chunks, see
+    `_file_data_request()`.
+
     Message is rewritten by self.upload_handler.upload() to translate local paths to
     remote paths.
 
     Args:
         root_path (str): Path giving parent of directory.
         directory (str): File within `root_path` that should be uploaded
+        channel (UploadChannel): Channel through which request will be sent.
     Returns:
-        dict : Dictionary suitable for making an UploadChannel UPLOAD request.
+        dict : Dictionary suitable for making an UploadChannel UPLOAD or UPLOAD_DIGEST request.
     """
         local_path = os.path.join(root_path, f)
         transid = self._transid(local_path, FILE)
@@ -496,20 +617,165 @@ class _UploadCallback(object):
         # Get the file mode.
         mode = os.stat(local_path).st_mode
 
-        with open(local_path, "rb") as infile:
-            file_data = infile.read()
+        digest = None
+        digests_seen = getattr(self.channel_iter, "digests_seen", None)
+        if getattr(channel, "blob_store", None) and digests_seen is not None:
+            digest = _file_digest(local_path)
+            if digest in digests_seen:
+                msgdict = self._build_msg(
+                    "UPLOAD_DIGEST",
+                    transid,
+                    mode=mode,
+                    remote_path=local_path,
+                    digest=digest,
+                    previous_path=digests_seen[digest],
+                )
+                msgdict = self.parent.upload_handler.upload(msgdict)
+                self._digest_requests[transid] = (local_path, msgdict)
+                return msgdict
 
         msgdict = self._build_msg(
-            "UPLOAD",
-            transid,
-            mode=mode,
-            remote_path=local_path,
-            file_data=file_data,
+            "UPLOAD", transid, mode=mode, remote_path=local_path
         )
-
         msgdict = self.parent.upload_handler.upload(msgdict)
+        if digest is not None:
+            digests_seen[digest] = msgdict["remote_path"]
+        return self._file_data_request(local_path, msgdict, channel)
+
+    def _file_data_request(self, local_path, msgdict, channel):
+        """Add file contents to UPLOAD request `msgdict`.
+
+    If the file is larger than `channel.chunk_size` only the first chunk is added and the request
+    is marked `chunked`. The remaining chunks are sent through the same channel by `_send_chunks()`,
+    with at most `window` chunks awaiting acknowledgement at any time. This bounds the memory used
+    for large files and allows requests for other files to be interleaved with the chunks.
+
+    Args:
+        local_path (str): Path of file being uploaded.
+        msgdict (dict): UPLOAD request without 'file_data'.
+        channel (UploadChannel): Channel through which request will be sent.
+
+    Returns:
+        dict : UPLOAD request.
+    """
+        chunk_size = getattr(channel, "chunk_size", None)
+        size = os.stat(local_path).st_size
+
+        if not chunk_size or size <= chunk_size:
+            with open(local_path, "rb") as infile:
+                self._set_file_data(msgdict, infile.read(), channel)
+            return msgdict
+
+        infile = open(local_path, "rb")
+        file_data = infile.read(chunk_size)
+        compressed = self._set_file_data(msgdict, file_data, channel)
+        msgdict["chunked"] = True
+
+        final_msg = dict(
+            (k, msgdict[k]) for k in ["mode", "digest"] if k in msgdict
+        )
+
+        transid = msgdict["id"]
+        self._chunked_uploads[transid] = _ChunkedUpload(
+            infile,
+            channel,
+            msgdict["remote_path"],
+            size,
+            chunk_size,
+            len(file_data),
+            final_msg,
+            compressed,
+        )
         return msgdict
 
+    def _set_file_data(self, msgdict, file_data, channel, compress=True):
+        """Set `msgdict['file_data']`, compressing it if a codec was negotiated for `channel`.
+
+    Compression is skipped for data that does not compress well, see `compress_file_data()`.
+
+    Args:
+        msgdict (dict): Request to which file data should be added.
+        file_data (bytes): File data.
+        channel (UploadChannel): Channel through which `msgdict` will be sent.
+        compress (bool): If `False` compression is not attempted.
+
+    Returns:
+        bool : True if data was compressed.
+    """
+        codec = getattr(channel, "codec", None) if compress else None
+        wire_data, compressed = compress_file_data(codec, file_data)
+        msgdict["file_data"] = wire_data
+        if compressed:
+            msgdict["compressed"] = compressed
+
+        stats = getattr(self.channel_iter, "compression_stats", None)
+        if stats is not None:
+            stats.record(len(file_data), len(wire_data), bool(compressed))
+        return bool(compressed)
+
+    def _send_chunks(self, transid):
+        """Send UPLOAD_CHUNK requests for chunked upload until window is full or the file has been sent"""
+        upload = self._chunked_uploads.get(transid, None)
+        if upload is None:
+            return
+
+        window = getattr(self.channel_iter, "window", DEFAULT_WINDOW)
+        while upload.infile is not None and upload.in_flight < window:
+            offset = upload.offset
+            file_data = upload.infile.read(upload.chunk_size)
+            upload.offset += len(file_data)
+            final = not file_data or upload.offset >= upload.size
+
+            msgdict = self._build_msg(
+                "UPLOAD_CHUNK",
+                transid,
+                remote_path=upload.remote_path,
+                offset=offset,
+                final=final,
+            )
+            self._set_file_data(
+                msgdict, file_data, upload.channel, upload.compress
+            )
+
+            if final:
+                msgdict.update(upload.final_msg)
+                upload.infile.close()
+                upload.infile = None
+
+            upload.in_flight += 1
+            self._channel_send(msgdict, upload.channel)
+
+    def _chunk_acknowledged(self, msg):
+        transid = msg["id"]
+        upload = self._chunked_uploads.get(transid, None)
+        if upload is None:
+            self._error("Received 'UPLOAD_CHUNK' for unknown request: %s" % msg)
+        upload.in_flight -= 1
+        self._send_chunks(transid)
+
+    def _close_chunked_upload(self, transid):
+        upload = self._chunked_uploads.pop(transid, None)
+        if upload is not None and upload.infile is not None:
+            upload.infile.close()
+            upload.infile = None
+
+    def _send_blob(self, msg):
+        """Called when remote responds to UPLOAD_DIGEST with BLOB_REQUIRED, sends
+    an UPLOAD request containing the file's contents"""
+        transid = msg["id"]
+        try:
+            local_path, msgdict = self._digest_requests.pop(transid)
+        except KeyError:
+            self._error("Received 'BLOB_REQUIRED' for unknown request: %s" % msg)
+
+        ch = self._get_channel("UPLOAD")
+        msgdict = dict(msgdict)
+        msgdict["msg"] = "UPLOAD"
+        msgdict.pop("previous_path", None)
+        msgdict = self._file_data_request(local_path, msgdict, ch)
+        self._channel_send(msgdict, ch)
+        self._send_chunks(transid)
+
     def _transid(self, path, file_type):
         """Make a unique request id from the given file path and file_type (PATH or DIR).
 
@@ -547,14 +813,18 @@ class _UploadCallback(object):
         msgdict.update(kwargs)
         return msgdict
 
-    def _channel_send(self, msgdict):
+    def _channel_send(self, msgdict, ch=None):
         self._logger.debug("Sending request: '%s'", msgdict)
-        ch = self._get_channel()
+        if ch is None:
+            ch = self._get_channel(msgdict["msg"])
         ch.send(msgdict)
 
-    def _get_channel(self):
-        ch = next(self.channel_iter)
-        return ch
+    def _get_channel(self, mtype=None):
+        """Returns least loaded channel for a request of type `mtype` (see `MultiChannel.select()`)"""
+        select = getattr(self.channel_iter, "select", None)
+        if select is None:
+            return next(self.channel_iter)
+        return select(mtype)
 
     def _unregister_callback(self):
         cb = self.channel_iter.callback
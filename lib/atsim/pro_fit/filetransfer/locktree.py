@@ -11,10 +11,14 @@ def nullVisitor(node, state):
 
 
 class Node(object):
-    def __init__(self, path, islocked):
+    def __init__(self, path, islocked, parent=None):
         self.path = path
         self.children = {}
-        self.islocked = islocked
+        self.parent = parent
+        self.islocked = None
+        # Number of locked nodes in the sub-tree rooted at this node (including itself).
+        self.locked_count = 0
+        self.setlocked(islocked)
 
     def getChild(self, child):
         return self.children.get(child, None)
@@ -22,10 +26,39 @@ class Node(object):
     def addChild(self, child_path, lockstatus):
         if not self.getChild(child_path) is None:
             raise KeyError("Child already exists: '%s'" % child_path)
-        child = Node(child_path, lockstatus)
+        child = Node(child_path, None, self)
         self.children[child_path] = child
+        child.setlocked(lockstatus)
         return child
 
+    def setlocked(self, lockstatus):
+        """Set `islocked` and keep the `locked_count` of this node and its ancestors up to date.
+
+    Args:
+        lockstatus (bool): `True`, `False` or `None` for nodes that have not been registered.
+    """
+        delta = int(lockstatus == True) - int(self.islocked == True)
+        self.islocked = lockstatus
+        if delta:
+            self._propagate(delta)
+
+    def _propagate(self, delta):
+        node = self
+        while node is not None:
+            node.locked_count += delta
+            node = node.parent
+
+    def ancestors(self):
+        """Iterator returning this node followed by each of its ancestors up to the root node"""
+        node = self
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def path_components(self):
+        """Returns list of `path` for each node from the root node down to this node"""
+        return [node.path for node in self.ancestors()][::-1]
+
     def treeIterator(self, visitor=nullVisitor, state=None):
         state = visitor(self, state)
         yield (self, state)
@@ -71,12 +104,17 @@ class LockTree(object):
                 currnode = currnode.addChild(token, None)
             else:
                 currnode = child
-        currnode.islocked = True
+        currnode.setlocked(True)
 
     def remove(self, path):
         parent, child = os.path.split(path)
         node = self[parent]
-        del node.children[child]
+        self._remove_node(node.children[child])
+
+    def _remove_node(self, node):
+        if node.locked_count:
+            node.parent._propagate(-node.locked_count)
+        del node.parent.children[node.path]
 
     def _registered(self):
         VisitorState = collections.namedtuple(
@@ -119,12 +157,14 @@ class LockTree(object):
     def _locked_or_unlocked(self, teststate, include_root):
         for (node, path_components) in self._registered():
             if self.islocked_node(node) == teststate:
-                if not include_root:
-                    path_components = path_components[1:]
-                if not path_components:
-                    yield ""
-                else:
-                    yield os.path.join(*path_components)
+                yield self._joinpath(path_components, include_root)
+
+    def _joinpath(self, path_components, include_root):
+        if not include_root:
+            path_components = path_components[1:]
+        if not path_components:
+            return ""
+        return os.path.join(*path_components)
 
     def unlock_tree(self, path):
         """Unlock path and anything below it by setting nodes with `islocked` == `True`
@@ -132,16 +172,10 @@ class LockTree(object):
         startnode = self[path]
         for node, _state in startnode.treeIterator():
             if not node.islocked is None:
-                node.islocked = False
+                node.setlocked(False)
 
     def islocked_node(self, startnode):
-        def visitor(node, state):
-            return node.islocked
-
-        for _node, state in startnode.treeIterator(visitor, None):
-            if state == True:
-                return True
-        return False
+        return startnode.locked_count > 0
 
     def islocked(self, path):
         startnode = self[path]
@@ -150,9 +184,42 @@ class LockTree(object):
     def unlock(self, path):
         node = self[path]
         if not node.islocked is None:
-            node.islocked = False
+            node.setlocked(False)
         return node
 
+    def unlock_and_remove(self, path, include_root=False):
+        """Unlock `path` and, if nothing remains locked beneath it, remove the highest
+    registered ancestor whose sub-tree no longer contains any locked nodes.
+
+    Removing that single ancestor removes everything beneath it, so the returned path is the only
+    one that needs to be deleted. Only the nodes between `path` and the root are visited.
+
+    Args:
+        path (str): Path to unlock.
+        include_root (bool) : If True, returned path is joined with the tree's root-path, otherwise it is relative to the root.
+
+    Returns:
+        str: Path of removed sub-tree or `None` if nothing could be removed.
+    """
+        node = self.unlock(path)
+        highest = None
+        for ancestor in node.ancestors():
+            if ancestor.locked_count:
+                break
+            if ancestor.islocked is not None:
+                highest = ancestor
+
+        if highest is None:
+            return None
+
+        path_components = highest.path_components()
+        if highest.parent is None:
+            highest.children = {}
+            highest.setlocked(None)
+        else:
+            self._remove_node(highest)
+        return self._joinpath(path_components, include_root)
+
     def __getitem__(self, path):
         tokens = self._splitpath(path)
         currnode = self.rootnode
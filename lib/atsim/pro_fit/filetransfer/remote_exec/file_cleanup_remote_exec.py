@@ -49,15 +49,8 @@ class FileDeleter(object):
 
     def unlock(self, remote_path):
         """Unlock and delete everything beneath `remote_path`"""
-        self._locktree.unlock(remote_path)
-
-        unlocked = list(self._locktree.unlocked(include_root=True))
-        for p in unlocked:
-            try:
-                self._locktree.remove(p)
-            except KeyError:
-                pass
-            # TODO: Filter out paths that have common ancestors (i.e. only delete the parents)
+        p = self._locktree.unlock_and_remove(remote_path, include_root=True)
+        if p is not None:
             self._deletion_thread.put(p)
 
     def finish(self):
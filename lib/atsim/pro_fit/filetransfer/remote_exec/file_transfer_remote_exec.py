@@ -1,14 +1,288 @@
 import uuid
 import tempfile
+import hashlib
 import os
+import shutil
+import stat
 import traceback
 
 FILE = 1
 DIR = 2
 
+# Compression codecs that may be negotiated for a channel, in order of preference.
+COMPRESSION_PREFERENCE = ["zstd", "lz4", "zlib"]
+
+# file_data shorter than this is never compressed.
+COMPRESSION_MIN_SIZE = 512
+
+# Compressed data is only sent if it is smaller than this fraction of the original.
+COMPRESSION_MAX_RATIO = 0.9
+
+# Default limit, in bytes, on the total size of blob store files that are no longer linked into any job directory.
+BLOB_STORE_MAX_SIZE = 1024 ** 3
+
 # INCLUDE "_remote_exec_funcs.py.inc"
 
 
+def _zstd_codec():
+    import zstandard
+
+    return (
+        zstandard.ZstdCompressor().compress,
+        zstandard.ZstdDecompressor().decompress,
+    )
+
+
+def _lz4_codec():
+    import lz4.frame
+
+    return (lz4.frame.compress, lz4.frame.decompress)
+
+
+def _zlib_codec():
+    import zlib
+
+    return (lambda data: zlib.compress(data, 6), zlib.decompress)
+
+
+_COMPRESSION_CODECS = {
+    "zstd": _zstd_codec,
+    "lz4": _lz4_codec,
+    "zlib": _zlib_codec,
+}
+
+_codec_cache = {}
+
+
+def load_codec(name):
+    """Returns `(name, compress, decompress)` tuple for the named codec or None if it
+  is unknown or its module cannot be imported"""
+    if name in _codec_cache:
+        return _codec_cache[name]
+
+    factory = _COMPRESSION_CODECS.get(name, None)
+    codec = None
+    if factory is not None:
+        try:
+            compress, decompress = factory()
+            codec = (name, compress, decompress)
+        except ImportError:
+            pass
+    _codec_cache[name] = codec
+    return codec
+
+
+def available_codecs(names=None):
+    """Returns those codec names from `names` (default: `COMPRESSION_PREFERENCE`) that can be used on this host"""
+    if names is None:
+        names = COMPRESSION_PREFERENCE
+    return [name for name in names if load_codec(name)]
+
+
+def negotiate_compression(requested):
+    """Returns first codec from the `requested` list of names that is available, or None"""
+    if not requested:
+        return None
+    for name in requested:
+        codec = load_codec(name)
+        if codec:
+            return codec
+    return None
+
+
+def compress_file_data(codec, file_data):
+    """Compress `file_data` using `codec`.
+
+  Returns tuple `(data, codec_name)` where `codec_name` is None if compression was not applied,
+  either because `codec` is None, the data is small or compression would not reduce its size
+  sufficiently."""
+    if codec is None or len(file_data) < COMPRESSION_MIN_SIZE:
+        return file_data, None
+
+    name, compress, _decompress = codec
+    compressed = compress(file_data)
+    if len(compressed) > len(file_data) * COMPRESSION_MAX_RATIO:
+        return file_data, None
+    return compressed, name
+
+
+def decompress_file_data(msg):
+    """Returns `msg['file_data']`, decompressed using the codec named by `msg['compressed']` if present"""
+    file_data = msg.get("file_data", b"")
+    name = msg.get("compressed", None)
+    if not name:
+        return file_data
+
+    codec = load_codec(name)
+    if codec is None:
+        raise ValueError("file_data compressed with unavailable codec: '%s'" % name)
+    return codec[2](file_data)
+
+
+# ioctl request used to create copy-on-write clones of files (Linux FICLONE).
+_FICLONE = 0x40049409
+
+
+def _clone_file(src, dst):
+    """Copy `src` to `dst`, as a copy-on-write clone where the filesystem supports it.
+  Used where files cannot be hard linked (e.g. across filesystems)."""
+    with open(src, "rb") as infile, open(dst, "wb") as outfile:
+        try:
+            import fcntl
+
+            fcntl.ioctl(outfile.fileno(), _FICLONE, infile.fileno())
+            return
+        except (ImportError, OSError, IOError):
+            pass
+        shutil.copyfileobj(infile, outfile, 1048576)
+
+
+class BlobStore(object):
+    """Content addressed store of uploaded files, keyed on the sha256 digest of their
+  contents and their mode. Files are materialised from the store by hard link so
+  that content already present on the remote does not need to be sent again.
+
+  Write permission is removed from blobs (and therefore from the job files linked to them)
+  so that jobs cannot modify shared content in place. Jobs needing to change an input file
+  must replace it (e.g. write a new file and rename it over the original) which breaks the link.
+  Files are copied only where they cannot be hard linked.
+
+  Blobs that are no longer linked from any job directory (i.e. the directories of the jobs
+  that used them have been cleaned up) are kept so that they can be used by later jobs,
+  until their total size exceeds `max_size`. The oldest of these are then removed."""
+
+    _WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+    def __init__(self, path, max_size=BLOB_STORE_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        # Maps blob path to (st_size, st_mtime_ns) recorded when blob was known to be valid.
+        self._verified = {}
+
+    def blob_path(self, digest, mode):
+        return os.path.join(self.path, "%s-%o" % (digest, mode or 0))
+
+    @staticmethod
+    def digest_file(path):
+        h = hashlib.sha256()
+        with open(path, "rb") as infile:
+            for block in iter(lambda: infile.read(1048576), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def lookup(self, digest, mode):
+        """Returns path to blob or None if blob is not in the store.
+
+    Blobs whose size or modification time have changed since they were validated (e.g. if a
+    job has restored write permission and modified a linked file) are removed from the store
+    and None is returned."""
+        blob_path = self.blob_path(digest, mode)
+        try:
+            st = os.stat(blob_path)
+        except OSError:
+            return None
+
+        stkey = (st.st_size, st.st_mtime_ns)
+        verified = self._verified.get(blob_path, None)
+        if verified is None and self.digest_file(blob_path) == digest:
+            self._verified[blob_path] = stkey
+            return blob_path
+        elif verified == stkey:
+            return blob_path
+
+        self._verified.pop(blob_path, None)
+        try:
+            os.unlink(blob_path)
+        except OSError:
+            pass
+        return None
+
+    def add(self, path, digest, mode):
+        """Add file at `path` to the store, making it read-only"""
+        blob_path = self.blob_path(digest, mode)
+        if os.path.exists(blob_path):
+            return False
+
+        try:
+            os.link(path, blob_path)
+        except OSError:
+            if os.path.exists(blob_path):
+                return False
+            # Filesystem doesn't support hard links, copy to temporary file first so that
+            # incomplete blobs are never visible in the store.
+            fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".tmp")
+            os.close(fd)
+            try:
+                _clone_file(path, tmp_path)
+                os.rename(tmp_path, blob_path)
+            except (OSError, IOError):
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                return False
+
+        st = os.stat(blob_path)
+        os.chmod(blob_path, stat.S_IMODE(mode or st.st_mode) & ~self._WRITE_BITS)
+        self._verified[blob_path] = (st.st_size, st.st_mtime_ns)
+        self.evict()
+        return True
+
+    def add_previous(self, previous_path, digest, mode):
+        """Add file at `previous_path`, written by an earlier upload, to the store if it
+    still has the given `digest` and `mode`. Returns path to blob or None if this isn't possible."""
+        try:
+            st = os.stat(previous_path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        if mode and stat.S_IMODE(st.st_mode) != stat.S_IMODE(mode):
+            return None
+        if self.digest_file(previous_path) != digest:
+            return None
+        self.add(previous_path, digest, mode)
+        return self.lookup(digest, mode)
+
+    def evict(self):
+        """Remove the oldest blobs not linked into any job directory until their total size is within `max_size`"""
+        unlinked = []
+        total = 0
+        for entry in os.listdir(self.path):
+            if entry.startswith(".tmp"):
+                continue
+            blob_path = os.path.join(self.path, entry)
+            try:
+                st = os.stat(blob_path)
+            except OSError:
+                continue
+            if st.st_nlink == 1:
+                unlinked.append((st.st_mtime_ns, blob_path, st.st_size))
+                total += st.st_size
+
+        unlinked.sort()
+        for _mtime, blob_path, size in unlinked:
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(blob_path)
+            except OSError:
+                continue
+            self._verified.pop(blob_path, None)
+            total -= size
+
+    def materialise(self, blob_path, dest_path, mode):
+        """Create file at `dest_path` from blob"""
+        if os.path.lexists(dest_path):
+            os.unlink(dest_path)
+        try:
+            os.link(blob_path, dest_path)
+        except OSError:
+            _clone_file(blob_path, dest_path)
+            if mode:
+                os.chmod(dest_path, mode)
+
+
 def mktempdir(channel, channel_id):
     try:
         tmpdir = tempfile.mkdtemp()
@@ -81,7 +355,7 @@ def chkpath(channel, channel_id, remote_path):
     return True, remote_path
 
 
-def upload(channel, channel_id, remote_root, msg):
+def upload(channel, channel_id, remote_root, msg, blob_store=None):
     if "id" not in msg:
         error( # pylint: disable=undefined-variable
             channel,
@@ -92,9 +366,11 @@ def upload(channel, channel_id, remote_root, msg):
         )
         return False
 
-    file_data = msg.get("file_data", b"")
     mode = msg.get("mode", None)
     fileid = msg["id"]
+    # If chunked is True, file_data is the first chunk of the file and the remainder will
+    # follow in UPLOAD_CHUNK messages.
+    chunked = msg.get("chunked", False)
     rp = child_path(channel, channel_id, remote_root, msg) # pylint: disable=undefined-variable
 
     if rp is None:
@@ -108,6 +384,12 @@ def upload(channel, channel_id, remote_root, msg):
         if not os.path.exists(dname):
             os.makedirs(dname)
 
+        file_data = decompress_file_data(msg)
+
+        # Don't write through hard links into the blob store.
+        if os.path.isfile(remote_path) and os.stat(remote_path).st_nlink > 1:
+            os.unlink(remote_path)
+
         with open(remote_path, "wb") as outfile:
             outfile.write(file_data)
     except Exception as e:
@@ -123,20 +405,207 @@ def upload(channel, channel_id, remote_root, msg):
         )
         return False
 
+    if chunked:
+        chunk_received(channel, channel_id, fileid, remote_path, len(file_data))
+        return True
+
     if mode:
         os.chmod(remote_path, mode)
 
+    digest = msg.get("digest", None)
+    if blob_store and digest:
+        if hashlib.sha256(file_data).hexdigest() == digest:
+            blob_store.add(remote_path, digest, mode)
+
+    uploaded(channel, channel_id, fileid, remote_path)
+    return True
+
+
+def uploaded(channel, channel_id, fileid, remote_path):
     uploaded_msg = dict(
         msg="UPLOADED",
         channel_id=channel_id,
         id=fileid,
         remote_path=remote_path,
     )
-
     channel.send(uploaded_msg)
+
+
+def chunk_received(channel, channel_id, fileid, remote_path, offset):
+    """Acknowledge receipt of file data up to `offset`, allowing client to send the next chunk"""
+    channel.send(
+        dict(
+            msg="UPLOAD_CHUNK",
+            channel_id=channel_id,
+            id=fileid,
+            remote_path=remote_path,
+            offset=offset,
+        )
+    )
+
+
+def upload_chunk(channel, channel_id, remote_root, msg, blob_store=None):
+    """Write chunk of file started with an UPLOAD message with `chunked=True`.
+
+  Chunks are written at their `offset`. Once the chunk with `final=True` has been written
+  the file's mode is set and UPLOADED is sent, otherwise an UPLOAD_CHUNK acknowledgement is returned."""
+    for k in ["id", "offset"]:
+        if k not in msg:
+            error( # pylint: disable=undefined-variable
+                channel,
+                channel_id,
+                "UPLOAD_CHUNK message does not contain '%s' argument" % k,
+                ("MSGERROR", "KEYERROR"),
+                key=k,
+            )
+            return False
+
+    fileid = msg["id"]
+    offset = msg["offset"]
+    rp = child_path(channel, channel_id, remote_root, msg) # pylint: disable=undefined-variable
+
+    if rp is None:
+        return
+
+    remote_path = rp
+
+    try:
+        file_data = decompress_file_data(msg)
+        with open(remote_path, "r+b") as outfile:
+            outfile.seek(offset)
+            outfile.write(file_data)
+    except Exception as e:
+        error( # pylint: disable=undefined-variable
+            channel,
+            channel_id,
+            "Error writing file: '%s'" % str(e),
+            ("IOERROR", "WRITE"),
+            remote_path=remote_path,
+            id=fileid,
+            remote_root=remote_root,
+        )
+        return False
+
+    if not msg.get("final", False):
+        chunk_received(
+            channel, channel_id, fileid, remote_path, offset + len(file_data)
+        )
+        return True
+
+    mode = msg.get("mode", None)
+    if mode:
+        os.chmod(remote_path, mode)
+
+    digest = msg.get("digest", None)
+    if blob_store and digest:
+        if blob_store.digest_file(remote_path) == digest:
+            blob_store.add(remote_path, digest, mode)
+
+    uploaded(channel, channel_id, fileid, remote_path)
+    return True
+
+
+def upload_digest(channel, channel_id, remote_root, msg, blob_store):
+    for k in ["id", "digest"]:
+        if k not in msg:
+            error( # pylint: disable=undefined-variable
+                channel,
+                channel_id,
+                "UPLOAD_DIGEST message does not contain '%s' argument" % k,
+                ("MSGERROR", "KEYERROR"),
+                key=k,
+            )
+            return False
+
+    fileid = msg["id"]
+    if blob_store is None:
+        error( # pylint: disable=undefined-variable
+            channel,
+            channel_id,
+            "UPLOAD_DIGEST message received but channel has no blob store",
+            ("MSGERROR", "NO_BLOB_STORE"),
+            id=fileid,
+        )
+        return False
+
+    mode = msg.get("mode", None)
+    digest = msg["digest"]
+    rp = child_path(channel, channel_id, remote_root, msg) # pylint: disable=undefined-variable
+
+    if rp is None:
+        return
+
+    remote_path = rp
+    blob_path = blob_store.lookup(digest, mode)
+
+    # Content is only added to the store once it has been uploaded twice, the first copy
+    # is then taken from the path it was uploaded to.
+    previous_path = msg.get("previous_path", None)
+    if blob_path is None and previous_path:
+        previous_path = normalize_path(remote_root, previous_path) # pylint: disable=undefined-variable
+        if previous_path is not None and previous_path != remote_path:
+            blob_path = blob_store.add_previous(previous_path, digest, mode)
+
+    if blob_path is None:
+        channel.send(
+            dict(
+                msg="BLOB_REQUIRED",
+                channel_id=channel_id,
+                id=fileid,
+                remote_path=remote_path,
+                digest=digest,
+            )
+        )
+        return True
+
+    try:
+        dname = os.path.dirname(remote_path)
+        if not os.path.exists(dname):
+            os.makedirs(dname)
+        blob_store.materialise(blob_path, remote_path, mode)
+    except Exception as e:
+        error( # pylint: disable=undefined-variable
+            channel,
+            channel_id,
+            "Error writing file: '%s'" % str(e),
+            ("IOERROR", "WRITE"),
+            remote_path=remote_path,
+            id=fileid,
+            remote_root=remote_root,
+        )
+        return False
+
+    channel.send(
+        dict(
+            msg="UPLOADED",
+            channel_id=channel_id,
+            id=fileid,
+            remote_path=remote_path,
+            deduplicated=True,
+        )
+    )
     return True
 
 
+def make_blob_store(remote_root, blob_store_path, max_size=None):
+    """Create BlobStore for `blob_store_path` or return None if this isn't possible"""
+    if not blob_store_path:
+        return None
+
+    path = normalize_path(remote_root, blob_store_path) # pylint: disable=undefined-variable
+    if path is None:
+        return None
+
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+    except OSError:
+        return None
+    if max_size is None:
+        max_size = BLOB_STORE_MAX_SIZE
+    return BlobStore(path, max_size)
+
+
 def mkdir(channel, channel_id, remote_root, msg):
     if "id" not in msg:
         error( # pylint: disable=undefined-variable
@@ -291,7 +760,9 @@ def list_dir(channel, channel_id, remote_root, msg):
     channel.send(retmsg)
 
 
-def download_file(channel, channel_id, remote_root, msg):
+def download_file(
+    channel, channel_id, remote_root, msg, chunk_size=None, codec=None
+):
     # Extract required arguments
     path = msg.get("remote_path", None)
     if path is None:
@@ -352,8 +823,13 @@ def download_file(channel, channel_id, remote_root, msg):
         return
 
     try:
+        st = os.stat(path)
         with open(path, "rb") as infile:
-            filecontents = infile.read()
+            if chunk_size and st.st_size > chunk_size:
+                # Only send the first chunk, client requests the rest with DOWNLOAD_CHUNK.
+                filecontents = infile.read(chunk_size)
+            else:
+                filecontents = infile.read()
     except IOError as e:
         error( # pylint: disable=undefined-variable
             channel,
@@ -366,19 +842,110 @@ def download_file(channel, channel_id, remote_root, msg):
         )
         return
 
-    mode = os.stat(path).st_mode
+    chunked = len(filecontents) < st.st_size
+    if not msg.get("compress", True):
+        codec = None
+    filecontents, compressed = compress_file_data(codec, filecontents)
+
     retmsg = dict(
         msg="DOWNLOAD_FILE",
         id=fileid,
         channel_id=channel_id,
         remote_path=path,
         file_data=filecontents,
-        mode=mode,
+        mode=st.st_mode,
     )
+
+    if chunked:
+        retmsg["chunked"] = True
+        retmsg["size"] = st.st_size
+
+    if compressed:
+        retmsg["compressed"] = compressed
     channel.send(retmsg)
 
 
-def upload_remote_exec(channel, channel_id, remote_path):
+def download_chunk(
+    channel, channel_id, remote_root, msg, chunk_size=None, codec=None
+):
+    """Send `length` bytes (limited to `chunk_size`) from `offset` of file started by a chunked DOWNLOAD_FILE response"""
+    for k in ["id", "remote_path", "offset"]:
+        if k not in msg:
+            error( # pylint: disable=undefined-variable
+                channel,
+                channel_id,
+                "Could not find '%s' argument in 'DOWNLOAD_CHUNK' request'" % k,
+                ("MSGERROR", "KEYERROR"),
+                key=k,
+            )
+            return
+
+    fileid = msg["id"]
+    offset = msg["offset"]
+    length = msg.get("length", chunk_size)
+    if chunk_size:
+        length = min(length or chunk_size, chunk_size)
+
+    path = child_path(channel, channel_id, remote_root, msg) # pylint: disable=undefined-variable
+    if path is None:
+        return
+
+    try:
+        st = os.stat(path)
+        with open(path, "rb") as infile:
+            infile.seek(offset)
+            filecontents = infile.read(length)
+    except (IOError, OSError) as e:
+        error( # pylint: disable=undefined-variable
+            channel,
+            channel_id,
+            "permission denied",
+            ("IOERROR", "FILEOPEN"),
+            id=fileid,
+            exc_msg=str(e),
+            remote_path=path,
+        )
+        return
+
+    if not msg.get("compress", True):
+        codec = None
+    filecontents, compressed = compress_file_data(codec, filecontents)
+
+    retmsg = dict(
+        msg="DOWNLOAD_CHUNK",
+        id=fileid,
+        channel_id=channel_id,
+        remote_path=path,
+        file_data=filecontents,
+        offset=offset,
+        mode=st.st_mode,
+    )
+
+    if compressed:
+        retmsg["compressed"] = compressed
+    channel.send(retmsg)
+
+
+def chunk_size_option(chunk_size):
+    """Validate chunk_size requested by client, returns None if chunked transfer should not be used"""
+    try:
+        chunk_size = int(chunk_size)
+    except (TypeError, ValueError):
+        return None
+    if chunk_size <= 0:
+        return None
+    return chunk_size
+
+
+def upload_remote_exec(
+    channel,
+    channel_id,
+    remote_path,
+    blob_store_path=None,
+    chunk_size=None,
+    compression=None,
+    blob_store_max_size=None,
+):
     if remote_path is None:
         remote_path = mktempdir(channel, channel_id)
         if not remote_path:
@@ -392,7 +959,20 @@ def upload_remote_exec(channel, channel_id, remote_path):
     if not rc:
         return
 
-    ready(channel, channel_id, remote_path) # pylint: disable=undefined-variable
+    ready_args = {}
+    blob_store = make_blob_store(remote_path, blob_store_path, blob_store_max_size)
+    if blob_store is not None:
+        ready_args["blob_store"] = blob_store.path
+
+    chunk_size = chunk_size_option(chunk_size)
+    if chunk_size:
+        ready_args["chunk_size"] = chunk_size
+
+    codec = negotiate_compression(compression)
+    if codec:
+        ready_args["compression"] = codec[0]
+
+    ready(channel, channel_id, remote_path, **ready_args) # pylint: disable=undefined-variable
 
     for msg in channel:
         if msg is None:
@@ -404,7 +984,11 @@ def upload_remote_exec(channel, channel_id, remote_path):
                 continue
 
             if mtype == "UPLOAD":
-                upload(channel, channel_id, remote_path, msg)
+                upload(channel, channel_id, remote_path, msg, blob_store)
+            elif mtype == "UPLOAD_CHUNK":
+                upload_chunk(channel, channel_id, remote_path, msg, blob_store)
+            elif mtype == "UPLOAD_DIGEST":
+                upload_digest(channel, channel_id, remote_path, msg, blob_store)
             elif mtype == "MKDIR":
                 mkdir(channel, channel_id, remote_path, msg)
             elif mtype == "MKDIRS":
@@ -429,7 +1013,9 @@ def upload_remote_exec(channel, channel_id, remote_path):
             )
 
 
-def download_remote_exec(channel, channel_id, remote_path):
+def download_remote_exec(
+    channel, channel_id, remote_path, chunk_size=None, compression=None
+):
     if remote_path is None:
         error( # pylint: disable=undefined-variable
             channel,
@@ -449,7 +1035,16 @@ def download_remote_exec(channel, channel_id, remote_path):
         )
         return
 
-    ready(channel, channel_id, remote_path) # pylint: disable=undefined-variable
+    ready_args = {}
+    chunk_size = chunk_size_option(chunk_size)
+    if chunk_size:
+        ready_args["chunk_size"] = chunk_size
+
+    codec = negotiate_compression(compression)
+    if codec:
+        ready_args["compression"] = codec[0]
+
+    ready(channel, channel_id, remote_path, **ready_args) # pylint: disable=undefined-variable
 
     for msg in channel:
         if msg is None:
@@ -462,7 +1057,13 @@ def download_remote_exec(channel, channel_id, remote_path):
             if mtype == "LIST":
                 list_dir(channel, channel_id, remote_path, msg)
             elif mtype == "DOWNLOAD_FILE":
-                download_file(channel, channel_id, remote_path, msg)
+                download_file(
+                    channel, channel_id, remote_path, msg, chunk_size, codec
+                )
+            elif mtype == "DOWNLOAD_CHUNK":
+                download_chunk(
+                    channel, channel_id, remote_path, msg, chunk_size, codec
+                )
             elif mtype == "KEEP_ALIVE":
                 keepalive(channel, channel_id, msg)
             else:
@@ -505,7 +1106,24 @@ def start_channel(channel):
     channel_id = msg.get("channel_id", str(uuid.uuid4()))
     remote_path = msg.get("remote_path", None)
 
-    channeltypes[mtype](channel, channel_id, remote_path)
+    if mtype == "START_UPLOAD_CHANNEL":
+        upload_remote_exec(
+            channel,
+            channel_id,
+            remote_path,
+            msg.get("blob_store", None),
+            msg.get("chunk_size", None),
+            msg.get("compression", None),
+            msg.get("blob_store_max_size", None),
+        )
+    else:
+        channeltypes[mtype](
+            channel,
+            channel_id,
+            remote_path,
+            msg.get("chunk_size", None),
+            msg.get("compression", None),
+        )
 
 
 if __name__ == "__channelexec__":
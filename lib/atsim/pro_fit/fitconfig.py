@@ -1,4 +1,5 @@
 import configparser
+import hashlib
 import logging
 import math
 import os
@@ -8,10 +9,11 @@ from typing import List, Optional
 import cexprtk
 import gevent
 from atsim.pro_fit import jobfactories
-from atsim.pro_fit.cfg import float_convert
+from atsim.pro_fit.cfg import choice_convert, float_convert, int_convert
 from atsim.pro_fit.exceptions import (ConfigException,
                                       MultipleSectionConfigException)
-from atsim.pro_fit.merit import Merit, Replace_Merit_After_Evaluation_Callback
+from atsim.pro_fit.merit import (Merit, MeritCache, PipelinedMerit,
+                                 Replace_Merit_After_Evaluation_Callback)
 from atsim.pro_fit.variables import CalculatedVariables, Variables
 
 
@@ -81,6 +83,9 @@ class FitConfig(object):
         self._instantiateRunners()
         self._title = self._parseTitle()
         self._bad_merit_substitute = self._parse_bad_merit_substitute()
+        self._reporter_mode = self._parse_reporter_mode()
+        self._merit_mode = self._parse_merit_mode()
+        self._merit_cache = self._parse_merit_cache()
 
         self._merit = self._createMerit()
         self._minimizer = self._createMinimizer(minimizermodules)
@@ -104,6 +109,7 @@ class FitConfig(object):
         logger = logging.getLogger("console.shutdown")
         logger.info("Shutting down 'pprofit'")
         self._minimizer.stopMinimizer()
+        self._merit.close()
         evts = self._closeRunners()
         gevent.wait(evts)
 
@@ -207,6 +213,30 @@ class FitConfig(object):
         doc="If this is not None, evaluator merit values that are non finite (e.g. nan or inf) will be replaced with this value",
     )
 
+    def reporter_mode(self):
+        return self._reporter_mode
+
+    reporter_mode = property(
+        reporter_mode,
+        doc="How results are written to fitting_run.db, one of the values in atsim.pro_fit.reporters.REPORTER_MODES",
+    )
+
+    def merit_mode(self):
+        return self._merit_mode
+
+    merit_mode = property(
+        merit_mode,
+        doc="Either 'sequential' (Merit) or 'pipelined' (PipelinedMerit), see atsim.pro_fit.merit.MERIT_MODES",
+    )
+
+    def merit_cache(self):
+        return self._merit_cache
+
+    merit_cache = property(
+        merit_cache,
+        doc="One of the values in atsim.pro_fit.merit.MERIT_CACHE_MODES, if not 'none' merit.cache is a MeritCache",
+    )
+
     def _parseConfig(self, fitCfgFilename):
         """@param fitCfgFilename Filename for fit.cfg.
     @return ConfigParser object"""
@@ -417,7 +447,8 @@ class FitConfig(object):
     def _createMerit(self):
         # Build the merit object
         runners = [v for (k, v) in sorted(self.runners.items())]
-        merit = Merit(
+        meritcls = PipelinedMerit if self.merit_mode == "pipelined" else Merit
+        merit = meritcls(
             runners,
             self._jobfactories,
             self._metaevaluators,
@@ -425,6 +456,15 @@ class FitConfig(object):
             self.jobdir,
         )
 
+        if self.merit_cache != "none":
+            merit.cache = MeritCache(
+                self._configurationHash(),
+                significantFigures=self._parse_merit_cache_option(
+                    "merit_cache_significant_figures", 10
+                ),
+                maxSize=self._parse_merit_cache_option("merit_cache_size", 10000),
+            )
+
         if self.bad_merit_substitute is not None:
             # Register afterEvaluation callback
             after_evaluation = Replace_Merit_After_Evaluation_Callback(
@@ -622,6 +662,82 @@ class FitConfig(object):
 
         return value
 
+    def _parse_reporter_mode(self):
+        from atsim.pro_fit.reporters import REPORTER_MODES
+
+        value = "synchronous"
+        try:
+            converter = choice_convert("fit.cfg", "reporter_mode", REPORTER_MODES)
+            value = self._cfg.get("FittingRun", "reporter_mode")
+            value = converter(value)
+        except (configparser.NoSectionError, configparser.NoOptionError) as _e:
+            pass
+
+        return value
+
+    def _parse_merit_mode(self):
+        from atsim.pro_fit.merit import MERIT_MODES
+
+        value = "sequential"
+        try:
+            converter = choice_convert("fit.cfg", "merit_mode", MERIT_MODES)
+            value = self._cfg.get("FittingRun", "merit_mode")
+            value = converter(value)
+        except (configparser.NoSectionError, configparser.NoOptionError) as _e:
+            pass
+
+        return value
+
+    def _parse_merit_cache(self):
+        from atsim.pro_fit.merit import MERIT_CACHE_MODES
+
+        value = "none"
+        try:
+            converter = choice_convert("fit.cfg", "merit_cache", MERIT_CACHE_MODES)
+            value = self._cfg.get("FittingRun", "merit_cache")
+            value = converter(value)
+        except (configparser.NoSectionError, configparser.NoOptionError) as _e:
+            pass
+
+        return value
+
+    def _parse_merit_cache_option(self, key, default):
+        value = default
+        try:
+            converter = int_convert("fit.cfg", key, bounds=(1, float("inf")))
+            value = self._cfg.get("FittingRun", key)
+            value = converter(value)
+        except (configparser.NoSectionError, configparser.NoOptionError) as _e:
+            pass
+
+        return value
+
+    def _configurationHash(self):
+        """Hash of the parts of the configuration affecting merit values of candidates (used to key MeritCache).
+
+    This covers the contents of the fit_files directory (job templates, job.cfg files and their evaluators)
+    and the [CalculatedVariables] and [MetaEvaluator:*] sections of fit.cfg.
+
+    @return Hex digest string."""
+        h = hashlib.sha256()
+        fitfilespath = os.path.join(self._fitRootPath, "fit_files")
+        for dirpath, dirnames, filenames in os.walk(fitfilespath):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                h.update(os.path.relpath(path, fitfilespath).encode("utf-8"))
+                h.update(b"\0")
+                with open(path, "rb") as infile:
+                    h.update(infile.read())
+                h.update(b"\0")
+
+        for section in sorted(self._cfg.sections()):
+            if section == "CalculatedVariables" or section.startswith("MetaEvaluator"):
+                h.update(section.encode("utf-8"))
+                for k, v in sorted(self._cfg.items(section)):
+                    h.update(("%s=%s\n" % (k, v)).encode("utf-8"))
+        return h.hexdigest()
+
     def _verifyHasJobs(self):
         if not self._jobfactories:
             raise ConfigException("No Jobs defined.")
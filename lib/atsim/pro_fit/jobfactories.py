@@ -44,10 +44,35 @@ from the job.cfg files located in fit_files.
 
 import logging
 import os
+import shlex
 from typing import List, Tuple
 
 from atsim.pro_fit.exceptions import ConfigException
 from atsim.pro_fit.tools import csvbuild
+from atsim.pro_fit._util import FILE_LINK_MODES
+
+# Values accepted by the 'download_files' [Job] option.
+DOWNLOAD_FILES_OPTIONS = ["all", "required"]
+
+
+def requiredOutputFiles(evaluators, jobtasks):
+    """Collect the output file glob patterns declared by evaluators and job tasks through their `requiredOutputFiles` attribute.
+
+  Args:
+      evaluators (list): Evaluators applied to job output.
+      jobtasks (list): JobTask instances run for job.
+
+  Returns:
+      list: Sorted list of glob patterns (relative to job output directory) or `None` if any evaluator or job task
+        does not declare the files it requires.
+  """
+    patterns = set()
+    for obj in list(evaluators) + list(jobtasks):
+        declared = getattr(obj, "requiredOutputFiles", None)
+        if declared is None:
+            return None
+        patterns.update(declared)
+    return sorted(patterns)
 
 
 class Job(object):
@@ -103,6 +128,25 @@ class MetaEvaluatorJob(object):
         self.isMetaEvaluatorJob = True
 
 
+class CachedJob(object):
+    """Job-alike holding the evaluator records of a job retrieved from atsim.pro_fit.merit.MeritCache"""
+
+    def __init__(self, name, evaluatorRecords, variables, isMetaEvaluatorJob=False):
+        """
+    Args:
+        name (string): Job name.
+        evaluatorRecords (list): EvaluatorRecords returned by evaluatorRecords property.
+        variables (atsim.prof_fit.variables.Variables): Variables instance.
+        isMetaEvaluatorJob (bool): True if cached job was a MetaEvaluatorJob.
+    """
+        self.name = name
+        self.evaluatorRecords = evaluatorRecords
+        self.variables = variables
+        self.isCachedJob = True
+        if isMetaEvaluatorJob:
+            self.isMetaEvaluatorJob = True
+
+
 class TemplateJobFactory(object):
     """Performs csvbuild style template substitution to create job directories from Variables"""
 
@@ -111,7 +155,7 @@ class TemplateJobFactory(object):
     )
 
     def __init__(
-        self, templatePath: str, runnerFilesPath: str, runnerName: str, jobName: str, evaluators: List[object], jobtasks: List[object]
+        self, templatePath: str, runnerFilesPath: str, runnerName: str, jobName: str, evaluators: List[object], jobtasks: List[object], fileLinkMode: str = "copy", downloadFilter=None, worker=None
     ):
         """
     Args:
@@ -121,6 +165,10 @@ class TemplateJobFactory(object):
         jobName (str): Factory name.
         evaluators (list): List of evaluators to be applied to directory after run.
         jobtasks (list): List of JobTask objects.
+        fileLinkMode (str): How files not undergoing template substitution are placed in job directories. One of 'copy', 'hardlink', 'reflink' or 'symlink'.
+        downloadFilter (atsim.pro_fit.filetransfer.DownloadFilter): Selects the output files retrieved by runners after a job has run. If `None` all files are retrieved.
+        worker (dict): If not `None` runners that support persistent worker processes run jobs with this worker description rather than `runjob`
+          (see `atsim.pro_fit.runners._run_remote_client.RunClient.runCommand()`).
     """
         self.name = jobName
         self.runnerName = runnerName
@@ -128,8 +176,21 @@ class TemplateJobFactory(object):
         self.jobName = jobName
         self.evaluators = evaluators
         self.tasks = jobtasks
+        self.downloadFilter = downloadFilter
+        self.worker = worker
         self._templatePath = templatePath
 
+        # Parse template directories once, they are then rendered for each job.
+        self._jobTemplate = csvbuild.TemplateDirectory(
+            templatePath, linkMode=fileLinkMode
+        )
+        if runnerFilesPath is None:
+            self._runnerFilesTemplate = None
+        else:
+            self._runnerFilesTemplate = csvbuild.TemplateDirectory(
+                runnerFilesPath, linkMode=fileLinkMode
+            )
+
     def createJob(self, destdir, variables):
         jfdir = os.path.join(destdir, "job_files")
         rfdir = os.path.join(destdir, "runner_files")
@@ -156,29 +217,24 @@ class TemplateJobFactory(object):
             logger.debug("running job task: %s", task.name)
             task.afterRun(job)
 
-    def _createFiles(self, srcdir, destdir, variables):
-
-        oldcwd = os.getcwd()
+    def _createFiles(self, template, destdir, variables):
         try:
-            rows = [dict(variables.variablePairs)]
-            os.chdir(os.path.join(srcdir, os.pardir))
-            csvbuild.buildDirs(rows, os.path.basename(srcdir), destdir)
+            row = dict(variables.variablePairs)
+            template.build(row, destdir)
         except csvbuild.CSVBuildKeyError as e:
             msg = "Unknown variable name '%s' specified in template: %s" % (
                 e.args[0],
-                os.path.join(srcdir, e.templateFilename),
+                e.templateFilename,
             )
             raise ConfigException(msg)
-        finally:
-            os.chdir(oldcwd)
 
     def _createJobFiles(self, destdir, variables):
-        self._createFiles(self._templatePath, destdir, variables)
+        self._createFiles(self._jobTemplate, destdir, variables)
 
     def _createRunnerFiles(self, destdir, variables):
         # Populate the job's runner_files directory
-        if not self.runnerFilesPath is None:
-            self._createFiles(self.runnerFilesPath, destdir, variables)
+        if not self._runnerFilesTemplate is None:
+            self._createFiles(self._runnerFilesTemplate, destdir, variables)
 
     @staticmethod
     def createFromConfig(
@@ -208,6 +264,22 @@ class TemplateJobFactory(object):
         log.debug("runnername = '%s'", runnername)
         log.debug("jobname = '%s'", jobname)
 
+        fileLinkMode = dict(cfgitems).get("file_link_mode", "copy").strip()
+        if not fileLinkMode in FILE_LINK_MODES:
+            raise ConfigException(
+                "Unknown value for 'file_link_mode' in [Job] section of job '%s': '%s'. Should be one of: %s"
+                % (jobname, fileLinkMode, ", ".join(FILE_LINK_MODES))
+            )
+        log.debug("file_link_mode = '%s'", fileLinkMode)
+
+        downloadFilter = TemplateJobFactory._downloadFilterFromConfig(
+            jobname, evaluators, jobtasks, cfgitems
+        )
+        log.debug("download filter = %s", downloadFilter)
+
+        worker = TemplateJobFactory._workerFromConfig(jobname, cfgitems)
+        log.debug("worker = %s", worker)
+
         # Check for runner_files
         testrunnerfiles = os.path.join(fitRootPath, "runner_files", runnername)
 
@@ -233,5 +305,80 @@ class TemplateJobFactory(object):
             )
 
         return TemplateJobFactory(
-            jobpath, runnerFilesPath, runnername, jobname, evaluators, jobtasks
+            jobpath,
+            runnerFilesPath,
+            runnername,
+            jobname,
+            evaluators,
+            jobtasks,
+            fileLinkMode,
+            downloadFilter,
+            worker,
         )
+
+    @staticmethod
+    def _downloadFilterFromConfig(jobname, evaluators, jobtasks, cfgitems):
+        """Create DownloadFilter from the 'download_files', 'download_include' and 'download_exclude' [Job] options.
+
+    Returns:
+        atsim.pro_fit.filetransfer.DownloadFilter: Filter or `None` if all files should be downloaded."""
+        from atsim.pro_fit.filetransfer import DownloadFilter
+
+        cfgdict = dict(cfgitems)
+        downloadFiles = cfgdict.get("download_files", "all").strip()
+        if not downloadFiles in DOWNLOAD_FILES_OPTIONS:
+            raise ConfigException(
+                "Unknown value for 'download_files' in [Job] section of job '%s': '%s'. Should be one of: %s"
+                % (jobname, downloadFiles, ", ".join(DOWNLOAD_FILES_OPTIONS))
+            )
+
+        include = cfgdict.get("download_include", "").split()
+        exclude = cfgdict.get("download_exclude", "").split()
+
+        if downloadFiles == "all":
+            if not exclude:
+                return None
+            return DownloadFilter(exclude=exclude)
+
+        required = requiredOutputFiles(evaluators, jobtasks)
+        if required is None:
+            raise ConfigException(
+                "'download_files' is 'required' for job '%s' but not all of its evaluators and job tasks declare the output files they need. Use 'download_files : all' for this job."
+                % jobname
+            )
+        return DownloadFilter(include=required + include, exclude=exclude)
+
+    @staticmethod
+    def _workerFromConfig(jobname, cfgitems):
+        """Create worker description from the 'worker_command' and 'worker_entry_point' [Job] options.
+
+    Returns:
+        dict: Worker description or `None` if jobs should be run through `runjob`."""
+        cfgdict = dict(cfgitems)
+        command = cfgdict.get("worker_command", "").strip()
+        entryPoint = cfgdict.get("worker_entry_point", "").strip()
+
+        if command and entryPoint:
+            raise ConfigException(
+                "Only one of 'worker_command' and 'worker_entry_point' can be specified in [Job] section of job '%s'"
+                % jobname
+            )
+
+        if command:
+            try:
+                return {"command": shlex.split(command)}
+            except ValueError as e:
+                raise ConfigException(
+                    "Could not parse 'worker_command' in [Job] section of job '%s': %s"
+                    % (jobname, e)
+                )
+
+        if entryPoint:
+            modname, _sep, funcname = entryPoint.partition(":")
+            if not (modname.strip() and funcname.strip()):
+                raise ConfigException(
+                    "'worker_entry_point' in [Job] section of job '%s' should have the form 'module:function', value was: '%s'"
+                    % (jobname, entryPoint)
+                )
+            return {"entry_point": entryPoint}
+        return None
@@ -1,29 +1,185 @@
 """Module containing JobTask classes. These are used to create additional for runner jobs"""
 
+import atexit
+import collections
+import concurrent.futures
+import hashlib
+import io
 import logging
+import multiprocessing
 import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+import gevent
+import gevent.event
 
 from atsim.pro_fit.exceptions import ConfigException
 from atsim.pro_fit.jobfactories import Job
 from atsim.potentials.config import Configuration
 
 
+def _tabulate(potable_input: str) -> str:
+    """Create tabulation described by potable input and return its contents.
+
+    This is run in TabulationExecutor's worker processes.
+
+    Args:
+        potable_input (str): Contents of potable input file.
+
+    Returns:
+        str: Contents of tabulation file.
+    """
+    asp_cfg = Configuration()
+    tabulation = asp_cfg.read(io.StringIO(potable_input))
+    outfile = io.StringIO()
+    tabulation.write(outfile)
+    return outfile.getvalue()
+
+
+class TabulationExecutor:
+    """Runs potable tabulations in a pool of worker processes.
+
+    Tabulations are memoised by a hash of their potable input. Identical candidates, and
+    jobs sharing a potential, are therefore only tabulated once. Requests for a tabulation
+    that is still being calculated wait for the same result.
+
+    tabulate() waits cooperatively, allowing other greenlets (e.g. runner keep-alives and the
+    console) to run whilst tabulation takes place. If a process pool cannot be created
+    tabulations are run in-process instead.
+    """
+
+    _logger = logging.getLogger(__name__).getChild("TabulationExecutor")
+
+    def __init__(self, max_workers: Optional[int] = None, cache_size: int = 64):
+        """Create executor.
+
+        Args:
+            max_workers (int, optional): Maximum number of worker processes. Defaults to the number of processors.
+            cache_size (int): Maximum number of tabulations held in the memoisation cache.
+        """
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._pool = None
+        self._poolUnavailable = False
+
+    def _getPool(self):
+        if self._pool is None and not self._poolUnavailable:
+            try:
+                # Worker processes are spawned rather than forked: forking a process
+                # running the gevent hub (and possibly other threads) is not safe.
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (ImportError, NotImplementedError, OSError) as e:
+                self._logger.warning(
+                    "Process pool could not be created, tabulations will be run in-process: %s", e)
+                self._poolUnavailable = True
+        return self._pool
+
+    def _submit(self, potable_input: str) -> concurrent.futures.Future:
+        pool = self._getPool()
+        if pool is None:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(_tabulate(potable_input))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return pool.submit(_tabulate, potable_input)
+
+    def tabulate(self, potable_input: str) -> str:
+        """Return contents of tabulation file for given potable input.
+
+        Args:
+            potable_input (str): Contents of potable input file.
+
+        Returns:
+            str: Contents of tabulation file.
+        """
+        key = hashlib.sha256(potable_input.encode("utf-8")).hexdigest()
+        future = self._cache.get(key, None)
+        if future is None:
+            future = self._submit(potable_input)
+            self._cache[key] = future
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        try:
+            return self._wait(future)
+        except Exception:
+            # Don't memoise failures.
+            if self._cache.get(key, None) is future:
+                del self._cache[key]
+            raise
+
+    def _wait(self, future: concurrent.futures.Future) -> str:
+        if future.done():
+            return future.result()
+
+        # Future callbacks are invoked from the executor's management thread, hand result
+        # over to the hub of the waiting greenlet.
+        hub = gevent.get_hub()
+        result = gevent.event.AsyncResult()
+
+        def done(f):
+            hub.loop.run_callback_threadsafe(result.set, None)
+
+        future.add_done_callback(done)
+        result.get()
+        return future.result()
+
+    def shutdown(self):
+        """Stop worker processes and clear memoisation cache"""
+        self._cache.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+_tabulationExecutor = None
+
+
+def tabulationExecutor() -> TabulationExecutor:
+    """Returns the TabulationExecutor shared by PotableJobTask instances that were not given their own"""
+    global _tabulationExecutor
+    if _tabulationExecutor is None:
+        _tabulationExecutor = TabulationExecutor()
+        atexit.register(_tabulationExecutor.shutdown)
+    return _tabulationExecutor
+
+
 class PotableJobTask:
     """JobTask that uses atsim.potentials to create potential tabulations"""
 
-    def __init__(self, name: str, input_filename: str, output_filename: str):
+    def __init__(self, name: str, input_filename: str, output_filename: str, executor: Optional[TabulationExecutor] = None):
         """Create JobTask for generating potential tabulation files.
 
         Args:
             name (str): Name of task.
             input_filename (str): Name of potable input file.
             output_filename (str): File in which tabulation should be created (should be a relative path).
+            executor (TabulationExecutor, optional): Executor used to create tabulations. Defaults to the shared instance returned by `tabulationExecutor()`.
         """
 
         self.name = name
         self.input_filename = input_filename
         self.output_filename = output_filename
+        self._executor = executor
+
+    @property
+    def executor(self) -> TabulationExecutor:
+        if self._executor is None:
+            return tabulationExecutor()
+        return self._executor
+
+    @property
+    def requiredOutputFiles(self) -> List[str]:
+        """Glob patterns of job output files needed by this task after the job has run (none for this task)"""
+        return []
 
     def beforeRun(self, job: Job):
         logger = logging.getLogger(__name__).getChild(
@@ -38,12 +194,13 @@ class PotableJobTask:
 
         logger.debug("Executing potable for job '%s', using input file: '%s', tabulating into '%s'",
                      job.name, input_filename, output_filename)
-        asp_cfg = Configuration()
         with open(input_filename) as infile:
-            tabulation = asp_cfg.read(infile)
+            potable_input = infile.read()
+
+        tabulation = self.executor.tabulate(potable_input)
 
         with open(output_filename, 'w') as outfile:
-            tabulation.write(outfile)
+            outfile.write(tabulation)
 
     def afterRun(self, job: Job):
         pass
@@ -1,3 +1,8 @@
+import collections
+import copy
+import logging
+import math
+import pickle
 import tempfile
 import os
 import shutil
@@ -5,11 +10,20 @@ import shutil
 from atsim.pro_fit import jobfactories
 
 import gevent
+import gevent.event
+import gevent.queue
 
 from atsim.pro_fit._util import MultiCallback
 
 from typing import List
 
+# Values accepted by the [FittingRun] merit_mode option. See Merit and PipelinedMerit.
+MERIT_MODES = ["sequential", "pipelined"]
+
+# Values accepted by the [FittingRun] merit_cache option. See MeritCache.
+MERIT_CACHE_MODES = ["none", "memory", "database"]
+
+
 def _sumValuesReductionFunction(evaluatedJobs):
     """Default reduction function, for each list enter sub lists and sum values"""
     ret = []
@@ -44,6 +58,161 @@ class Replace_Merit_After_Evaluation_Callback(object):
                             er.meritValue = self.replacement_value
 
 
+class MeritCache(object):
+    """Cache of merit values and evaluator records for candidates that have already been evaluated.
+
+  Candidates are identified by their variable values, rounded to a given number of significant figures,
+  together with a hash of the fitting run's configuration (e.g. job templates and evaluator settings)
+  supplied by the caller. Entries are held in memory and evicted in least recently used order.
+  Optionally entries are also written to (and on attachDatabase() read back from) the merit_cache table of
+  fitting_run.db.
+
+  Candidates with evaluator errors or non-finite merit values are not cached, as these may be the result of
+  transient failures (e.g. a runner being unavailable)."""
+
+    _logger = logging.getLogger(__name__).getChild("MeritCache")
+
+    def __init__(self, configurationHash="", significantFigures=10, maxSize=10000):
+        """@param configurationHash String identifying the configuration used to evaluate candidates.
+       @param significantFigures Variable values are rounded to this many significant figures before comparison.
+       @param maxSize Maximum number of candidates held in memory."""
+        self.configurationHash = configurationHash
+        self.significantFigures = significantFigures
+        self.maxSize = maxSize
+        self._entries = collections.OrderedDict()
+        self._engine = None
+        self._pending = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, candidate):
+        return self.key(candidate) in self._entries
+
+    def key(self, candidate):
+        """@param candidate Variables instance.
+    @return String used to identify candidate within cache."""
+        return repr(
+            tuple(
+                [
+                    (k, float("%.*g" % (self.significantFigures, v)))
+                    for (k, v) in candidate.variablePairs
+                ]
+            )
+        )
+
+    def get(self, candidate, variables=None):
+        """Retrieve cached result for candidate.
+
+    @param candidate Variables instance.
+    @param variables Variables instance given to the returned jobs (defaults to candidate).
+    @return Tuple (meritValue, JOB_LIST) or None if candidate is not cached. JOB_LIST contains
+      atsim.pro_fit.jobfactories.CachedJob instances holding copies of the cached evaluator records."""
+        key = self.key(candidate)
+        entry = self._entries.get(key, None)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+
+        if variables is None:
+            variables = candidate
+        meritValue, jobs = entry
+        return (
+            meritValue,
+            [
+                jobfactories.CachedJob(
+                    name,
+                    [[copy.copy(er) for er in erl] for erl in evaluatorRecords],
+                    variables,
+                    isMeta,
+                )
+                for (name, evaluatorRecords, isMeta) in jobs
+            ],
+        )
+
+    def put(self, candidate, meritValue, jobs):
+        """Add evaluated candidate to cache.
+
+    @param candidate Variables instance.
+    @param meritValue Merit value of candidate.
+    @param jobs Evaluated jobs belonging to candidate.
+    @return True if candidate was cached."""
+        if not math.isfinite(meritValue):
+            return False
+
+        cachedJobs = []
+        for job in jobs:
+            evaluatorRecords = []
+            for erl in job.evaluatorRecords:
+                if any([er.errorFlag for er in erl]):
+                    return False
+                evaluatorRecords.append([copy.copy(er) for er in erl])
+            cachedJobs.append(
+                (job.name, evaluatorRecords, getattr(job, "isMetaEvaluatorJob", False))
+            )
+
+        key = self.key(candidate)
+        self._store(key, (meritValue, cachedJobs))
+        if self._engine is not None:
+            self._pending.append((key, meritValue, cachedJobs))
+        return True
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+
+    def attachDatabase(self, engine):
+        """Back cache with the merit_cache table of a pprofit database. Entries previously written
+    with the same configuration hash are loaded and new entries are written by flush().
+
+    @param engine sqlalchemy.Engine for fitting_run.db"""
+        from atsim.pro_fit import db
+
+        table = db.getMetadata().tables["merit_cache"]
+        table.create(engine, checkfirst=True)
+
+        query = (
+            table.select()
+            .where(table.c.configuration_hash == self.configurationHash)
+            .order_by(table.c.id)
+        )
+        loaded = 0
+        with engine.connect() as conn:
+            for row in conn.execute(query):
+                self._store(row.candidate_key, (row.merit_value, pickle.loads(row.jobs)))
+                loaded += 1
+        self._logger.info("Loaded %d cached candidates from database", loaded)
+        self._table = table
+        self._engine = engine
+
+    def flush(self):
+        """Write entries added since last call to the database (if one has been attached)"""
+        if self._engine is None or not self._pending:
+            return
+
+        rows = []
+        for key, meritValue, cachedJobs in self._pending:
+            try:
+                pickled = pickle.dumps(cachedJobs)
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                self._logger.debug("Candidate could not be written to merit_cache table: %s", e)
+                continue
+            rows.append(
+                dict(
+                    configuration_hash=self.configurationHash,
+                    candidate_key=key,
+                    merit_value=meritValue,
+                    jobs=pickled,
+                )
+            )
+        self._pending = []
+        if rows:
+            with self._engine.begin() as conn:
+                conn.execute(self._table.insert(), rows)
+
+
 class Merit(object):
     """Class defining merit function within pprofit.
 
@@ -77,7 +246,14 @@ class Merit(object):
                 MultiCallback meaning new callbacks are registered by appending to the afterMerit property.
 
                 Where candidateJobPairs is as before and meritValues is a list of merit values one
-                per candidate. """
+                per candidate.
+
+  If a MeritCache is assigned to the cache property, calculate() only creates and runs jobs for candidates
+  that are not in the cache (identical candidates within a call are only run once). beforeRun, afterRun and
+  afterEvaluation are only passed the candidates that were run whilst afterMerit receives every candidate,
+  with cached candidates' jobs represented by atsim.pro_fit.jobfactories.CachedJob instances."""
+
+    _logger = logging.getLogger(__name__).getChild("Merit")
 
     def __init__(
         self,
@@ -105,6 +281,7 @@ class Merit(object):
         self.calculatedVariables = calculatedVariables
         self._jobdir = jobdir
         self._reductionFunction = _sumValuesReductionFunction
+        self.cache = None
 
     def _getjobdir(self):
         return self._jobdir
@@ -120,32 +297,16 @@ class Merit(object):
       CANDIDATE is atomsscripts.fitting.variables.Variables instance and JOB_LIST is a list of the atsim.pro_fit.jobfactories.Job
       instances representing each job belonging to the candidate. This is equivalent to the values passed to afterMerit callback"""
 
-        batchpaths, batchedJobs, candidate_job_lists = self._prepareJobs(
-            candidates
-        )
+        batchpaths = []
         try:
-            finishedEvents = self._runBatches(batchedJobs)
-            gevent.wait(objects=finishedEvents)
-
-            # Run job tasks.
-            self._runTasksAfterRun(candidate_job_lists)
-
-            # Call the afterRun callback
-            self.afterRun(candidate_job_lists)  # pylint: disable=E1102
-
-            # Apply evaluators
-            self._applyEvaluators(batchedJobs)
-            self._applyMetaEvaluators(
-                [joblist for (v, joblist) in candidate_job_lists]
-            )
-
-            # Call the afterEvaluation callback (first zip evaluated lists with their jobs)
-            self.afterEvaluation(candidate_job_lists)  # pylint: disable=E1102
-
-            # Reduce evaluated dictionary into single values
-            meritvals = self._reductionFunction(
-                [joblist for (v, joblist) in candidate_job_lists]
-            )
+            if self.cache is None:
+                meritvals, candidate_job_lists = self._runAndEvaluate(
+                    candidates, batchpaths
+                )
+            else:
+                meritvals, candidate_job_lists = self._calculateCached(
+                    candidates, batchpaths
+                )
 
             self.afterMerit(
                 meritvals, candidate_job_lists
@@ -156,7 +317,157 @@ class Merit(object):
             else:
                 return meritvals
         finally:
-            self._cleanBatches(batchpaths)
+            self._cleanGeneration(batchpaths)
+
+    def _runAndEvaluate(self, candidates, batchpaths):
+        """Create, run and evaluate jobs for candidates (without invoking afterMerit).
+
+    @param candidates List of Variables instances
+    @param batchpaths List to which the directories created for candidates are appended.
+    @return Tuple (meritValueList, candidateJobPairs)"""
+        candidatepaths, batchedJobs, candidate_job_lists = self._prepareJobs(
+            candidates
+        )
+        batchpaths.extend(candidatepaths)
+        finishedEvents = self._runBatches(batchedJobs)
+        gevent.wait(objects=finishedEvents)
+
+        meritvals = self._evaluateJobs(candidate_job_lists, batchedJobs)
+        return (meritvals, candidate_job_lists)
+
+    def _cleanGeneration(self, batchpaths):
+        """Remove the directories of candidates evaluated by calculate()"""
+        self._cleanBatches(batchpaths)
+
+    def _candidatesToRun(self, candidates):
+        """Candidates that need to be run given the current contents of self.cache.
+
+    @param candidates List of Variables instances.
+    @return List of candidates that are not cached, with only the first of any identical candidates included."""
+        if self.cache is None:
+            return list(candidates)
+
+        toRun = collections.OrderedDict()
+        for candidate in candidates:
+            key = self.cache.key(candidate)
+            if key in toRun or candidate in self.cache:
+                continue
+            toRun[key] = candidate
+        return list(toRun.values())
+
+    def _calculateCached(self, candidates, batchpaths):
+        """Calculate merit values using self.cache, candidates not found in cache are run and added to it.
+
+    @param candidates List of Variables instances
+    @param batchpaths List to which the directories created for candidates are appended.
+    @return Tuple (meritValueList, candidateJobPairs)"""
+        # Retrieve cache hits before anything is run. Storing the results of the run candidates
+        # can evict entries from a full cache, hits must not depend on them still being present.
+        calculated = self._calculateVariables(candidates)
+        cached = [
+            self.cache.get(candidate, variables)
+            for (candidate, variables) in zip(candidates, calculated)
+        ]
+
+        toRun = collections.OrderedDict()
+        for candidate, hit in zip(candidates, cached):
+            key = self.cache.key(candidate)
+            if hit is None and not key in toRun:
+                toRun[key] = candidate
+        toRun = list(toRun.values())
+
+        if toRun:
+            runvals, runCandidateJobPairs = self._runAndEvaluate(toRun, batchpaths)
+        else:
+            runvals, runCandidateJobPairs = [], []
+
+        ran = {}
+        for candidate, meritval, candidateJobPair in zip(
+            toRun, runvals, runCandidateJobPairs
+        ):
+            ran[self.cache.key(candidate)] = (meritval, candidateJobPair)
+            self.cache.put(candidate, meritval, candidateJobPair[1])
+        self.cache.flush()
+
+        meritvals = []
+        candidate_job_lists = []
+        used = set()
+        for candidate, variables, hit in zip(candidates, calculated, cached):
+            key = self.cache.key(candidate)
+            if hit is None and key in used:
+                hit = self.cache.get(candidate, variables)
+
+            if hit is None:
+                # Run above. Duplicates of candidates that could not be cached share their jobs.
+                used.add(key)
+                meritval, candidateJobPair = ran[key]
+            else:
+                meritval, jobs = hit
+                candidateJobPair = (variables, jobs)
+            meritvals.append(meritval)
+            candidate_job_lists.append(candidateJobPair)
+
+        self._logger.debug(
+            "%d of %d candidates retrieved from cache",
+            len(candidates) - len(toRun),
+            len(candidates),
+        )
+        return meritvals, candidate_job_lists
+
+    def calculateAsCompleted(self, candidates):
+        """Generator that calculates merit values for each Variables object in candidates, yielding
+    results as soon as each candidate's jobs have finished, rather than once the slowest job of
+    the whole population has completed.
+
+    The same callbacks as for calculate() are invoked. beforeRun is called once with all the candidates,
+    afterRun, afterEvaluation and afterMerit are called as each candidate completes with single element lists.
+
+    @param candidates List of Variables instances
+    @return Iterator yielding CompletedCandidate (ticket, meritValue, candidateJobPair) tuples in completion order.
+      ticket gives the index of the candidate within candidates."""
+        asyncMerit = AsynchronousMerit(self)
+        try:
+            asyncMerit.submit(candidates)
+            for completed in asyncMerit:
+                yield completed
+        finally:
+            asyncMerit.close()
+
+    def _evaluateCandidates(self, candidate_job_lists, batchedJobs):
+        """Run after-run job tasks, evaluators and meta-evaluators for jobs that have finished running,
+    invoking the afterRun, afterEvaluation and afterMerit callbacks along the way.
+
+    @param candidate_job_lists List of (CANDIDATE, JOB_LIST) pairs.
+    @param batchedJobs List of job lists (giving the order in which jobs are evaluated).
+    @return List of merit values, one per candidate."""
+        meritvals = self._evaluateJobs(candidate_job_lists, batchedJobs)
+        self.afterMerit(
+            meritvals, candidate_job_lists
+        )  # pylint: disable=E1102
+        return meritvals
+
+    def _evaluateJobs(self, candidate_job_lists, batchedJobs):
+        """As _evaluateCandidates() but without invoking the afterMerit callback"""
+        # Run job tasks.
+        self._runTasksAfterRun(candidate_job_lists)
+
+        # Call the afterRun callback
+        self.afterRun(candidate_job_lists)  # pylint: disable=E1102
+
+        # Apply evaluators
+        self._applyEvaluators(batchedJobs)
+        self._applyMetaEvaluators(
+            [joblist for (v, joblist) in candidate_job_lists]
+        )
+
+        # Call the afterEvaluation callback (first zip evaluated lists with their jobs)
+        self.afterEvaluation(candidate_job_lists)  # pylint: disable=E1102
+
+        # Reduce evaluated dictionary into single values
+        meritvals = self._reductionFunction(
+            [joblist for (v, joblist) in candidate_job_lists]
+        )
+        return meritvals
 
     def _prepareJobs(self, candidateVariables):
         """Create job directories and populate them with files from jobfactories.
@@ -171,21 +482,13 @@ class Merit(object):
         runnerBatches = {}
         candidate_job_lists = []
         batchpaths = []
-        for candidate in candidateVariables:
-            candidate = self.calculatedVariables(candidate)
-            cpath = tempfile.mkdtemp(dir=self._jobdir)
+        for cpath, candidateJobPair, candidateBatches in self._prepareCandidates(
+            candidateVariables
+        ):
             batchpaths.append(cpath)
-            candidate_job_lists.append((candidate, []))
-            for factory in self._jobfactories:
-                # Create job path as combination of candidate temporary directory
-                # and factory.name.
-                jobpath = os.path.join(cpath, factory.name)
-                os.mkdir(jobpath)
-                job = factory.createJob(jobpath, candidate)
-                candidate_job_lists[-1][1].append(job)
-                factory.runTasksBeforeRun(job)
-                # Assign job to correct batch
-                runnerBatches.setdefault(factory.runnerName, []).append(job)
+            candidate_job_lists.append(candidateJobPair)
+            for runnerName, jobs in candidateBatches.items():
+                runnerBatches.setdefault(runnerName, []).extend(jobs)
 
         # Call the beforeRun callback
         self.beforeRun(candidate_job_lists)  # pylint: disable=E1102
@@ -197,6 +500,63 @@ class Merit(object):
             candidate_job_lists,
         )
 
+    def _calculateVariables(self, candidateVariables):
+        """Apply self.calculatedVariables to each candidate, as a single batch when it supports evaluatePopulation().
+
+    @param candidateVariables List of Variables instances.
+    @return List of Variables instances including calculated variables."""
+        evaluatePopulation = getattr(
+            self.calculatedVariables, "evaluatePopulation", None
+        )
+        if evaluatePopulation is not None:
+            return evaluatePopulation(candidateVariables)
+        return [self.calculatedVariables(c) for c in candidateVariables]
+
+    def _prepareCandidates(self, candidateVariables):
+        """Apply calculated variables then call _prepareCandidate() for each candidate. Candidates are prepared in their own greenlets allowing
+    job tasks that wait on other processes (e.g. potable tabulation, see atsim.pro_fit.jobtasks.TabulationExecutor)
+    to proceed concurrently. If any candidate cannot be prepared, the directories of the others are removed.
+
+    @param candidateVariables List of Variables instances.
+    @return List of (batch_directory, candidate_job_pair, runner_jobs) tuples (see _prepareCandidate()) in candidate order."""
+        greenlets = []
+        for candidate in self._calculateVariables(candidateVariables):
+            grn = gevent.Greenlet(self._prepareCandidate, candidate)
+            grn.name = "Merit-prepareCandidate-{}".format(grn.name)
+            grn.start()
+            greenlets.append(grn)
+        gevent.joinall(greenlets)
+
+        failed = [grn for grn in greenlets if not grn.successful()]
+        if failed:
+            self._cleanBatches(
+                [grn.value[0] for grn in greenlets if grn.successful()]
+            )
+            raise failed[0].exception
+        return [grn.value for grn in greenlets]
+
+    def _prepareCandidate(self, candidate):
+        """Create the job directories for a single candidate.
+
+    @param candidate Variables instance, already including calculated variables.
+    @return Tuple (batch_directory, candidate_job_pair, runner_jobs). Where batch_directory is the directory
+            containing the candidate's jobs, candidate_job_pair is the (VARIABLES, JOB_LIST) tuple for the candidate
+            and runner_jobs a dictionary mapping runner names to the list of the candidate's jobs for that runner."""
+        runnerBatches = {}
+        cpath = tempfile.mkdtemp(dir=self._jobdir)
+        candidateJobPair = (candidate, [])
+        for factory in self._jobfactories:
+            # Create job path as combination of candidate temporary directory
+            # and factory.name.
+            jobpath = os.path.join(cpath, factory.name)
+            os.mkdir(jobpath)
+            job = factory.createJob(jobpath, candidate)
+            candidateJobPair[1].append(job)
+            factory.runTasksBeforeRun(job)
+            # Assign job to correct batch
+            runnerBatches.setdefault(factory.runnerName, []).append(job)
+        return cpath, candidateJobPair, runnerBatches
+
     def _runBatches(self, jobBatches):
         """Execute the runBatch command on the job batches and return threading.Event objects
     indicating when each batch completes
@@ -209,10 +569,26 @@ class Merit(object):
             events.append(f.finishedEvent)
         return events
 
+    def _runCandidateBatches(self, runnerBatches):
+        """Submit a single candidate's jobs to the runners.
+
+    @param runnerBatches Dictionary mapping runner names to job lists (as returned by _prepareCandidate).
+    @return List of batch futures, one per runner used by the candidate."""
+        futures = []
+        for runner in self._runners:
+            batch = runnerBatches.get(runner.name, [])
+            if batch:
+                futures.append(runner.runBatch(batch))
+        return futures
+
     def _cleanBatches(self, batchpaths):
         for p in batchpaths:
             shutil.rmtree(p, ignore_errors=True)
 
+    def close(self):
+        """Release any resources held by the merit function. Called once fitting has finished."""
+        pass
+
     def _applyEvaluators(self, batchedJobs):
         """Apply job evaluators.
 
@@ -263,3 +639,338 @@ class Merit(object):
     @property
     def afterMerit(self):
         return self._afterMerit
+
+
+class _PrefetchedGeneration(object):
+    """Book-keeping for candidates passed to PipelinedMerit.prefetch()"""
+
+    def __init__(self, key, greenlet):
+        self.key = key
+        self.greenlet = greenlet
+
+
+class PipelinedMerit(Merit):
+    """Merit variant that overlaps consecutive generations.
+
+  With Merit.calculate() nothing of the next generation can start until the current generation has been
+  evaluated and its job directories deleted. When a minimizer knows its next candidates in advance
+  (e.g. the spreadsheet minimizer) it can pass them to prefetch(). Their jobs are then created and
+  submitted to the runners (uploading them for remote runners) while the tail of the current generation
+  is still running. Runners queue the prefetched jobs behind those already submitted.
+
+  The next call to calculate() with the same candidates picks up the prefetched jobs rather than creating
+  new ones. Prefetched candidates that are skipped over by calculate() are terminated and discarded.
+
+  For all calculate() calls job directories are removed by a background greenlet, allowing the minimizer
+  to continue as soon as merit values are available.
+
+  Note: beforeRun is invoked when jobs are created and therefore, for prefetched candidates, from prefetch().
+  """
+
+    _logger = logging.getLogger(__name__).getChild("PipelinedMerit")
+
+    def __init__(self, *args, **kwargs):
+        """Accepts the same arguments as Merit"""
+        super(PipelinedMerit, self).__init__(*args, **kwargs)
+        self._prefetched = collections.deque()
+        self._cleanupGreenlets = set()
+
+    @staticmethod
+    def _candidatesKey(candidates):
+        return [c.flaggedVariablePairs for c in candidates]
+
+    def prefetch(self, candidates):
+        """Create and submit jobs for candidates that will be passed to a later call to calculate().
+    This method returns immediately, jobs are created in the background. Candidates held by the
+    merit cache (if any) are not prefetched.
+
+    @param candidates List of Variables instances."""
+        candidates = self._candidatesToRun(candidates)
+        if not candidates:
+            return
+        grn = gevent.Greenlet(self._prepareAndRun, candidates)
+        grn.name = "PipelinedMerit-prefetch-{}".format(grn.name)
+        self._prefetched.append(
+            _PrefetchedGeneration(self._candidatesKey(candidates), grn)
+        )
+        grn.start()
+
+    def _prepareAndRun(self, candidates):
+        batchpaths, batchedJobs, candidate_job_lists = self._prepareJobs(
+            candidates
+        )
+        try:
+            futures = [
+                runner.runBatch(batch)
+                for runner, batch in zip(self._runners, batchedJobs)
+            ]
+        except:
+            self._cleanBatches(batchpaths)
+            raise
+        return batchpaths, batchedJobs, candidate_job_lists, futures
+
+    def _takePrefetched(self, candidates):
+        """Return greenlet for prefetched candidates or None if they were not prefetched.
+    Generations prefetched before candidates are discarded."""
+        key = self._candidatesKey(candidates)
+        if not any([p.key == key for p in self._prefetched]):
+            return None
+
+        while True:
+            prefetched = self._prefetched.popleft()
+            if prefetched.key == key:
+                return prefetched.greenlet
+            self._logger.debug("Discarding unused prefetched candidates")
+            self._spawnCleanup(self._discard, prefetched.greenlet)
+
+    def _runAndEvaluate(self, candidates, batchpaths):
+        """Run and evaluate candidates, using jobs created by prefetch() if available"""
+        grn = self._takePrefetched(candidates)
+        if grn is None:
+            candidatepaths, batchedJobs, candidate_job_lists, futures = self._prepareAndRun(
+                candidates
+            )
+        else:
+            candidatepaths, batchedJobs, candidate_job_lists, futures = grn.get()
+        batchpaths.extend(candidatepaths)
+
+        gevent.wait(objects=[f.finishedEvent for f in futures])
+        meritvals = self._evaluateJobs(candidate_job_lists, batchedJobs)
+        return (meritvals, candidate_job_lists)
+
+    def _cleanGeneration(self, batchpaths):
+        if batchpaths:
+            self._spawnCleanup(self._cleanBatches, batchpaths)
+
+    def _spawnCleanup(self, func, *args):
+        grn = gevent.Greenlet(func, *args)
+        grn.name = "PipelinedMerit-cleanup-{}".format(grn.name)
+        self._cleanupGreenlets.add(grn)
+        grn.link(self._cleanupGreenlets.discard)
+        grn.start()
+
+    def _discard(self, prepareGreenlet):
+        try:
+            batchpaths, _batchedJobs, _candidate_job_lists, futures = prepareGreenlet.get()
+        except Exception:
+            self._logger.exception("Error creating prefetched jobs")
+            return
+        events = []
+        for f in futures:
+            if hasattr(f, "terminate"):
+                events.append(f.terminate())
+            else:
+                events.append(f.finishedEvent)
+        gevent.wait(objects=events)
+        self._cleanBatches(batchpaths)
+
+    def close(self):
+        """Discard prefetched candidates and block until job directories have been removed."""
+        while self._prefetched:
+            self._spawnCleanup(self._discard, self._prefetched.popleft().greenlet)
+        gevent.joinall(list(self._cleanupGreenlets))
+
+
+CompletedCandidate = collections.namedtuple(
+    "CompletedCandidate", ["ticket", "meritValue", "candidateJobPair"]
+)
+
+
+class _PendingCandidate(object):
+    """Book-keeping for a candidate that has been submitted to AsynchronousMerit.
+  Candidates retrieved from the merit cache have no batchpath or futures and their meritValue is already known."""
+
+    def __init__(
+        self, ticket, candidate, batchpath, candidateJobPair, futures, meritValue=None
+    ):
+        self.ticket = ticket
+        self.candidate = candidate
+        self.batchpath = batchpath
+        self.candidateJobPair = candidateJobPair
+        self.futures = futures
+        self.meritValue = meritValue
+
+    @property
+    def cached(self):
+        return self.batchpath is None
+
+
+class AsynchronousMerit(object):
+    """Streaming interface to a Merit instance.
+
+  Where Merit.calculate() waits for every job of every candidate to finish before evaluating any of
+  them, AsynchronousMerit submits each candidate's jobs to the runners as their own batch. Merit values are
+  then made available, in completion order, as soon as all the jobs belonging to a candidate have finished.
+  Further candidates can be submitted at any time, allowing minimizers to keep runners busy
+  (see the asynchronous evaluation modes of the population and Nelder-Mead minimizers).
+
+  Usage:
+    asyncMerit = AsynchronousMerit(merit)
+    tickets = asyncMerit.submit(candidates)
+    for ticket, meritValue, candidateJobPair in asyncMerit:
+      ...
+    asyncMerit.close()
+
+  Iteration finishes once no submitted candidates remain outstanding.
+
+  The callbacks registered with the underlying Merit are invoked as for Merit.calculate() with the
+  following difference: beforeRun receives the candidates passed to each call of submit(), whilst afterRun,
+  afterEvaluation and afterMerit are called with single element lists as each candidate completes.
+  Job directories are removed as soon as a candidate has been evaluated.
+
+  If Merit.cache is set, candidates found in the cache are not run. They are returned by next_completed()
+  straight away, with only afterMerit being invoked for them. Candidates that are run are added to the cache
+  once they have been evaluated."""
+
+    _logger = logging.getLogger(__name__).getChild("AsynchronousMerit")
+
+    def __init__(self, merit):
+        """@param merit Merit instance used to create, run and evaluate jobs."""
+        self._merit = merit
+        self._outstanding = {}
+        self._completedQueue = gevent.queue.Queue()
+        self._nextTicket = 0
+
+    @property
+    def merit(self):
+        return self._merit
+
+    @property
+    def outstanding(self):
+        """Number of submitted candidates for which merit values have not yet been returned"""
+        return len(self._outstanding)
+
+    def submit(self, candidates):
+        """Create jobs for candidates and submit them to the runners.
+
+    @param candidates List of Variables instances.
+    @return List of tickets (integers), one per candidate, identifying each candidate in the CompletedCandidate
+      tuples returned by next_completed()."""
+        tickets = []
+        for _candidate in candidates:
+            tickets.append(self._nextTicket)
+            self._nextTicket += 1
+
+        toRun = list(zip(tickets, candidates))
+        cache = self._merit.cache
+        if cache is not None:
+            toRun = []
+            calculated = self._merit._calculateVariables(candidates)
+            for ticket, candidate, variables in zip(tickets, candidates, calculated):
+                hit = cache.get(candidate, variables)
+                if hit is None:
+                    toRun.append((ticket, candidate))
+                    continue
+                meritValue, jobs = hit
+                pending = _PendingCandidate(
+                    ticket, candidate, None, (variables, jobs), [], meritValue
+                )
+                self._outstanding[ticket] = pending
+                self._completedQueue.put(pending)
+
+        if toRun:
+            prepared = self._merit._prepareCandidates(
+                [candidate for (_ticket, candidate) in toRun]
+            )
+
+            self._merit.beforeRun(  # pylint: disable=E1102
+                [candidateJobPair for (_cpath, candidateJobPair, _rb) in prepared]
+            )
+
+            for (ticket, candidate), (cpath, candidateJobPair, runnerBatches) in zip(
+                toRun, prepared
+            ):
+                futures = self._merit._runCandidateBatches(runnerBatches)
+                pending = _PendingCandidate(
+                    ticket, candidate, cpath, candidateJobPair, futures
+                )
+                self._outstanding[ticket] = pending
+                grn = gevent.Greenlet.spawn(self._waitForCandidate, pending)
+                grn.name = "AsynchronousMerit-waitForCandidate-{}".format(grn.name)
+        self._logger.debug(
+            "Submitted %d candidates (%d retrieved from cache), %d now outstanding",
+            len(tickets),
+            len(tickets) - len(toRun),
+            len(self._outstanding),
+        )
+        return tickets
+
+    def _waitForCandidate(self, pending):
+        gevent.wait(objects=[f.finishedEvent for f in pending.futures])
+        self._completedQueue.put(pending)
+
+    def next_completed(self, timeout=None):
+        """Block until a submitted candidate's jobs have finished then evaluate it.
+
+    @param timeout Time in seconds to wait, None waits indefinitely.
+    @return CompletedCandidate tuple or None if timeout expired before a candidate completed.
+    @raise StopIteration if there are no outstanding candidates."""
+        if not self._outstanding:
+            raise StopIteration()
+        while True:
+            try:
+                pending = self._completedQueue.get(timeout=timeout)
+            except gevent.queue.Empty:
+                return None
+            # Skip candidates discarded by close()
+            if self._outstanding.pop(pending.ticket, None) is pending:
+                break
+
+        if pending.cached:
+            self._merit.afterMerit(  # pylint: disable=E1102
+                [pending.meritValue], [pending.candidateJobPair]
+            )
+            return CompletedCandidate(
+                pending.ticket, pending.meritValue, pending.candidateJobPair
+            )
+
+        try:
+            meritvals = self._merit._evaluateCandidates(
+                [pending.candidateJobPair], [pending.candidateJobPair[1]]
+            )
+        finally:
+            self._merit._cleanBatches([pending.batchpath])
+
+        cache = self._merit.cache
+        if cache is not None:
+            cache.put(pending.candidate, meritvals[0], pending.candidateJobPair[1])
+            cache.flush()
+        return CompletedCandidate(
+            pending.ticket, meritvals[0], pending.candidateJobPair
+        )
+
+    def __iter__(self):
+        while self._outstanding:
+            yield self.next_completed()
+
+    def discard(self, tickets):
+        """Discard submitted candidates whose merit values are no longer required.
+    Their batches are terminated (where supported) and job directories removed in the background.
+
+    @param tickets List of tickets as returned by submit()."""
+        pending = [
+            self._outstanding.pop(t) for t in tickets if t in self._outstanding
+        ]
+        if pending:
+            grn = gevent.Greenlet.spawn(self._terminate, pending)
+            grn.name = "AsynchronousMerit-discard-{}".format(grn.name)
+
+    def close(self):
+        """Discard outstanding candidates. Batches supporting terminate() are terminated and job directories removed.
+    This method blocks until outstanding batches have finished."""
+        pending = list(self._outstanding.values())
+        self._outstanding.clear()
+        self._terminate(pending)
+
+    def _terminate(self, pending):
+        events = []
+        for p in pending:
+            for f in p.futures:
+                if hasattr(f, "terminate"):
+                    events.append(f.terminate())
+                else:
+                    events.append(f.finishedEvent)
+        gevent.wait(objects=events)
+        self._merit._cleanBatches(
+            [p.batchpath for p in pending if not p.cached]
+        )
@@ -16,6 +16,26 @@ class MinimizerConfigException(ConfigException):
     pass
 
 
+class ResumeStepCallback(object):
+    """Wraps the stepCallback of a minimizer continuing an interrupted run (see pprofit --resume).
+
+  The first iteration of a resumed minimizer re-evaluates its starting point. The results of this
+  iteration are already stored in fitting_run.db and so are not passed to the wrapped callback."""
+
+    def __init__(self, stepCallback, skip=1):
+        """@param stepCallback Callable called with MinimizerResults, may be None.
+       @param skip Number of iterations whose results are discarded."""
+        self.stepCallback = stepCallback
+        self.skip = skip
+
+    def __call__(self, minimizerResults):
+        if self.skip > 0:
+            self.skip -= 1
+            return
+        if self.stepCallback:
+            self.stepCallback(minimizerResults)
+
+
 @total_ordering
 class MinimizerResults(object):
     """Container for the results obtained from an iteration of a minimizer"""
@@ -7,7 +7,10 @@ import inspyred
 
 from atsim.pro_fit.variables import BoundedVariableBaseClass
 from atsim.pro_fit.variables import VariableException
-from ._inspyred_common import _EvolutionaryComputationMinimizerBaseClass
+from ._inspyred_common import (
+    _EvolutionaryComputationMinimizerBaseClass,
+    EVALUATION_MODES,
+)
 
 import atsim.pro_fit.cfg
 
@@ -35,6 +38,8 @@ class DEAMinimizer(object):
         gaussian_mean,
         gaussian_stdev,
         max_iterations,
+        evaluation_mode="synchronous",
+        max_in_flight=None,
     ):
 
         # Configure the terminator
@@ -55,6 +60,8 @@ class DEAMinimizer(object):
             dea,
             population_size,
             initial_population,
+            evaluation_mode=evaluation_mode,
+            max_in_flight=max_in_flight,
             num_selected=num_selected,
             tournament_size=tournament_size,
             crossover_rate=crossover_rate,
@@ -67,6 +74,9 @@ class DEAMinimizer(object):
     def minimize(self, merit):
         return self._minimizer.minimize(merit)
 
+    def resume(self, resumeState):
+        self._minimizer.resume(resumeState)
+
     def _setStepCallBack(self, callback):
         self._minimizer.stepCallback = callback
 
@@ -91,6 +101,8 @@ class DEAMinimizer(object):
         gaussian_mean,
         gaussian_stdev,
         max_iterations,
+        evaluation_mode,
+        max_in_flight,
     ):
         population_factory = population(variables)
         initial_population = population_factory.population
@@ -110,6 +122,8 @@ class DEAMinimizer(object):
             gaussian_mean,
             gaussian_stdev,
             max_iterations,
+            evaluation_mode,
+            max_in_flight,
         )
 
         return minimizer
@@ -157,6 +171,13 @@ class DEAMinimizer(object):
             "max_iterations",
             bounds=(1, sys.maxsize),
             default=1000,
+        ).add_choices_option(
+            "evaluation_mode",
+            "evaluation_mode",
+            EVALUATION_MODES,
+            default="synchronous",
+        ).add_int_option(
+            "max_in_flight", "max_in_flight", bounds=(1, sys.maxsize)
         )
 
         atsim.pro_fit.cfg.add_initial_population_options(cfgparse)
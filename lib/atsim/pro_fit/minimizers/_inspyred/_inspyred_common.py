@@ -1,11 +1,16 @@
+import collections.abc
+import copy
+import logging
 import math
 
 import inspyred
 import gevent
 
-from .._common import MinimizerResults
+from .._common import MinimizerResults, ResumeStepCallback
+from ..population_generators import Predefined_Initial_Population
 
 from atsim.pro_fit._util import MultiCallback
+from atsim.pro_fit.merit import AsynchronousMerit
 
 from atsim.pro_fit.exceptions import ConfigException
 
@@ -14,12 +19,14 @@ from atsim.pro_fit.variables import BoundedVariableBaseClass
 # Monkey patch the collections module imported by inspyred 
 # Iterable and Sequence we moved from collections to collections.abc
 # after python 3.10.
-import collections.abc
 inspyred.ec.ec.collections.Iterable = collections.abc.Iterable
 inspyred.ec.ec.collections.Sequence = collections.abc.Sequence
 
 
 
+EVALUATION_MODES = ["synchronous", "asynchronous"]
+
+
 class Bounder(BoundedVariableBaseClass):
     """Inspyred bounder populated from Variables instance"""
 
@@ -75,23 +82,32 @@ class Evaluator(object):
         self._merit = merit
 
     def __call__(self, candidates, args):
-        variables = [
-            self._initialVariables.createUpdated(c) for c in candidates
-        ]
+        variables = self.candidatesToVariables(candidates)
         meritVals, candidateJobList = self._merit.calculate(variables, True)
 
         fitnessJobList = []
         for mv, cj in zip(meritVals, candidateJobList):
-            if not math.isnan(mv):
-                fj = FitnessJob(mv)
-                fj.merit = mv
-                fj.candidateJobTuple = cj
-                fitnessJobList.append(fj)
-            else:
-                fitnessJobList.append(None)
+            fitnessJobList.append(self.fitnessJob(mv, cj))
 
         return fitnessJobList
 
+    def candidatesToVariables(self, candidates):
+        """@param candidates List of inspyred candidates (lists of fitting variable values).
+       @return List of Variables instances"""
+        return self._initialVariables.createUpdatedPopulation(candidates)
+
+    @staticmethod
+    def fitnessJob(meritValue, candidateJobTuple):
+        """@param meritValue Merit value for candidate
+       @param candidateJobTuple (CANDIDATE, JOB_LIST) tuple for candidate
+       @return FitnessJob or None if meritValue is NaN"""
+        if math.isnan(meritValue):
+            return None
+        fj = FitnessJob(meritValue)
+        fj.merit = meritValue
+        fj.candidateJobTuple = candidateJobTuple
+        return fj
+
 
 class FitnessJob(float):
     """Need way of passing job information, fitness and candidates intact through inspyred.
@@ -142,6 +158,298 @@ class Observer(object):
             self.bestMinimizerResults = minimizerResults
 
 
+class _BreedingEvent(object):
+    """Offspring created by a single round of selection and variation during asynchronous evolution"""
+
+    def __init__(self, parents, offspring_cs):
+        self.parents = parents
+        self.offspring_cs = offspring_cs
+        self.fitness = [None] * len(offspring_cs)
+        self.remaining = len(offspring_cs)
+
+
+class _AsynchronousEvolution(object):
+    """Asynchronous, steady-state counterpart of inspyred.ec.EvolutionaryComputation.evolve().
+
+  Rather than evaluating a generation's offspring together and waiting for the slowest of them, candidates are
+  evaluated through atsim.pro_fit.merit.AsynchronousMerit and up to maxInFlight candidates are kept running at
+  any one time. Offspring are bred from the current population using the selector and variators of the wrapped
+  evolutionary computation. Once every offspring of a breeding event has been evaluated, they are passed to the
+  replacer, migrator, archiver and observers in the same way as one generation of evolve(). New offspring are then
+  bred to fill the free slots."""
+
+    _logger = logging.getLogger(__name__).getChild("_AsynchronousEvolution")
+
+    def __init__(self, evolutionaryComputation, evaluator, maxInFlight):
+        """@param evolutionaryComputation inspyred.ec.EvolutionaryComputation providing the evolutionary operators.
+       @param evaluator Evaluator instance, used to convert candidates to Variables and merit values to fitness.
+       @param maxInFlight Maximum number of candidates evaluated concurrently."""
+        self._ec = evolutionaryComputation
+        self._evaluator = evaluator
+        self._maxInFlight = maxInFlight
+        self._asyncMerit = None
+        self._tickets = {}
+
+    def evolve(
+        self,
+        generator,
+        merit,
+        pop_size=100,
+        seeds=None,
+        maximize=True,
+        bounder=None,
+        **args
+    ):
+        """Perform the evolution.
+
+    @param generator Inspyred generator.
+    @param merit atsim.pro_fit.merit.Merit instance.
+    @param pop_size Population size.
+    @param seeds Candidates to include in initial population.
+    @param maximize Boolean value stating use of maximization.
+    @param bounder Function used to bound candidate solutions.
+    @param args Dictionary of keyword arguments passed to the evolutionary operators.
+    @return Final population."""
+        ec = self._ec
+        ec._kwargs = args
+        ec._kwargs["_ec"] = ec
+
+        if seeds is None:
+            seeds = []
+        if bounder is None:
+            bounder = inspyred.ec.Bounder()
+
+        ec.termination_cause = None
+        ec.generator = generator
+        ec.bounder = bounder
+        ec.maximize = maximize
+        ec.population = []
+        ec.archive = []
+        ec.num_evaluations = 0
+        ec.num_generations = 0
+
+        initial_cs = copy.copy(seeds)
+        for _i in range(max(pop_size - len(seeds), 0)):
+            initial_cs.append(generator(random=ec._random, args=ec._kwargs))
+
+        self._asyncMerit = AsynchronousMerit(merit)
+        try:
+            self._evaluateInitialPopulation(initial_cs)
+            self._observe()
+            while not ec._should_terminate(
+                list(ec.population), ec.num_generations, ec.num_evaluations
+            ):
+                self._fill()
+                completed = self._asyncMerit.next_completed()
+                self._candidateCompleted(completed)
+        finally:
+            self._asyncMerit.close()
+            self._tickets.clear()
+        return ec.population
+
+    def _evaluateInitialPopulation(self, initial_cs):
+        ec = self._ec
+        tickets = self._submit(initial_cs)
+        fitness = {}
+        for completed in self._asyncMerit:
+            fitness[completed.ticket] = self._evaluator.fitnessJob(
+                completed.meritValue, completed.candidateJobPair
+            )
+
+        for ticket, cs in zip(tickets, initial_cs):
+            fit = fitness[ticket]
+            if fit is not None:
+                ind = inspyred.ec.Individual(cs, maximize=ec.maximize)
+                ind.fitness = fit
+                ec.population.append(ind)
+            else:
+                self._logger.warning(
+                    "excluding candidate %s because fitness received as None",
+                    cs,
+                )
+        ec.num_evaluations = len(initial_cs)
+        ec.archive = ec.archiver(
+            random=ec._random,
+            population=list(ec.population),
+            archive=list(ec.archive),
+            args=ec._kwargs,
+        )
+
+    def _submit(self, candidates):
+        variables = self._evaluator.candidatesToVariables(candidates)
+        return self._asyncMerit.submit(variables)
+
+    def _observe(self):
+        ec = self._ec
+        if isinstance(ec.observer, collections.abc.Iterable):
+            observers = ec.observer
+        else:
+            observers = [ec.observer]
+        for obs in observers:
+            obs(
+                population=list(ec.population),
+                num_generations=ec.num_generations,
+                num_evaluations=ec.num_evaluations,
+                args=ec._kwargs,
+            )
+
+    def _variators(self):
+        if isinstance(self._ec.variator, collections.abc.Iterable):
+            return self._ec.variator
+        return [self._ec.variator]
+
+    def _fill(self):
+        """Breed and submit offspring until maxInFlight candidates are being evaluated"""
+        ec = self._ec
+        while self._asyncMerit.outstanding < self._maxInFlight:
+            if not ec.population:
+                if not self._asyncMerit.outstanding:
+                    raise inspyred.ec.EvolutionExit(
+                        "Population is empty, no candidates could be evaluated"
+                    )
+                return
+            parents = ec.selector(
+                random=ec._random, population=list(ec.population), args=ec._kwargs
+            )
+            offspring_cs = [copy.deepcopy(i.candidate) for i in parents]
+            for op in self._variators():
+                offspring_cs = op(
+                    random=ec._random, candidates=offspring_cs, args=ec._kwargs
+                )
+            if not offspring_cs:
+                return
+            event = _BreedingEvent(parents, offspring_cs)
+            for i, ticket in enumerate(self._submit(offspring_cs)):
+                self._tickets[ticket] = (event, i)
+
+    def _candidateCompleted(self, completed):
+        ec = self._ec
+        event, idx = self._tickets.pop(completed.ticket)
+        event.fitness[idx] = self._evaluator.fitnessJob(
+            completed.meritValue, completed.candidateJobPair
+        )
+        event.remaining -= 1
+        if event.remaining:
+            return
+
+        offspring = []
+        for cs, fit in zip(event.offspring_cs, event.fitness):
+            if fit is not None:
+                off = inspyred.ec.Individual(cs, maximize=ec.maximize)
+                off.fitness = fit
+                offspring.append(off)
+            else:
+                self._logger.warning(
+                    "excluding candidate %s because fitness received as None",
+                    cs,
+                )
+        ec.num_evaluations += len(event.offspring_cs)
+
+        # Parents recorded at breeding time may since have been replaced by other offspring.
+        # Compare against the current population instead (required for simulated_annealing_replacement).
+        parents = list(ec.population)[: len(event.parents)]
+        ec.population = ec.replacer(
+            random=ec._random,
+            population=ec.population,
+            parents=parents,
+            offspring=offspring,
+            args=ec._kwargs,
+        )
+        ec.population = ec.migrator(
+            random=ec._random, population=ec.population, args=ec._kwargs
+        )
+        ec.archive = ec.archiver(
+            random=ec._random,
+            archive=ec.archive,
+            population=list(ec.population),
+            args=ec._kwargs,
+        )
+        ec.num_generations += 1
+        self._observe()
+
+
+class _AsynchronousSwarm(_AsynchronousEvolution):
+    """Asynchronous counterpart of inspyred.swarm.PSO.evolve().
+
+  Each particle is moved as soon as the evaluation of its previous position completes, using the current
+  personal and neighbourhood bests. One generation is counted each time population size evaluations have
+  completed."""
+
+    def __init__(self, evolutionaryComputation, evaluator):
+        super(_AsynchronousSwarm, self).__init__(
+            evolutionaryComputation, evaluator, None
+        )
+        self._completedSinceObserve = 0
+
+    def _fill(self):
+        ec = self._ec
+        if self._tickets or not ec.population:
+            return
+        ec._previous_population = ec.population[:]
+        for i in range(len(ec.population)):
+            self._moveParticle(i)
+
+    def _moveParticle(self, i):
+        ec = self._ec
+        args = ec._kwargs
+        inertia = args.setdefault("inertia", 0.5)
+        cognitive_rate = args.setdefault("cognitive_rate", 2.1)
+        social_rate = args.setdefault("social_rate", 2.1)
+        random = ec._random
+
+        x = ec.population[i]
+        xprev = ec._previous_population[i]
+        pbest = ec.archive[i]
+        hood = list(ec.topology(random, ec.archive, args))[i]
+        nbest = max(hood)
+
+        particle = []
+        for xi, xpi, pbi, nbi in zip(
+            x.candidate, xprev.candidate, pbest.candidate, nbest.candidate
+        ):
+            value = (
+                xi
+                + inertia * (xi - xpi)
+                + cognitive_rate * random.random() * (pbi - xi)
+                + social_rate * random.random() * (nbi - xi)
+            )
+            particle.append(value)
+        particle = ec.bounder(particle, args)
+        (ticket,) = self._submit([particle])
+        self._tickets[ticket] = (particle, i)
+
+    def _candidateCompleted(self, completed):
+        ec = self._ec
+        particle, i = self._tickets.pop(completed.ticket)
+        fit = self._evaluator.fitnessJob(
+            completed.meritValue, completed.candidateJobPair
+        )
+        ec.num_evaluations += 1
+        if fit is not None:
+            ind = inspyred.ec.Individual(particle, maximize=ec.maximize)
+            ind.fitness = fit
+            ec._previous_population[i] = ec.population[i]
+            ec.population[i] = ind
+            if not ind < ec.archive[i]:
+                ec.archive[i] = ind
+        else:
+            self._logger.warning(
+                "particle %s not moved because fitness received as None",
+                particle,
+            )
+
+        self._completedSinceObserve += 1
+        if self._completedSinceObserve >= len(ec.population):
+            self._completedSinceObserve = 0
+            ec.num_generations += 1
+            self._observe()
+
+        if not ec._should_terminate(
+            list(ec.population), ec.num_generations, ec.num_evaluations
+        ):
+            self._moveParticle(i)
+
+
 class _EvolutionaryComputationMinimizerBaseClass(object):
     """Base class for fittingTool minimizers that wrap minimizers based on inspyred.ec.EvolutionaryComputation."""
 
@@ -154,6 +462,8 @@ class _EvolutionaryComputationMinimizerBaseClass(object):
         evolutionaryComputation,
         populationSize,
         initial_population,
+        evaluation_mode="synchronous",
+        max_in_flight=None,
         **args
     ):
         """@param generator UniformGenerator object from atsim.pro_fit.minimizers.population_generators.
@@ -161,17 +471,46 @@ class _EvolutionaryComputationMinimizerBaseClass(object):
                 Note: the evaluator, bounder and generator of the evolutionaryComputation are overwritten by this class.
        @param populationSize Size of population used for evolutionary computation.
        @param initial_population Seed the minimizer with initial population (from atsim.pro_fit.minimizers.population_generators)
+       @param evaluation_mode If "synchronous" each generation is evaluated using Merit.calculate(). If "asynchronous"
+                candidates are evaluated as a steady-state, see _AsynchronousEvolution.
+       @param max_in_flight Maximum number of candidates evaluated at once in "asynchronous" mode. Defaults to populationSize.
        @param args Dictionary containing optional keyword arguments that should be passed to the evolutionaryComputation.evolve method"""
         assert initial_population.population_size <= populationSize
+        assert evaluation_mode in EVALUATION_MODES
         self._generator = generator
         self._initialVariables = generator.initialVariables
         self._ec = evolutionaryComputation
         self._args = args
         self._populationSize = populationSize
         self._initial_population = initial_population
+        self._evaluationMode = evaluation_mode
+        if max_in_flight is None:
+            max_in_flight = populationSize
+        self._maxInFlight = max_in_flight
+        self._resumed = False
         self.stepCallback = None
         self._greenlet = gevent.Greenlet()
 
+    def resume(self, resumeState):
+        """Continue an interrupted run rather than starting from the initial population.
+
+    The population of the last iteration recorded in the run's database seeds the minimizer and
+    the number of generations remaining is reduced by the number of iterations already completed.
+
+    @param resumeState atsim.pro_fit.db.ResumeState describing the interrupted run."""
+        population = [
+            candidate.variables
+            for candidate in resumeState.population[: self._populationSize]
+        ]
+        self._initial_population = Predefined_Initial_Population(
+            self._initialVariables, from_dict=population
+        )
+        if "max_generations" in self._args:
+            self._args["max_generations"] = max(
+                self._args["max_generations"] - resumeState.iterationNumber, 0
+            )
+        self._resumed = True
+
     def minimize(self, merit):
         """Perform minimization.
 
@@ -193,7 +532,11 @@ class _EvolutionaryComputationMinimizerBaseClass(object):
         bounder = Bounder(self._initialVariables)
         # generator = UniformGenerator(self._initialVariables)
         evaluator = Evaluator(self._initialVariables, merit)
-        observer = Observer(self.stepCallback)
+        meritEvaluator = evaluator
+        stepCallback = self.stepCallback
+        if self._resumed:
+            stepCallback = ResumeStepCallback(stepCallback)
+        observer = Observer(stepCallback)
         origobserver = observer
 
         # Respect any callbacks already registered on the inspyred minimizer
@@ -220,7 +563,15 @@ class _EvolutionaryComputationMinimizerBaseClass(object):
         seeds = self._initial_population.generate_candidates()
         seeds = seeds.tolist()
 
-        self._ec.evolve(
+        if self._evaluationMode == "asynchronous":
+            # Candidates are evaluated directly through merit, evaluators registered
+            # on the inspyred object are not called.
+            evolve = self._asynchronousEvolution(meritEvaluator).evolve
+            evaluator = merit
+        else:
+            evolve = self._ec.evolve
+
+        evolve(
             self._generator,
             evaluator,
             bounder=bounder,
@@ -231,5 +582,10 @@ class _EvolutionaryComputationMinimizerBaseClass(object):
         )
         return origobserver.bestMinimizerResults
 
+    def _asynchronousEvolution(self, evaluator):
+        if isinstance(self._ec, inspyred.swarm.PSO):
+            return _AsynchronousSwarm(self._ec, evaluator)
+        return _AsynchronousEvolution(self._ec, evaluator, self._maxInFlight)
+
     def stopMinimizer(self):
         self._greenlet.kill()
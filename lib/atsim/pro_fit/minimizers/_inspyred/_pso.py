@@ -8,6 +8,7 @@ from atsim.pro_fit.variables import BoundedVariableBaseClass
 from ._inspyred_common import (
     _EvolutionaryComputationMinimizerBaseClass,
     Population_To_Generator_Adapter,
+    EVALUATION_MODES,
 )
 
 
@@ -39,6 +40,7 @@ class Particle_SwarmMinimizer(object):
         cognitive_rate,
         social_rate,
         max_iterations,
+        evaluation_mode="synchronous",
     ):
         # Configure the terminator
         terminator = inspyred.ec.terminators.generation_termination
@@ -58,6 +60,7 @@ class Particle_SwarmMinimizer(object):
             pso,
             population_size,
             initial_population,
+            evaluation_mode=evaluation_mode,
             inertia=inertia,
             cognitive_rate=cognitive_rate,
             social_rate=social_rate,
@@ -67,6 +70,9 @@ class Particle_SwarmMinimizer(object):
     def minimize(self, merit):
         return self._minimizer.minimize(merit)
 
+    def resume(self, resumeState):
+        self._minimizer.resume(resumeState)
+
     def _setStepCallBack(self, callback):
         self._minimizer.stepCallback = callback
 
@@ -90,6 +96,7 @@ class Particle_SwarmMinimizer(object):
         social_rate,
         cognitive_rate,
         max_iterations,
+        evaluation_mode,
     ):
         topology = {
             "star": inspyred.swarm.topologies.star_topology,
@@ -111,6 +118,7 @@ class Particle_SwarmMinimizer(object):
             cognitive_rate,
             social_rate,
             max_iterations,
+            evaluation_mode,
         )
         return minimizer
 
@@ -189,6 +197,11 @@ class Particle_SwarmMinimizer(object):
             default=1000,
         ).add_random_seed_option(
             "random_seed", "random_seed"
+        ).add_choices_option(
+            "evaluation_mode",
+            "evaluation_mode",
+            EVALUATION_MODES,
+            default="synchronous",
         )
 
         cfgparse.add_constraint(cls._ring_topology_constraint)
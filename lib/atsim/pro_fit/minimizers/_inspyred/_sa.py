@@ -7,9 +7,15 @@ from atsim.pro_fit.variables import VariableException
 from ._inspyred_common import (
     _EvolutionaryComputationMinimizerBaseClass,
     Population_To_Generator_Adapter,
+    EVALUATION_MODES,
 )
 
-from atsim.pro_fit.cfg import int_convert, float_convert, random_seed_option
+from atsim.pro_fit.cfg import (
+    int_convert,
+    float_convert,
+    random_seed_option,
+    choice_convert,
+)
 
 from atsim.pro_fit.minimizers.population_generators import (
     Predefined_Initial_Population,
@@ -23,6 +29,10 @@ from atsim.pro_fit.variables import Variables
 
 from .._common import MinimizerResults
 
+# Number of trial moves evaluated concurrently in asynchronous mode when max_in_flight isn't specified.
+# SA has a population of one, so unlike the other population minimizers the population size can't be used.
+DEFAULT_MAX_IN_FLIGHT = 4
+
 
 class _TemperatureVariableReporter(object):
     """Wraps stepcallback, injecting temperature from bounder into minimizer results"""
@@ -169,6 +179,8 @@ class Simulated_AnnealingMinimizer(object):
             sa,
             1,
             initial_population,
+            evaluation_mode=args.get("evaluation_mode", "synchronous"),
+            max_in_flight=args.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT),
             temperature=args["temperature"],
             cooling_rate=args["cooling_rate"],
             mutation_rate=args["mutation_rate"],
@@ -180,6 +192,17 @@ class Simulated_AnnealingMinimizer(object):
     def minimize(self, merit):
         return self._minimizer.minimize(merit)
 
+    def resume(self, resumeState):
+        """Continue interrupted run. The temperature is reduced to the value reached by
+    the last iteration recorded in the run's database.
+
+    @param resumeState atsim.pro_fit.db.ResumeState describing the interrupted run."""
+        args = self._minimizer._args
+        args["temperature"] *= args["cooling_rate"] ** resumeState.iterationNumber
+        if self._tbound:
+            self._tbound.minimizerTemperature = args["temperature"]
+        self._minimizer.resume(resumeState)
+
     def _setStepCallBack(self, callback):
         if self._tbound:
             callback = self._tbound.getStepCallBack(callback)
@@ -264,6 +287,22 @@ class Simulated_AnnealingMinimizer(object):
                     "Simulated_Annealing minimizer", "random_seed"
                 ),
             ),
+            evaluation_mode=(
+                "synchronous",
+                choice_convert(
+                    "Simulated_Annealing minimizer",
+                    "evaluation_mode",
+                    EVALUATION_MODES,
+                ),
+            ),
+            max_in_flight=(
+                DEFAULT_MAX_IN_FLIGHT,
+                int_convert(
+                    "Simulated_Annealing minimizer",
+                    "max_in_flight",
+                    (1, float("inf")),
+                ),
+            ),
         )
 
         # Throw if cfgdict has any keys not in defaults
@@ -2,9 +2,14 @@ import logging
 
 import gevent
 import mystic
+import mystic.scipy_optimize
+import numpy
 
 from atsim.pro_fit.exceptions import ConfigException
-from ._common import MinimizerResults
+from atsim.pro_fit.merit import AsynchronousMerit
+from ._common import MinimizerResults, ResumeStepCallback
+
+EVALUATION_MODES = ["synchronous", "asynchronous"]
 
 
 class _NelderMeadMeritCallback(object):
@@ -47,19 +52,25 @@ class _NelderMeadStepMonitor(object):
 
     _logger = logging.getLogger("atsim.pro_fit.minimizers.NelderMeadMinimizer")
 
-    def __init__(self, stepCallback, merit):
+    def __init__(self, stepCallback, merit, registerWithMerit=True):
+        """@param stepCallback NelderMeadMinimizer.stepCallback
+       @param merit Merit instance
+       @param registerWithMerit If False, afterMerit is not registered with merit and must be called
+                  explicitly for each merit value used by the minimizer."""
         self.bestSolution = None
         self.merit = merit
         self.stepCallback = stepCallback
 
-        # Register a memoizing callback with the merit function so we can access Job instances at each step.
-        self._logger.debug(
-            "Registering _NelderMeadMeritCallback with merit object"
-        )
-
         afterMerit = _NelderMeadMeritCallback()
-        self.merit.afterMerit.append(afterMerit)
         self.afterMerit = afterMerit
+        self._registered = registerWithMerit
+
+        if registerWithMerit:
+            # Register a memoizing callback with the merit function so we can access Job instances at each step.
+            self._logger.debug(
+                "Registering _NelderMeadMeritCallback with merit object"
+            )
+            self.merit.afterMerit.append(afterMerit)
 
     def __call__(self, x, fval):
         self._logger.debug(
@@ -84,17 +95,176 @@ class _NelderMeadStepMonitor(object):
 
     def cleanUp(self):
         # Unregister callback from the merit function
-        del self.merit.afterMerit[self.merit.afterMerit.index(self.afterMerit)]
+        if self._registered:
+            del self.merit.afterMerit[
+                self.merit.afterMerit.index(self.afterMerit)
+            ]
+
+
+class _SpeculativeCost(object):
+    """Cost function used by the NelderMeadMinimizer in asynchronous mode.
+
+  Points that the simplex might need are submitted in advance through speculate() and
+  are evaluated concurrently using AsynchronousMerit. When the solver then asks for the merit value
+  of one of these points, its result is awaited rather than being calculated from scratch. Unrequested
+  points are discarded when the next set of points is speculated.
+
+  As speculative merit values may never be used by the solver, stepevaluator.afterMerit is only
+  called for values returned to the solver."""
+
+    _logger = logging.getLogger("atsim.pro_fit.minimizers.NelderMeadMinimizer")
+
+    def __init__(self, argsToVariables, merit, stepevaluator):
+        """@param argsToVariables Callable converting solver parameter vector to Variables instance.
+       @param merit Merit instance.
+       @param stepevaluator _NelderMeadStepMonitor (created with registerWithMerit=False)"""
+        self._argsToVariables = argsToVariables
+        self._asyncMerit = AsynchronousMerit(merit)
+        self._stepevaluator = stepevaluator
+        self._tickets = {}
+        self._results = {}
+        self._triggers = {}
+
+    @staticmethod
+    def _key(x):
+        return tuple(float(v) for v in x)
+
+    def _submit(self, points):
+        points = [p for p in points if not self._key(p) in self._tickets]
+        if not points:
+            return
+        candidates = [self._argsToVariables(p) for p in points]
+        for p, ticket in zip(points, self._asyncMerit.submit(candidates)):
+            self._tickets[self._key(p)] = ticket
+
+    def speculate(self, points, triggers=None):
+        """Submit points for evaluation, discarding those speculated previously.
+
+    @param points List of parameter vectors.
+    @param triggers Dictionary, keyed by parameter vector tuple, of point lists to be submitted
+      if and when the solver requests the merit value for the key."""
+        unused = [
+            t for t in self._tickets.values() if not t in self._results
+        ]
+        self._asyncMerit.discard(unused)
+        self._tickets.clear()
+        self._results.clear()
+        self._triggers = dict(triggers or {})
+        self._logger.debug("Speculatively evaluating %d points", len(points))
+        self._submit(points)
+
+    def __call__(self, x):
+        key = self._key(x)
+        if not key in self._tickets:
+            self._submit([x] + self._triggers.pop(key, []))
+        ticket = self._tickets[key]
+
+        wanted = set(self._tickets.values())
+        while not ticket in self._results:
+            completed = self._asyncMerit.next_completed()
+            if completed.ticket in wanted:
+                self._results[completed.ticket] = completed
+
+        completed = self._results[ticket]
+        self._stepevaluator.afterMerit(
+            [completed.meritValue], [completed.candidateJobPair]
+        )
+        return completed.meritValue
+
+    def close(self):
+        self._asyncMerit.close()
+
+
+class _SpeculativeNelderMeadSimplexSolver(
+    mystic.scipy_optimize.NelderMeadSimplexSolver
+):
+    """NelderMeadSimplexSolver that passes the points an iteration could evaluate to a
+  _SpeculativeCost before the iteration runs, allowing them to be evaluated concurrently:
+
+    * generation 1: the vertices of the initial simplex.
+    * later generations: the reflection, expansion and (inside and outside) contraction points.
+      The shrink points are submitted together if the solver requests the first of them."""
+
+    def __init__(self, dim, speculativeCost):
+        super(_SpeculativeNelderMeadSimplexSolver, self).__init__(dim)
+        self._speculativeCost = speculativeCost
+
+    def _constraintsFunction(self):
+        # Mirror the constraints applied to points by NelderMeadSimplexSolver before they reach the cost function.
+        if self._useStrictRange:
+            from mystic.constraints import and_
+
+            return and_(
+                self._constraints,
+                self._strictbounds,
+                onfail=self._strictbounds,
+            )
+        return self._constraints
+
+    def _Step(self, cost=None, ExtraArgs=None, **kwds):
+        # Generation 0 only evaluates the initial point. The points calculated below assume the
+        # non-adaptive algorithm parameters, for which NelderMeadMinimizer does not provide an option.
+        if len(self._stepmon) and not self.adaptive:
+            constraints = self._constraintsFunction()
+
+            def constrain(points):
+                return [
+                    numpy.asarray(constraints(p[:]), dtype="float64")
+                    for p in points
+                ]
+
+            triggers = {}
+            if not self.generations:
+                points = constrain(self._initialSimplexPoints())
+            else:
+                points, shrinkPoints = self._iterationPoints(constraints)
+                points = constrain(points)
+                shrinkPoints = constrain(shrinkPoints)
+                if shrinkPoints:
+                    key = self._speculativeCost._key(shrinkPoints[0])
+                    triggers[key] = shrinkPoints[1:]
+            self._speculativeCost.speculate(points, triggers)
+        return super(_SpeculativeNelderMeadSimplexSolver, self)._Step(
+            cost, ExtraArgs, **kwds
+        )
+
+    def _initialSimplexPoints(self):
+        val = self._setSimplexWithinRangeBoundary(self.radius)
+        x0 = self.population[0]
+        points = []
+        for k in range(len(x0)):
+            y = numpy.array(x0, copy=True)
+            y[k] = val[k]
+            points.append(y)
+        return points
+
+    def _iterationPoints(self, constraints):
+        rho, chi, psi, sigma = 1, 2, 0.5, 0.5
+        sim = numpy.array(self.population, dtype="float64")
+        N = len(sim[0])
+        sim[0] = numpy.asarray(constraints(sim[0]), dtype="float64")
+        xbar = numpy.add.reduce(sim[:-1], 0) / N
+        xr = (1 + rho) * xbar - rho * sim[-1]
+        xe = (1 + rho * chi) * xbar - rho * chi * sim[-1]
+        xc = (1 + psi * rho) * xbar - psi * rho * sim[-1]
+        xcc = (1 - psi) * xbar + psi * sim[-1]
+        shrinkPoints = [
+            sim[0] + sigma * (sim[j] - sim[0]) for j in range(1, N + 1)
+        ]
+        return [xr, xe, xc, xcc], shrinkPoints
 
 
 class _NelderMeadInner(object):
-    def __init__(self, variables, maxiter, xtol, ftol):
+    def __init__(
+        self, variables, maxiter, xtol, ftol, evaluationMode="synchronous"
+    ):
         """Create simplex minimizer
 
     @param variables Initial parameter set (atomsscript.fitting.variables.Variables)
     @param maxiter Maximum number of minimization max_iterations
     @param xtol Variable value convergence criterion
-    @param ftol Merit function convergence criterion"""
+    @param ftol Merit function convergence criterion
+    @param evaluationMode "synchronous" or "asynchronous" (speculative evaluation, see _SpeculativeCost)"""
         self._logger = logging.getLogger(__name__).getChild(
             "NelderMeadMinimizer"
         )
@@ -102,11 +272,27 @@ class _NelderMeadInner(object):
         self._maxIter = maxiter
         self._xtol = xtol
         self._ftol = ftol
+        self._evaluationMode = evaluationMode
         self._logger.debug(
             "Created NelderMeadMinimizer. initial Variables = %s, maximum iterations = %s, xtol = %s, ftol = %s"
             % (self._initialVariables, self._maxIter, self._xtol, self._ftol)
         )
 
+    def resume(self, resumeState):
+        """Restart the simplex from the best candidate of an interrupted run.
+
+    @param resumeState atsim.pro_fit.db.ResumeState describing the interrupted run."""
+        if resumeState.best is not None:
+            fitValues = [
+                resumeState.best.variables[k]
+                for k in self._initialVariables.fitKeys
+            ]
+            self._initialVariables = self._initialVariables.createUpdated(
+                fitValues
+            )
+        if self._maxIter is not None:
+            self._maxIter = max(self._maxIter - resumeState.iterationNumber, 0)
+
     def _initialArgs(self):
         return self._initialVariables.fitValues
 
@@ -145,11 +331,19 @@ class _NelderMeadInner(object):
     @param stepevaluator _NelderMeadStepMonitor called every step, used to monitor minimizer progress.
     @return MinimizerResults for candidate solution population containing best merit value."""
         self._logger.info("Starting minimisation.")
-        optifunc = self._meritWrapper(merit)
         initargs = self._initialArgs()
-        minimizer = mystic.scipy_optimize.NelderMeadSimplexSolver(
-            len(initargs)
-        )
+        if self._evaluationMode == "asynchronous":
+            optifunc = _SpeculativeCost(
+                self._argsToVariables, merit, stepevaluator
+            )
+            minimizer = _SpeculativeNelderMeadSimplexSolver(
+                len(initargs), optifunc
+            )
+        else:
+            optifunc = self._meritWrapper(merit)
+            minimizer = mystic.scipy_optimize.NelderMeadSimplexSolver(
+                len(initargs)
+            )
         minimizer.SetInitialPoints(initargs)
         minimizer.SetEvaluationLimits(maxiter=self._maxIter)
         bounds = self._getBounds()
@@ -159,12 +353,16 @@ class _NelderMeadInner(object):
             minimizer.SetStrictRanges(lowbounds, upperbounds)
 
         minimizer.SetGenerationMonitor(_MysticCallbackMonitor(stepevaluator))
-        minimizer.Solve(
-            optifunc,
-            termination=mystic.termination.CandidateRelativeTolerance(
-                self._xtol, self._ftol
-            ),
-        )
+        try:
+            minimizer.Solve(
+                optifunc,
+                termination=mystic.termination.CandidateRelativeTolerance(
+                    self._xtol, self._ftol
+                ),
+            )
+        finally:
+            if hasattr(optifunc, "close"):
+                optifunc.close()
 
         # Extract final optimization merit value and variables from the step monitor.
         return stepevaluator.bestSolution
@@ -188,23 +386,48 @@ class NelderMeadMinimizer(object):
 
   """
 
-    def __init__(self, variables, maxiter, xtol, ftol):
+    def __init__(
+        self, variables, maxiter, xtol, ftol, evaluation_mode="synchronous"
+    ):
         """Create simplex minimizer
 
     @param variables Initial parameter set (atomsscript.fitting.variables.Variables)
     @param maxiter Maximum number of minimization max_iterations
     @param xtol Variable value convergence criterion
-    @param ftol Merit function convergence criterion"""
-        self._inner = _NelderMeadInner(variables, maxiter, xtol, ftol)
+    @param ftol Merit function convergence criterion
+    @param evaluation_mode If "asynchronous" the points each iteration might need are evaluated concurrently."""
+        self._evaluationMode = evaluation_mode
+        self._inner = _NelderMeadInner(
+            variables, maxiter, xtol, ftol, evaluation_mode
+        )
         self._greenlet = gevent.Greenlet()
+        self._resumed = False
         self.stepCallback = None
 
+    def resume(self, resumeState):
+        """Continue an interrupted run.
+
+    fitting_run.db records the best point of each iteration rather than the complete simplex.
+    The simplex is therefore rebuilt around the best candidate of the interrupted run and the
+    maximum number of iterations is reduced by the number of iterations already completed.
+
+    @param resumeState atsim.pro_fit.db.ResumeState describing the interrupted run."""
+        self._inner.resume(resumeState)
+        self._resumed = True
+
     def minimize(self, merit):
         """Perform minimization.
 
     @param merit atsim.pro_fit.merit.Merit instance used to calculate merit value.
     @return MinimizerResults for candidate solution population containing best merit value."""
-        stepevaluator = _NelderMeadStepMonitor(self.stepCallback, merit)
+        stepCallback = self.stepCallback
+        if self._resumed:
+            stepCallback = ResumeStepCallback(stepCallback)
+        stepevaluator = _NelderMeadStepMonitor(
+            stepCallback,
+            merit,
+            registerWithMerit=self._evaluationMode == "synchronous",
+        )
         self._greenlet = gevent.Greenlet(
             self._inner.minimize, merit, stepevaluator
         )
@@ -228,7 +451,12 @@ class NelderMeadMinimizer(object):
         del configitems["type"]
 
         allowedfields = set(
-            ["value_tolerance", "function_tolerance", "max_iterations"]
+            [
+                "value_tolerance",
+                "function_tolerance",
+                "max_iterations",
+                "evaluation_mode",
+            ]
         )
         actualfields = set(configitems.keys())
 
@@ -270,6 +498,15 @@ class NelderMeadMinimizer(object):
         else:
             max_iterations = None
 
+        evaluation_mode = configitems.get(
+            "evaluation_mode", "synchronous"
+        ).strip()
+        if not evaluation_mode in EVALUATION_MODES:
+            raise ConfigException(
+                "Minimizer NelderMead 'evaluation_mode' should be one of %s: %s"
+                % (", ".join(EVALUATION_MODES), evaluation_mode)
+            )
+
         try:
             import mystic  # noqa
         except ImportError:
@@ -278,7 +515,11 @@ class NelderMeadMinimizer(object):
             )
 
         return NelderMeadMinimizer(
-            variables, max_iterations, value_tolerance, function_tolerance
+            variables,
+            max_iterations,
+            value_tolerance,
+            function_tolerance,
+            evaluation_mode,
         )
 
     def stopMinimizer(self):
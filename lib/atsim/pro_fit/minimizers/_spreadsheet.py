@@ -43,7 +43,7 @@ class SpreadsheetMinimizer(object):
 
     def _minimize(self, merit):
         minimizerResults = None
-        for i, candidates in enumerate(self._batchIt()):
+        for i, candidates in enumerate(self._prefetchingBatchIt(merit)):
             self._logger.info("Minimizer iteration: %d" % i)
             meritValues, candidateJobPairs = merit.calculate(
                 candidates, returnCandidateJobPairs=True
@@ -81,6 +81,27 @@ class SpreadsheetMinimizer(object):
                 )
         return minimizerResults
 
+    def _prefetchingBatchIt(self, merit):
+        """Iterate over batches. If merit supports prefetch() (see atsim.pro_fit.merit.PipelinedMerit)
+        the batch following the one being yielded is passed to it, allowing its jobs to be created
+        and submitted whilst the current batch is being run."""
+        prefetch = getattr(merit, "prefetch", None)
+        if prefetch is None:
+            for batch in self._batchIt():
+                yield batch
+            return
+
+        batches = self._batchIt()
+        current = next(batches, None)
+        if current is not None:
+            prefetch(current)
+        while current is not None:
+            following = next(batches, None)
+            if following is not None:
+                prefetch(following)
+            yield current
+            current = following
+
     def _batchIt(self):
         batch = []
         for variables in self._rowIterator:
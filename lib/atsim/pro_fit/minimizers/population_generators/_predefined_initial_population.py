@@ -116,7 +116,7 @@ class Predefined_Initial_Population(object):
                 )
             )
 
-        if not np.alltrue(np.isfinite(data)):
+        if not np.all(np.isfinite(data)):
             raise VariableException(
                 "Some values were not finite when creating population."
             )
@@ -1,3 +1,6 @@
+import gevent
+import gevent.queue
+import gevent.threadpool
 import sqlalchemy as sa
 import tabulate
 
@@ -13,6 +16,12 @@ _retryLogger = logging.getLogger(
     "atsim.pro_fit.reporters.SQLiteReporter.retry"
 )
 
+# Values accepted by the [FittingRun] 'reporter_mode' option.
+REPORTER_MODES = ["synchronous", "batched"]
+
+# Number of generations BatchedSQLiteReporter may hold before calls to the reporter block.
+DEFAULT_QUEUE_SIZE = 8
+
 
 class SQLiteReporter(object):
     """Minimizer stepCallback that places results in a sqlite database"""
@@ -26,27 +35,34 @@ class SQLiteReporter(object):
         return SQLiteReporter._metadata
 
     def __init__(
-        self, dbfilename, initialVariables, calculatedVariables, title=None
+        self,
+        dbfilename,
+        initialVariables,
+        calculatedVariables,
+        title=None,
+        resume=False,
     ):
         """@param dbfilename Filename for database, None if in-memory database is to be used.
        @param initialVariables Variables instance containing variables before minimization.
-       @param calculatedVariables CalculatedVariables instance used by Merit object."""
+       @param calculatedVariables CalculatedVariables instance used by Merit object.
+       @param title Title of fitting run.
+       @param resume If True, the database already contains an interrupted run. Its status is set back to
+                'Running' and iteration numbering continues from the last iteration it contains."""
         self.dbfilename = dbfilename
         self._createDatabase()
-        with self._saengine.begin() as conn:
-            self._populateVariableKeysTable(
-                conn, initialVariables, calculatedVariables
-            )
-            self._populateStatus(conn, title)
-        self.iterationNum = 0
+        if resume:
+            self.iterationNum = self._resumeStatus()
+        else:
+            with self._saengine.begin() as conn:
+                self._populateVariableKeysTable(
+                    conn, initialVariables, calculatedVariables
+                )
+                self._populateStatus(conn, title)
+            self.iterationNum = 0
 
     def _createDatabase(self):
         """Create sqlite database"""
-
-        if self.dbfilename:
-            engine = sa.create_engine("sqlite:///%s" % self.dbfilename)
-        else:
-            engine = sa.create_engine("sqlite:///:memory:")
+        engine = self._createEngine()
 
         # Create database tables
         metadata = self._metadata
@@ -55,6 +71,17 @@ class SQLiteReporter(object):
         self._saengine = engine
         self._metadata = metadata
 
+    @property
+    def engine(self):
+        """sqlalchemy.Engine for reporter's database"""
+        return self._saengine
+
+    def _createEngine(self):
+        """@return sqlalchemy.Engine for reporter's database"""
+        if self.dbfilename:
+            return sa.create_engine("sqlite:///%s" % self.dbfilename)
+        return sa.create_engine("sqlite:///:memory:")
+
     def _populateVariableKeysTable(self, conn, variables, calculatedVariables):
         """Populate the variable_keys table with initial variables"""
         variableKeysTable = self._metadata.tables["variable_keys"]
@@ -104,6 +131,24 @@ class SQLiteReporter(object):
         insert = table.insert()
         conn.execute(insert, dict(runstatus="Running", title=title))
 
+    def _resumeStatus(self):
+        """Set status of an existing run back to 'Running'
+
+    @return Number of the iteration following the last iteration in the database"""
+        statusTable = self._metadata.tables["runstatus"]
+        candidateTable = self._metadata.tables["candidates"]
+        with self._saengine.begin() as conn:
+            conn.execute(
+                statusTable.update().where(statusTable.c.id == 1),
+                dict(runstatus="Running"),
+            )
+            lastIteration = conn.execute(
+                sa.select([sa.func.max(candidateTable.c.iteration_number)])
+            ).scalar()
+        if lastIteration is None:
+            return 0
+        return lastIteration + 1
+
     def _createCandidateRecord(
         self, conn, iterationNum, candidateNum, meritValue
     ):
@@ -133,7 +178,6 @@ class SQLiteReporter(object):
         insert = evaluatorTable.insert()
 
         # Create insertion dictionaries
-        staticValues = {"job_id": jobId}
         insertValues = []
         for evaluator in job.evaluatorRecords:
             for record in evaluator:
@@ -141,18 +185,7 @@ class SQLiteReporter(object):
                     errorId = self._insertEvaluatorError(conn, record)
                 else:
                     errorId = None
-
-                v = dict(
-                    evaluator_name=record.evaluatorName,
-                    value_name=record.name,
-                    expected_value=record.expectedValue,
-                    extracted_value=record.extractedValue,
-                    weight=record.weight,
-                    merit_value=record.meritValue,
-                    evaluatorerror_id=errorId,
-                )
-                v.update(staticValues)
-                insertValues.append(v)
+                insertValues.append(_evaluatedRow(jobId, record, errorId))
         conn.execute(insert, insertValues)
 
     def _insertEvaluatorError(self, conn, record):
@@ -217,6 +250,213 @@ class SQLiteReporter(object):
         self.iterationNum += 1
 
 
+def _evaluatedRow(jobId, record, errorId):
+    """@return Dictionary describing row of 'evaluated' table for evaluator record"""
+    return dict(
+        evaluator_name=record.evaluatorName,
+        value_name=record.name,
+        expected_value=record.expectedValue,
+        extracted_value=record.extractedValue,
+        weight=record.weight,
+        merit_value=record.meritValue,
+        evaluatorerror_id=errorId,
+        job_id=jobId,
+    )
+
+
+def _setWALPragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+class BatchedSQLiteReporter(SQLiteReporter):
+    """SQLiteReporter that writes each generation using bulk inserts on a dedicated writer thread.
+
+  Row ids for the `candidates`, `jobs` and `evaluatorerror` tables are allocated by the reporter, this
+  allows all the rows of a generation to be written in a single transaction with one `executemany`
+  per table. The database is placed in WAL mode with `synchronous=NORMAL`.
+
+  Calling the reporter converts the minimizer results to rows and places them on a bounded queue,
+  it only blocks if `queueSize` generations are already waiting to be written. `finished()` must be
+  called to make sure all generations have been written before the program exits."""
+
+    _logger = logging.getLogger("atsim.pro_fit.reporters.BatchedSQLiteReporter")
+
+    # Tables in the order they are written (ensures foreign keys refer to existing rows).
+    _tableOrder = ["evaluatorerror", "candidates", "variables", "jobs", "evaluated"]
+
+    def __init__(
+        self,
+        dbfilename,
+        initialVariables,
+        calculatedVariables,
+        title=None,
+        queueSize=DEFAULT_QUEUE_SIZE,
+        resume=False,
+    ):
+        """@param dbfilename Filename for database, None if in-memory database is to be used.
+       @param initialVariables Variables instance containing variables before minimization.
+       @param calculatedVariables CalculatedVariables instance used by Merit object.
+       @param title Title of fitting run.
+       @param queueSize Maximum number of generations waiting to be written before calls to reporter block.
+       @param resume If True, continue the interrupted run contained in the database (see SQLiteReporter)."""
+        super().__init__(
+            dbfilename, initialVariables, calculatedVariables, title, resume
+        )
+        self._nextIds = self._initialIds()
+        self.exception = None
+        self._queue = gevent.queue.JoinableQueue(maxsize=queueSize)
+        self._threadpool = gevent.threadpool.ThreadPool(1)
+        self._writer = gevent.spawn(self._writeLoop)
+        self._writer.name = "BatchedSQLiteReporter_writer-{}".format(
+            self._writer.name
+        )
+
+    def _createEngine(self):
+        # Connections are used from the writer thread as well as the thread that created the reporter.
+        connect_args = dict(check_same_thread=False)
+        if self.dbfilename:
+            engine = sa.create_engine(
+                "sqlite:///%s" % self.dbfilename, connect_args=connect_args
+            )
+        else:
+            # Share a single in-memory database between threads.
+            engine = sa.create_engine(
+                "sqlite://",
+                connect_args=connect_args,
+                poolclass=sa.pool.StaticPool,
+            )
+        sa.event.listen(engine, "connect", _setWALPragmas)
+        return engine
+
+    def _initialIds(self):
+        nextIds = {}
+        with self._saengine.connect() as conn:
+            for tablename in ["candidates", "jobs", "evaluatorerror"]:
+                table = self._metadata.tables[tablename]
+                maxId = conn.execute(sa.select([sa.func.max(table.c.id)])).scalar()
+                nextIds[tablename] = (maxId or 0) + 1
+        return nextIds
+
+    def _allocateId(self, tablename):
+        rowId = self._nextIds[tablename]
+        self._nextIds[tablename] = rowId + 1
+        return rowId
+
+    def _createBatch(self, minimizerResults):
+        """Convert minimizer results into rows for each database table.
+
+    @param minimizerResults MinimizerResults for a generation.
+    @return Dictionary with table names as keys and lists of row dictionaries as values."""
+        batch = dict([(tablename, []) for tablename in self._tableOrder])
+        meritValues = minimizerResults.meritValues
+        jobLists = minimizerResults.candidateJobList
+        for (candidateNum, (mval, (variables, joblist))) in enumerate(
+            zip(meritValues, jobLists)
+        ):
+            candidateId = self._allocateId("candidates")
+            batch["candidates"].append(
+                dict(
+                    id=candidateId,
+                    iteration_number=self.iterationNum,
+                    candidate_number=candidateNum,
+                    merit_value=mval,
+                )
+            )
+
+            batch["variables"].extend(
+                [
+                    dict(candidate_id=candidateId, variable_name=k, value=v)
+                    for (k, v) in variables.variablePairs
+                ]
+            )
+
+            for job in joblist:
+                jobId = self._allocateId("jobs")
+                batch["jobs"].append(
+                    dict(id=jobId, job_name=job.name, candidate_id=candidateId)
+                )
+                for evaluator in job.evaluatorRecords:
+                    for record in evaluator:
+                        errorId = None
+                        if record.errorFlag:
+                            errorId = self._allocateId("evaluatorerror")
+                            batch["evaluatorerror"].append(
+                                dict(id=errorId, msg=str(record.exception))
+                            )
+                        batch["evaluated"].append(
+                            _evaluatedRow(jobId, record, errorId)
+                        )
+        return batch
+
+    def _insertBatch(self, batch):
+        """Write batch to database, this is called on the writer thread"""
+        with self._saengine.begin() as conn:
+            for tablename in self._tableOrder:
+                rows = batch[tablename]
+                if rows:
+                    conn.execute(self._metadata.tables[tablename].insert(), rows)
+
+    @retry_backoff(
+        [sa.exc.OperationalError],
+        initialSleep=1,
+        maxSleep=60,
+        logger=_retryLogger,
+    )
+    def _writeBatch(self, batch):
+        self._threadpool.apply(self._insertBatch, (batch,))
+
+    def _writeLoop(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self.exception is None:
+                    self._writeBatch(batch)
+            except Exception as e:
+                self._logger.exception("Error writing to database")
+                self.exception = e
+            finally:
+                self._queue.task_done()
+
+    def _raiseWriterException(self):
+        if self.exception is not None:
+            raise self.exception
+
+    def __call__(self, minimizerResults):
+        self._raiseWriterException()
+        batch = self._createBatch(minimizerResults)
+        self._queue.put(batch)
+        self.iterationNum += 1
+
+    def flush(self):
+        """Block until all generations passed to the reporter have been written to the database.
+
+    @raises Exception If an error occurred when writing to the database, it is re-raised here."""
+        self._queue.join()
+        self._raiseWriterException()
+
+    def close(self):
+        """Write outstanding generations then stop the writer thread"""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+        self._threadpool.kill()
+        self._raiseWriterException()
+
+    def finished(self, error=False):
+        """Write outstanding generations, stop the writer thread and update status table"""
+        try:
+            self.close()
+        finally:
+            super().finished(error)
+
+
 class LogReporter(object):
     """Minimizer stepCallback that logs the best-ever variables and merit-value to
   a given logging.Logger. Logs at info level."""
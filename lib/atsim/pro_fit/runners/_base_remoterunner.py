@@ -23,6 +23,9 @@ import execnet
 
 EXECNET_TERM_TIMEOUT = 10
 
+# Name of directory, within runner's remote directory, holding de-duplicated uploaded file contents.
+BLOB_STORE_DIRECTORY = ".blobstore"
+
 
 class RemoteRunnerCloseThreadBase(gevent.Greenlet):
     def __init__(self, runner):
@@ -480,6 +483,7 @@ class BaseRemoteRunner(object):
             self._remotePath,
             self._numUpload,
             "_".join([self.name, "upload"]),
+            blob_store=posixpath.join(self._remotePath, BLOB_STORE_DIRECTORY),
         )
         return channel
 
@@ -610,7 +614,11 @@ class BaseRemoteRunner(object):
         os.mkdir(destPath)
 
         downloadDirectory = filetransfer.DownloadDirectory(
-            self._downloadChannel, remotePath, destPath, downloadHandler
+            self._downloadChannel,
+            remotePath,
+            destPath,
+            downloadHandler,
+            job.downloadFilter,
         )
         return downloadHandler.finishEvent, downloadDirectory
 
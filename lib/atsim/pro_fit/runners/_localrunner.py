@@ -1,5 +1,6 @@
 from atsim.pro_fit.exceptions import ConfigException
 from atsim.pro_fit import _execnet
+from atsim.pro_fit._util import FILE_LINK_MODES, link_tree
 from ._localrunner_batch import LocalRunnerBatch
 from ._run_remote_client import RunChannel, RunClient
 from ._base_remoterunner import BaseRemoteRunner, RemoteRunnerCloseThreadBase
@@ -10,7 +11,6 @@ from gevent.event import Event
 
 import logging
 import os
-import shutil
 import tempfile
 
 
@@ -20,9 +20,11 @@ EXECNET_TERM_TIMEOUT = 10
 class _CopyDirectory(object):
     _logger = logging.getLogger(__name__).getChild("_CopyDirectory")
 
-    def __init__(self, source_path, dest_path):
+    def __init__(self, source_path, dest_path, link_mode="copy", ignore=None):
         self.source_path = os.path.abspath(source_path)
         self.dest_path = os.path.abspath(dest_path)
+        self.link_mode = link_mode
+        self.ignore = ignore
         self.exception = None
         self._greenlet = None
         self.finishEvent = gevent.event.Event()
@@ -30,15 +32,18 @@ class _CopyDirectory(object):
     def doCopy(self, non_blocking=False):
         logger = self._logger.getChild("doCopy")
         logger.debug(
-            "Copying files from '%s' to '%s'.",
+            "Copying files from '%s' to '%s' (link_mode = '%s').",
             self.source_path,
             self.dest_path,
+            self.link_mode,
         )
 
         self.finishEvent.clear()
 
         def copyfiles():
-            shutil.copytree(self.source_path, self.dest_path)
+            link_tree(
+                self.source_path, self.dest_path, self.link_mode, self.ignore
+            )
 
         def after(grn):
             self.exception = grn.exception
@@ -72,6 +77,17 @@ class _CopyDirectoryDown(_CopyDirectory):
 
     _logger = logging.getLogger(__name__).getChild("_CopyDirectoryDown")
 
+    def __init__(
+        self, source_path, dest_path, link_mode="copy", download_filter=None
+    ):
+        # The runner's temporary directory is removed after download, symlinks into it would be left dangling.
+        if link_mode == "symlink":
+            link_mode = "copy"
+        ignore = None
+        if download_filter is not None:
+            ignore = download_filter.copytree_ignore(source_path)
+        super().__init__(source_path, dest_path, link_mode, ignore)
+
     def download(self, non_blocking=False):
         return self.doCopy()
 
@@ -98,13 +114,15 @@ class InnerLocalRunner(BaseRemoteRunner):
 
     _logger = logging.getLogger(__name__).getChild("InnerLocalRunner")
 
-    def __init__(self, name, nprocesses):
+    def __init__(self, name, nprocesses, file_link_mode="copy"):
         """Instantiate LocalRunner.
 
     Args:
         name (str): Name of this runner.
-        nprocesses (int): Number of processes that can be run in parallel by this runner"""
+        nprocesses (int): Number of processes that can be run in parallel by this runner
+        file_link_mode (str): How job files are transferred to and from the runner's working directory, one of 'copy', 'hardlink', 'reflink' or 'symlink'."""
         self._nprocesses = nprocesses
+        self._file_link_mode = file_link_mode
         super().__init__(name, None)
 
     def makeExecnetGateway(self, url, identityfile, extra_ssh_options):
@@ -153,6 +171,7 @@ class InnerLocalRunner(BaseRemoteRunner):
     Handler is an object with the following properties:
       * `workingDirectory`: gives the path of this job on the remote machine.
       * `callback`: Unary callback,  accepting throwable as its argument, which is called on completion of the job.
+      * `worker` (optional): Worker description (see `RunClient.runCommand()`), if present the job is run by a persistent worker process.
 
     Args:
         handler (object): See above
@@ -161,17 +180,24 @@ class InnerLocalRunner(BaseRemoteRunner):
         (_run_remote_client.JobRecord): Record supporting kill() method.
     """
         return self._runClient.runCommand(
-            handler.workingDirectory, handler.callback
+            handler.workingDirectory,
+            handler.callback,
+            getattr(handler, "worker", None),
         )
 
     def createUploadDirectory(self, job):
         # Copy from job.sourcePath to batch directory
-        upload = _CopyDirectoryUp(job.sourcePath, job.remotePath)
+        upload = _CopyDirectoryUp(
+            job.sourcePath, job.remotePath, self._file_link_mode
+        )
         return upload.finishEvent, upload
 
     def createDownloadDirectory(self, job):
         download = _CopyDirectoryDown(
-            os.path.join(job.remotePath, "job_files"), job.outputPath
+            os.path.join(job.remotePath, "job_files"),
+            job.outputPath,
+            self._file_link_mode,
+            job.downloadFilter,
         )
         return download.finishEvent, download
 
@@ -179,14 +205,16 @@ class InnerLocalRunner(BaseRemoteRunner):
 class LocalRunner(object):
     """Runner that uses SSH to run jobs in parallel on a remote machine"""
 
-    def __init__(self, name, nprocesses):
+    def __init__(self, name, nprocesses, file_link_mode="copy"):
         """Instantiate LocalRunner.
 
     Args:
         name (str): Name of this runner.
         nprocesses (int): Number of processes that can be run in parallel by this runner
+        file_link_mode (str): One of 'copy', 'hardlink', 'reflink' or 'symlink'. Determines how job files are placed
+          in the runner's working directory (and how output is retrieved). Files are copied if a link cannot be made.
     """
-        self._inner = InnerLocalRunner(name, nprocesses)
+        self._inner = InnerLocalRunner(name, nprocesses, file_link_mode)
 
     def runBatch(self, jobs):
         """Run job batch and return a job future that can be joined.
@@ -221,7 +249,7 @@ class LocalRunner(object):
 
     @staticmethod
     def createFromConfig(runnerName, fitRootPath, cfgitems):
-        allowedkeywords = set(["nprocesses", "type"])
+        allowedkeywords = set(["nprocesses", "type", "file_link_mode"])
         cfgdict = dict(cfgitems)
 
         for k in cfgdict.keys():
@@ -246,4 +274,12 @@ class LocalRunner(object):
                 % nprocesses,
             )
 
-        return LocalRunner(runnerName, nprocesses)
+        file_link_mode = cfgdict.get("file_link_mode", "copy").strip()
+        if not file_link_mode in FILE_LINK_MODES:
+            raise LocalRunner._makeException(
+                runnerName,
+                "Unknown value for 'file_link_mode' configuration item '%s', should be one of: %s"
+                % (file_link_mode, ", ".join(FILE_LINK_MODES)),
+            )
+
+        return LocalRunner(runnerName, nprocesses, file_link_mode)
@@ -4,8 +4,12 @@ import traceback
 import uuid
 import os
 import subprocess
+import threading
 import re
 
+# INCLUDE "_queueing_system_completion.py.inc"
+# INCLUDE "_queueing_system_script.py.inc"
+
 
 torque_jobid_regex = re.compile(r"^([0-9]+?)(-([0-9]+?))?(\.(.*?))?(@.*?)?$")
 
@@ -19,7 +23,7 @@ def torque_split(pbs_id):
     return jobnum, subjob, host
 
 
-def submission_script(pbsConfig, jobs, header_lines):
+def submission_script(pbsConfig, jobs, header_lines, jobs_per_task=1):
     try:
         # For python 3
         import shlex
@@ -46,18 +50,31 @@ def submission_script(pbsConfig, jobs, header_lines):
         "",
     ]
 
+    tasks = bundle_jobs(jobs, jobs_per_task)
     jobs = [quote(j) for j in jobs]
-    singleJob = not len(jobs) > 1
+    singleJob = not len(tasks) > 1
 
     if singleJob:
         lines = []
     else:
-        arrayjobline = "#PBS %s 1-%d" % (pbsConfig.arrayFlag, len(jobs))
+        arrayjobline = "#PBS %s 1-%d" % (pbsConfig.arrayFlag, len(tasks))
         lines = [arrayjobline]
 
     lines.extend(std_headerlines)
     lines.extend(header_lines)
 
+    if jobs_per_task > 1:
+        if singleJob:
+            arrayIDVariable = None
+        else:
+            arrayIDVariable = pbsConfig.arrayIDVariable
+        lines.extend(
+            bundled_task_lines(
+                tasks, quote, arrayIDVariable, "${PBS_NP:-${NCPUS:-1}}"
+            )
+        )
+        return os.linesep.join(lines)
+
     if not singleJob:
         for i, j in enumerate(jobs):
             jobnum = i + 1
@@ -79,6 +96,7 @@ def submission_script(pbsConfig, jobs, header_lines):
         "function finish {",
         '        mkdir "$JOB_DIR/output"',
         '        cp -r *  "$JOB_DIR/output/"',
+        '        touch "$JOB_DIR/%s"' % COMPLETION_MARKER,
         '        if [ -n "$CLEANTMP" ];then',
         '          rm -rf "$TMPDIR"',
         "        fi",
@@ -182,7 +200,7 @@ def qdel(pbs_ids, force, pbsConfig):
         raise QDelException(err.strip())
 
 
-def qdel_handler(channel, pbsConfig, channel_id, msg):
+def qdel_handler(channel, pbsConfig, channel_id, msg, watcher=None):
     try:
         pbs_ids = msg["job_ids"]
     except KeyError:
@@ -208,6 +226,9 @@ def qdel_handler(channel, pbsConfig, channel_id, msg):
         error(channel, str(e), channel_id=channel_id)
         return
 
+    if watcher is not None:
+        watcher.discard(pbs_ids)
+
     transid_send(channel, msg, "QDEL", channel_id=channel_id, job_ids=pbs_ids)
 
 
@@ -234,7 +255,7 @@ def qrls_handler(channel, pbsConfig, channel_id, msg):
     transid_send(channel, msg, "QRLS", channel_id=channel_id, job_id=pbs_id)
 
 
-def qsub_handler(channel, pbsConfig, channel_id, msg):
+def qsub_handler(channel, pbsConfig, channel_id, msg, watcher=None):
     try:
         jobs = msg["jobs"]
     except KeyError:
@@ -257,7 +278,8 @@ def qsub_handler(channel, pbsConfig, channel_id, msg):
             return
 
     header_lines = msg.get("header_lines", [])
-    script = submission_script(pbsConfig, jobs, header_lines)
+    jobs_per_task = msg.get("jobs_per_task", 1)
+    script = submission_script(pbsConfig, jobs, header_lines, jobs_per_task)
 
     p = subprocess.Popen(
         ["qsub", "-h"],
@@ -272,9 +294,11 @@ def qsub_handler(channel, pbsConfig, channel_id, msg):
         error(channel, err.strip(), channel_id=channel_id)
         return
 
-    transid_send(
-        channel, msg, "QSUB", channel_id=channel_id, job_id=output.strip()
-    )
+    job_id = output.strip()
+    if watcher is not None:
+        watcher.add(job_id, jobs)
+
+    transid_send(channel, msg, "QSUB", channel_id=channel_id, job_id=job_id)
 
 
 def qselect_handler(channel, pbsConfig, channel_id, msg):
@@ -389,12 +413,6 @@ def error(channel, reason, **kwargs):
 
 def remote_exec(channel):
     channel_id = None
-    msghandlers = dict(
-        QSUB=qsub_handler,
-        QSELECT=qselect_handler,
-        QRLS=qrls_handler,
-        QDEL=qdel_handler,
-    )
 
     msg = channel.receive()
 
@@ -430,31 +448,50 @@ def remote_exec(channel):
         pbs_identify=dict(pbsConfig._asdict()),
     )
 
-    for msg in channel:
+    watcher = CompletionWatcher(channel, channel_id)
+    watcher.start()
 
-        if msg is None:
-            return
+    def qsub_watched(*args):
+        return qsub_handler(*args, watcher=watcher)
 
-        try:
-            mtype = msg["msg"]
-        except:
-            error(
-                channel,
-                "malformed message, could not find 'msg' field in %s" % msg,
-                channel_id=channel_id,
-            )
-            continue
-        try:
-            handler = msghandlers[mtype]
-        except KeyError:
-            error(
-                channel,
-                "unknown message type '%s' for message: %s" % (mtype, msg),
-                channel_id=channel_id,
-            )
-            continue
+    def qdel_watched(*args):
+        return qdel_handler(*args, watcher=watcher)
 
-        handler(channel, pbsConfig, channel_id, msg)
+    msghandlers = dict(
+        QSUB=qsub_watched,
+        QSELECT=qselect_handler,
+        QRLS=qrls_handler,
+        QDEL=qdel_watched,
+    )
+
+    try:
+        for msg in channel:
+
+            if msg is None:
+                return
+
+            try:
+                mtype = msg["msg"]
+            except:
+                error(
+                    channel,
+                    "malformed message, could not find 'msg' field in %s" % msg,
+                    channel_id=channel_id,
+                )
+                continue
+            try:
+                handler = msghandlers[mtype]
+            except KeyError:
+                error(
+                    channel,
+                    "unknown message type '%s' for message: %s" % (mtype, msg),
+                    channel_id=channel_id,
+                )
+                continue
+
+            handler(channel, pbsConfig, channel_id, msg)
+    finally:
+        watcher.stop()
 
 
 if __name__ == "__channelexec__":
@@ -11,9 +11,11 @@ This is currently defined as follows:
 Submit jobs to queue.
 
 * Message Format:
-  + `{'msg' : 'QSUB', 'jobs' : JOB_LIST}`
+  + `{'msg' : 'QSUB', 'jobs' : JOB_LIST, 'jobs_per_task' : JOBS_PER_TASK}`
   + Where:
     - `JOB_LIST` : List of paths to be run through queue. Each path must refer to a `runjob` file.
+    - `JOBS_PER_TASK` : Optional (default 1). Number of jobs run by each task of the array job.
+      Jobs within a task are run concurrently, up to the number of cores allocated to the task.
   + Jobs are submitted in a held state. In the case of very short jobs, this gives time for 
     client to register the job's existence and maintain consistent state. Once identified by polling
     the queueing system using the `QSELECT` message, the job is released by sending a `QRLS` message.
@@ -58,6 +60,19 @@ Terminate jobs.
      - `JOB_IDS` : List of queueing system IDs to be terminated.
      - `FORCE_FLAG` : The force attribute is optional. If set to `True`, then
                       jobs will be hard killed.
+
+`JOB_COMPLETE`:
+
+Pushed by the server, without a request, once every job of a submitted array job has
+finished and copied back its output.
+
+* Message Format:
+  + `{'msg' : 'JOB_COMPLETE', 'job_id' : JOB_ID, 'channel_id' : CHANNEL_ID}`
+  + Where:
+    - `JOB_ID` : Queueing system ID, as returned in the `QSUB` response.
+* Notes:
+  + Jobs that die without running their submission script's exit trap never produce this message.
+    Their completion is detected when they are no longer listed in `QSELECT` responses.
 """
 
 from atsim.pro_fit._channel import AbstractChannel
@@ -72,8 +87,17 @@ import gevent
 from gevent.event import Event
 
 import itertools
+import time
 import uuid
 
+# When the queueing system's state is unchanged, the interval between QSELECT requests is
+# doubled, up to this multiple of the client's `pollEvery`. Completion of jobs is normally pushed
+# by the server (`JOB_COMPLETE`), polling acts as a fallback.
+POLL_BACKOFF_LIMIT = 4
+
+# Interval (seconds) before the QSELECT request made following job submission.
+SUBMIT_POLL_INTERVAL = 1.0
+
 
 class QueueingSystemJobKilledException(JobKilledException):
     pass
@@ -157,7 +181,7 @@ class _QSubCallback(QueueingSystemStateListenerAdapter):
         except:
             return
 
-        transaction_id = msg["transaction_id"]
+        transaction_id = msg.get("transaction_id", None)
 
         if not (transaction_id == self.transaction_id and mtype == "QSUB"):
             return
@@ -165,6 +189,9 @@ class _QSubCallback(QueueingSystemStateListenerAdapter):
         jobId = msg["job_id"]
         self.jobRecord.jobId = jobId
 
+        # Job is held until seen by QSELECT, poll soon rather than waiting for the next scheduled poll.
+        self.qsClient._qsState.requestPoll()
+
         # Register event handlers with the qsState object, the first to trigger QRLS, then second to indicate job completion.
         self.qsClient._qsState.listeners.append(self)
         if self.qsClient._qsState.hasJobId(jobId):
@@ -245,16 +272,21 @@ class QueueingSystemClient(object):
         self._channel.callback.append(self._cbregister)
         self._closed = False
 
-    def runJobs(self, jobList, callback, header_lines=None):
+    def runJobs(self, jobList, callback, header_lines=None, jobs_per_task=1):
         jr = QueueingSystemJobRecord(jobList, callback)
         transid = str(uuid.uuid4())
         qsubcallback = _QSubCallback(self, transid, jr)
         jr._qscallback = qsubcallback
         self._cbregister.append(qsubcallback)
-        self._qsub(transid, jobList, header_lines=header_lines)
+        self._qsub(
+            transid,
+            jobList,
+            header_lines=header_lines,
+            jobs_per_task=jobs_per_task,
+        )
         return jr
 
-    def _qsub(self, transId, jobList, header_lines=None):
+    def _qsub(self, transId, jobList, header_lines=None, jobs_per_task=1):
         msg = {
             "msg": "QSUB",
             "transaction_id": transId,
@@ -265,6 +297,9 @@ class QueueingSystemClient(object):
         if header_lines:
             msg["header_lines"] = header_lines
 
+        if jobs_per_task > 1:
+            msg["jobs_per_task"] = jobs_per_task
+
         self.channel.send(msg)
 
     def _qrls(self, transId, jobId):
@@ -317,29 +352,49 @@ class _QueueingSystemStateQSelectCallback(object):
             return
 
         job_ids = msg.get("job_ids", [])
-        self._qsState._updateJobIds(job_ids)
+        self._qsState._qselectResponse(job_ids)
 
-        def qselect_later():
-            try:
-                self._qsState._qselect(self._transId)
-            except IOError:
-                pass
 
-        grn = gevent.spawn_later(self._qsState._pollEvery, qselect_later)
-        grn.name = "_QueueingSystemStateQSelectCallback-qselect_later-{}".format(
-            grn.name
-        )
+class _QueueingSystemStateCompletionCallback(object):
+    """Receives the `JOB_COMPLETE` messages pushed by the server"""
+
+    def __init__(self, qsState):
+        self._qsState = qsState
+
+    def __call__(self, msg):
+        try:
+            mtype = msg.get("msg", None)
+        except:
+            return
+
+        if mtype != "JOB_COMPLETE":
+            return
+
+        self._qsState._jobCompleted(msg.get("job_id", None))
 
 
 class QueueingSystemState(object):
     def __init__(self, qsChannel, pollEvery=10.0):
+        """Tracks the jobs known to the queueing system.
+
+    Args:
+      qsChannel (atsim.pro_fit._channel.AbstractChannel): Channel supporting protocol described in this module's comments.
+      pollEvery (float): Interval for QSELECT polling in seconds. Whilst the queueing system's state is unchanged
+        the interval is progressively increased up to `POLL_BACKOFF_LIMIT` times this value."""
         self._channel = qsChannel
         self._privatelisteners = []
         self._listeners = []
         self._privatelisteners.append(_AddRemoveListener(self._listeners))
         self._jobIds = set()
+        self._completedJobIds = set()
         self._pollEvery = pollEvery
+        self._pollInterval = pollEvery
+        self._pollRequested = False
+        self._pollGreenlet = None
+        self._nextPollTime = None
+        self._closed = False
         self._cb = None
+        self._completionCb = None
 
         # Register msg callback with the qsChannel
         self._registerChannelCallback()
@@ -348,6 +403,8 @@ class QueueingSystemState(object):
     def _registerChannelCallback(self):
         self._cb = _QueueingSystemStateQSelectCallback(self)
         self._channel.callback.append(self._cb)
+        self._completionCb = _QueueingSystemStateCompletionCallback(self)
+        self._channel.callback.append(self._completionCb)
 
     def _qselect(self, transId=None):
         msg = {"msg": "QSELECT", "channel_id": self._channel.channel_id}
@@ -357,15 +414,74 @@ class QueueingSystemState(object):
 
         self._channel.send(msg)
 
+    def _qselectLater(self):
+        self._pollGreenlet = None
+        self._nextPollTime = None
+        try:
+            self._qselect(self._cb._transId)
+        except IOError:
+            pass
+
+    def _schedulePoll(self, interval):
+        if self._closed:
+            return
+        self._nextPollTime = time.time() + interval
+        grn = gevent.spawn_later(interval, self._qselectLater)
+        grn.name = "QueueingSystemState-qselect_later-{}".format(grn.name)
+        self._pollGreenlet = grn
+
+    def _qselectResponse(self, jobIds):
+        changed = self._updateJobIds(jobIds)
+
+        if self._pollRequested:
+            self._pollRequested = False
+            interval = min(SUBMIT_POLL_INTERVAL, self._pollEvery)
+        elif changed:
+            interval = self._pollEvery
+        else:
+            interval = min(
+                2.0 * self._pollInterval, POLL_BACKOFF_LIMIT * self._pollEvery
+            )
+        self._pollInterval = interval
+        self._schedulePoll(interval)
+
+    def requestPoll(self):
+        """Make the next QSELECT request within `SUBMIT_POLL_INTERVAL` seconds"""
+        interval = min(SUBMIT_POLL_INTERVAL, self._pollEvery)
+        if self._pollGreenlet is None:
+            # QSELECT request is in progress, shorten interval once it is answered.
+            self._pollRequested = True
+            return
+
+        if self._nextPollTime - time.time() > interval:
+            self._pollGreenlet.kill(block=False)
+            self._pollInterval = interval
+            self._schedulePoll(interval)
+
+    def _jobCompleted(self, jobId):
+        """Called when server pushes completion of `jobId`"""
+        if jobId is None or jobId in self._completedJobIds:
+            return
+        self._completedJobIds.add(jobId)
+        self._setJobIds(self._jobIds - set([jobId]))
+
     def _updateJobIds(self, newJobIds):
-        oldJobIds = self._jobIds
         newJobIds = set(newJobIds)
 
+        # Jobs whose completion has been pushed may remain listed by the queueing system
+        # for a while, don't report them as running again.
+        self._completedJobIds &= newJobIds
+        return self._setJobIds(newJobIds - self._completedJobIds)
+
+    def _setJobIds(self, newJobIds):
+        oldJobIds = self._jobIds
         self._jobIds = newJobIds
 
         if oldJobIds != newJobIds:
             for l in list(self._allListeners):
                 l.jobsChanged(oldJobIds, newJobIds)
+            return True
+        return False
 
     @property
     def _allListeners(self):
@@ -379,8 +495,16 @@ class QueueingSystemState(object):
         return jobId in self._jobIds
 
     def close(self):
+        self._closed = True
+        if not self._pollGreenlet is None:
+            self._pollGreenlet.kill(block=False)
+            self._pollGreenlet = None
         if not self._cb is None:
             del self._channel.callback[self._channel.callback.index(self._cb)]
+        if not self._completionCb is None:
+            del self._channel.callback[
+                self._channel.callback.index(self._completionCb)
+            ]
 
 
 class _AddRemoveListener(QueueingSystemStateListenerAdapter):
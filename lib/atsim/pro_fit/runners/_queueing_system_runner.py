@@ -36,6 +36,7 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
         identityfile=None,
         extra_ssh_options=[],
         do_cleanup=True,
+        jobs_per_task=1,
     ):
         """Create runner.
 
@@ -46,7 +47,8 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
       qselect_poll_interval (float): Time interval (seconds) at which queueing system is queried to establish state of array jobs.
       identityfile (str) : Path to ssh private key file used to log into remote host (or None if system defaults are to be used).
       extra_ssh_options (list): List of strings giving any extra ssh configuration options.
-      do_cleanup (bool): If True perform file clean-up on queueing system submission host. If False leave temporary files on remote machine (for debugging)."""
+      do_cleanup (bool): If True perform file clean-up on queueing system submission host. If False leave temporary files on remote machine (for debugging).
+      jobs_per_task (int): Number of pprofit jobs run by each task of an array job."""
 
         self.header_include = []
         if not header_include is None:
@@ -54,6 +56,7 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
 
         self.qselect_poll_interval = qselect_poll_interval
         self.batch_size = batch_size
+        self.jobs_per_task = jobs_per_task
 
         logger = self._get_logger()
         logger.debug("Instantiating runner with following values:")
@@ -61,6 +64,7 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
         logger.debug("  * url = {}".format(url))
         logger.debug("  * header_include = {}".format(header_include))
         logger.debug("  * batch_size = {}".format(batch_size))
+        logger.debug("  * jobs_per_task = {}".format(jobs_per_task))
         logger.debug(
             "  * qselect_poll_interval = {}".format(qselect_poll_interval)
         )
@@ -111,7 +115,9 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
     def allowedConfigKeywords(cls):
         """Returns list of standard keywords accepted by parseConfig_* class methods"""
         kws = super(QueueingSystemRunnerBaseClass, cls).allowedConfigKeywords()
-        kws.extend(["header_include", "arraysize", "pollinterval"])
+        kws.extend(
+            ["header_include", "arraysize", "pollinterval", "jobs_per_task"]
+        )
         return kws
 
     @classmethod
@@ -178,6 +184,38 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
                 )
         return {"arraysize": arraysize}
 
+    @classmethod
+    def parseConfigItem_jobs_per_task(cls, runnerName, fitRootPath, cfgitems):
+        """Convenience method to provide consistent provision of `jobs_per_task` option in sub-classes.
+
+    Args:
+      runnerName (str) : Label identifying runner.
+      fitRootPath (str) : Path to directory containing 'fit.cfg'
+      cfgdict (list) : List of (key, value) pairs identifying relecant section of configuration file.
+
+    Returns:
+      dict: Dictionary `{ 'jobs_per_task' : VALUE}` where `VALUE` is value of `jobs_per_task` configuration option.
+            If option is not found, `VALUE` is 1.
+
+    Raises:
+      atsim.pro_fit.exceptions.ConfigException: thrown if configuration problem found."""
+        cfgdict = dict(cfgitems)
+        jobs_per_task = cfgdict.get("jobs_per_task", "1")
+        try:
+            jobs_per_task = int(jobs_per_task)
+        except ValueError:
+            raise ConfigException(
+                "Invalid numerical value for 'jobs_per_task' configuration option: %s"
+                % jobs_per_task
+            )
+
+        if not jobs_per_task >= 1:
+            raise ConfigException(
+                "Value of 'jobs_per_task' must >= 1. Value was %s"
+                % jobs_per_task
+            )
+        return {"jobs_per_task": jobs_per_task}
+
     @classmethod
     def parseConfigItem_pollinterval(
         cls, runnerName, fitRootPath, cfgitems, default=30.0
@@ -222,6 +260,7 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
     * `header_include` (str): contents of file specified by the `header_include` config item.
     * `arraysize` (int): size of bath arrays
     * `pollinterval` (float): time interval at which queue stat is polled.
+    * `jobs_per_task` (int): number of jobs run by each array task.
     * `do_cleanup` (bool): read from the `debug.disable_cleanup` configuration item.
 
     Args:
@@ -248,4 +287,9 @@ class QueueingSystemRunnerBaseClass(BaseRemoteRunner):
         option_dict.update(
             cls.parseConfigItem_pollinterval(runnerName, fitRootPath, cfgitems)
         )
+        option_dict.update(
+            cls.parseConfigItem_jobs_per_task(
+                runnerName, fitRootPath, cfgitems
+            )
+        )
         return option_dict
@@ -17,7 +17,9 @@ class QueueingSystemRunnerJobRecordException(Exception):
 
 
 class QueueingSystemRunnerJobRecord(object):
-    def __init__(self, name, batch_size, qs_client, header_include):
+    def __init__(
+        self, name, batch_size, qs_client, header_include, jobs_per_task=1
+    ):
         self.name = name
         self._qsclient = weakref.proxy(qs_client)
         self._batch_size = batch_size
@@ -25,6 +27,7 @@ class QueueingSystemRunnerJobRecord(object):
         self._qs_client_record = None
         self._qs_submit_event = Event()
         self._header_include = header_include
+        self._jobs_per_task = jobs_per_task
         self._jobId = None
 
     @property
@@ -71,7 +74,10 @@ class QueueingSystemRunnerJobRecord(object):
         callback.extend(handlers)
 
         qs_client_record = self._qsclient.runJobs(
-            joblist, callback, header_lines=self._header_include
+            joblist,
+            callback,
+            header_lines=self._header_include,
+            jobs_per_task=self._jobs_per_task,
         )
         self._qs_client_record = qs_client_record
 
@@ -107,6 +113,7 @@ class _ModifiedPathJob(object):
         self.sourcePath = job.sourcePath
         self.remotePath = job.remotePath
         self.outputPath = job.outputPath
+        self.downloadFilter = job.downloadFilter
 
     def setexception(self, exc):
         self._job.exception = exc
@@ -160,6 +167,7 @@ class QueueingSystemRunnerBatch(RunnerBatch):
             self.parentRunner.batch_size,
             self.qs_client,
             self._header_include,
+            self.parentRunner.jobs_per_task,
         )
         self._subBatchCount += 1
 
@@ -85,6 +85,7 @@ class InnerRemoteRunner(BaseRemoteRunner):
     Handler is an object with the following properties:
       * `workingDirectory`: gives the path of this job on the remote machine.
       * `callback`: Unary callback,  accepting throwable as its argument, which is called on completion of the job.
+      * `worker` (optional): Worker description (see `RunClient.runCommand()`), if present the job is run by a persistent worker process.
 
     Args:
         handler (object): See above
@@ -93,7 +94,9 @@ class InnerRemoteRunner(BaseRemoteRunner):
         (_run_remote_client.JobRecord): Record supporting kill() method.
     """
         return self._runClient.runCommand(
-            handler.workingDirectory, handler.callback
+            handler.workingDirectory,
+            handler.callback,
+            getattr(handler, "worker", None),
         )
 
 
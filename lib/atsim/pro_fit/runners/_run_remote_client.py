@@ -96,7 +96,7 @@ class RunClient(object):
         self._cbregister = CallbackRegister()
         self.channel.setcallback(self._cbregister)
 
-    def runCommand(self, workingDirectory, callback=None):
+    def runCommand(self, workingDirectory, callback=None, worker=None):
         """Executes `runjob` command in the given working directory.
 
     If a callback is specified, this will be invoked with any exception raised
@@ -109,12 +109,16 @@ class RunClient(object):
     Args:
         workingDirectory (TYPE): Description
         callback (None, optional): Description
+        worker (dict, optional): If specified, the job is run by a persistent worker process instead of
+          through `runjob`. Dictionary has either a `command` key giving an argument list to be executed
+          without a shell or an `entry_point` key (`module:function`) naming a Python callable that is
+          called, within the worker process, with the working directory as its argument.
 
     """
         self._logger.debug(
             "runCommand called for workingDirectory = '%s'", workingDirectory
         )
-        cbobj = self._registerCallback(workingDirectory, callback)
+        cbobj = self._registerCallback(workingDirectory, callback, worker)
         if callback is None:
             cbobj.finishEvent.wait()
             cbobj.raise_exception()
@@ -123,7 +127,7 @@ class RunClient(object):
             jobRecord = JobRecord(cbobj, self)
             return jobRecord
 
-    def _registerCallback(self, workingDirectory, callback):
+    def _registerCallback(self, workingDirectory, callback, worker=None):
         if callback is None:
             cbobj = RunJobCallback(
                 workingDirectory, _NullCallback, self._transid, self
@@ -133,6 +137,7 @@ class RunClient(object):
             cbobj = RunJobCallback(
                 workingDirectory, callback, self._transid, self
             )
+        cbobj.worker = worker
         self._submitJob(cbobj)
         return cbobj
 
@@ -143,13 +148,14 @@ class RunClient(object):
     def _submitJob(self, cbobj):
         cbobj.channel_id = self.channel.channel_id
         self._cbregister.append(cbobj)
-        self.channel.send(
-            {
-                "msg": "JOB_START",
-                "job_path": cbobj.workingDirectory,
-                "job_id": cbobj.trans_id,
-            }
-        )
+        msg = {
+            "msg": "JOB_START",
+            "job_path": cbobj.workingDirectory,
+            "job_id": cbobj.trans_id,
+        }
+        if cbobj.worker is not None:
+            msg["worker"] = cbobj.worker
+        self.channel.send(msg)
         gevent.sleep(0)
 
 
@@ -226,6 +232,7 @@ class RunJobCallback(object):
         self.active = True
         self.should_raise = False
         self.channel_id = None
+        self.worker = None
 
         self.pidSetEvent = gevent.event.Event()
         self._pid = None
@@ -2,6 +2,10 @@ import threading
 import subprocess
 import os
 import collections
+import select
+import signal
+import json
+import sys
 
 try:
     import queue
@@ -19,185 +23,527 @@ class Channel_Closed_Exception(Exception):
     pass
 
 
-class RunCmd(threading.Thread):
-    def __init__(self, parent, shell, hardkill_timeout, semval):
-        self.lock = threading.RLock()
-        self.parent = parent
-        self.kill_called = threading.Event()
-        self.path = None
-        self.job_id = None
-        self.semval = semval
+class _Job(object):
+    """State of a job queued or being run by `Runners`"""
+
+    def __init__(self, job_id, path, worker=None):
+        self.job_id = job_id
+        self.path = path
+        self.worker = worker
+        self.popen = None
+        self.killed = False
+        self.reaped = False
+        self.hardkill_timer = None
         self.finishedEvent = threading.Event()
 
-        # Seconds   before kill -9 called when killjob invoked
-        self.hardkill_timeout = hardkill_timeout
 
-        # Shell that should be used to execute runjob
-        self.shell = shell
+class _PidfdReaper(object):
+    """Waits for job processes to exit by polling a pidfd for each process (Linux >= 5.3, python >= 3.9).
 
-        self.popen = None
+  A self-pipe is used to wake the reaper when processes are added or it is stopped."""
 
-        threading.Thread.__init__(self)
+    def __init__(self, exited):
+        self._exited = exited
+        self._lock = threading.Lock()
+        self._pending = []
+        self._stopped = False
+        self._wakeup_r, self._wakeup_w = os.pipe()
 
-    def run(self):
+    @staticmethod
+    def available():
+        if not hasattr(os, "pidfd_open"):
+            return False
         try:
-            if self.kill_called.is_set():
-                return self.jobdone(True)
+            os.close(os.pidfd_open(os.getpid()))
+        except OSError:
+            return False
+        return True
 
-            rjpath = os.path.join(self.path, "runjob")
+    def add(self, job):
+        pidfd = os.pidfd_open(job.popen.pid)
+        with self._lock:
+            self._pending.append((pidfd, job))
+        os.write(self._wakeup_w, b"x")
 
-            if not os.path.isfile(rjpath):
-                self.parent.jobstarterror(
-                    self.job_id,
-                    "PATH_ERROR, '%s' does not exist or is not a file."
-                    % rjpath,
-                )
-                return
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+        os.write(self._wakeup_w, b"x")
 
-            if not self.kill_called.is_set():
-                with self.lock:
-                    stdout = open(os.path.join(self.path, "STDOUT"), "wb")
-                    stderr = open(os.path.join(self.path, "STDERR"), "wb")
-                    self.popen = subprocess.Popen(
-                        [self.shell, "runjob"],
-                        cwd=self.path,
-                        stdout=stdout,
-                        stderr=stderr,
-                    )
-                    self.parent.jobstarted(
-                        self.job_id, self.popen.pid, self.semval
-                    )
-                self.popen.wait()
-
-            if self.kill_called.is_set():
-                self.jobdone(True)
-            else:
-                self.jobdone(False)
+    def run(self):
+        poller = select.poll()
+        poller.register(self._wakeup_r, select.POLLIN)
+        jobs = {}
+        try:
+            while True:
+                for fd, _event in poller.poll():
+                    if fd == self._wakeup_r:
+                        os.read(self._wakeup_r, 4096)
+                        with self._lock:
+                            pending, self._pending = self._pending, []
+                            stopped = self._stopped
+                        for pidfd, job in pending:
+                            jobs[pidfd] = job
+                            poller.register(pidfd, select.POLLIN)
+                        if stopped:
+                            return
+                    else:
+                        job = jobs.pop(fd)
+                        poller.unregister(fd)
+                        os.close(fd)
+                        self._exited(job)
         finally:
-            self.parent.runcmdfinished(self)
-            self.finishedEvent.set()
+            for pidfd in jobs:
+                os.close(pidfd)
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
 
-    def killjob(self, immediate_kill=False, wait=False):
-        with self.lock:
-            olkk = self.kill_called.is_set()
-            popenstatus = self.popen is None
-            self.kill_called.set()
 
-        if not olkk and not popenstatus:
-            self.popen.terminate()
+class _WaitidReaper(object):
+    """Waits for job processes to exit using `os.waitid(P_ALL, ..., WNOWAIT)`.
 
-            def hardkill(slf, popen):
-                if slf.is_alive() and popen.poll() is None:
-                    popen.kill()
+  WNOWAIT leaves the exit status of processes that were not started by `Runners` (e.g. those created
+  by other channels in the same gateway) to be collected by their owners."""
 
-            if immediate_kill:
-                hardkill(self, self.popen)
-                self.popen.wait()
-            else:
-                t = threading.Timer(
-                    self.hardkill_timeout, hardkill, [self, self.popen]
-                )
-                t.start()
+    def __init__(self, exited):
+        self._exited = exited
+        self._condition = threading.Condition()
+        self._jobs = {}
+        self._stopped = False
+
+    @staticmethod
+    def available():
+        return hasattr(os, "waitid") and hasattr(os, "WNOWAIT")
 
-            if wait:
-                self.finishedEvent.wait()
+    def add(self, job):
+        with self._condition:
+            self._jobs[job.popen.pid] = job
+            self._condition.notify()
 
-    def jobdone(self, killed):
-        with self.lock:
-            if self.popen != None:
-                self.popen.wait()
-                returncode = self.popen.returncode
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+            try:
+                info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT)
+            except ChildProcessError:
+                info = None
+
+            with self._condition:
+                job = None
+                if info is not None:
+                    job = self._jobs.pop(info.si_pid, None)
+
+            if job is not None:
+                self._exited(job)
             else:
-                returncode = None
+                # Process belongs to someone else, give its owner a chance to collect it. Also check that
+                # none of our processes have been collected by a waitpid(-1) made elsewhere.
+                self._collect_reaped()
+                time.sleep(0.01)
+
+    def _collect_reaped(self):
+        with self._condition:
+            jobs = list(self._jobs.items())
+        for pid, job in jobs:
+            if job.popen.poll() is not None:
+                with self._condition:
+                    self._jobs.pop(pid, None)
+                self._exited(job)
+
+
+class _ThreadReaper(object):
+    """Fallback reaper that waits for each job process on its own thread"""
 
+    def __init__(self, exited):
+        self._exited = exited
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def available():
+        return True
+
+    def add(self, job):
+        t = threading.Thread(target=self._wait, args=(job,))
+        t.daemon = True
+        t.start()
+
+    def _wait(self, job):
+        job.popen.wait()
+        self._exited(job)
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        self._stopped.wait()
+
+
+def _create_reaper(exited):
+    for cls in [_PidfdReaper, _WaitidReaper, _ThreadReaper]:
+        if cls.available():
+            return cls(exited)
+
+
+# Source of the persistent worker processes started by `_Worker`.
+#
+# Requests are read, one JSON object per line, from stdin and have the form:
+#   {"path" : JOB_DIRECTORY, "command" : [ARG, ...]}
+#   {"path" : JOB_DIRECTORY, "entry_point" : "module:function"}
+# Once the job has run {"returncode" : RETURNCODE} is written to stdout.
+_WORKER_SOURCE = r"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+import traceback
+
+_entry_points = {}
+
+
+def load_entry_point(name):
+    if not name in _entry_points:
+        modname, funcname = name.split(":", 1)
+        func = importlib.import_module(modname)
+        for attr in funcname.split("."):
+            func = getattr(func, attr)
+        _entry_points[name] = func
+    return _entry_points[name]
+
+
+def run_command(path, command, stdout, stderr):
+    with open(os.devnull, "rb") as stdin:
+        return subprocess.call(command, cwd=path, stdin=stdin, stdout=stdout, stderr=stderr)
+
+
+def run_entry_point(path, name, stdout, stderr):
+    cwd = os.getcwd()
+    saved = os.dup(1), os.dup(2)
+    os.dup2(stdout.fileno(), 1)
+    os.dup2(stderr.fileno(), 2)
+    try:
+        os.chdir(path)
+        returncode = load_entry_point(name)(path)
+    except SystemExit as e:
+        returncode = e.code
+    except Exception:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+        os.chdir(cwd)
+    if returncode is None:
+        return 0
+    try:
+        return int(returncode)
+    except (TypeError, ValueError):
+        return 1
+
+
+def main():
+    requests = os.fdopen(os.dup(0), "r")
+    responses = os.fdopen(os.dup(1), "w")
+
+    # Stop stray output from entry points corrupting the protocol.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    for line in iter(requests.readline, ""):
+        request = json.loads(line)
+        path = request["path"]
+        with open(os.path.join(path, "STDOUT"), "wb") as stdout:
+            with open(os.path.join(path, "STDERR"), "wb") as stderr:
+                if "entry_point" in request:
+                    returncode = run_entry_point(path, request["entry_point"], stdout, stderr)
+                else:
+                    returncode = run_command(path, request["command"], stdout, stderr)
+        responses.write(json.dumps({"returncode": returncode}) + "\n")
+        responses.flush()
+
+
+main()
+"""
+
+
+class _Worker(object):
+    """Persistent process used to run jobs that have opted in to worker mode.
+
+  The worker runs in its own process group so that commands it starts are
+  signalled along with it when a job is killed. A worker whose job is killed
+  is discarded. Jobs are passed to the worker by a thread that lives as long
+  as the worker."""
+
+    def __init__(self, runners):
+        self._runners = runners
+        self._jobs = queue.Queue()
+        self.reaped = False
+        self.popen = subprocess.Popen(
+            [sys.executable, "-c", _WORKER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            start_new_session=True,
+        )
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def pid(self):
+        return self.popen.pid
+
+    def runjob(self, job):
+        self._jobs.put(job)
+
+    def stop(self):
+        self._jobs.put(None)
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _request(self, job):
+        request = dict(job.worker)
+        request["path"] = job.path
+        try:
+            self.popen.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+            self.popen.stdin.flush()
+            line = self.popen.stdout.readline()
+            if line:
+                return json.loads(line.decode("utf-8"))["returncode"]
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def _run(self):
+        try:
+            for job in iter(self._jobs.get, None):
+                returncode = self._request(job)
+                if returncode is None:
+                    # Worker has died, most likely because its job was killed.
+                    returncode = self._runners._workerexited(self)
+                    self._runners._workerjobdone(self, job, returncode)
+                    return
+                self._runners._workerjobdone(self, job, returncode)
+        finally:
             try:
-                with open(
-                    os.path.join(self.path, "STATUS"), "w"
-                ) as statusfile:
-                    statusfile.write("%s\n" % returncode)
-            except IOError:
+                self.popen.stdin.close()
+            except (IOError, OSError):
                 pass
-            self.parent.jobdone(self.job_id, returncode, killed=killed)
+            self._runners._workerexited(self)
 
 
 class Runners(threading.Thread):
+    """Runs at most `nprocesses` jobs at a time.
+
+  Jobs are started as soon as they are queued or a running job finishes. Job processes
+  are monitored by a single reaper (see `_create_reaper()`), which runs on this thread.
+
+  Jobs submitted with a `worker` description are not run through `runjob` but are instead
+  passed to a persistent `_Worker` process, avoiding shell start-up for each job."""
+
     def __init__(self, parent, nprocesses):
         threading.Thread.__init__(self)
         self._parent = parent
-        self._semaphore = threading.BoundedSemaphore(nprocesses)
+        self._nprocesses = nprocesses
         self._lock = threading.RLock()
-        self._queued_jobs = queue.Queue()
-        self._runcmd = set()
+        self._queued_jobs = collections.deque()
+        self._running = set()
+        self._workers = set()
+        self._idle_workers = []
         self._killevent = threading.Event()
-        self._timeout = 0.01
+        self._reaper = _create_reaper(self._processexited)
 
     def run(self):
-        while not self._killevent.is_set():
-            # Prepare a runner
-            while not self._semaphore.acquire(False):
-                if self._killevent.is_set():
-                    return
-                time.sleep(self._timeout)
+        self._reaper.run()
 
-            job = None
-            while not job:
-                if self._killevent.is_set():
+    def runjob(self, job_id, job_path, worker=None):
+        if self._killevent.is_set():
+            self.jobdone(job_id, 1)
+            return
+        with self._lock:
+            self._queued_jobs.append(_Job(job_id, job_path, worker))
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start queued jobs while there are free process slots"""
+        while True:
+            with self._lock:
+                if (
+                    self._killevent.is_set()
+                    or not self._queued_jobs
+                    or len(self._running) >= self._nprocesses
+                ):
                     return
-                try:
-                    job = self._queued_jobs.get(True, self._timeout)
-                except queue.Empty:
-                    pass
+                job = self._queued_jobs.popleft()
+                self._startjob(job)
 
-            if self._killevent.is_set():
-                return
-            runcmd = self._makeruncmd(job)
+    def _startjob(self, job):
+        if job.worker is not None:
+            self._startworkerjob(job)
+            return
 
-            if not runcmd.kill_called.is_set():
-                runcmd.start()
-            elif not runcmd.is_alive():
-                self.jobdone(runcmd.job_id,1)
+        rjpath = os.path.join(job.path, "runjob")
+        if not os.path.isfile(rjpath):
+            self.jobstarterror(
+                job.job_id,
+                "PATH_ERROR, '%s' does not exist or is not a file." % rjpath,
+            )
+            return
 
-    def runjob(self, job_id, job_path):
-        if self._killevent.is_set():
-            self.jobdone(job_id,1)
+        with open(os.path.join(job.path, "STDOUT"), "wb") as stdout, open(
+            os.path.join(job.path, "STDERR"), "wb"
+        ) as stderr:
+            job.popen = subprocess.Popen(
+                [self._parent.shell, "runjob"],
+                cwd=job.path,
+                stdout=stdout,
+                stderr=stderr,
+            )
+        self._running.add(job)
+        self.jobstarted(job.job_id, job.popen.pid, len(self._running))
+        self._reaper.add(job)
+
+    def _startworkerjob(self, job):
+        if not os.path.isdir(job.path):
+            self.jobstarterror(
+                job.job_id,
+                "PATH_ERROR, '%s' does not exist or is not a directory."
+                % job.path,
+            )
             return
-        jobtuple = JobTuple(job_id, job_path)
-        self._queued_jobs.put(jobtuple)
 
-    def killjob(self, job_id, immediate_kill=True, wait=False):
-        # Has job been run? If not remove from the queued jobs
-        with self._queued_jobs.mutex:
-            jobtuples = [
-                j for j in self._queued_jobs.queue if j.job_id == job_id
-            ]
-            if jobtuples:
-                self._queued_jobs.queue.remove(jobtuples[0])
-                self.jobdone(job_id, None, killed=True)
-                return True
+        if self._idle_workers:
+            worker = self._idle_workers.pop()
+        else:
+            try:
+                worker = _Worker(self)
+            except OSError as e:
+                self.jobstarterror(
+                    job.job_id, "WORKER_ERROR, could not start worker: %s" % e
+                )
+                return
+            self._workers.add(worker)
 
-        # Is the job currently running?
-        found = None
-        for runcmd in list(self._runcmd):
-            if runcmd.job_id == job_id:
-                found = runcmd
-                break
-        if found:
-            if found.is_alive():
-                found.killjob(immediate_kill=immediate_kill, wait=wait)
-            else:
-                found.kill_called.set()
-                # self._runcmd.remove(found)
-            return True
-        return False
+        job.popen = worker.popen
+        self._running.add(job)
+        self.jobstarted(job.job_id, worker.pid, len(self._running))
+        worker.runjob(job)
+
+    def _workerexited(self, worker):
+        """Called from a worker's thread once the worker process has stopped, returns its exit status"""
+        with self._lock:
+            if not worker.reaped:
+                worker.popen.wait()
+                worker.reaped = True
+            self._workers.discard(worker)
+            if worker in self._idle_workers:
+                self._idle_workers.remove(worker)
+        return worker.popen.returncode
+
+    def _workerjobdone(self, worker, job, returncode):
+        """Called from a worker's thread once it has finished running `job`"""
+        with self._lock:
+            job.reaped = True
+            self._running.discard(job)
+            if job.hardkill_timer is not None:
+                job.hardkill_timer.cancel()
+            if not worker.reaped:
+                if job.killed or self._killevent.is_set():
+                    # Worker may already have been signalled, don't reuse it.
+                    worker.stop()
+                else:
+                    self._idle_workers.append(worker)
+        self._jobfinished(job, returncode)
+
+    def _processexited(self, job):
+        """Called by reaper once job's process has exited"""
+        with self._lock:
+            job.popen.wait()
+            job.reaped = True
+            self._running.discard(job)
+            if job.hardkill_timer is not None:
+                job.hardkill_timer.cancel()
+        self._jobfinished(job, job.popen.returncode)
+
+    def _jobfinished(self, job, returncode):
+        try:
+            with open(os.path.join(job.path, "STATUS"), "w") as statusfile:
+                statusfile.write("%s\n" % returncode)
+        except IOError:
+            pass
 
-    def runcmdfinished(self, runcmd):
-        self._semaphore.release()
+        try:
+            self.jobdone(job.job_id, returncode, killed=job.killed)
+        finally:
+            job.finishedEvent.set()
+            self._dispatch()
+
+    def _signal(self, job, signum):
+        # Jobs are only reaped whilst holding lock, so pid cannot have been reused.
         with self._lock:
+            if job.reaped:
+                return
             try:
-                self._runcmd.remove(runcmd)
-            except IndexError:
+                if job.worker is None:
+                    os.kill(job.popen.pid, signum)
+                else:
+                    # Workers lead their own process group.
+                    os.killpg(job.popen.pid, signum)
+            except OSError:
                 pass
 
+    def _killprocess(self, job, immediate_kill):
+        with self._lock:
+            if job.killed:
+                return
+            job.killed = True
+            self._signal(job, signal.SIGTERM)
+            if immediate_kill:
+                self._signal(job, signal.SIGKILL)
+            elif not job.reaped:
+                job.hardkill_timer = threading.Timer(
+                    self._parent.hardkill_timeout,
+                    self._signal,
+                    [job, signal.SIGKILL],
+                )
+                job.hardkill_timer.daemon = True
+                job.hardkill_timer.start()
+
+    def killjob(self, job_id, immediate_kill=True, wait=False):
+        with self._lock:
+            # Has job been run? If not remove from the queued jobs
+            queued = [j for j in self._queued_jobs if j.job_id == job_id]
+            if queued:
+                self._queued_jobs.remove(queued[0])
+            running = [j for j in self._running if j.job_id == job_id]
+
+        if queued:
+            self.jobdone(job_id, None, killed=True)
+            return True
+
+        # Is the job currently running?
+        if not running:
+            return False
+        job = running[0]
+        self._killprocess(job, immediate_kill)
+        if wait:
+            job.finishedEvent.wait()
+        return True
+
     def jobdone(self, job_id, returncode, **kwargs):
         return self._parent.jobdone(job_id, returncode, **kwargs)
 
@@ -207,39 +553,29 @@ class Runners(threading.Thread):
     def jobstarted(self, job_id, pid, semaphore):
         return self._parent.jobstarted(job_id, pid, semaphore)
 
-    def _makeruncmd(self, job):
-        if hasattr(self._semaphore, "_value"):
-            val = self._semaphore._value
-        else:
-            val = self._semaphore._Semaphore__value
-
-        semval = self._semaphore._initial_value - val
-        cmd = RunCmd(
-            self, self._parent.shell, self._parent.hardkill_timeout, semval
-        )
-        cmd.job_id = job.job_id
-        cmd.path = job.path
-        with self._lock:
-            self._runcmd.add(cmd)
-        return cmd
-
     def terminate(self):
         self._killevent.set()
-        with self._queued_jobs.mutex:
-            job_ids = [j.job_id for j in self._queued_jobs.queue]
-        for job_id in job_ids:
-            self.killjob(job_id, immediate_kill=True, wait=True)
-        joins = []
-        job_ids = []
-        for runcmd in list(self._runcmd):
-            if runcmd.job_id != None:
-                self.killjob(runcmd.job_id, immediate_kill=True, wait=True)
-            else:
-                runcmd.kill_called.set()
-            if runcmd.is_alive():
-                joins.append(runcmd)
-        for j in joins:
-            j.join(60.0)
+        with self._lock:
+            queued = list(self._queued_jobs)
+            self._queued_jobs.clear()
+            running = list(self._running)
+
+        for job in queued:
+            self.jobdone(job.job_id, None, killed=True)
+
+        for job in running:
+            self._killprocess(job, immediate_kill=True)
+        for job in running:
+            job.finishedEvent.wait(60.0)
+
+        with self._lock:
+            workers = list(self._workers)
+            del self._idle_workers[:]
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            worker.join(60.0)
+        self._reaper.stop()
 
 
 class EventLoop(threading.Thread):
@@ -335,6 +671,7 @@ class EventLoop(threading.Thread):
                         try:
                             job_id = msg["job_id"]
                             path = msg["job_path"]
+                            worker = msg.get("worker", None)
                         except KeyError:
                             self.sendargs(
                                 msg="JOB_START_ERROR",
@@ -343,7 +680,7 @@ class EventLoop(threading.Thread):
                             )
                             continue
 
-                        self.runners.runjob(job_id, path)
+                        self.runners.runjob(job_id, path, worker)
                     elif mtype == "JOB_KILL":
                         try:
                             job_id = msg["job_id"]
@@ -449,6 +449,19 @@ class RunnerJob(object):
             self._remotePath = os.path.join(batchdir, job_name)
         return self._remotePath
 
+    @property
+    def downloadFilter(self):
+        """filetransfer.DownloadFilter selecting the job output files that should be downloaded
+    (None if all files are required)"""
+        jobFactory = getattr(self.job, "jobFactory", None)
+        return getattr(jobFactory, "downloadFilter", None)
+
+    @property
+    def worker(self):
+        """Worker description used to run this job in a persistent worker process (None if job should be run through `runjob`)"""
+        jobFactory = getattr(self.job, "jobFactory", None)
+        return getattr(jobFactory, "worker", None)
+
     @property
     def pid(self):
         if not self._jobRun:
@@ -559,6 +572,10 @@ class RunnerJobRunClientJob(object):
     def workingDirectory(self):
         return posixpath.join(self.job.remotePath, "job_files")
 
+    @property
+    def worker(self):
+        return self.job.worker
+
     @property
     def callback(self):
         return self
@@ -33,6 +33,7 @@ class SGERunner(object):
         identityfile=None,
         extra_ssh_options=[],
         do_cleanup=True,
+        jobs_per_task=1,
     ):
         """Create SGERunner instance
 
@@ -48,6 +49,8 @@ class SGERunner(object):
         extra_ssh_options (list, optional): List of (key,value) tuples that are added to the ssh_config file used when making ssh connections.
         do_cleanup (bool): If `True` file clean-up will be automatically performed following a run and on termination of the runner. If `False` this
                                       behaviour is disabled. This option is provided for the purposes of debugging.
+        jobs_per_task (int, optional): Number of pprofit jobs run by each task of an array job. Jobs within a task are run concurrently,
+                                      up to the number of cores allocated to the task.
 
     """
         self._inner = InnerSGERunner(
@@ -59,6 +62,7 @@ class SGERunner(object):
             identityfile,
             extra_ssh_options,
             do_cleanup,
+            jobs_per_task,
         )
 
     def runBatch(self, jobs):
@@ -110,4 +114,5 @@ class SGERunner(object):
             options["pollinterval"],
             extra_ssh_options=options["extra_ssh_options"],
             do_cleanup=options["do_cleanup"],
+            jobs_per_task=options["jobs_per_task"],
         )
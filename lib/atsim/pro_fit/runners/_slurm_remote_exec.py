@@ -1,9 +1,13 @@
 import uuid
 import os
 import subprocess
+import threading
 
+# INCLUDE "_queueing_system_completion.py.inc"
+# INCLUDE "_queueing_system_script.py.inc"
 
-def submission_script(jobs, header_lines):
+
+def submission_script(jobs, header_lines, jobs_per_task=1):
     try:
         # For python 3
         import shlex
@@ -33,13 +37,25 @@ def submission_script(jobs, header_lines):
         "",
     ]
 
+    tasks = bundle_jobs(jobs, jobs_per_task)
     jobs = [quote(j) for j in jobs]
-    arrayjobline = "#SBATCH %s1-%d" % ("--array=", len(jobs))
+    arrayjobline = "#SBATCH %s1-%d" % ("--array=", len(tasks))
     lines = ["#! /bin/bash", arrayjobline]
 
     lines.extend(std_headerlines)
     lines.extend(header_lines)
 
+    if jobs_per_task > 1:
+        lines.extend(
+            bundled_task_lines(
+                tasks,
+                quote,
+                "SLURM_ARRAY_TASK_ID",
+                "${SLURM_CPUS_PER_TASK:-${SLURM_CPUS_ON_NODE:-1}}",
+            )
+        )
+        return os.linesep.join(lines)
+
     for i, j in enumerate(jobs):
         jobnum = i + 1
         line = 'JOB_ARRAY[%d]="%s"' % (jobnum, j)
@@ -54,6 +70,7 @@ def submission_script(jobs, header_lines):
         "function finish {",
         '        mkdir "$JOB_DIR/output"',
         '        cp -r *  "$JOB_DIR/output/"',
+        '        touch "$JOB_DIR/%s"' % COMPLETION_MARKER,
         '        if [ -n "$CLEANTMP" ];then',
         '          rm -rf "$TMPDIR"',
         "        fi",
@@ -129,7 +146,7 @@ def qdel(job_ids, force):
         raise QDelException(err.strip())
 
 
-def qdel_handler(channel, channel_id, msg):
+def qdel_handler(channel, channel_id, msg, watcher=None):
     try:
         job_ids = msg["job_ids"]
     except KeyError:
@@ -143,6 +160,8 @@ def qdel_handler(channel, channel_id, msg):
     force = msg.get("force", False)
 
     qdel(job_ids, force)
+    if watcher is not None:
+        watcher.discard(job_ids)
 
     transid_send(channel, msg, "QDEL", channel_id=channel_id, job_ids=job_ids)
 
@@ -168,7 +187,7 @@ def qrls_handler(channel, channel_id, msg):
     transid_send(channel, msg, "QRLS", channel_id=channel_id, job_id=job_id)
 
 
-def qsub_handler(channel, channel_id, msg):
+def qsub_handler(channel, channel_id, msg, watcher=None):
     try:
         jobs = msg["jobs"]
     except KeyError:
@@ -191,7 +210,8 @@ def qsub_handler(channel, channel_id, msg):
             return
 
     header_lines = msg.get("header_lines", [])
-    script = submission_script(jobs, header_lines)
+    jobs_per_task = msg.get("jobs_per_task", 1)
+    script = submission_script(jobs, header_lines, jobs_per_task)
 
     p = subprocess.Popen(
         ["sbatch", "-H"],
@@ -209,6 +229,9 @@ def qsub_handler(channel, channel_id, msg):
     job_id = output.strip()
     job_id = job_id.split()[-1]
 
+    if watcher is not None:
+        watcher.add(job_id, jobs)
+
     transid_send(channel, msg, "QSUB", channel_id=channel_id, job_id=job_id)
 
 
@@ -279,12 +302,6 @@ def error(channel, reason, **kwargs):
 
 def remote_exec(channel):
     channel_id = None
-    msghandlers = dict(
-        QSUB=qsub_handler,
-        QSELECT=qselect_handler,
-        QRLS=qrls_handler,
-        QDEL=qdel_handler,
-    )
 
     msg = channel.receive()
 
@@ -314,30 +331,49 @@ def remote_exec(channel):
 
     send(channel, "READY", channel_id=channel_id)
 
-    for msg in channel:
-        if msg is None:
-            return
+    watcher = CompletionWatcher(channel, channel_id)
+    watcher.start()
 
-        try:
-            mtype = msg["msg"]
-        except:
-            error(
-                channel,
-                "malformed message, could not find 'msg' field in %s" % msg,
-                channel_id=channel_id,
-            )
-            continue
-        try:
-            handler = msghandlers[mtype]
-        except KeyError:
-            error(
-                channel,
-                "unknown message type '%s' for message: %s" % (mtype, msg),
-                channel_id=channel_id,
-            )
-            continue
+    def qsub_watched(*args):
+        return qsub_handler(*args, watcher=watcher)
+
+    def qdel_watched(*args):
+        return qdel_handler(*args, watcher=watcher)
 
-        handler(channel, channel_id, msg)
+    msghandlers = dict(
+        QSUB=qsub_watched,
+        QSELECT=qselect_handler,
+        QRLS=qrls_handler,
+        QDEL=qdel_watched,
+    )
+
+    try:
+        for msg in channel:
+            if msg is None:
+                return
+
+            try:
+                mtype = msg["msg"]
+            except:
+                error(
+                    channel,
+                    "malformed message, could not find 'msg' field in %s" % msg,
+                    channel_id=channel_id,
+                )
+                continue
+            try:
+                handler = msghandlers[mtype]
+            except KeyError:
+                error(
+                    channel,
+                    "unknown message type '%s' for message: %s" % (mtype, msg),
+                    channel_id=channel_id,
+                )
+                continue
+
+            handler(channel, channel_id, msg)
+    finally:
+        watcher.stop()
 
 
 if __name__ == "__channelexec__":
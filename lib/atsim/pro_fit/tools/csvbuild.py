@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import io
 import numbers
 import os
 import re
@@ -9,6 +8,8 @@ import sys
 
 import logging
 
+from atsim.pro_fit._util import FILE_LINK_MODES, link_file
+
 
 class CSVBuildKeyError(KeyError):
     """Raised when a bad substitution variable is encountered."""
@@ -30,58 +31,145 @@ class _StringFormatter(string.Formatter):
         return string.Formatter.format_field(self, value, conversion)
 
 
-def _includeHandler(placeholder, substitutionDict, skelpath):
-    if not placeholder.startswith("INCLUDE:"):
-        return (False, None)
+_stringFormatter = _StringFormatter()
 
-    fnameToken = placeholder[8:]
-    fname = substitutionDict[fnameToken]
+_splitRegex = re.compile(r"((?<!\\)@(.*?)(?<!\\)@)")
 
-    if not os.path.isabs(fname):
-        fname = os.path.join(skelpath, fname)
 
-    logging.getLogger("csvbuild._includeHandler").debug(
-        '@INCLUDE: filename="%s"' % fname
-    )
-    with open(fname, "r") as infile:
-        includedTemplate = infile.read()
-        substituted = _templateSubstitution(
-            includedTemplate, substitutionDict, skelpath
-        )
-        return (True, substituted)
+def _unescape(s):
+    return s.replace("\\@", "@")
+
 
+class _IncludePlaceholder(object):
+    """@INCLUDE:token@ placeholder. The included file is itself treated as a template."""
 
-class _DefaultHandler(object):
-    def __init__(self, stringFormatter):
-        self._stringFormatter = stringFormatter
+    def __init__(self, fnameToken):
+        self.fnameToken = fnameToken
 
-    def __call__(self, placeholder, substitutionDict, skelpath):
+    def render(self, substitutionDict, skelpath, includeCache):
         try:
-            tokens = placeholder.split(":", 1)
-            if len(tokens) > 1:
-                placeholder, fmt = tokens
-                fmtstring = "{" + placeholder + ":" + fmt + "}"
-            else:
-                fmtstring = "{" + placeholder + "}"
+            fname = substitutionDict[self.fnameToken]
+        except KeyError as e:
+            raise CSVBuildKeyError(*e.args)
+
+        if not os.path.isabs(fname):
+            fname = os.path.join(skelpath, fname)
+
+        logging.getLogger("csvbuild._includeHandler").debug(
+            '@INCLUDE: filename="%s"' % fname
+        )
+
+        if includeCache is None:
+            included = _compileFile(fname)
+        else:
+            included = includeCache.get(fname)
+            if included is None:
+                included = _compileFile(fname)
+                includeCache[fname] = included
+        return included.render(substitutionDict, skelpath, includeCache)
+
+
+class _FieldPlaceholder(object):
+    """@name@ or @name:format_spec@ placeholder, parsed into its field name, conversion and
+  format spec so that rendering avoids re-parsing a format string."""
+
+    def __init__(self, fieldName, conversion, formatSpec):
+        self.fieldName = fieldName
+        self.conversion = conversion
+        self.formatSpec = formatSpec
 
-            retstring = self._stringFormatter.format(
-                fmtstring, **substitutionDict
+    def render(self, substitutionDict, skelpath, includeCache):
+        try:
+            value, _key = _stringFormatter.get_field(
+                self.fieldName, (), substitutionDict
             )
         except KeyError as e:
             raise CSVBuildKeyError(*e.args)
-        return (True, retstring)
+        value = _stringFormatter.convert_field(value, self.conversion)
+        return _stringFormatter.format_field(value, self.formatSpec)
+
+
+class _FormatStringPlaceholder(object):
+    """Fallback for placeholders that do not reduce to a single format field
+  (e.g. nested format specs). These are passed to the formatter on each render."""
+
+    def __init__(self, fmtstring):
+        self.fmtstring = fmtstring
+
+    def render(self, substitutionDict, skelpath, includeCache):
+        try:
+            return _stringFormatter.format(self.fmtstring, **substitutionDict)
+        except KeyError as e:
+            raise CSVBuildKeyError(*e.args)
+
 
+def _compilePlaceholder(placeholder):
+    if placeholder.startswith("INCLUDE:"):
+        return _IncludePlaceholder(placeholder[8:])
 
-_defaultHandler = _DefaultHandler(_StringFormatter())
+    tokens = placeholder.split(":", 1)
+    if len(tokens) > 1:
+        placeholder, fmt = tokens
+        fmtstring = "{" + placeholder + ":" + fmt + "}"
+    else:
+        fmtstring = "{" + placeholder + "}"
 
-_handlers = [_includeHandler, _defaultHandler]
+    try:
+        parsed = list(_stringFormatter.parse(fmtstring))
+    except ValueError:
+        parsed = None
+
+    if parsed and len(parsed) == 1:
+        literal, fieldName, formatSpec, conversion = parsed[0]
+        if (
+            not literal
+            and fieldName
+            and not "{" in formatSpec
+            and not "}" in formatSpec
+        ):
+            return _FieldPlaceholder(fieldName, conversion, formatSpec)
+    return _FormatStringPlaceholder(fmtstring)
+
+
+class _CompiledTemplate(object):
+    """Template string pre-split into literal and placeholder segments.
+
+  Literal segments are stored with escaped @ signs already removed, allowing the
+  template to be rendered many times without re-tokenising it."""
+
+    def __init__(self, template):
+        self.segments = []
+        tokens = _splitRegex.split(template)
+        # re.split() with two groups gives: literal, whole match, placeholder, literal, ...
+        for i in range(0, len(tokens), 3):
+            literal = _unescape(tokens[i])
+            if literal:
+                self.segments.append(literal)
+            if i + 2 < len(tokens):
+                self.segments.append(_compilePlaceholder(tokens[i + 2]))
+
+    def render(self, substitutionDict, skelpath, includeCache=None):
+        """Substitute placeholders with values from substitutionDict.
+
+    :param substitutionDict: Values to be substituted into template.
+    :param skelpath: Directory against which relative @INCLUDE:@ filenames are resolved.
+    :param includeCache: Dictionary used to cache compiled included files between calls (or None).
+
+    :return: Substituted string"""
+        out = []
+        for s in self.segments:
+            if isinstance(s, str):
+                out.append(s)
+            else:
+                out.append(
+                    _unescape(s.render(substitutionDict, skelpath, includeCache))
+                )
+        return "".join(out)
 
 
-def _placeholderHandler(placeholder, substitutionDict, skelpath):
-    for handler in _handlers:
-        status, retstring = handler(placeholder, substitutionDict, skelpath)
-        if status:
-            return retstring
+def _compileFile(filename):
+    with open(filename, "r") as infile:
+        return _CompiledTemplate(infile.read())
 
 
 def _templateSubstitution(template, substitutionDict, skelpath):
@@ -91,117 +179,143 @@ def _templateSubstitution(template, substitutionDict, skelpath):
   :param substitutionDict: Values to be substituted into template
 
   :return: Substituted string"""
-    splitRegex = re.compile(r"((?<!\\)@(.*?)(?<!\\)@)")
-    sbuild = io.StringIO()
-
-    tokens = splitRegex.split(template)
-    while len(tokens) > 0:
-        token = tokens.pop(0)
-        if token.startswith("@"):
-            placeholder = tokens.pop(0)
-            token = _placeholderHandler(
-                placeholder, substitutionDict, skelpath
-            )
+    return _CompiledTemplate(template).render(substitutionDict, skelpath)
 
-        # Remove escape characters from @ signs.
-        token = re.sub(r"\\@", "@", token)
-        sbuild.write(token)
-    return sbuild.getvalue()
 
+class _TemplateFile(object):
+    def __init__(self, srcpath, destname, contents):
+        self.srcpath = srcpath
+        self.destname = destname
+        self.contents = contents
 
-class _DirectoryWalker(object):
-    _logger = logging.getLogger("csvbuild._DirectoryWalker")
 
-    def __init__(
-        self, skeletonDirectory, destinationDirectory, templateSuffix
-    ):
-        self.skeletonDirectory = skeletonDirectory
-        self.destinationDirectory = destinationDirectory
-        self.templateSuffix = templateSuffix
-        self.overwrite = False
-
-        self._logger.debug(
-            "init with: skeletonDirectory= %s, destinationDirectory= %s, templateSuffix= %s "
-            % (
-                self.skeletonDirectory,
-                self.destinationDirectory,
-                self.templateSuffix,
-            )
-        )
+class TemplateDirectory(object):
+    """Template directory structure parsed once so that it can be used to create many
+  destination directories.
 
-    def _pathToDestPath(self, skelPath, row):
-        # Create the destination directory
-        skelPath = os.path.normpath(skelPath)
-        pathTokens = skelPath.split(os.path.sep)
-        # ... change first component of path to dest
-        pathTokens = pathTokens[1:]
-        pathTokens.insert(0, self.destinationDirectory)
-        destPath = os.path.join(*pathTokens)
-        # ... perform substitution
-        destPath = _templateSubstitution(destPath, row, self.skeletonDirectory)
-        return destPath
-
-    def _processFile(self, sourcedirname, destdirname, filename, row):
-        """Copies file to destination performing template substitution if necessary"""
-        destfilename = _templateSubstitution(
-            filename, row, self.skeletonDirectory
-        )
+  The directory is walked on construction. Directory and file names are tokenised into
+  placeholder segments and the contents of files with names ending in `templateSuffix` are
+  read and tokenised. Other files are recorded as static files, copied verbatim by `build()`
+  (or linked into the destination, see `linkMode`)."""
 
-        if not destfilename.endswith(self.templateSuffix):
-            # Doesn't need any extra processing, just copy
-            srcpath = os.path.join(sourcedirname, filename)
-            dstpath = os.path.join(destdirname, destfilename)
-            if self.overwrite == False and os.path.isfile(dstpath):
-                self._logger.debug("'%s' exists, will not overwrite" % dstpath)
-                return
-            self._logger.debug("Copying: %s ---> %s" % (srcpath, dstpath))
-            shutil.copy(srcpath, dstpath)
-        else:
-            # Perform template substitution
-            destfilename = destfilename[: -len(self.templateSuffix)]
-            srcpath = os.path.join(sourcedirname, filename)
-            dstpath = os.path.join(destdirname, destfilename)
-            if self.overwrite == False and os.path.isfile(dstpath):
-                self._logger.debug("'%s' exists, will not overwrite" % dstpath)
-                return
-            self._logger.debug(
-                "Template processing: %s ---> %s" % (srcpath, dstpath)
-            )
-            with open(srcpath, "r") as infile:
-                filecontents = infile.read()
+    _logger = logging.getLogger("csvbuild.TemplateDirectory")
+
+    def __init__(self, skeletonDirectory, templateSuffix=".in", linkMode="copy"):
+        """:param skeletonDirectory: Source directory containing files with which to populate created directory structures.
+    :param templateSuffix: Files within skeletonDirectory with this suffix are subject to file content variable substitution
+    :param linkMode: How static files are placed in destination directories, one of `FILE_LINK_MODES`
+      ('copy', 'hardlink', 'reflink' or 'symlink'). If a link cannot be made the file is copied."""
+        if not linkMode in FILE_LINK_MODES:
+            raise ValueError("Unknown link mode: '%s'" % linkMode)
+        self.skeletonDirectory = os.path.abspath(skeletonDirectory)
+        self.templateSuffix = templateSuffix
+        self.linkMode = linkMode
+        self._includeCache = {}
+
+        # List of (source_dir, [compiled_dest_path_component], [_TemplateFile,...]) in the order
+        # in which directories should be created.
+        self._directories = []
 
-            try:
-                filecontents = _templateSubstitution(
-                    filecontents, row, self.skeletonDirectory
-                )
-            except CSVBuildKeyError as e:
-                augmentedException = CSVBuildKeyError(*e.args)
-                augmentedException.templateFilename = srcpath
-                raise augmentedException
-
-            with open(dstpath, "w") as outfile:
-                outfile.write(filecontents)
-
-    def _processDirectory(self, row, dirname, names):
-        destdirname = self._pathToDestPath(dirname, row)
-        self._logger.debug(
-            "Found directory: %s. Destination Directory: %s"
-            % (dirname, destdirname)
-        )
-        if not os.path.isdir(destdirname):
-            self._logger.debug("Directory doesn't exist, creating.")
-            os.mkdir(destdirname)
-        shutil.copystat(dirname, destdirname)
-        for n in names:
-            self._processFile(dirname, destdirname, n, row)
-
-    def processRow(self, row):
         for dirpath, dirnames, filenames in os.walk(
             self.skeletonDirectory, topdown=True
         ):
             for dn in dirnames:
-                self._processDirectory(row, os.path.join(dirpath, dn), [])
-            self._processDirectory(row, dirpath, filenames)
+                self._directories.append(
+                    (
+                        os.path.join(dirpath, dn),
+                        self._compilePath(os.path.join(dirpath, dn)),
+                        [],
+                    )
+                )
+            files = [self._compileFile(dirpath, fn) for fn in filenames]
+            self._directories.append(
+                (dirpath, self._compilePath(dirpath), files)
+            )
+
+    def _compilePath(self, dirpath):
+        relpath = os.path.relpath(dirpath, self.skeletonDirectory)
+        if relpath == os.curdir:
+            return []
+        return [_CompiledTemplate(t) for t in relpath.split(os.path.sep)]
+
+    def _compileFile(self, dirpath, filename):
+        srcpath = os.path.join(dirpath, filename)
+        if filename.endswith(self.templateSuffix):
+            destname = _CompiledTemplate(filename[: -len(self.templateSuffix)])
+            contents = _compileFile(srcpath)
+        else:
+            destname = _CompiledTemplate(filename)
+            contents = None
+        return _TemplateFile(srcpath, destname, contents)
+
+    @property
+    def staticFiles(self):
+        """List of source paths for files copied without content substitution"""
+        return [
+            f.srcpath
+            for (_d, _p, files) in self._directories
+            for f in files
+            if f.contents is None
+        ]
+
+    @property
+    def templateFiles(self):
+        """List of source paths for files subject to content substitution"""
+        return [
+            f.srcpath
+            for (_d, _p, files) in self._directories
+            for f in files
+            if not f.contents is None
+        ]
+
+    def _render(self, compiled, row, srcpath):
+        try:
+            return compiled.render(
+                row, self.skeletonDirectory, self._includeCache
+            )
+        except CSVBuildKeyError as e:
+            augmentedException = CSVBuildKeyError(*e.args)
+            augmentedException.templateFilename = srcpath
+            raise augmentedException
+
+    def build(self, row, destinationDirectory, overwrite=False):
+        """Create directory structure within destinationDirectory.
+
+    :param row: Dictionary of placeholder values.
+    :param destinationDirectory: Path giving the root of the created directory structure
+    :param overwrite: If True, overwrite existing files"""
+        for srcdir, pathTokens, files in self._directories:
+            destdirname = os.path.join(
+                destinationDirectory,
+                *[self._render(t, row, srcdir) for t in pathTokens]
+            )
+            if not os.path.isdir(destdirname):
+                os.mkdir(destdirname)
+            shutil.copystat(srcdir, destdirname)
+
+            for f in files:
+                dstpath = os.path.join(
+                    destdirname, self._render(f.destname, row, f.srcpath)
+                )
+                if overwrite == False and os.path.isfile(dstpath):
+                    self._logger.debug(
+                        "'%s' exists, will not overwrite" % dstpath
+                    )
+                    continue
+
+                if f.contents is None:
+                    self._logger.debug(
+                        "Copying (%s): %s ---> %s"
+                        % (self.linkMode, f.srcpath, dstpath)
+                    )
+                    link_file(f.srcpath, dstpath, self.linkMode, shutil.copy)
+                else:
+                    self._logger.debug(
+                        "Template processing: %s ---> %s" % (f.srcpath, dstpath)
+                    )
+                    filecontents = self._render(f.contents, row, f.srcpath)
+                    with open(dstpath, "w") as outfile:
+                        outfile.write(filecontents)
 
 
 def buildDirs(
@@ -211,6 +325,7 @@ def buildDirs(
     templateSuffix=".in",
     extraVariables={},
     overwrite=False,
+    linkMode="copy",
 ):
     """Create a directory structure from a CSV file.
 
@@ -219,21 +334,33 @@ def buildDirs(
   :param destinationDirectory: Path giving the root of the created directory structure
   :param templateSuffix: Files within skeletonDirectory with this suffix are subject to filename and file content variable substitution from rows
   :param extraVariables: Dictionary giving extra key value pairs which should be added to spreadsheet row before processing templates
-  :param overwrite: If True, overwrite existing files"""
-    dw = _DirectoryWalker(
-        skeletonDirectory, destinationDirectory, templateSuffix
-    )
-    dw.overwrite = overwrite
+  :param overwrite: If True, overwrite existing files
+  :param linkMode: One of 'copy', 'hardlink', 'reflink' or 'symlink'. Determines how non-template files are placed in destination."""
     logger = logging.getLogger("csvbuild.buildDirs")
+    logger.debug(
+        "skeletonDirectory= %s, destinationDirectory= %s, templateSuffix= %s "
+        % (skeletonDirectory, destinationDirectory, templateSuffix)
+    )
     if overwrite:
         logger.debug("File overwriting enabled")
     else:
         logger.debug("File overwriting disabled")
 
+    template = TemplateDirectory(skeletonDirectory, templateSuffix, linkMode)
+
+    # The first component of skeletonDirectory is replaced by destinationDirectory
+    # any remaining components are kept.
+    rootTokens = os.path.normpath(skeletonDirectory).split(os.path.sep)[1:]
+    rootTokens = [_CompiledTemplate(t) for t in rootTokens]
+
     for row in rows:
         row = dict(row)
         row.update(extraVariables)
-        dw.processRow(row)
+        destroot = os.path.join(
+            destinationDirectory,
+            *[template._render(t, row, skeletonDirectory) for t in rootTokens]
+        )
+        template.build(row, destroot, overwrite)
 
 
 def _verboseLogging():
@@ -370,6 +497,16 @@ temperature values:
         default=False,
         help="If set, overwrite existing files. Otherwise existing files will not be overwritten.",
     )
+    parser.add_option(
+        "-l",
+        "--link-mode",
+        action="store",
+        dest="link_mode",
+        type="choice",
+        choices=FILE_LINK_MODES,
+        default="copy",
+        help="How files that do not undergo template substitution are created in the destination. One of: %s. If a link cannot be created the file is copied. Default: %%default." % ", ".join(FILE_LINK_MODES),
+    )
     return parser
 
 
@@ -419,6 +556,7 @@ def main():
             suffix,
             extraVariables=extraVariables,
             overwrite=options.overwrite,
+            linkMode=options.link_mode,
         )
     except CSVBuildKeyError as e:
         logger = logging.getLogger("csvbuild")
@@ -28,6 +28,13 @@ def parseCommandLine():
         help="Specify path of 'fitting_run.db' file.",
     )
 
+    parser.add_argument(
+        "--upgrade-db",
+        dest="upgrade_db",
+        action="store_true",
+        help="Add the indexes used to speed up queries to a 'fitting_run.db' created by an earlier version of pprofit, then exit. The database is modified in place.",
+    )
+
     metadataGroup = parser.add_argument_group("Fitting Run Information")
 
     metadataGroup.add_argument(
@@ -316,6 +323,20 @@ def outputGrid(engine, gridtype, gridx, gridy, gridz, outfile, gridmissing):
     serializer(iterationSeriesTable, outfile, gridx, gridy, gridz, gridmissing)
 
 
+def upgradeDatabase(parser, engine, dbfilename):
+    """Add missing indexes to database and exit"""
+    try:
+        created = db.upgrade(engine)
+    except sa.exc.OperationalError as e:
+        parser.exit(
+            EXIT_STATUS_DB_CANNOT_OPEN,
+            "Database could not be upgraded: '%s': %s\n" % (dbfilename, e.orig),
+        )
+    for name in created:
+        print("Created index: %s" % name)
+    parser.exit(0, "Database is up to date: '%s'\n" % dbfilename)
+
+
 def main():
     parser, options = parseCommandLine()
 
@@ -336,6 +357,15 @@ def main():
             % options.dbfilename,
         )
 
+    if options.upgrade_db:
+        upgradeDatabase(parser, engine, options.dbfilename)
+    elif db.missingIndexes(engine):
+        print(
+            "Warning: '%s' was created by an earlier version of pprofit and is not indexed, queries may be slow. Run 'ppdump --upgrade-db -f %s' to add indexes."
+            % (options.dbfilename, options.dbfilename),
+            file=sys.stderr,
+        )
+
     if options.list_columns:
         listColumns(engine, options.list_columns)
     elif options.num_iterations:
@@ -12,10 +12,12 @@ import logging
 import os
 import sys
 import argparse
+import sqlalchemy as sa
 from atsim.pro_fit.exceptions import ConfigException
 from atsim.pro_fit.console import Console
 from atsim.pro_fit._util import MultiCallback, iter_namespace
 import atsim.pro_fit.exceptions
+import atsim.pro_fit.db
 import atsim.pro_fit.fitconfig
 import atsim.pro_fit.runners
 import atsim.pro_fit.reporters
@@ -356,6 +358,15 @@ for description of required directory structure and files."""
         help="create job files but do not run or perform evaluation. Jobs are created in JOB_DIR",
     )
 
+    optgroup.add_argument(
+        "-r",
+        "--resume",
+        dest="resume",
+        action="store_true",
+        default=False,
+        help="continue an interrupted fitting run from the existing 'fitting_run.db' rather than starting a new run",
+    )
+
     optgroup.add_argument(
         "-p",
         "--plugin",
@@ -401,6 +412,11 @@ This gives name of runner (defined in fit.cfg) to be associated with created JOB
     if args.init and args.initjob:
         parser.error("-i/--init cannot be specified with -j/--init-job")
 
+    if args.resume and (
+        args.init or args.initjob or args.single_step or args.create_files
+    ):
+        parser.error("-r/--resume cannot be specified with other options")
+
     # Automatically disable the console for certain options
     if args.console:
         disable_console_opts = ["initjob", "init", "create_files"]
@@ -519,7 +535,38 @@ def _getCreateFilesCfg(jobdir, keepDirectory, pluginmodules):
     return _getfitcfg(jobdir, cls=CustomConfig, pluginmodules=pluginmodules)
 
 
-def _invokeMinimizer(cfg, logsql, console):
+def _resumeMinimizer(cfg, minimizer, engine):
+    """Configure `minimizer` to continue the interrupted run stored in fitting_run.db
+
+  @param cfg atsim.pro_fit.fitconfig.FitConfig for the run.
+  @param minimizer Minimizer to be resumed.
+  @param engine sqlalchemy.Engine for fitting_run.db"""
+    console_logger = logging.getLogger("console")
+    if not hasattr(minimizer, "resume"):
+        raise atsim.pro_fit.exceptions.ConfigException(
+            "--resume is not supported by the minimizer defined in fit.cfg"
+        )
+
+    state = atsim.pro_fit.db.loadResumeState(engine)
+    if state is None:
+        console_logger.info(
+            "'fitting_run.db' does not contain any candidates, starting from the beginning of the run"
+        )
+        return
+
+    if state.fitKeys != cfg.variables.fitKeys:
+        raise atsim.pro_fit.exceptions.ConfigException(
+            "Cannot resume, fitting variables in 'fitting_run.db' (%s) differ from those in fit.cfg (%s)"
+            % (", ".join(state.fitKeys), ", ".join(cfg.variables.fitKeys))
+        )
+
+    console_logger.info(
+        "Resuming fitting run after iteration %d", state.iterationNumber
+    )
+    minimizer.resume(state)
+
+
+def _invokeMinimizer(cfg, logsql, console, resume=False):
     logger = logging.getLogger(__name__).getChild("_invokeMinimizer")
     console_logger = logging.getLogger("console")
 
@@ -545,18 +592,40 @@ def _invokeMinimizer(cfg, logsql, console):
     if logsql:
         # ... create the console log reporter
         stepCallback.append(atsim.pro_fit.reporters.LogReporter())
-        if os.path.exists("fitting_run.db"):
+        if resume:
+            if not os.path.exists("fitting_run.db"):
+                raise atsim.pro_fit.exceptions.ConfigException(
+                    "--resume specified but 'fitting_run.db' does not exist"
+                )
+            engine = sa.create_engine("sqlite:///fitting_run.db")
+            valid = atsim.pro_fit.db.validate(engine)
+            engine.dispose()
+            if not valid:
+                raise atsim.pro_fit.exceptions.ConfigException(
+                    "--resume specified but 'fitting_run.db' is not a valid fitting run database"
+                )
+        elif os.path.exists("fitting_run.db"):
             console_logger.info("Removing existing 'fitting_run.db'")
             os.remove("fitting_run.db")
-        sqlreporter = atsim.pro_fit.reporters.SQLiteReporter(
+        if cfg.reporter_mode == "batched":
+            reporterClass = atsim.pro_fit.reporters.BatchedSQLiteReporter
+        else:
+            reporterClass = atsim.pro_fit.reporters.SQLiteReporter
+        sqlreporter = reporterClass(
             "fitting_run.db",
             cfg.variables,
             cfg.merit.calculatedVariables,
             cfg.title,
+            resume=resume,
         )
         stepCallback.append(sqlreporter)
 
+        if cfg.merit_cache == "database":
+            cfg.merit.cache.attachDatabase(sqlreporter.engine)
+
     minimizer = cfg.minimizer
+    if resume:
+        _resumeMinimizer(cfg, minimizer, sqlreporter.engine)
     minimizer.stepCallback = stepCallback
 
     if console:
@@ -733,7 +802,7 @@ def perform_minimization(options, pluginmodules, console):
             console_logger.info("Performing Minimization run")
             cfg = _getfitcfg(tempdir, pluginmodules=pluginmodules)
 
-        _invokeMinimizer(cfg, logsql, console)
+        _invokeMinimizer(cfg, logsql, console, resume=options.resume)
 
     finally:
         if cfg:
@@ -1,4 +1,5 @@
 import collections
+import threading
 
 import cexprtk
 
@@ -23,6 +24,21 @@ class Variables(object):
             assert len(bounds) == len(varValPairs)
             self._bounds = bounds
 
+    @classmethod
+    def _fromState(cls, varDict, fitKeys, bounds):
+        """Create instance directly from the internal state of another, bypassing the processing performed by the constructor.
+
+    @param varDict OrderedDict mapping variable names to values.
+    @param fitKeys List of fitting variable names (may be shared between instances).
+    @param bounds List of bounds (may be shared between instances).
+    @return New Variables instance"""
+        variables = cls.__new__(cls)
+        variables._varDict = varDict
+        variables._fitKeys = fitKeys
+        variables._bounds = bounds
+        variables.id = None
+        return variables
+
     def _processPairs(self, pairs):
         d = collections.OrderedDict([(k, v) for (k, v, isP) in pairs])
 
@@ -173,6 +189,23 @@ class Variables(object):
                 updated.append((k, v, isp))
         return Variables(updated, self.bounds)
 
+    def createUpdatedPopulation(self, population):
+        """Create an updated copy of this Variables instance (see createUpdated()) for each list of fitValues in population.
+
+    This is considerably cheaper than calling createUpdated() for each member of a large population.
+
+    @param population List of lists of values for fitting variables (e.g. the candidates of an evolutionary minimizer),
+                      each in the same order as keys returned by fitKeys property.
+    @return List of Variables instances, one per member of population."""
+        fitKeys = self._fitKeys
+        bounds = list(self._bounds)
+        updated = []
+        for newvals in population:
+            varDict = collections.OrderedDict(self._varDict)
+            varDict.update(zip(fitKeys, newvals))
+            updated.append(Variables._fromState(varDict, fitKeys, bounds))
+        return updated
+
     def __repr__(self):
         s = "Variables("
         tokens = []
@@ -193,12 +226,50 @@ class CalculatedVariables(object):
   arithmetic expressions are evaluated using these variables. A new instance of Variables
   containing the results of this evaluation is then returned. """
 
+    _Compiled = collections.namedtuple(
+        "_Compiled", ["variableNames", "symbolTable", "expressions"]
+    )
+
     def __init__(self, nameExpressionTuples):
         """Create CalculatedVariables instance from a list of of (variable_name, expression) tuples.
     Where 'expression' is an arithmetic expression that can be parsed by cexprtk.evaluate_expression.
 
     @param nameExpressionTuples List of (variable_name, expression) tuples."""
         self.nameExpressionTuples = nameExpressionTuples
+        self._compiled = None
+        self._bounds = (None, None)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Compiled cexprtk expressions can't be pickled, they are recreated when needed.
+        return {"nameExpressionTuples": self.nameExpressionTuples}
+
+    def __setstate__(self, state):
+        self.__init__(state["nameExpressionTuples"])
+
+    def _compiledFor(self, variableNames):
+        """Expressions are compiled, against a symbol table containing `variableNames`, the first time they are needed
+    and then re-used for as long as the same variable names are provided."""
+        compiled = self._compiled
+        if compiled is None or compiled.variableNames != variableNames:
+            symbolTable = cexprtk.Symbol_Table(
+                dict([(k, 0.0) for k in variableNames])
+            )
+            expressions = [
+                cexprtk.Expression(expression, symbolTable)
+                for (_name, expression) in self.nameExpressionTuples
+            ]
+            compiled = self._Compiled(variableNames, symbolTable, expressions)
+            self._compiled = compiled
+        return compiled
+
+    def _boundsFor(self, bounds):
+        inputBounds, outputBounds = self._bounds
+        if inputBounds is not bounds:
+            outputBounds = list(bounds)
+            outputBounds.extend([None] * len(self.nameExpressionTuples))
+            self._bounds = (bounds, outputBounds)
+        return outputBounds
 
     def __call__(self, variables):
         """Evaluate expression values using provided variables.
@@ -207,25 +278,41 @@ class CalculatedVariables(object):
     @return Variables instance containing original variables and additionally evaluated values"""
         if not self.nameExpressionTuples:
             return variables
+        return self.evaluatePopulation([variables])[0]
 
-        variableDict = dict(variables.variablePairs)
-
-        extraVars = []
-        for name, expression in self.nameExpressionTuples:
-            value = cexprtk.evaluate_expression(expression, variableDict)
-            extraVars.append((name, value, False))
+    def evaluatePopulation(self, population):
+        """Evaluate expression values for each Variables instance in population.
 
-        # Create the values we'll need for the Variables constructor.
-        vartuples = variables.flaggedVariablePairs
-        vartuples.extend(extraVars)
+    Equivalent to calling this object for each member of population, but expressions are only compiled once
+    and members of population produced by Variables.createUpdatedPopulation() share their bounds.
 
-        # Don't forget the bounds
-        bounds = variables.bounds
-        for _i in range(len(extraVars)):
-            bounds.append(None)
-
-        newvariables = Variables(vartuples, bounds)
-        return newvariables
+    @param population List of Variables instances.
+    @return List of Variables instances containing original variables and additionally evaluated values"""
+        if not self.nameExpressionTuples:
+            return list(population)
+
+        names = [name for (name, _expression) in self.nameExpressionTuples]
+        evaluated = []
+        with self._lock:
+            for variables in population:
+                varDict = variables._varDict
+                compiled = self._compiledFor(tuple(varDict))
+                symbols = compiled.symbolTable.variables
+                for k, v in varDict.items():
+                    symbols[k] = v
+
+                newDict = collections.OrderedDict(varDict)
+                newDict.update(
+                    zip(names, [e.value() for e in compiled.expressions])
+                )
+                evaluated.append(
+                    Variables._fromState(
+                        newDict,
+                        variables._fitKeys,
+                        self._boundsFor(variables._bounds),
+                    )
+                )
+        return evaluated
 
     @staticmethod
     def createFromConfig(cfgitems):
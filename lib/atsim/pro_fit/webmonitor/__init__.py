@@ -476,8 +476,24 @@ def _setupCherryPy(sqliteURL):
     return root
 
 
+def _upgradeDatabase(dbfilename):
+    """Add indexes missing from databases written by earlier versions of pprofit"""
+    if not os.path.isfile(dbfilename):
+        return
+    engine = sa.create_engine("sqlite:///" + dbfilename)
+    try:
+        db.upgrade(engine)
+    except sa.exc.OperationalError as e:
+        cherrypy.log(
+            "Could not add indexes to database, queries may be slow: %s" % e.orig
+        )
+    finally:
+        engine.dispose()
+
+
 def main():
     _processCommandLineOptions()
+    _upgradeDatabase("fitting_run.db")
     # Build cherrypy tree
     _setupCherryPy("sqlite:///fitting_run.db")
     cherrypy.engine.start()
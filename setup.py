@@ -39,7 +39,10 @@ def preprocess(infilename):
     os.chdir(oldir)
 
 preprocess_files = ["lib/atsim/pro_fit/filetransfer/remote_exec/file_cleanup_remote_exec.py",
-                    "lib/atsim/pro_fit/filetransfer/remote_exec/file_transfer_remote_exec.py"]
+                    "lib/atsim/pro_fit/filetransfer/remote_exec/file_transfer_remote_exec.py",
+                    "lib/atsim/pro_fit/runners/_pbs_remote_exec.py",
+                    "lib/atsim/pro_fit/runners/_sge_remote_exec.py",
+                    "lib/atsim/pro_fit/runners/_slurm_remote_exec.py"]
 
 class my_build(build_py):
 
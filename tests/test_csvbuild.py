@@ -240,3 +240,83 @@ Goodbye
                 os.path.join("dest", "DL_POLY_1", "support_1", "file2"), "r"
             ).readline()[:-1],
         )
+
+    def testTemplateDirectory(self):
+        """Test that TemplateDirectory can be built repeatedly from a single parse of the skeleton"""
+        j = os.path.join
+        os.mkdir("skel")
+        os.mkdir(j("skel", "sub_@run@"))
+        with open(j("skel", "sub_@run@", "input.in"), "w") as outfile:
+            print(r"run=@run:03d@ value=@value:.2f@ \@literal\@", file=outfile)
+        with open(j("skel", "static"), "w") as outfile:
+            print("@run@", file=outfile)
+
+        template = csvbuild.TemplateDirectory("skel")
+        self.assertEqual(
+            [os.path.abspath(j("skel", "static"))], template.staticFiles
+        )
+        self.assertEqual(
+            [os.path.abspath(j("skel", "sub_@run@", "input.in"))],
+            template.templateFiles,
+        )
+
+        # Changes to template after parsing should not be seen by build()
+        with open(j("skel", "sub_@run@", "input.in"), "w") as outfile:
+            print("changed", file=outfile)
+
+        cwd = os.getcwd()
+        for run, value in [(1, 1.234), (2, "5.678")]:
+            dest = j(self.tempdir, "dest_%d" % run)
+            os.mkdir(dest)
+            template.build(dict(run=run, value=value), dest)
+            self.assertEqual(cwd, os.getcwd())
+
+            self.assertEqual(
+                sorted(["static", "sub_%d" % run]), sorted(os.listdir(dest))
+            )
+            with open(j(dest, "sub_%d" % run, "input")) as infile:
+                self.assertEqual(
+                    "run=%03d value=%.2f @literal@\n" % (run, float(value)),
+                    infile.read(),
+                )
+            with open(j(dest, "static")) as infile:
+                self.assertEqual("@run@\n", infile.read())
+
+        os.mkdir("dest_bad")
+        with self.assertRaises(csvbuild.CSVBuildKeyError) as cm:
+            template.build(dict(run=3), "dest_bad")
+        self.assertEqual("value", cm.exception.args[0])
+        self.assertEqual(
+            os.path.abspath(j("skel", "sub_@run@", "input.in")),
+            cm.exception.templateFilename,
+        )
+
+    def testLinkModes(self):
+        """Test that static files can be linked rather than copied into destination"""
+        j = os.path.join
+        os.mkdir("skel")
+        with open(j("skel", "static"), "w") as outfile:
+            print("static contents", file=outfile)
+        with open(j("skel", "template.in"), "w") as outfile:
+            print("@A@", file=outfile)
+
+        srcstat = os.stat(j("skel", "static"))
+        for linkMode in ["copy", "hardlink", "reflink", "symlink"]:
+            dest = "dest_%s" % linkMode
+            os.mkdir(dest)
+            csvbuild.buildDirs([dict(A=linkMode)], "skel", dest, linkMode=linkMode)
+
+            with open(j(dest, "static")) as infile:
+                self.assertEqual("static contents\n", infile.read())
+            with open(j(dest, "template")) as infile:
+                self.assertEqual(linkMode + "\n", infile.read())
+            self.assertFalse(os.path.islink(j(dest, "template")))
+
+            samefile = os.path.samefile(j("skel", "static"), j(dest, "static"))
+            self.assertEqual(linkMode in ("hardlink", "symlink"), samefile)
+            self.assertEqual(
+                linkMode == "symlink", os.path.islink(j(dest, "static"))
+            )
+
+        with self.assertRaises(ValueError):
+            csvbuild.TemplateDirectory("skel", linkMode="bad")
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import math
+import os
+import shutil
+import tempfile
 import unittest
 
+import sqlalchemy as sa
+
 from .. import testutil
 
 from ._dbtestcase import DBTestCase
@@ -251,3 +257,74 @@ class IterationSeries_StatsColumns_TestCase(DBTestCase):
 
         actual = {"columns": next(t), "values": list(t)}
         testutil.compareCollection(self, expect, actual)
+
+    def testAllCandidates(self):
+        """Test stat: columns are repeated for every candidate of an iteration when candidateFilter is 'all'"""
+        t = db.IterationSeriesTable(
+            self.engine, candidateFilter="all", columns=["stat:min", "stat:max"]
+        )
+        next(t)
+        rows = list(t)
+        self.assertEqual(24, len(rows))
+        for row in rows:
+            iterationNumber = row[0]
+            iterationRows = [r for r in rows if r[0] == iterationNumber]
+            self.assertEqual(min(r[2] for r in iterationRows), row[3])
+            self.assertEqual(max(r[2] for r in iterationRows), row[4])
+
+
+class IterationSeries_StatsCache_TestCase(unittest.TestCase):
+    """Tests for caching of population statistics for finished iterations"""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        dbfilename = os.path.join(self.tempdir, "fitting_run.db")
+        shutil.copyfile(
+            IterationSeries_StatsColumns_TestCase.dbPath(), dbfilename
+        )
+        self.engine = sa.create_engine("sqlite:///" + dbfilename)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def _maxColumn(self):
+        t = db.IterationSeriesTable(self.engine, columns=["stat:max"])
+        next(t)
+        return [row[-1] for row in t]
+
+    def _setMerit(self, iterationNumber, meritValue):
+        with self.engine.begin() as conn:
+            conn.execute(
+                sa.text(
+                    "UPDATE candidates SET merit_value = :m WHERE iteration_number = :i AND candidate_number = 0"
+                ),
+                dict(m=meritValue, i=iterationNumber),
+            )
+
+    def testFinishedIterationsCached(self):
+        expect = self._maxColumn()
+        self.assertEqual(6, len(expect))
+        self.assertAlmostEqual(56979.43601, expect[0])
+
+        # Rows of finished iterations are not expected to change, values come from cache.
+        # The last iteration may still be being written so is recalculated.
+        self._setMerit(0, 1.0e6)
+        self._setMerit(5, 1.0e6)
+        self.assertEqual(expect[:-1] + [1.0e6], self._maxColumn())
+
+        # Removing rows (e.g. database replaced by new fitting run) invalidates cache.
+        with self.engine.begin() as conn:
+            conn.execute(sa.text("DELETE FROM candidates WHERE iteration_number = 5"))
+        self.assertEqual([1.0e6] + expect[1:-1], self._maxColumn())
+
+    def testGroupByIteration(self):
+        from atsim.pro_fit.db._columnproviders import _groupByIteration
+
+        groups = _groupByIteration([(0, 1.0), (0, 2.0), (2, 3.0), (3, 4.0), (3, None)])
+        self.assertEqual([0, 2, 3], [i for (i, v) in groups])
+        self.assertEqual([1.0, 2.0], groups[0][1].tolist())
+        self.assertEqual([3.0], groups[1][1].tolist())
+        self.assertEqual(4.0, groups[2][1][0])
+        self.assertTrue(math.isnan(groups[2][1][1]))
+        self.assertEqual([], _groupByIteration([]))
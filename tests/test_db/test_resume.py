@@ -0,0 +1,53 @@
+import sqlalchemy as sa
+
+import atsim.pro_fit.reporters
+import atsim.pro_fit.variables
+from atsim.pro_fit.db import loadResumeState
+from atsim.pro_fit.minimizers import MinimizerResults
+
+
+def _variables():
+    return atsim.pro_fit.variables.Variables(
+        [("A", 1.0, False), ("B", 2.0, True), ("C", 3.0, True)]
+    )
+
+
+def _minimizerResults(meritValues, fitValues):
+    variables = _variables()
+    return MinimizerResults(
+        meritValues, [(variables.createUpdated(fv), []) for fv in fitValues]
+    )
+
+
+def test_loadResumeState(tmpdir):
+    """Test atsim.pro_fit.db.loadResumeState()"""
+    dbfilename = tmpdir.join("fitting_run.db").strpath
+    reporter = atsim.pro_fit.reporters.SQLiteReporter(
+        dbfilename,
+        _variables(),
+        atsim.pro_fit.variables.CalculatedVariables([]),
+    )
+    engine = sa.create_engine("sqlite:///" + dbfilename)
+    assert loadResumeState(engine) is None
+
+    reporter(_minimizerResults([5.0, 0.5], [[10.0, 11.0], [12.0, 13.0]]))
+    reporter(
+        _minimizerResults(
+            [float("nan"), 2.0, 1.0], [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]
+        )
+    )
+    reporter.finished()
+
+    state = loadResumeState(engine)
+    assert 1 == state.iterationNumber
+    assert ["B", "C"] == state.fitKeys
+
+    assert [None, 2.0, 1.0] == [c.meritValue for c in state.population]
+    assert [
+        dict(A=1.0, B=1.0, C=2.0),
+        dict(A=1.0, B=3.0, C=4.0),
+        dict(A=1.0, B=5.0, C=6.0),
+    ] == [c.variables for c in state.population]
+
+    assert 0.5 == state.best.meritValue
+    assert dict(A=1.0, B=12.0, C=13.0) == state.best.variables
@@ -1,9 +1,10 @@
 import os
+import shutil
 
 import sqlalchemy as sa
 
 
-from atsim.pro_fit.db import validate
+from atsim.pro_fit.db import getMetadata, missingIndexes, upgrade, validate
 
 
 def _getResourceDir():
@@ -29,3 +30,44 @@ def test_validatebad(tmpdir):
     dburl = "sqlite:///emptyfile"
     engine = sa.create_engine(dburl)
     assert not validate(engine)
+
+
+def test_upgrade(tmpdir):
+    """Test atsim.pro_fit.db.upgrade() adds indexes to database created without them"""
+    dbfilename = tmpdir.join("fitting_run.db").strpath
+    shutil.copyfile(
+        os.path.join(_getResourceDir(), "grid_fitting_run.db"), dbfilename
+    )
+    engine = sa.create_engine("sqlite:///" + dbfilename)
+
+    expect = sorted(
+        [
+            "ix_candidates_iteration_number_candidate_number",
+            "ix_evaluated_job_id_evaluator_name_value_name",
+            "ix_jobs_candidate_id",
+            "ix_variables_candidate_id_variable_name",
+        ]
+    )
+    assert expect == sorted(idx.name for idx in missingIndexes(engine))
+    assert expect == sorted(upgrade(engine))
+    assert [] == missingIndexes(engine)
+    assert validate(engine)
+
+    inspector = sa.inspect(engine)
+    indexes = dict(
+        (idx["name"], idx["column_names"])
+        for idx in inspector.get_indexes("evaluated")
+    )
+    assert ["job_id", "evaluator_name", "value_name"] == indexes[
+        "ix_evaluated_job_id_evaluator_name_value_name"
+    ]
+
+    # Database is already up to date
+    assert [] == upgrade(engine)
+
+
+def test_new_database_indexed():
+    """Test that databases created from the current schema need no upgrade"""
+    engine = sa.create_engine("sqlite:///:memory:")
+    getMetadata().create_all(engine)
+    assert [] == missingIndexes(engine)
@@ -76,3 +76,75 @@ class DLPolySTATISEvaluator(unittest.TestCase):
         self.assertEqual(True, r.errorFlag)
         self.assertEqual(KeyError, type(r.exception))
         self.assertEqual("STATIS_Eval", r.evaluatorName)
+
+
+class DLPolySTATISReductionTestCase(unittest.TestCase):
+    """Tests for streaming STATIS reduction used by DLPOLY_STATISEvaluator"""
+
+    def _outputPath(self, filename):
+        return os.path.join(
+            _getResourceDirectory(), "job_files", "output", filename
+        )
+
+    def testBlocksMatchParseSTATIS(self):
+        from atsim.pro_fit.evaluators import _dlpoly_parse
+
+        with open(self._outputPath("CONFIG")) as infile:
+            config = _dlpoly_parse.parseCONFIG(infile)
+        indices = _dlpoly_parse.statisKeyIndices(config, True)
+
+        with open(self._outputPath("STATIS")) as infile:
+            rows = list(_dlpoly_parse.parseSTATIS(infile, config, True))
+        with open(self._outputPath("STATIS")) as infile:
+            blocks = list(_dlpoly_parse.parseSTATISBlocks(infile))
+
+        self.assertEqual(len(rows), len(blocks))
+        for row, (timestep, time, values) in zip(rows, blocks):
+            self.assertEqual(row["timestep"], timestep)
+            self.assertEqual(row["time"], time)
+            for k in ["volume", "msd_O", "stressxx", "cella_x"]:
+                self.assertEqual(row[k], values[indices[k]])
+
+    def testReducer(self):
+        import numpy as np
+        from atsim.pro_fit.evaluators._dlpoly import _STATISReducer
+
+        blocks = [np.arange(5.0) * (i + 1) for i in range(7)]
+        blocks[3] = blocks[3][:3]
+
+        reducer = _STATISReducer([1, 4], bufferSize=3)
+        for values in blocks:
+            reducer.add(values)
+
+        self.assertEqual(7, reducer.count)
+        self.assertEqual([False, True], list(reducer.missing))
+        self.assertAlmostEqual(
+            sum([b[1] for b in blocks]) / 7.0, reducer.averages()[0]
+        )
+
+    def testMissingKey(self):
+        """Keys that aren't in the STATIS file give an error record, others are still evaluated"""
+        evaluator = pro_fit.evaluators.DLPOLY_STATISEvaluator(
+            "STATIS_Eval",
+            75.0,
+            [("msd_Xx", 1.0, 1.0), ("volume", 84000.0, 2.0)],
+        )
+        job = Job(None, _getResourceDirectory(), None)
+        evaluated = evaluator(job)
+        self.assertEqual(["msd_Xx", "volume"], [r.name for r in evaluated])
+        self.assertEqual(KeyError, type(evaluated[0].exception))
+        self.assertAlmostEqual(17849.1273, evaluated[1].extractedValue, places=5)
+
+    def testStartTimeAfterEnd(self):
+        from atsim.pro_fit.evaluators._dlpoly import (
+            DLPOLY_STATISEvaluatorException,
+        )
+
+        evaluator = pro_fit.evaluators.DLPOLY_STATISEvaluator(
+            "STATIS_Eval", 1.0e9, [("volume", 84000.0, 2.0)]
+        )
+        job = Job(None, _getResourceDirectory(), None)
+        evaluated = evaluator(job)
+        self.assertEqual(
+            DLPOLY_STATISEvaluatorException, type(evaluated[0].exception)
+        )
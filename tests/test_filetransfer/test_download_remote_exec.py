@@ -243,3 +243,114 @@ def testDownloadFile(tmpdir, execnet_gw, channel_id):
     finally:
         ch1.send(None)
         ch1.waitclose(5)
+
+
+def testDownloadChunked(tmpdir, execnet_gw, channel_id):
+    tmpdir.join("small").write_binary(b"0123")
+    tmpdir.join("large").write_binary(b"0123456789")
+    tmpdir.join("large").chmod(0o640)
+    mode = os.stat(tmpdir.join("large").strpath).st_mode
+
+    ch1 = execnet_gw.remote_exec(file_transfer_remote_exec)
+    try:
+        ch1.send(
+            {
+                "msg": "START_DOWNLOAD_CHANNEL",
+                "channel_id": channel_id,
+                "remote_path": tmpdir.strpath,
+                "chunk_size": 4,
+            }
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(
+            msg="READY",
+            channel_id=channel_id,
+            remote_path=tmpdir.strpath,
+            chunk_size=4,
+        )
+
+        # Files no larger than chunk_size are sent whole.
+        ch1.send(dict(msg="DOWNLOAD_FILE", id=1, remote_path="small"))
+        msg = ch1.receive(10.0)
+        assert msg["file_data"] == b"0123"
+        assert not "chunked" in msg
+
+        ch1.send(dict(msg="DOWNLOAD_FILE", id=2, remote_path="large"))
+        msg = ch1.receive(10.0)
+        assert msg == dict(
+            msg="DOWNLOAD_FILE",
+            id=2,
+            channel_id=channel_id,
+            remote_path=tmpdir.join("large").strpath,
+            file_data=b"0123",
+            mode=mode,
+            chunked=True,
+            size=10,
+        )
+
+        ch1.send(
+            dict(msg="DOWNLOAD_CHUNK", id=2, remote_path="large", offset=8, length=4)
+        )
+        # Length is limited by the channel's chunk_size.
+        ch1.send(
+            dict(msg="DOWNLOAD_CHUNK", id=2, remote_path="large", offset=4, length=100)
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(
+            msg="DOWNLOAD_CHUNK",
+            id=2,
+            channel_id=channel_id,
+            remote_path=tmpdir.join("large").strpath,
+            file_data=b"89",
+            offset=8,
+            mode=mode,
+        )
+        msg = ch1.receive(10.0)
+        assert msg["offset"] == 4
+        assert msg["file_data"] == b"4567"
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
+
+
+def testDownloadCompressed(tmpdir, execnet_gw, channel_id):
+    import zlib
+
+    text = b"Hello World\n" * 100
+    tmpdir.join("text").write_binary(text)
+    random_data = os.urandom(1000)
+    tmpdir.join("random").write_binary(random_data)
+
+    ch1 = execnet_gw.remote_exec(file_transfer_remote_exec)
+    try:
+        ch1.send(
+            {
+                "msg": "START_DOWNLOAD_CHANNEL",
+                "channel_id": channel_id,
+                "remote_path": tmpdir.strpath,
+                "compression": ["zlib"],
+            }
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "READY"
+        assert msg["compression"] == "zlib"
+
+        ch1.send(dict(msg="DOWNLOAD_FILE", id=1, remote_path="text"))
+        msg = ch1.receive(10.0)
+        assert msg["compressed"] == "zlib"
+        assert zlib.decompress(msg["file_data"]) == text
+
+        # Incompressible data is sent as is.
+        ch1.send(dict(msg="DOWNLOAD_FILE", id=2, remote_path="random"))
+        msg = ch1.receive(10.0)
+        assert not "compressed" in msg
+        assert msg["file_data"] == random_data
+
+        # Compression can be disabled per request.
+        ch1.send(dict(msg="DOWNLOAD_FILE", id=3, remote_path="text", compress=False))
+        msg = ch1.receive(10.0)
+        assert not "compressed" in msg
+        assert msg["file_data"] == text
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
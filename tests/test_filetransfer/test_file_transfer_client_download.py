@@ -9,7 +9,8 @@ import pytest
 from atsim.pro_fit.filetransfer import (ChannelException,
                                         DownloadCancelledException,
                                         DownloadChannel, DownloadChannels,
-                                        DownloadDirectory, DownloadHandler)
+                                        DownloadDirectory, DownloadFilter,
+                                        DownloadHandler)
 
 from ._common import channel_id, cmpdirs, execnet_gw
 
@@ -561,3 +562,121 @@ def testDirectoryDownload_cancel(tmpdir, execnet_gw, channel_id):
     finally:
         ch1.broadcast(None)
         ch1.waitclose(2)
+
+
+@pytest.mark.parametrize("num_channels", [1, 3])
+def testDirectoryDownload_chunked(tmpdir, execnet_gw, channel_id, num_channels):
+    create_dir_structure(tmpdir)
+    rpath = tmpdir.join("remote")
+    large = os.urandom(1000)
+    rpath.join("0", "large").write_binary(large)
+    rpath.join("0", "large").chmod(0o640)
+    rpath.join("0", "exact").write_binary(large[:70])
+
+    ch1 = DownloadChannels(
+        execnet_gw,
+        rpath.strpath,
+        num_channels,
+        channel_id=channel_id,
+        keepAlive=KEEP_ALIVE,
+        chunk_size=70,
+        window=3,
+    )
+    try:
+        assert next(ch1).chunk_size == 70
+        do_dl(tmpdir, ch1)
+        dpath = tmpdir.join("dest")
+        assert dpath.join("0", "large").read_binary() == large
+        assert dpath.join("0", "exact").read_binary() == large[:70]
+        assert stat.S_IMODE(dpath.join("0", "large").stat().mode) == 0o640
+
+        # Every chunk request has been answered.
+        metrics = ch1.metrics()
+        assert len(metrics) == num_channels
+        assert sum(m["pending_bytes"] for m in metrics) == 0
+        assert sum(m["sent_bytes"] for m in metrics) >= 1000
+    finally:
+        ch1.broadcast(None)
+        ch1.waitclose(2)
+
+
+@pytest.mark.parametrize("compression", [["zlib"], None])
+def testDirectoryDownload_compressed(tmpdir, execnet_gw, channel_id, compression):
+    create_dir_structure(tmpdir)
+    rpath = tmpdir.join("remote")
+    rpath.join("text").write_binary(b"Hello World\n" * 1000)
+    rpath.join("random").write_binary(os.urandom(1000))
+
+    ch1 = DownloadChannels(
+        execnet_gw,
+        rpath.strpath,
+        channel_id=channel_id,
+        keepAlive=KEEP_ALIVE,
+        chunk_size=4096,
+        compression=compression,
+    )
+    try:
+        assert next(ch1).compression == (compression and compression[0])
+        do_dl(tmpdir, ch1)
+        stats = ch1.compression_stats
+        if compression:
+            assert stats.compressed_count == 3
+            assert stats.bytes_saved > 0
+            assert stats.ratio > 1.0
+        else:
+            assert stats.compressed_count == 0
+            assert stats.bytes_saved == 0
+        assert stats.uncompressed_count > 0
+        assert stats.raw_bytes >= 13000
+    finally:
+        ch1.broadcast(None)
+        ch1.waitclose(2)
+
+
+def testDownloadFilter():
+    dlfilter = DownloadFilter(include=["0/One", "0/1/*T*"], exclude=["*Three"])
+    assert dlfilter.include_file("0/One")
+    assert not dlfilter.include_file("0/Two")
+    assert dlfilter.include_file("0/1/Two")
+    assert not dlfilter.include_file("0/1/Three")
+    assert dlfilter.include_file("0/1/2/Two")
+
+    assert dlfilter.include_directory("0")
+    assert dlfilter.include_directory("0/1")
+    assert dlfilter.include_directory("0/1/2")
+    assert not dlfilter.include_directory("1")
+
+    dlfilter = DownloadFilter(include=["0/1/One"])
+    assert dlfilter.include_directory("0/1")
+    assert not dlfilter.include_directory("0/1/2")
+
+    dlfilter = DownloadFilter(exclude=["0/1"])
+    assert dlfilter.include_file("0/One")
+    assert not dlfilter.include_directory("0/1")
+
+
+def testDirectoryDownload_filtered(tmpdir, execnet_gw, channel_id):
+    create_dir_structure(tmpdir)
+    rpath = tmpdir.join("remote")
+    dpath = tmpdir.join("dest")
+
+    ch1 = DownloadChannels(
+        execnet_gw, rpath.strpath, channel_id=channel_id, keepAlive=KEEP_ALIVE
+    )
+    try:
+        dlfilter = DownloadFilter(include=["0/One", "0/1/*T*"], exclude=["*Three"])
+        dl = DownloadDirectory(
+            ch1, rpath.strpath, dpath.strpath, download_filter=dlfilter
+        )
+        do_dl(tmpdir, ch1, dl=dl, do_cmp=False)
+
+        actual = sorted(
+            os.path.relpath(os.path.join(dirpath, f), dpath.strpath)
+            for dirpath, dirnames, filenames in os.walk(dpath.strpath)
+            for f in filenames
+        )
+        assert actual == ["0/1/2/Two", "0/1/Two", "0/One"]
+        assert dpath.join("0", "One").read() == "One"
+    finally:
+        ch1.broadcast(None)
+        ch1.waitclose(2)
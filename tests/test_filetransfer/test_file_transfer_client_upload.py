@@ -1,3 +1,5 @@
+import os
+import stat
 import pathlib
 
 import pytest
@@ -407,3 +409,154 @@ def testDirectoryUpload_cancel(tmpdir, execnet_gw, channel_id):
     finally:
         ch1.broadcast(None)
         ch1.waitclose(2)
+
+
+def testDirectoryUpload_deduplicate(tmpdir, execnet_gw, channel_id):
+    source = tmpdir.join("source")
+    source.ensure_dir()
+    with source.join("static.txt").open("w") as outfile:
+        print("Static", file=outfile)
+
+    remote = tmpdir.join("remote")
+    remote.ensure_dir()
+    blobdir = remote.join(".blobstore")
+
+    ch1 = UploadChannels(
+        execnet_gw,
+        remote.strpath,
+        num_channels=2,
+        keepAlive=KEEP_ALIVE,
+        blob_store=blobdir.strpath,
+    )
+    try:
+        dests = []
+        for i in range(4):
+            with source.join("unique.txt").open("w") as outfile:
+                print("Unique %d" % i, file=outfile)
+            dest = remote.join("dest_%d" % i)
+            UploadDirectory(ch1, source.strpath, dest.strpath).upload()
+            cmpdirs(source.strpath, dest.strpath)
+            dests.append(dest)
+
+        # Only content seen more than once is stored.
+        assert len(blobdir.listdir()) == 1
+
+        # static.txt is linked from the store into each destination and is read-only.
+        static = [d.join("static.txt") for d in dests]
+        for f in static[1:]:
+            assert os.path.samefile(static[0].strpath, f.strpath)
+        assert stat.S_IMODE(static[0].stat().mode) & 0o222 == 0
+    finally:
+        ch1.broadcast(None)
+        ch1.waitclose(2)
+
+
+def testDirectoryUpload_deduplicate_sent_once(tmpdir, execnet_gw, channel_id):
+    source = tmpdir.join("source")
+    source.ensure_dir()
+    content = b"Static content\n"
+    source.join("static.txt").write_binary(content)
+
+    remote = tmpdir.join("remote")
+    remote.ensure_dir()
+
+    ch1 = UploadChannels(
+        execnet_gw,
+        remote.strpath,
+        num_channels=2,
+        keepAlive=KEEP_ALIVE,
+        blob_store=remote.join(".blobstore").strpath,
+    )
+    try:
+        for i in range(2):
+            dest = remote.join("dest_%d" % i)
+            UploadDirectory(ch1, source.strpath, dest.strpath).upload()
+            cmpdirs(source.strpath, dest.strpath)
+
+        # Second upload is satisfied from the blob store without sending the content again.
+        assert sum(m["sent_bytes"] for m in ch1.metrics()) == len(content)
+    finally:
+        ch1.broadcast(None)
+        ch1.waitclose(2)
+
+
+@pytest.mark.parametrize("num_channels", [1, 3])
+def testDirectoryUpload_chunked(tmpdir, execnet_gw, channel_id, num_channels):
+    source = tmpdir.join("source")
+    source.ensure_dir()
+    large = os.urandom(1000)
+    source.join("large").write_binary(large)
+    source.join("large").chmod(0o640)
+    source.join("sub", "exact").write_binary(large[:70], ensure=True)
+    source.join("sub", "small").write("small")
+
+    remote = tmpdir.join("remote")
+    remote.ensure_dir()
+
+    ch1 = UploadChannels(
+        execnet_gw,
+        remote.strpath,
+        num_channels=num_channels,
+        keepAlive=KEEP_ALIVE,
+        blob_store=remote.join(".blobstore").strpath,
+        chunk_size=70,
+        window=3,
+    )
+    try:
+        assert next(ch1).chunk_size == 70
+        dests = []
+        # Repeat upload so that chunked content is also added to and taken from blob store.
+        for i in range(3):
+            dest = remote.join("dest_%d" % i)
+            UploadDirectory(ch1, source.strpath, dest.strpath).upload()
+            cmpdirs(source.strpath, dest.strpath)
+            assert dest.join("large").read_binary() == large
+            assert dest.join("sub", "exact").read_binary() == large[:70]
+            # Write permission is removed once files are linked to the blob store.
+            assert stat.S_IMODE(dest.join("large").stat().mode) & ~0o222 == 0o440
+            dests.append(dest)
+
+        for dest in dests[1:]:
+            assert os.path.samefile(
+                dests[0].join("large").strpath, dest.join("large").strpath
+            )
+
+        # Every chunk has been acknowledged.
+        metrics = ch1.metrics()
+        assert len(metrics) == num_channels
+        assert sum(m["pending_bytes"] for m in metrics) == 0
+        assert sum(m["sent_bytes"] for m in metrics) >= 1000
+    finally:
+        ch1.broadcast(None)
+        ch1.waitclose(2)
+
+
+def testDirectoryUpload_compressed(tmpdir, execnet_gw, channel_id):
+    source = tmpdir.join("source")
+    source.ensure_dir()
+    source.join("text").write_binary(b"Hello World\n" * 1000)
+    source.join("random").write_binary(os.urandom(10000))
+    source.join("small").write("small")
+
+    remote = tmpdir.join("remote")
+    remote.ensure_dir()
+
+    ch1 = UploadChannels(
+        execnet_gw, remote.strpath, keepAlive=KEEP_ALIVE, chunk_size=4096
+    )
+    try:
+        assert next(ch1).compression is not None
+        dest = remote.join("dest")
+        UploadDirectory(ch1, source.strpath, dest.strpath).upload()
+        cmpdirs(source.strpath, dest.strpath)
+
+        stats = ch1.compression_stats
+        # text file is sent as three compressed chunks. After the first chunk of
+        # random is found to be incompressible, compression isn't attempted for the rest.
+        assert stats.compressed_count == 3
+        assert stats.uncompressed_count == 4
+        assert stats.raw_bytes == 22005
+        assert stats.bytes_saved > 0
+    finally:
+        ch1.broadcast(None)
+        ch1.waitclose(2)
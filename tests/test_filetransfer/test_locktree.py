@@ -181,3 +181,58 @@ def testLockTree_splitpath():
     assert ["one"] == lt._splitpath("one")
     assert ["one"] == lt._splitpath("/this/is/the/root/one")
     assert ["one", "two", "three"] == lt._splitpath("one/two/three")
+
+
+def testLockTree_locked_count():
+    lt = file_cleanup_remote_exec.LockTree("/root")
+    lt.add("one/two/three")
+    lt.add("one/two/three")
+    lt.add("one/four")
+    lt.add("one")
+    assert 3 == lt.rootnode.locked_count
+    assert 3 == lt["one"].locked_count
+    assert 1 == lt["one/two"].locked_count
+
+    lt.unlock("one/two/three")
+    assert 2 == lt.rootnode.locked_count
+    assert 0 == lt["one/two"].locked_count
+    assert not lt.islocked("one/two")
+
+    lt.unlock_tree("one")
+    assert 0 == lt.rootnode.locked_count
+    assert not lt.islocked("one")
+
+
+def testLockTree_unlock_and_remove():
+    root = "/root"
+    lt = file_cleanup_remote_exec.LockTree(root)
+    lt.add("two")
+    lt.add("two/three/four")
+    lt.add("two/three")
+    lt.add("two/a/b")
+    lt.add("two/a/c")
+    lt.add("other")
+
+    # Descendants still locked.
+    assert lt.unlock_and_remove("two/three") is None
+    assert lt["two/three"].islocked == False
+    assert lt.islocked("two/three")
+
+    # Unregistered parent of the removed node is left in place.
+    assert "two/a/b" == lt.unlock_and_remove("two/a/b")
+    assert "a" in lt["two"].children
+    assert "b" not in lt["two/a"].children
+    assert 4 == lt.rootnode.locked_count
+
+    # Nothing locked beneath 'two/three', it replaces its unlocked descendant.
+    assert posixpath.join(root, "two/three") == lt.unlock_and_remove(
+        "two/three/four", include_root=True
+    )
+    assert "three" not in lt["two"].children
+
+    assert lt.unlock_and_remove("two") is None
+    # Only the highest unlocked ancestor is returned.
+    assert "two" == lt.unlock_and_remove("two/a/c")
+    assert ["other"] == list(lt.rootnode.children)
+    assert ["other"] == list(lt.locked())
+    assert 1 == lt.rootnode.locked_count
@@ -0,0 +1,97 @@
+"""Tests for atsim.pro_fit._channel.MultiChannel channel selection"""
+
+from atsim.pro_fit._channel import ChannelLoad, MultiChannel, message_bytes
+
+
+class _MockChannel(object):
+    def __init__(self, channel_id):
+        self.channel_id = channel_id
+        self.chunk_size = 100
+        self.load = None
+
+    def send(self, msg):
+        self.load.sent(msg, message_bytes(msg, self.chunk_size))
+
+
+class _MockChannelFactory(object):
+    def createChannel(self, execnet_gw, channel_id):
+        return _MockChannel(channel_id)
+
+
+def _upload(msgid, nbytes):
+    return dict(msg="UPLOAD", id=msgid, file_data=b"0" * nbytes)
+
+
+def test_message_bytes():
+    assert message_bytes(_upload("a", 10)) == 10
+    assert message_bytes(dict(msg="MKDIR", id="a", remote_path="b")) == 0
+    assert message_bytes(dict(msg="DOWNLOAD_CHUNK", id="a", length=7)) == 7
+    assert message_bytes(dict(msg="DOWNLOAD_FILE", id="a"), 50) == 50
+    assert message_bytes(None) == 0
+
+
+def test_channel_load():
+    load = ChannelLoad()
+    load.sent(_upload("a", 10), 10)
+    load.sent(_upload("a", 5), 5)
+    load.sent(dict(msg="MKDIR", id="b"), 0)
+    load.sent(dict(msg="KEEP_ALIVE"), 0)
+    assert load.pending_messages == 3
+    assert load.pending_bytes == 15
+
+    load.received(dict(msg="UPLOAD_CHUNK", id="a"))
+    assert load.pending_messages == 2
+    assert load.pending_bytes == 5
+
+    # ERROR without an id releases the oldest request.
+    load.received(dict(msg="ERROR", reason="bad"))
+    assert load.pending_bytes == 0
+
+    # Responses to unknown requests are ignored.
+    load.received(dict(msg="MKDIR", id="c"))
+    load.received(dict(msg="MKDIR", id="b"))
+    assert load.metrics() == dict(
+        pending_messages=0,
+        pending_bytes=0,
+        max_pending_messages=3,
+        sent_messages=3,
+        sent_bytes=15,
+    )
+
+
+def test_select_least_loaded():
+    mc = MultiChannel(None, _MockChannelFactory(), num_channels=3, channel_id="mc")
+    ch0, ch1, ch2 = mc._channels
+
+    # Equally loaded channels are used in turn.
+    assert [next(mc) for _i in range(3)] == [ch0, ch1, ch2]
+
+    # Large upload in flight on ch0, small on ch1.
+    ch0.send(_upload("big", 1000000))
+    ch1.send(_upload("small", 10))
+    assert mc.select("UPLOAD") is ch2
+    ch2.send(_upload("small2", 10))
+
+    # ch1 and ch2 hold the same bytes, ch1 was used longer ago.
+    assert mc.select("UPLOAD") is ch1
+    ch1.send(_upload("small3", 10))
+    assert mc.select("UPLOAD") is ch2
+
+    ch2.send(_upload("small4", 10))
+
+    # Control messages are sent where least data is waiting, regardless of request count.
+    ch2.send(dict(msg="MKDIR", id="d1"))
+    ch2.send(dict(msg="MKDIR", id="d2"))
+    assert mc.select("UPLOAD") is ch1
+    assert mc.select("MKDIR") is ch2
+
+    ch0.load.received(dict(msg="UPLOADED", id="big"))
+    assert mc.select("UPLOAD") is ch0
+
+    metrics = dict((m["channel_id"], m) for m in mc.metrics())
+    assert sorted(metrics) == ["mc_0", "mc_1", "mc_2"]
+    assert metrics["mc_0"]["pending_messages"] == 0
+    assert metrics["mc_1"]["pending_messages"] == 2
+    assert metrics["mc_1"]["pending_bytes"] == 20
+    assert metrics["mc_2"]["pending_messages"] == 4
+    assert metrics["mc_2"]["pending_bytes"] == 20
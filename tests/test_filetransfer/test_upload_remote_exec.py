@@ -342,3 +342,358 @@ def testMkdirs(tmpdir, execnet_gw, channel_id):
     finally:
         ch1.send(None)
         ch1.waitclose(5)
+
+
+def testUploadDigest(tmpdir, execnet_gw, channel_id):
+    import hashlib
+
+    ch1 = execnet_gw.remote_exec(file_transfer_remote_exec)
+    try:
+        destdir = tmpdir.join("dest")
+        blobdir = destdir.join(".blobstore")
+        ch1.send(
+            dict(
+                msg="START_UPLOAD_CHANNEL",
+                remote_path=destdir.strpath,
+                blob_store=blobdir.strpath,
+            )
+        )
+
+        msg = ch1.receive()
+        assert msg["msg"] == "READY"
+        assert msg["blob_store"] == blobdir.strpath
+        channel_id = msg["channel_id"]
+        assert blobdir.isdir()
+
+        filecontents = b"Hello World\n"
+        digest = hashlib.sha256(filecontents).hexdigest()
+        mode = 0o100644
+
+        # Content not in store.
+        ch1.send(
+            dict(msg="UPLOAD_DIGEST", remote_path="file1", mode=mode, digest=digest, id=1)
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(
+            msg="BLOB_REQUIRED",
+            channel_id=channel_id,
+            id=1,
+            remote_path=destdir.join("file1").strpath,
+            digest=digest,
+        )
+
+        # Upload content with digest, this should add file to store.
+        ch1.send(
+            dict(
+                msg="UPLOAD",
+                remote_path="file1",
+                mode=mode,
+                digest=digest,
+                file_data=filecontents,
+                id=1,
+            )
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "UPLOADED"
+        assert len(blobdir.listdir()) == 1
+
+        # Now content is available from store.
+        ch1.send(
+            dict(msg="UPLOAD_DIGEST", remote_path="sub/file2", mode=mode, digest=digest, id=2)
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(
+            msg="UPLOADED",
+            channel_id=channel_id,
+            id=2,
+            remote_path=destdir.join("sub", "file2").strpath,
+            deduplicated=True,
+        )
+        file1 = destdir.join("file1")
+        file2 = destdir.join("sub", "file2")
+        assert file2.read_binary() == filecontents
+
+        # Files are hard linked to a blob without write permission.
+        (blob,) = blobdir.listdir()
+        assert os.path.samefile(file1.strpath, blob.strpath)
+        assert os.path.samefile(file2.strpath, blob.strpath)
+        assert stat.S_IMODE(blob.stat().mode) == 0o444
+
+        # Uploading over a linked file replaces it rather than writing into the blob.
+        ch1.send(dict(msg="UPLOAD", remote_path="file4", mode=mode, file_data=b"Other\n", id=4))
+        assert ch1.receive(10.0)["msg"] == "UPLOADED"
+        ch1.send(
+            dict(msg="UPLOAD_DIGEST", remote_path="file4", mode=mode, digest=digest, id=5)
+        )
+        assert ch1.receive(10.0)["msg"] == "UPLOADED"
+        ch1.send(dict(msg="UPLOAD", remote_path="file4", mode=mode, file_data=b"Other\n", id=6))
+        assert ch1.receive(10.0)["msg"] == "UPLOADED"
+        assert destdir.join("file4").read_binary() == b"Other\n"
+        assert blob.read_binary() == filecontents
+
+        # Modifying file in place should invalidate blob.
+        file1.chmod(0o644)
+        with file1.open("ab") as outfile:
+            outfile.write(b"Modified\n")
+
+        ch1.send(
+            dict(msg="UPLOAD_DIGEST", remote_path="file3", mode=mode, digest=digest, id=3)
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "BLOB_REQUIRED"
+        assert blobdir.listdir() == []
+        assert not destdir.join("file3").exists()
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
+
+
+def _start_blob_store_channel(execnet_gw, destdir, blobdir, **kwargs):
+    ch1 = execnet_gw.remote_exec(file_transfer_remote_exec)
+    ch1.send(
+        dict(
+            msg="START_UPLOAD_CHANNEL",
+            remote_path=destdir.strpath,
+            blob_store=blobdir.strpath,
+            **kwargs
+        )
+    )
+    msg = ch1.receive()
+    assert msg["msg"] == "READY"
+    return ch1, msg["channel_id"]
+
+
+def testUploadDigest_previous_path(tmpdir, execnet_gw, channel_id):
+    import hashlib
+
+    destdir = tmpdir.join("dest")
+    blobdir = destdir.join(".blobstore")
+    ch1, channel_id = _start_blob_store_channel(execnet_gw, destdir, blobdir)
+    try:
+        filecontents = b"Hello World\n"
+        digest = hashlib.sha256(filecontents).hexdigest()
+        mode = 0o100644
+
+        # First upload is sent without digest and isn't stored.
+        ch1.send(
+            dict(msg="UPLOAD", remote_path="file1", mode=mode, file_data=filecontents, id=1)
+        )
+        assert ch1.receive(10.0)["msg"] == "UPLOADED"
+        assert blobdir.listdir() == []
+
+        # previous_path with different content or outside remote root is ignored.
+        destdir.join("other").write_binary(b"Other\n")
+        for i, previous_path in enumerate(["other", "/etc/passwd", "missing"]):
+            ch1.send(
+                dict(
+                    msg="UPLOAD_DIGEST",
+                    remote_path="file2",
+                    mode=mode,
+                    digest=digest,
+                    previous_path=previous_path,
+                    id=2 + i,
+                )
+            )
+            assert ch1.receive(10.0)["msg"] == "BLOB_REQUIRED"
+        assert blobdir.listdir() == []
+
+        # Second sighting adds earlier upload to store without content being sent again.
+        ch1.send(
+            dict(
+                msg="UPLOAD_DIGEST",
+                remote_path="file2",
+                mode=mode,
+                digest=digest,
+                previous_path=destdir.join("file1").strpath,
+                id=5,
+            )
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "UPLOADED"
+        assert msg["deduplicated"]
+
+        (blob,) = blobdir.listdir()
+        for f in ["file1", "file2"]:
+            assert os.path.samefile(destdir.join(f).strpath, blob.strpath)
+        assert destdir.join("file2").read_binary() == filecontents
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
+
+
+def testUploadDigest_eviction(tmpdir, execnet_gw, channel_id):
+    import hashlib
+
+    destdir = tmpdir.join("dest")
+    blobdir = destdir.join(".blobstore")
+    ch1, channel_id = _start_blob_store_channel(
+        execnet_gw, destdir, blobdir, blob_store_max_size=25
+    )
+    try:
+        mode = 0o100644
+
+        def store(i):
+            filecontents = (b"%d" % i) * 10
+            digest = hashlib.sha256(filecontents).hexdigest()
+            ch1.send(
+                dict(
+                    msg="UPLOAD",
+                    remote_path="job_%d/file" % i,
+                    mode=mode,
+                    digest=digest,
+                    file_data=filecontents,
+                    id=i,
+                )
+            )
+            assert ch1.receive(10.0)["msg"] == "UPLOADED"
+            # Make blob age explicit rather than relying on timestamp resolution.
+            t = (i + 1) * 10 ** 9
+            os.utime(destdir.join("job_%d" % i, "file").strpath, ns=(t, t))
+            return digest
+
+        digests = [store(i) for i in range(3)]
+        # All blobs are still linked from job directories.
+        assert len(blobdir.listdir()) == 3
+
+        # Cleaning up jobs leaves unlinked blobs, the oldest are removed
+        # once their total size exceeds the limit.
+        for i in range(3):
+            destdir.join("job_%d" % i).remove()
+        digests.append(store(3))
+
+        remaining = sorted(b.basename.split("-")[0] for b in blobdir.listdir())
+        assert remaining == sorted(digests[1:])
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
+
+
+def testUploadDigest_no_blob_store(tmpdir, execnet_gw, channel_id):
+    ch1 = execnet_gw.remote_exec(file_transfer_remote_exec)
+    try:
+        ch1.send(dict(msg="START_UPLOAD_CHANNEL", remote_path=tmpdir.strpath))
+        msg = ch1.receive()
+        assert msg["msg"] == "READY"
+        assert not "blob_store" in msg
+
+        ch1.send(
+            dict(msg="UPLOAD_DIGEST", remote_path="file1", digest="abc", id=1)
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "ERROR"
+        assert msg["error_code"] == ("MSGERROR", "NO_BLOB_STORE")
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
+
+
+def testUploadChunked(tmpdir, execnet_gw, channel_id):
+    ch1 = execnet_gw.remote_exec(file_transfer_remote_exec)
+    try:
+        ch1.send(
+            dict(
+                msg="START_UPLOAD_CHANNEL",
+                channel_id=channel_id,
+                remote_path=tmpdir.strpath,
+                chunk_size=4,
+            )
+        )
+        msg = ch1.receive()
+        assert msg == dict(
+            msg="READY",
+            channel_id=channel_id,
+            remote_path=tmpdir.strpath,
+            chunk_size=4,
+        )
+
+        remote_path = tmpdir.join("file").strpath
+        ch1.send(
+            dict(
+                msg="UPLOAD",
+                id=1,
+                remote_path="file",
+                mode=0o100600,
+                file_data=b"0123",
+                chunked=True,
+            )
+        )
+        # Second chunk is sent before first is acknowledged.
+        ch1.send(
+            dict(
+                msg="UPLOAD_CHUNK",
+                id=1,
+                remote_path="file",
+                offset=4,
+                file_data=b"4567",
+            )
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(
+            msg="UPLOAD_CHUNK",
+            channel_id=channel_id,
+            id=1,
+            remote_path=remote_path,
+            offset=4,
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "UPLOAD_CHUNK"
+        assert msg["offset"] == 8
+
+        ch1.send(
+            dict(
+                msg="UPLOAD_CHUNK",
+                id=1,
+                remote_path="file",
+                offset=8,
+                file_data=b"89",
+                final=True,
+                mode=0o100640,
+            )
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(
+            msg="UPLOADED",
+            channel_id=channel_id,
+            id=1,
+            remote_path=remote_path,
+        )
+        assert tmpdir.join("file").read_binary() == b"0123456789"
+        assert stat.S_IMODE(os.stat(remote_path).st_mode) == 0o640
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
+
+
+def testUploadCompressed(tmpdir, execnet_gw, channel_id):
+    import zlib
+
+    ch1 = execnet_gw.remote_exec(file_transfer_remote_exec)
+    try:
+        ch1.send(
+            dict(
+                msg="START_UPLOAD_CHANNEL",
+                channel_id=channel_id,
+                remote_path=tmpdir.strpath,
+                compression=["not_a_codec", "zlib"],
+            )
+        )
+        msg = ch1.receive()
+        assert msg["msg"] == "READY"
+        assert msg["compression"] == "zlib"
+
+        filecontents = b"Hello World\n" * 100
+        ch1.send(
+            dict(
+                msg="UPLOAD",
+                id=1,
+                remote_path="file",
+                file_data=zlib.compress(filecontents),
+                compressed="zlib",
+            )
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "UPLOADED"
+        assert tmpdir.join("file").read_binary() == filecontents
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
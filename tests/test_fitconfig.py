@@ -1,5 +1,6 @@
 import atsim.pro_fit.fitconfig
 import atsim.pro_fit.metaevaluators
+import atsim.pro_fit.merit
 import atsim.pro_fit.minimizers
 import atsim.pro_fit.jobtasks
 from . import testutil
@@ -89,6 +90,76 @@ class FitConfigTestCase(unittest.TestCase):
 
         self.assertEqual(20.0, cfgobject.bad_merit_substitute)
 
+    def testReporterMode(self):
+        """Test parsing of [FittingRun] reporter_mode option"""
+        self.assertEqual("synchronous", self.cfgobject.reporter_mode)
+
+        import configparser
+
+        cfg = configparser.ConfigParser()
+        cfg.optionxform = str
+        cfg.read_string("[FittingRun]\nreporter_mode : batched\n")
+        self.cfgobject._cfg = cfg
+        self.assertEqual("batched", self.cfgobject._parse_reporter_mode())
+
+        cfg.set("FittingRun", "reporter_mode", "sometimes")
+        with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+            self.cfgobject._parse_reporter_mode()
+
+    def testMeritMode(self):
+        """Test parsing of [FittingRun] merit_mode option"""
+        self.assertEqual("sequential", self.cfgobject.merit_mode)
+        self.assertEqual(atsim.pro_fit.merit.Merit, type(self.cfgobject.merit))
+
+        import configparser
+
+        cfg = configparser.ConfigParser()
+        cfg.optionxform = str
+        cfg.read_string("[FittingRun]\nmerit_mode : pipelined\n")
+        self.cfgobject._cfg = cfg
+        self.assertEqual("pipelined", self.cfgobject._parse_merit_mode())
+
+        cfg.set("FittingRun", "merit_mode", "sometimes")
+        with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+            self.cfgobject._parse_merit_mode()
+
+    def testMeritCache(self):
+        """Test parsing of [FittingRun] merit_cache options"""
+        self.assertEqual("none", self.cfgobject.merit_cache)
+        self.assertEqual(None, self.cfgobject.merit.cache)
+
+        import configparser
+
+        oldcfg = self.cfgobject._cfg
+        confighash = self.cfgobject._configurationHash()
+        self.assertEqual(confighash, self.cfgobject._configurationHash())
+
+        cfg = configparser.ConfigParser()
+        cfg.optionxform = str
+        cfg.read_string(
+            "[FittingRun]\nmerit_cache : database\nmerit_cache_significant_figures : 6\n"
+        )
+        self.cfgobject._cfg = cfg
+        self.assertEqual("database", self.cfgobject._parse_merit_cache())
+        self.cfgobject._merit_cache = "memory"
+        merit = self.cfgobject._createMerit()
+        self.assertEqual(6, merit.cache.significantFigures)
+        self.assertEqual(10000, merit.cache.maxSize)
+
+        # Configuration hash depends on [CalculatedVariables] but not on [FittingRun]
+        self.assertNotEqual(confighash, merit.cache.configurationHash)
+        cfg.read_dict(dict(oldcfg))
+        cfg.set("FittingRun", "title", "Another title")
+        self.assertEqual(confighash, self.cfgobject._configurationHash())
+
+        cfg.set("FittingRun", "merit_cache", "sometimes")
+        with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+            self.cfgobject._parse_merit_cache()
+
+        cfg.set("FittingRun", "merit_cache_size", "0")
+        with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+            self.cfgobject._parse_merit_cache_option("merit_cache_size", 10)
+
     def testParseVariables(self):
         """Test creation of pro_fit._Variables Variables section of fit.cfg"""
         variables = self.cfgobject.variables
@@ -160,3 +160,72 @@ class GulpParseOutputConfigurationTestCase(unittest.TestCase):
         }
         actual = _gulp_parse.parseMechanicalProperties(testfile)
         testutil.compareCollection(self, expect, actual)
+
+
+class GulpOutputTestCase(unittest.TestCase):
+    """Tests for atsim.pro_fit.evaluators._gulp_parse.GulpOutput and chunkIndex()"""
+
+    def testChunkIndex(self):
+        delim = 80 * "*" + "\n"
+
+        def header(name):
+            return [delim, "*  %s *\n" % name.ljust(75), delim]
+
+        lines = header("GULP")
+        lines.extend(["\n", "untitled\n"])
+        lines.extend(header("Output for configuration   1"))
+        lines.extend(["one\n", delim, "not a header\n", "two\n"])
+        lines.extend(header("Timing"))
+        lines.extend(["three\n"])
+
+        index = _gulp_parse.chunkIndex(lines)
+        chunks = [
+            (name.strip(), lines[start:end]) for (name, start, end) in index
+        ]
+        self.assertEqual(
+            [
+                ("", ["untitled\n"]),
+                (
+                    "Output for configuration   1",
+                    ["one\n", delim, "not a header\n", "two\n"],
+                ),
+                ("Timing", ["three\n"]),
+            ],
+            chunks,
+        )
+
+        chunks = [
+            (name.strip(), list(chunk))
+            for (name, chunk) in _gulp_parse.chunkIterator(iter(lines))
+        ]
+        self.assertEqual("Timing", chunks[-1][0])
+        self.assertEqual(["three\n"], chunks[-1][1])
+
+    def testSectionsMemoised(self):
+        filename = os.path.join(
+            _getResourceDirectory(), "opti_conp_prop_outputsection.res"
+        )
+        gulpOutput = _gulp_parse.GulpOutput(filename)
+
+        with open(filename) as testfile:
+            expect = _gulp_parse.parseMechanicalProperties(testfile)
+        actual = gulpOutput.mechanicalProperties()
+        testutil.compareCollection(self, expect, actual)
+        self.assertTrue(actual is gulpOutput.mechanicalProperties())
+
+        with open(filename) as testfile:
+            expect = _gulp_parse.parseElasticConstantMatrix(testfile)
+        testutil.compareCollection(
+            self, expect, gulpOutput.elasticConstantMatrix()
+        )
+
+        calls = []
+
+        def badparser(o):
+            calls.append(o)
+            raise _gulp_parse.ParseException("bad")
+
+        for _i in range(2):
+            with self.assertRaises(_gulp_parse.ParseException):
+                gulpOutput.section("bad", badparser)
+        self.assertEqual(1, len(calls))
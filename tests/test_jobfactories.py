@@ -5,6 +5,8 @@ import tempfile
 import unittest
 
 import atsim.pro_fit
+import atsim.pro_fit.exceptions
+import atsim.pro_fit.jobfactories
 import atsim.pro_fit.variables
 
 from .common import logger
@@ -177,6 +179,17 @@ runner : runner_name
         )
         self.assertEqual(None, jf.runnerFilesPath)
 
+        with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+            atsim.pro_fit.jobfactories.TemplateJobFactory.createFromConfig(
+                "path/to/sourcedir",
+                self.rootDir,
+                "runner_name",
+                "Blah",
+                [eval1],
+                [],
+                sect + [("file_link_mode", "bad")],
+            )
+
         shutil.rmtree(os.path.join(self.rootDir, "runner_files"))
         jf = atsim.pro_fit.jobfactories.TemplateJobFactory.createFromConfig(
             "path/to/sourcedir",
@@ -188,3 +201,92 @@ runner : runner_name
             sect,
         )
         self.assertEqual(None, jf.runnerFilesPath)
+
+    def testCreateFromConfig_download_files(self):
+        """Test the download_files, download_include and download_exclude options of TemplateJobFactory"""
+        from atsim.pro_fit.evaluators import TableEvaluator
+        from atsim.pro_fit.jobtasks import PotableJobTask
+
+        from . import mockeval1
+
+        def create(evaluators, items):
+            return atsim.pro_fit.jobfactories.TemplateJobFactory.createFromConfig(
+                "path/to/sourcedir",
+                self.rootDir,
+                "runner_name",
+                "Blah",
+                evaluators,
+                [PotableJobTask("potable", "in.aspot", "out.lmp_pot")],
+                [("type", "Template"), ("runner", "runner_name")] + items,
+            )
+
+        tableEval = TableEvaluator(
+            "table", [], "results[1].csv", "r_A", 1.0, 0.0, False
+        )
+
+        jf = create([tableEval], [])
+        self.assertEqual(None, jf.downloadFilter)
+
+        jf = create([tableEval], [("download_exclude", "*.dump  big/*")])
+        self.assertEqual(None, jf.downloadFilter.include)
+        self.assertEqual(["*.dump", "big/*"], jf.downloadFilter.exclude)
+
+        jf = create(
+            [tableEval],
+            [
+                ("download_files", "required"),
+                ("download_include", "log.lammps"),
+                ("download_exclude", "*.dump"),
+            ],
+        )
+        self.assertEqual(["results[[]1].csv", "log.lammps"], jf.downloadFilter.include)
+        self.assertEqual(["*.dump"], jf.downloadFilter.exclude)
+        self.assertTrue(jf.downloadFilter.include_file("results[1].csv"))
+        self.assertFalse(jf.downloadFilter.include_file("results1.csv"))
+
+        with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+            create([tableEval], [("download_files", "bad")])
+
+        # mockeval1 does not declare the files it needs.
+        with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+            create(
+                [tableEval, mockeval1.MockEvaluator1Evaluator()],
+                [("download_files", "required")],
+            )
+
+    def testCreateFromConfig_worker(self):
+        """Test the worker_command and worker_entry_point options of TemplateJobFactory"""
+        from . import mockeval1
+
+        def create(items):
+            return atsim.pro_fit.jobfactories.TemplateJobFactory.createFromConfig(
+                "path/to/sourcedir",
+                self.rootDir,
+                "runner_name",
+                "Blah",
+                [mockeval1.MockEvaluator1Evaluator()],
+                [],
+                [("type", "Template"), ("runner", "runner_name")] + items,
+            )
+
+        self.assertEqual(None, create([]).worker)
+        self.assertEqual(
+            {"command": ["gulp", "input file.gin"]},
+            create([("worker_command", "gulp 'input file.gin'")]).worker,
+        )
+        self.assertEqual(
+            {"entry_point": "mypackage.jobs:run"},
+            create([("worker_entry_point", "mypackage.jobs:run")]).worker,
+        )
+
+        for items in [
+            [("worker_entry_point", "mypackage.jobs")],
+            [("worker_entry_point", ":run")],
+            [("worker_command", "gulp 'input.gin")],
+            [
+                ("worker_command", "gulp input.gin"),
+                ("worker_entry_point", "mypackage.jobs:run"),
+            ],
+        ]:
+            with self.assertRaises(atsim.pro_fit.exceptions.ConfigException):
+                create(items)
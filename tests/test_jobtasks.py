@@ -173,3 +173,54 @@ def test_potable_end_to_end(tmpdir):
     assert erdict["r"].extractedValue == pytest.approx(2.02020202)
     assert erdict["v"].extractedValue == pytest.approx(5.0)
     assert erdict["dvdr"].extractedValue == pytest.approx(0.0)
+
+
+def test_tabulation_executor(tmpdir):
+    """Check that TabulationExecutor memoises tabulations and waits cooperatively"""
+    import gevent
+
+    p = pathlib.Path(tmpdir.strpath) / "table.aspot"
+    _make_tabulation_file(p, "10.0")
+    potable_input = p.read_text()
+    expect = atsim.pro_fit.jobtasks._tabulate(potable_input)
+
+    executor = atsim.pro_fit.jobtasks.TabulationExecutor(max_workers=1, cache_size=2)
+    try:
+        ticks = []
+
+        def ticker():
+            while True:
+                ticks.append(None)
+                gevent.sleep(0.01)
+
+        tickgrn = gevent.spawn(ticker)
+        try:
+            greenlets = [gevent.spawn(executor.tabulate, potable_input) for i in range(3)]
+            gevent.joinall(greenlets, raise_error=True)
+        finally:
+            tickgrn.kill()
+
+        assert [expect] * 3 == [g.value for g in greenlets]
+        # Other greenlets ran whilst waiting for the worker process.
+        assert len(ticks) > 1
+        assert len(executor._cache) == 1
+
+        # Least recently used tabulation is evicted.
+        _make_tabulation_file(p, "20.0")
+        other = p.read_text()
+        _make_tabulation_file(p, "30.0")
+        third = p.read_text()
+        executor.tabulate(other)
+        executor.tabulate(potable_input)
+        executor.tabulate(third)
+        assert len(executor._cache) == 2
+        cached = list(executor._cache.values())
+        assert cached[0].result() == expect
+        assert cached[1].result() == atsim.pro_fit.jobtasks._tabulate(third)
+
+        # Failures are not memoised.
+        with pytest.raises(Exception):
+            executor.tabulate("[Tabulation]\ntarget : NOT_A_TARGET\n")
+        assert [f.exception() for f in executor._cache.values()] == [None]
+    finally:
+        executor.shutdown()
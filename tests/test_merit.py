@@ -8,6 +8,8 @@ import sys
 import unittest
 
 import atsim.pro_fit.evaluators
+import atsim.pro_fit.db
+import atsim.pro_fit.jobfactories
 import atsim.pro_fit.merit
 import atsim.pro_fit.variables
 import gevent
@@ -662,3 +664,191 @@ class MeritTestCase(unittest.TestCase):
         self.assertEqual(expect, actual)
 
         # self.fail()
+
+    def testPipelinedMerit(self):
+        """Test atsim.pro_fit.merit.PipelinedMerit prefetching and background clean-up"""
+        merit = atsim.pro_fit.merit.PipelinedMerit(
+            self.merit._runners,
+            self.merit._jobfactories,
+            [],
+            atsim.pro_fit.variables.CalculatedVariables([]),
+            self.tempd,
+        )
+
+        beforeRunCount = []
+        merit.beforeRun.append(lambda cjp: beforeRunCount.append(len(cjp)))
+
+        # Without prefetch() behaves as Merit.calculate()
+        expect = [-3.0, 1.0]
+        actual = merit.calculate(self.candidates)
+        testutil.compareCollection(self, expect, actual)
+        self.assertEqual([2], beforeRunCount)
+
+        skipped = [self.candidates[0].createUpdated([10.0, 20.0])]
+        skipped[0].id = 3
+        merit.prefetch(self.candidates)
+        merit.prefetch(skipped)
+        merit.prefetch(self.candidates[1:])
+
+        # Wait for prefetch greenlets to create and submit jobs.
+        gevent.joinall([p.greenlet for p in merit._prefetched])
+        self.assertEqual([2, 2, 1, 1], beforeRunCount)
+
+        actual = merit.calculate(self.candidates)
+        testutil.compareCollection(self, expect, actual)
+
+        # Second prefetched generation is skipped over and discarded.
+        actual = merit.calculate(self.candidates[1:])
+        testutil.compareCollection(self, expect[1:], actual)
+        self.assertEqual([2, 2, 1, 1], beforeRunCount)
+
+        # Candidates that were not prefetched.
+        merit.prefetch(skipped)
+        actual = merit.calculate(self.candidates[:1])
+        testutil.compareCollection(self, expect[:1], actual)
+
+        merit.close()
+        self.assertEqual([], os.listdir(self.tempd))
+
+    def testMeritCache(self):
+        """Test atsim.pro_fit.merit.MeritCache"""
+        cache = atsim.pro_fit.merit.MeritCache(
+            "hash", significantFigures=3, maxSize=2
+        )
+        meritvals, candidateJobPairs = self.merit.calculate(self.candidates, True)
+
+        c1, c2 = self.candidates
+        self.assertTrue(cache.put(c1, meritvals[0], candidateJobPairs[0][1]))
+        self.assertTrue(c1 in cache)
+        self.assertFalse(c2 in cache)
+
+        # Rounding
+        c1_close = c1.createUpdated([2.5001, 4.5])
+        c1_far = c1.createUpdated([2.51, 4.5])
+        self.assertTrue(c1_close in cache)
+        self.assertFalse(c1_far in cache)
+
+        meritval, jobs = cache.get(c1_close)
+        self.assertEqual(meritvals[0], meritval)
+        self.assertEqual(["Job1", "Job2", "Job3", "Job4"], [j.name for j in jobs])
+        for job, expect in zip(jobs, candidateJobPairs[0][1]):
+            self.assertTrue(job.isCachedJob)
+            self.assertTrue(job.variables is c1_close)
+            self.assertEqual(
+                [[er.meritValue for er in erl] for erl in expect.evaluatorRecords],
+                [[er.meritValue for er in erl] for erl in job.evaluatorRecords],
+            )
+
+        # Returned records are copies
+        jobs[0].evaluatorRecords[0][0].meritValue = 1000.0
+        self.assertNotEqual(1000.0, cache.get(c1)[1][0].evaluatorRecords[0][0].meritValue)
+
+        # Non-finite merit values and evaluator errors aren't cached
+        self.assertFalse(cache.put(c2, float("nan"), candidateJobPairs[1][1]))
+        errjob = atsim.pro_fit.jobfactories.MetaEvaluatorJob(
+            "meta",
+            [[atsim.pro_fit.evaluators.ErrorEvaluatorRecord("v", 1.0, Exception("boom"))]],
+            c2,
+        )
+        self.assertFalse(cache.put(c2, 1.0, [errjob]))
+        self.assertFalse(c2 in cache)
+
+        # LRU eviction
+        c3 = c1.createUpdated([100.0, 200.0])
+        self.assertTrue(cache.put(c2, meritvals[1], candidateJobPairs[1][1]))
+        cache.get(c1)
+        self.assertTrue(cache.put(c3, 5.0, candidateJobPairs[1][1]))
+        self.assertEqual(2, len(cache))
+        self.assertTrue(c1 in cache)
+        self.assertFalse(c2 in cache)
+        self.assertTrue(c3 in cache)
+
+    def testMeritCacheDatabase(self):
+        """Test persistence of MeritCache entries in fitting_run.db"""
+        import sqlalchemy as sa
+
+        dbfilename = os.path.join(self.tempd, "fitting_run.db")
+        engine = sa.create_engine("sqlite:///%s" % dbfilename)
+        atsim.pro_fit.db.getMetadata().create_all(engine)
+
+        meritvals, candidateJobPairs = self.metamerit.calculate(self.candidates, True)
+        cache = atsim.pro_fit.merit.MeritCache("hash")
+        cache.attachDatabase(engine)
+        for c, m, (v, jobs) in zip(self.candidates, meritvals, candidateJobPairs):
+            cache.put(c, m, jobs)
+        cache.flush()
+
+        # Different configuration, nothing is loaded
+        other = atsim.pro_fit.merit.MeritCache("other_hash")
+        other.attachDatabase(engine)
+        self.assertEqual(0, len(other))
+
+        restored = atsim.pro_fit.merit.MeritCache("hash")
+        restored.attachDatabase(engine)
+        self.assertEqual(2, len(restored))
+        for c, m, (v, expect) in zip(self.candidates, meritvals, candidateJobPairs):
+            meritval, jobs = restored.get(c)
+            self.assertEqual(m, meritval)
+            self.assertEqual([j.name for j in expect], [j.name for j in jobs])
+            self.assertTrue(jobs[-1].isMetaEvaluatorJob)
+            self.assertEqual(
+                [[er.extractedValue for er in erl] for erl in expect[-1].evaluatorRecords],
+                [[er.extractedValue for er in erl] for erl in jobs[-1].evaluatorRecords],
+            )
+        engine.dispose()
+
+    def testCalculateMeritCached(self):
+        """Test Merit.calculate() when a MeritCache is assigned to Merit.cache"""
+        runCandidates = []
+        self.merit.beforeRun.append(
+            lambda cjp: runCandidates.append([v.id for (v, jobs) in cjp])
+        )
+        afterMerit = []
+        self.merit.afterMerit.append(
+            lambda meritvals, cjp: afterMerit.append((list(meritvals), cjp))
+        )
+        self.merit.cache = atsim.pro_fit.merit.MeritCache("hash")
+
+        c1, c2 = self.candidates
+        c1_dup = c1.createUpdated()
+        c1_dup.id = 1
+
+        # Duplicates within a call are only run once.
+        actual = self.merit.calculate([c1, c1_dup])
+        testutil.compareCollection(self, [-3.0, -3.0], actual)
+        self.assertEqual([[1]], runCandidates)
+
+        actual, cjp = self.merit.calculate([c2, c1, c1_dup], True)
+        testutil.compareCollection(self, [1.0, -3.0, -3.0], actual)
+        self.assertEqual([[1], [2]], runCandidates)
+        self.assertEqual([1.0, -3.0, -3.0], afterMerit[-1][0])
+        self.assertTrue(cjp is afterMerit[-1][1])
+        self.assertFalse(hasattr(cjp[0][1][0], "isCachedJob"))
+        self.assertTrue(cjp[1][1][0].isCachedJob)
+        self.assertEqual(4, len(cjp[2][1]))
+
+        # Nothing to run
+        actual = self.merit.calculate([c2, c1])
+        testutil.compareCollection(self, [1.0, -3.0], actual)
+        self.assertEqual([[1], [2]], runCandidates)
+        self.assertEqual(3, len(afterMerit))
+        self.assertEqual([], os.listdir(self.tempd))
+
+    def testCalculateMeritCachedFull(self):
+        """Test Merit.calculate() when storing run candidates evicts cache hits from a full MeritCache"""
+        c1, c2 = self.candidates
+        c3 = c1.createUpdated([6.5, 1.5])
+        c3.id = 3
+        expect = self.merit.calculate([c1, c2, c3])
+
+        self.merit.cache = atsim.pro_fit.merit.MeritCache("hash", maxSize=2)
+        self.merit.calculate([c1])
+        self.assertEqual(1, len(self.merit.cache))
+
+        actual, cjp = self.merit.calculate([c1, c2, c3, c1], True)
+        testutil.compareCollection(self, expect + expect[:1], actual)
+        self.assertTrue(cjp[0][1][0].isCachedJob)
+        self.assertTrue(cjp[3][1][0].isCachedJob)
+        self.assertFalse(hasattr(cjp[1][1][0], "isCachedJob"))
+        self.assertEqual(2, len(self.merit.cache))
+        self.assertEqual([], os.listdir(self.tempd))
@@ -0,0 +1,336 @@
+"""Tests for the asynchronous evaluation modes of the minimizers"""
+
+import configparser
+import io
+import os
+import random
+import shutil
+import tempfile
+
+import gevent
+import gevent.event
+import mystic.models
+
+import pytest
+
+from atsim import pro_fit
+
+import atsim.pro_fit.merit
+import atsim.pro_fit.minimizers
+import atsim.pro_fit.variables
+from atsim.pro_fit.evaluators import EvaluatorRecord
+from atsim.pro_fit.jobfactories import Job
+
+from ._common import StepCallBack
+
+
+class _DelayedFuture(object):
+    def __init__(self, delay):
+        self.finishedEvent = gevent.event.Event()
+        gevent.spawn_later(delay, self.finishedEvent.set)
+
+
+class _RandomDelayRunner(object):
+    """Runner that doesn't run anything but finishes batches after a random delay,
+  so that candidates complete out of submission order"""
+
+    def __init__(self, name, seed=1):
+        self.name = name
+        self._random = random.Random(seed)
+
+    def runBatch(self, jobs):
+        return _DelayedFuture(self._random.uniform(0.0, 0.005))
+
+
+class _RosenbrockEvaluator(object):
+    name = "rosen"
+
+    def __call__(self, job):
+        v = mystic.models.rosen(job.variables.fitValues)
+        return [EvaluatorRecord("rosen", 0.0, v, meritValue=v)]
+
+
+class _JobFactory(object):
+    def __init__(self, runnerName, jobName, evaluators):
+        self.name = jobName
+        self.runnerName = runnerName
+        self.evaluators = evaluators
+
+    def createJob(self, destdir, variables):
+        return Job(self, destdir, variables)
+
+    def runTasksBeforeRun(self, job):
+        pass
+
+    def runTasksAfterRun(self, job):
+        pass
+
+
+@pytest.fixture
+def merit():
+    jobdir = tempfile.mkdtemp()
+    m = pro_fit.merit.Merit(
+        [_RandomDelayRunner("Runner")],
+        [_JobFactory("Runner", "Job", [_RosenbrockEvaluator()])],
+        [],
+        pro_fit.variables.CalculatedVariables([]),
+        jobdir,
+    )
+    yield m
+    shutil.rmtree(jobdir, ignore_errors=True)
+
+
+def _configitems(config):
+    cfg = configparser.ConfigParser()
+    cfg.optionxform = str
+    cfg.read_file(io.StringIO(config))
+    return cfg.items("Minimizer")
+
+
+def _variables():
+    return pro_fit.variables.Variables(
+        [
+            ("A", 1.0, False),
+            ("B", 2.0, True),
+            ("C", 3.0, False),
+            ("D", 4.0, True),
+        ],
+        [(None, None), (-5.0, 5.0), (None, None), (-5.0, 5.0)],
+    )
+
+
+def test_calculate_as_completed(merit):
+    variables = _variables()
+    candidates = [variables.createUpdated([b, d]) for (b, d) in [(2.0, 4.0), (1.0, 1.0), (0.5, 3.0)]]
+    expect = [mystic.models.rosen(c.fitValues) for c in candidates]
+
+    after_merit = []
+    merit.afterMerit.append(lambda mv, cj: after_merit.append(mv))
+
+    results = list(merit.calculateAsCompleted(candidates))
+    assert sorted(r.ticket for r in results) == [0, 1, 2]
+    for r in results:
+        assert pytest.approx(expect[r.ticket]) == r.meritValue
+        assert r.candidateJobPair[0].fitValues == candidates[r.ticket].fitValues
+    assert len(after_merit) == 3
+    assert all(len(mv) == 1 for mv in after_merit)
+
+
+def test_asynchronous_merit_discard(merit):
+    variables = _variables()
+    candidates = [variables.createUpdated([b, 1.0]) for b in (1.0, 2.0, 3.0)]
+    async_merit = pro_fit.merit.AsynchronousMerit(merit)
+    tickets = async_merit.submit(candidates)
+    async_merit.discard(tickets[1:])
+    assert async_merit.outstanding == 1
+    completed = list(async_merit)
+    assert [c.ticket for c in completed] == tickets[:1]
+    async_merit.close()
+
+
+def _countBatches(merit):
+    batches = []
+    runner = merit._runners[0]
+    runBatch = runner.runBatch
+
+    def countingRunBatch(jobs):
+        batches.append([j.variables.fitValues for j in jobs])
+        return runBatch(jobs)
+
+    runner.runBatch = countingRunBatch
+    return batches
+
+
+def test_asynchronous_merit_cached(merit):
+    variables = _variables()
+    c1, c2, c3 = [variables.createUpdated([b, 1.0]) for b in (1.0, 2.0, 3.0)]
+    merit.cache = pro_fit.merit.MeritCache("hash")
+    batches = _countBatches(merit)
+    before_run = []
+    merit.beforeRun.append(lambda cj: before_run.append(len(cj)))
+    after_merit = []
+    merit.afterMerit.append(lambda mv, cj: after_merit.append(mv))
+
+    async_merit = pro_fit.merit.AsynchronousMerit(merit)
+    async_merit.submit([c1, c2])
+    first = dict((c.ticket, c.meritValue) for c in async_merit)
+    assert len(merit.cache) == 2
+    assert len(batches) == 2
+
+    # Cached candidate completes without being run.
+    tickets = async_merit.submit([c3, c2])
+    completed = list(async_merit)
+    assert len(batches) == 3
+    assert batches[-1] == [c3.fitValues]
+    assert before_run == [2, 1]
+    assert len(after_merit) == 4
+
+    completed = dict((c.ticket, c) for c in completed)
+    cached = completed[tickets[1]]
+    assert pytest.approx(first[1]) == cached.meritValue
+    assert cached.candidateJobPair[1][0].isCachedJob
+    assert pytest.approx(mystic.models.rosen(c3.fitValues)) == completed[tickets[0]].meritValue
+
+    # Everything cached, nothing run.
+    async_merit.submit([c1, c2, c3])
+    assert len(list(async_merit)) == 3
+    assert len(batches) == 3
+    async_merit.close()
+    assert os.listdir(merit.jobdir) == []
+
+
+def test_inspyred_asynchronous_cached(merit):
+    """Asynchronous evaluation mode takes candidates from the merit cache"""
+    configitems = _configitems(
+        """[Minimizer]
+type : Simulated_Annealing
+temperature : 10.0
+max_iterations : 10
+random_seed : 1
+evaluation_mode : asynchronous
+max_in_flight : 1
+"""
+    )
+    merit.cache = pro_fit.merit.MeritCache("hash")
+    batches = _countBatches(merit)
+
+    results = []
+    numBatches = []
+    for _i in range(2):
+        minimizer = pro_fit.minimizers.Simulated_AnnealingMinimizer.createFromConfig(
+            _variables(), configitems
+        )
+        best = minimizer.minimize(merit)
+        results.append((best.bestMeritValue, best.bestVariables.fitValues))
+        numBatches.append(len(batches))
+
+    # Results of the first run are cached.
+    assert numBatches[0] > 0
+    assert len(merit.cache) == len(set(tuple(fv) for b in batches for fv in b))
+
+    # Second run repeats the candidates of the first, none of which are run again.
+    assert numBatches[1] == numBatches[0]
+    assert results[0] == results[1]
+
+
+def test_neldermead_asynchronous_matches_synchronous(merit):
+    """Speculative evaluation should not change the path taken by the simplex"""
+    config = """[Minimizer]
+type : NelderMead
+function_tolerance : 1.0E-3
+value_tolerance : 1.0E-3
+max_iterations : 30
+"""
+
+    results = {}
+    for mode in ["synchronous", "asynchronous"]:
+        minimizer = pro_fit.minimizers.NelderMeadMinimizer.createFromConfig(
+            _variables(),
+            _configitems(config + "evaluation_mode : %s\n" % mode),
+        )
+        minimizer.stepCallback = StepCallBack()
+        best = minimizer.minimize(merit)
+        results[mode] = (
+            best.bestMeritValue,
+            best.bestVariables.variablePairs,
+            minimizer.stepCallback.stepDicts,
+        )
+    assert results["synchronous"] == results["asynchronous"]
+    assert not merit.afterMerit
+
+
+def test_neldermead_bad_evaluation_mode():
+    config = """[Minimizer]
+type : NelderMead
+evaluation_mode : sometimes
+"""
+    with pytest.raises(pro_fit.exceptions.ConfigException):
+        pro_fit.minimizers.NelderMeadMinimizer.createFromConfig(
+            _variables(), _configitems(config)
+        )
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        """[Minimizer]
+type : DEA
+population_size : 8
+max_iterations : 10
+random_seed : 1
+evaluation_mode : asynchronous
+max_in_flight : 4
+""",
+        """[Minimizer]
+type : Particle_Swarm
+population_size : 8
+max_iterations : 5
+random_seed : 1
+evaluation_mode : asynchronous
+""",
+        """[Minimizer]
+type : Simulated_Annealing
+temperature : 10.0
+max_iterations : 10
+random_seed : 1
+evaluation_mode : asynchronous
+max_in_flight : 3
+""",
+    ],
+)
+def test_inspyred_asynchronous(merit, config):
+    cls = {
+        "DEA": pro_fit.minimizers.DEAMinimizer,
+        "Particle_Swarm": pro_fit.minimizers.Particle_SwarmMinimizer,
+        "Simulated_Annealing": pro_fit.minimizers.Simulated_AnnealingMinimizer,
+    }
+    configitems = _configitems(config)
+    minimizer = cls[dict(configitems)["type"]].createFromConfig(
+        _variables(), configitems
+    )
+
+    steps = []
+    minimizer.stepCallback = steps.append
+    best = minimizer.minimize(merit)
+
+    # Observer is called for initial population then once per generation.
+    assert len(steps) == int(dict(configitems)["max_iterations"]) + 1
+    assert best.bestMeritValue <= steps[0].bestMeritValue
+
+    # All job directories should have been removed.
+    gevent.sleep(0.05)
+    assert os.listdir(merit.jobdir) == []
+
+
+def test_simulated_annealing_asynchronous_default_max_in_flight(merit):
+    """Asynchronous SA evaluates several trial moves at once without max_in_flight being set"""
+    configitems = _configitems(
+        """[Minimizer]
+type : Simulated_Annealing
+temperature : 10.0
+max_iterations : 10
+random_seed : 1
+evaluation_mode : asynchronous
+"""
+    )
+    minimizer = pro_fit.minimizers.Simulated_AnnealingMinimizer.createFromConfig(
+        _variables(), configitems
+    )
+    assert minimizer._minimizer._maxInFlight == 4
+
+    # Record number of batches running whenever a new one starts.
+    running = set()
+    concurrent = []
+    runner = merit._runners[0]
+    runBatch = runner.runBatch
+
+    def recordingRunBatch(jobs):
+        future = runBatch(jobs)
+        running.add(future)
+        future.finishedEvent.rawlink(lambda evt: running.discard(future))
+        concurrent.append(len(running))
+        return future
+
+    runner.runBatch = recordingRunBatch
+    minimizer.minimize(merit)
+    assert max(concurrent) > 1
@@ -0,0 +1,147 @@
+"""Tests for resuming minimizers from the state of an interrupted run (pprofit --resume)"""
+
+import configparser
+import io
+
+import pytest
+
+from atsim import pro_fit
+
+import atsim.pro_fit.minimizers
+import atsim.pro_fit.variables
+from atsim.pro_fit.db import ResumeState, ResumeCandidate
+
+from ._common import MockMerit
+
+
+def _configitems(config):
+    cfg = configparser.ConfigParser()
+    cfg.optionxform = str
+    cfg.read_file(io.StringIO(config))
+    return cfg.items("Minimizer")
+
+
+def _variables():
+    return pro_fit.variables.Variables(
+        [("A", 1.0, False), ("B", 2.0, True), ("C", 3.0, True)],
+        [(None, None), (-5.0, 5.0), (-5.0, 5.0)],
+    )
+
+
+def _resumeState(iterationNumber=3):
+    population = [
+        ResumeCandidate(1.0 + i, dict(A=1.0, B=0.1 * i, C=-0.2 * i))
+        for i in range(4)
+    ]
+    return ResumeState(iterationNumber, ["B", "C"], population, population[0])
+
+
+def _minimizer(config):
+    cls = {
+        "DEA": pro_fit.minimizers.DEAMinimizer,
+        "Particle_Swarm": pro_fit.minimizers.Particle_SwarmMinimizer,
+        "Simulated_Annealing": pro_fit.minimizers.Simulated_AnnealingMinimizer,
+    }
+    configitems = _configitems(config)
+    return cls[dict(configitems)["type"]].createFromConfig(
+        _variables(), configitems
+    )
+
+
+class _RecordingMerit(MockMerit):
+    def __init__(self):
+        super(_RecordingMerit, self).__init__()
+        self.calculated = []
+
+    def calculate(self, candidates, returnCandidateJobPairs=False):
+        self.calculated.append([c.fitValues for c in candidates])
+        return super(_RecordingMerit, self).calculate(
+            candidates, returnCandidateJobPairs
+        )
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        """[Minimizer]
+type : DEA
+population_size : 4
+max_iterations : 5
+random_seed : 1
+""",
+        """[Minimizer]
+type : Particle_Swarm
+population_size : 4
+max_iterations : 5
+random_seed : 1
+""",
+    ],
+)
+def test_inspyred_resume(config):
+    minimizer = _minimizer(config)
+    minimizer.resume(_resumeState())
+
+    steps = []
+    minimizer.stepCallback = steps.append
+    merit = _RecordingMerit()
+    minimizer.minimize(merit)
+
+    # Last population of the interrupted run is re-evaluated first.
+    expect = [c.variables for c in _resumeState().population]
+    expect = [[v["B"], v["C"]] for v in expect]
+    assert sorted(expect) == sorted(merit.calculated[0])
+
+    # Already recorded generation isn't reported and only the remaining generations are run.
+    assert len(steps) == 5 - 3
+
+
+def test_simulated_annealing_resume():
+    minimizer = _minimizer(
+        """[Minimizer]
+type : Simulated_Annealing
+temperature : 10.0
+cooling_rate : 0.5
+max_iterations : 10
+random_seed : 1
+"""
+    )
+    minimizer.resume(_resumeState(iterationNumber=4))
+
+    args = minimizer._minimizer._args
+    assert pytest.approx(10.0 * 0.5 ** 4) == args["temperature"]
+    assert 6 == args["max_generations"]
+
+    steps = []
+    minimizer.stepCallback = steps.append
+    merit = _RecordingMerit()
+    minimizer.minimize(merit)
+
+    # Population size is one, so the first candidate of last generation is used.
+    assert [[0.0, 0.0]] == merit.calculated[0]
+    assert 6 == len(steps)
+
+
+def test_neldermead_resume():
+    minimizer = pro_fit.minimizers.NelderMeadMinimizer.createFromConfig(
+        _variables(),
+        _configitems(
+            """[Minimizer]
+type : NelderMead
+max_iterations : 30
+"""
+        ),
+    )
+    state = _resumeState(iterationNumber=10)
+    state.best = state.population[2]
+    minimizer.resume(state)
+
+    assert pytest.approx([0.2, -0.4]) == minimizer._inner._initialArgs()
+    assert 20 == minimizer._inner._maxIter
+
+    steps = []
+    minimizer.stepCallback = steps.append
+    minimizer.minimize(MockMerit())
+
+    # The starting point was recorded before the run was interrupted and isn't reported again.
+    assert steps
+    assert pytest.approx([0.2, -0.4]) != steps[0].bestVariables.fitValues
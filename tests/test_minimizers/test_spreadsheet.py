@@ -295,6 +295,49 @@ batch_size : 2
 
         testutil.compareCollection(self, expect, actual)
 
+    def testBatchSize_prefetch(self):
+        """Test that SpreadsheetMinimizer passes each batch to merit.prefetch() before the previous batch is calculated"""
+        spreadfilename = os.path.join(
+            getResourceDir(), "spreadsheet_minimizer", "spreadsheet.csv"
+        )
+        variables = atsim.pro_fit.variables.Variables(
+            [
+                ("A", 10.0, False),
+                ("B", 20.0, True),
+                ("C", 30.0, False),
+                ("D", 40.0, True),
+            ]
+        )
+        minimizer = atsim.pro_fit.minimizers.SpreadsheetMinimizer.createFromConfig(
+            variables,
+            [
+                ("type", "SpreadSheet"),
+                ("filename", spreadfilename),
+                ("batch_size", "2"),
+            ],
+        )
+
+        calls = []
+
+        class PrefetchMerit(MockMerit):
+            def prefetch(self, candidates):
+                calls.append(("prefetch", [dict(c.variablePairs)["B"] for c in candidates]))
+
+            def calculate(self, candidates, returnCandidateJobPairs=False):
+                calls.append(("calculate", [dict(c.variablePairs)["B"] for c in candidates]))
+                return MockMerit.calculate(self, candidates, returnCandidateJobPairs)
+
+        minimizer.minimize(PrefetchMerit())
+        self.assertEqual(
+            [
+                ("prefetch", [2.0, 7.0]),
+                ("prefetch", [12.0, 17.0]),
+                ("calculate", [2.0, 7.0]),
+                ("calculate", [12.0, 17.0]),
+            ],
+            calls,
+        )
+
     def testBatchSize_withStartRow(self):
         """Test SpreadsheetMinimizer 'batch_size' configuration option"""
         spreadfilename = os.path.join(
@@ -370,3 +370,26 @@ def test_default_fitting_run_db_cannot_be_opened(tmpdir):
     exc = excinfo.value
     status = exc.returncode
     assert_that(status).is_equal_to(ppdump.EXIT_STATUS_DB_CANNOT_OPEN)
+
+
+def test_upgrade_db(tmpdir):
+    """Test ppdump --upgrade-db adds indexes to database created by earlier version of pprofit"""
+    import shutil
+
+    import sqlalchemy as sa
+    from atsim.pro_fit import db
+
+    dbfilename = tmpdir.join("fitting_run.db").strpath
+    shutil.copyfile(_getdbpath(), dbfilename)
+    engine = sa.create_engine("sqlite:///" + dbfilename)
+    assert_that(db.missingIndexes(engine)).is_not_empty()
+
+    actual = _run_ppdump(["--upgrade-db", "-f '%s'" % dbfilename])
+    assert_that(actual).contains("Created index: ix_jobs_candidate_id")
+    assert_that(db.missingIndexes(engine)).is_empty()
+
+    # Dumping still works after upgrade
+    actual = _run_ppdump(["-f '%s'" % dbfilename, "--num-iterations"])
+    assert_that(actual[0]).is_equal_to(
+        _run_ppdump(["-f '%s'" % _getdbpath(), "--num-iterations"])[0]
+    )
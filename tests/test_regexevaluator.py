@@ -1,10 +1,13 @@
 import unittest
 
 import os
+import shutil
+import tempfile
 
 import configparser
 
 from atsim import pro_fit
+from atsim.pro_fit.evaluators import _regex
 from . import testutil
 
 
@@ -54,3 +57,72 @@ class RegexEvaluatorTestCase(unittest.TestCase):
         testutil.compareCollection(self, extractExpect, actual)
         actual = dict([(e.name, e.meritValue) for e in evaluated])
         testutil.compareCollection(self, meritExpect, actual)
+
+    def testSingleScan(self):
+        """Test that sub-evaluators sharing a file give same results as when evaluated individually"""
+        tempdir = tempfile.mkdtemp()
+        try:
+            outputdir = os.path.join(tempdir, "job_files", "output")
+            os.makedirs(outputdir)
+            with open(os.path.join(outputdir, "log.txt"), "w") as outfile:
+                outfile.write("step 1 energy 1.5 volume 10.0\n")
+                outfile.write("pressure pressure 3.0\n")
+                outfile.write("step 2 energy 2.5 volume 11.0\n")
+                outfile.write("step 3 energy bad volume 12.0\n")
+
+            cfgitems = [
+                ("type", "Regex"),
+                ("filename", "log.txt"),
+                ("energy", r"/energy ([0-9.]+)/ 1.0 1.0 1:2"),
+                ("volume", r"/volume ([0-9.]+)/ 1.0"),
+                ("pressure", r"/(pressure) \1 ([0-9.]+)/ 1.0 1.0 2"),
+                ("bad", r"/energy (\S+)/ 1.0 1.0 1:3"),
+                ("missing", r"/energy ([0-9.]+)/ 1.0 1.0 1:4"),
+            ]
+            evaluator = pro_fit.evaluators.RegexEvaluator.createFromConfig(
+                "regex", tempdir, cfgitems
+            )
+            # Back-reference means patterns can't be combined.
+            self.assertEqual(None, evaluator._scans[0][1]._prefilter)
+
+            job = pro_fit.jobfactories.Job(None, tempdir, None)
+            evaluated = evaluator(job)
+            self.assertEqual(
+                ["energy", "volume", "pressure", "bad", "missing"],
+                [e.name for e in evaluated],
+            )
+            self.assertEqual(
+                [False, False, False, True, True],
+                [e.errorFlag for e in evaluated],
+            )
+            self.assertEqual(
+                [2.5, 10.0, 3.0],
+                [e.extractedValue for e in evaluated[:3]],
+            )
+            self.assertEqual(
+                _regex.RegexEvaluatorException,
+                type(evaluated[-1].exception),
+            )
+
+            for subeval, expect in zip(evaluator._subevalList, evaluated):
+                individual = subeval(job)
+                self.assertEqual(expect.errorFlag, individual.errorFlag)
+                if not expect.errorFlag:
+                    self.assertEqual(
+                        expect.extractedValue, individual.extractedValue
+                    )
+
+            del cfgitems[4]
+            evaluator = pro_fit.evaluators.RegexEvaluator.createFromConfig(
+                "regex", tempdir, cfgitems
+            )
+            self.assertNotEqual(None, evaluator._scans[0][1]._prefilter)
+            evaluated = evaluator(job)
+            self.assertEqual(
+                [False, False, True, True], [e.errorFlag for e in evaluated]
+            )
+            self.assertEqual(
+                [2.5, 10.0], [e.extractedValue for e in evaluated[:2]]
+            )
+        finally:
+            shutil.rmtree(tempdir, ignore_errors=True)
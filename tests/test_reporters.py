@@ -1,5 +1,9 @@
 """Tests for atomsscripts.fitting.reporters"""
 
+import os
+import shutil
+import tempfile
+import time
 import unittest
 
 # from atsim.pro_fit import minimizers, reporters, evaluators, variables
@@ -620,3 +624,146 @@ class SQLiteReporterTestCase(unittest.TestCase):
             for row in conn.execute(query):
                 actual.append(dict(list(zip(list(row.keys()), row))))
             testutil.compareCollection(self, expect, actual)
+
+
+class BatchedSQLiteReporterTestCase(unittest.TestCase):
+    """Tests for atsim.pro_fit.reporters.BatchedSQLiteReporter"""
+
+    def setUp(self):
+        self.initialVariables = SQLiteReporterTestCase.getInitialVariables()
+        self.calculatedVariables = SQLiteReporterTestCase.getCalculatedVariables()
+        self.minimizerResults = SQLiteReporterTestCase.getVariables()
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def testInsertSingleMinimizerResult(self):
+        reporter = atsim.pro_fit.reporters.BatchedSQLiteReporter(
+            None, self.initialVariables, self.calculatedVariables
+        )
+        reporter(self.minimizerResults[0])
+        reporter.flush()
+        SQLiteReporterTestCase.tstInsertSingleMinimizerResult(
+            self, reporter._saengine
+        )
+        reporter.finished()
+
+    def testSameAsSynchronous(self):
+        """Database written by BatchedSQLiteReporter should match that written by SQLiteReporter"""
+        try:
+            {}["badkey"]
+        except Exception as exc:
+            mybad = exc
+
+        minimizerResults = self.minimizerResults[0]
+        _variables, jobs = minimizerResults.candidateJobList[0]
+        jobs[1].evaluatorRecords.append(
+            [
+                atsim.pro_fit.evaluators.ErrorEvaluatorRecord(
+                    "BadEvalValue", 10.0, mybad, 12.0, "BadEvaluator"
+                )
+            ]
+        )
+
+        dumps = {}
+        for cls in [
+            atsim.pro_fit.reporters.SQLiteReporter,
+            atsim.pro_fit.reporters.BatchedSQLiteReporter,
+        ]:
+            dbfilename = os.path.join(self.tempdir, cls.__name__ + ".db")
+            reporter = cls(
+                dbfilename, self.initialVariables, self.calculatedVariables
+            )
+            for _i in range(3):
+                reporter(minimizerResults)
+            reporter.finished()
+
+            engine = sa.create_engine("sqlite:///" + dbfilename)
+            with engine.connect() as conn:
+                metadata = sa.MetaData(conn)
+                metadata.reflect()
+                dumps[cls] = dict(
+                    (name, [tuple(row) for row in conn.execute(table.select())])
+                    for (name, table) in metadata.tables.items()
+                )
+                journalMode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            engine.dispose()
+
+            if cls is atsim.pro_fit.reporters.BatchedSQLiteReporter:
+                self.assertEqual("wal", journalMode)
+
+        synchronous, batched = [
+            dumps[atsim.pro_fit.reporters.SQLiteReporter],
+            dumps[atsim.pro_fit.reporters.BatchedSQLiteReporter],
+        ]
+        self.assertEqual(synchronous, batched)
+        self.assertEqual(3, len(batched["candidates"]))
+        self.assertEqual(3, len(batched["evaluatorerror"]))
+        self.assertEqual("Finished", batched["runstatus"][0][2])
+
+    def testReportingDoesNotBlock(self):
+        """Calls to reporter should return before rows are written"""
+        reporter = atsim.pro_fit.reporters.BatchedSQLiteReporter(
+            None, self.initialVariables, self.calculatedVariables, queueSize=2
+        )
+        written = []
+        insertBatch = reporter._insertBatch
+
+        def slowInsert(batch):
+            time.sleep(0.05)
+            insertBatch(batch)
+            written.append(batch)
+
+        reporter._insertBatch = slowInsert
+        reporter(self.minimizerResults[0])
+        reporter(self.minimizerResults[0])
+        self.assertEqual([], written)
+        reporter.flush()
+        self.assertEqual(2, len(written))
+        reporter.finished()
+
+        with reporter._saengine.connect() as conn:
+            rows = conn.execute(
+                sa.text("SELECT iteration_number FROM candidates ORDER BY id")
+            ).fetchall()
+        self.assertEqual([(0,), (1,)], rows)
+
+    def testResume(self):
+        """Resumed reporter should continue iteration numbering of existing database"""
+        dbfilename = os.path.join(self.tempdir, "fitting_run.db")
+        reporter = atsim.pro_fit.reporters.SQLiteReporter(
+            dbfilename, self.initialVariables, self.calculatedVariables, "run"
+        )
+        reporter(self.minimizerResults[0])
+        reporter(self.minimizerResults[0])
+        reporter.finished(True)
+
+        reporter = atsim.pro_fit.reporters.BatchedSQLiteReporter(
+            dbfilename,
+            self.initialVariables,
+            self.calculatedVariables,
+            "run",
+            resume=True,
+        )
+        self.assertEqual(2, reporter.iterationNum)
+        with reporter._saengine.connect() as conn:
+            status = conn.execute(
+                sa.text("SELECT runstatus, title FROM runstatus")
+            ).fetchall()
+        self.assertEqual([("Running", "run")], status)
+
+        reporter(self.minimizerResults[0])
+        reporter.finished()
+
+        with reporter._saengine.connect() as conn:
+            rows = conn.execute(
+                sa.text(
+                    "SELECT DISTINCT iteration_number FROM candidates ORDER BY iteration_number"
+                )
+            ).fetchall()
+            numKeys = conn.execute(
+                sa.text("SELECT COUNT(*) FROM variable_keys")
+            ).scalar()
+        self.assertEqual([(0,), (1,), (2,)], rows)
+        self.assertEqual(5, numKeys)
@@ -9,6 +9,10 @@ import configparser
 from .. import common
 
 from atsim import pro_fit
+import atsim.pro_fit._util
+import atsim.pro_fit.evaluators
+import atsim.pro_fit.runners
+import atsim.pro_fit.variables
 
 
 class LocalRunnerTestCase(unittest.TestCase):
@@ -168,6 +172,60 @@ nprocesses : 5
             )
             runner.close()
 
+        runner = pro_fit.runners.LocalRunner.createFromConfig(
+            "RunnerName",
+            self.tempd,
+            parser.items("Runner:RunnerName") + [("file_link_mode", "hardlink")],
+        )
+        self.assertEqual("hardlink", runner._inner._file_link_mode)
+        runner.close()
+
+        with self.assertRaises(pro_fit.exceptions.ConfigException):
+            runner = pro_fit.runners.LocalRunner.createFromConfig(
+                "RunnerName",
+                self.tempd,
+                parser.items("Runner:RunnerName") + [("file_link_mode", "bad")],
+            )
+
+    def testFileLinkModes(self):
+        for link_mode in pro_fit._util.FILE_LINK_MODES:
+            runner = pro_fit.runners.LocalRunner(
+                "LocalRunner", 1, file_link_mode=link_mode
+            )
+            try:
+                runner.runBatch([self.jobs[0]]).join()
+                self._testjob(runner, 0)
+                ddir = os.path.join(self.jobs[0].path, "job_files", "output")
+                self.assertFalse(os.path.islink(os.path.join(ddir, "output.res")))
+            finally:
+                runner.close()
+            shutil.rmtree(os.path.join(self.jobs[0].path, "job_files", "output"))
+
+    def testDownloadFilter(self):
+        from atsim.pro_fit.filetransfer import DownloadFilter
+
+        self.jobfactory.downloadFilter = DownloadFilter(
+            include=["output.res"], exclude=["STD*"]
+        )
+        runner = pro_fit.runners.LocalRunner("LocalRunner", 1)
+        try:
+            runner.runBatch([self.jobs[0]]).join()
+        finally:
+            runner.close()
+        ddir = os.path.join(self.jobs[0].path, "job_files", "output")
+        self.assertEqual([("output.res", self.FILE)], self._compareDir(ddir))
+
+    def testWorker(self):
+        """Jobs that opt in to worker mode should be run by persistent worker processes"""
+        self.jobfactory.worker = {"command": ["/bin/bash", "runjob"]}
+        runner = pro_fit.runners.LocalRunner("LocalRunner", 2)
+        try:
+            runner.runBatch(self.jobs).join()
+            for job in self.jobs:
+                self._testjob(runner, job.variables.id)
+        finally:
+            runner.close()
+
     # def testTerminate(self):
     #   """Test runner's .terminate() method."""
     #   self.fail("Not implemented")
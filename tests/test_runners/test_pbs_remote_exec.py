@@ -1,6 +1,7 @@
 import pathlib
 import time
 import os
+import subprocess
 
 import pytest
 from atsim.pro_fit import _execnet
@@ -329,3 +330,37 @@ def testQDel(clearqueue, channel_id):
     finally:
         ch.send(None)
         ch.waitclose(5)
+
+
+def testSubmissionScript_jobs_per_task(tmpdir):
+    """When all jobs fit in a single task, bundled PBS script should not be an array job"""
+    from .test_slurm_remote_exec import _mkbundledjobs
+
+    jobs = _mkbundledjobs(tmpdir, 3)
+    pbsConfig = PBSIdentifyRecord(
+        arrayFlag="-t",
+        arrayIDVariable="PBS_ARRAYID",
+        qdelForceFlags=["-W", "0"],
+        flavour="TORQUE",
+    )
+    script = _pbs_remote_exec.submission_script(
+        pbsConfig, jobs, [], jobs_per_task=4
+    )
+    assert not [l for l in script.splitlines() if l.startswith("#PBS -t")]
+
+    scriptpath = tmpdir.join("submit.sh")
+    scriptpath.write(script)
+    env = dict(os.environ)
+    env.update(PBS_NP="3", SHELL="/bin/bash")
+    env.pop("PBS_ARRAYID", None)
+    subprocess.check_call(["/bin/bash", scriptpath.strpath], env=env)
+
+    for i in range(3):
+        outdir = tmpdir.join("job %d" % i, "output", "job_files")
+        assert outdir.join("job_output").read() == "%d\n" % i
+        assert outdir.join("STATUS").read() == "%d\n" % (i % 3)
+
+    script = _pbs_remote_exec.submission_script(
+        pbsConfig, jobs, [], jobs_per_task=2
+    )
+    assert "#PBS -t 1-2" in script.splitlines()
@@ -183,6 +183,110 @@ def testQueueStateAddRemovePrivateListener():
     listener.reset()
 
 
+class _MockQSChannel(object):
+    """Records QSELECT requests instead of sending them to a queueing system"""
+
+    channel_id = "mock"
+
+    def __init__(self):
+        self.callback = []
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append(msg)
+
+    def respond(self, job_ids):
+        msg = self.sent[-1]
+        for cb in list(self.callback):
+            cb(
+                {
+                    "msg": "QSELECT",
+                    "channel_id": self.channel_id,
+                    "transaction_id": msg["transaction_id"],
+                    "job_ids": job_ids,
+                }
+            )
+
+    def push(self, msg):
+        for cb in list(self.callback):
+            cb(msg)
+
+
+def testQueueingSystemState_jobComplete():
+    """Check that pushed JOB_COMPLETE messages remove jobs without waiting for QSELECT"""
+    channel = _MockQSChannel()
+    state = generic_client.QueueingSystemState(channel, pollEvery=60.0)
+    try:
+        listener = JobsChangedListener()
+        state.listeners.append(listener)
+
+        channel.respond(["1", "2"])
+        assert listener.newJobs == set(["1", "2"])
+        listener.reset()
+
+        channel.push({"msg": "JOB_COMPLETE", "channel_id": "mock", "job_id": "1"})
+        assert listener.oldJobs == set(["1", "2"])
+        assert listener.newJobs == set(["2"])
+        listener.reset()
+
+        # Queueing system may still list the completed job, it shouldn't reappear.
+        state._qselectLater()
+        channel.respond(["1", "2"])
+        assert listener.newJobs is None
+        assert state._jobIds == set(["2"])
+
+        # Once the queueing system forgets the job, the id may be reused.
+        state._qselectLater()
+        channel.respond(["2"])
+        assert state._completedJobIds == set()
+        state._qselectLater()
+        channel.respond(["1", "2"])
+        assert state._jobIds == set(["1", "2"])
+    finally:
+        state.close()
+    assert channel.callback == []
+
+
+def testQueueingSystemState_pollBackoff():
+    """Check that QSELECT interval backs off when nothing changes and shortens after submission"""
+    channel = _MockQSChannel()
+    state = generic_client.QueueingSystemState(channel, pollEvery=10.0)
+    try:
+        intervals = []
+        for i in range(5):
+            channel.respond(["1"])
+            intervals.append(state._pollInterval)
+            state._pollGreenlet.kill()
+            state._qselectLater()
+        assert intervals == [10.0, 20.0, 40.0, 40.0, 40.0]
+
+        channel.respond(["1", "2"])
+        assert state._pollInterval == 10.0
+        state._pollGreenlet.kill()
+        state._qselectLater()
+
+        # Poll requested whilst QSELECT in flight
+        state.requestPoll()
+        channel.respond(["1", "2"])
+        assert state._pollInterval == generic_client.SUBMIT_POLL_INTERVAL
+
+        # Poll requested whilst waiting
+        state._pollGreenlet.kill()
+        state._qselectLater()
+        channel.respond(["1", "2"])
+        state._pollGreenlet.kill()
+        state._qselectLater()
+        channel.respond(["1", "2"])
+        assert state._pollInterval == 4.0
+        numsent = len(channel.sent)
+        state.requestPoll()
+        assert state._pollInterval == generic_client.SUBMIT_POLL_INTERVAL
+        gevent.sleep(generic_client.SUBMIT_POLL_INTERVAL + 0.5)
+        assert len(channel.sent) == numsent + 1
+    finally:
+        state.close()
+
+
 def chIsDir(channel):
     pth = channel.receive()
     import os
@@ -352,3 +352,155 @@ def testMultipleJobs(execnet_gw, tmpdir, channel_id):
     finally:
         ch1.send(None)
         ch1.waitclose(5)
+
+
+def testQueuedJobs(execnet_gw, tmpdir, channel_id):
+    """Queued jobs should start as slots become free and can be killed before starting"""
+    ch1 = execnet_gw.remote_exec(_run_remote_exec)
+    try:
+        ch1.send(
+            {"msg": "START_CHANNEL", "channel_id": channel_id, "nprocesses": 2}
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(msg="READY", channel_id=channel_id)
+
+        job_ids = []
+        for i in range(10):
+            jobdir = tmpdir.join("job%d" % i)
+            jobdir.ensure_dir()
+            with jobdir.join("runjob").open("w") as outfile:
+                print("exit %d" % i, file=outfile)
+            job_ids.append((i,))
+            ch1.send(
+                {"msg": "JOB_START", "job_path": jobdir.strpath, "job_id": (i,)}
+            )
+
+        # Job that will sit in the queue behind a long running job.
+        blockdir = tmpdir.join("block")
+        blockdir.ensure_dir()
+        with blockdir.join("runjob").open("w") as outfile:
+            print("sleep 10", file=outfile)
+        ch1.send({"msg": "JOB_START", "job_path": blockdir.strpath, "job_id": (100,)})
+        ch1.send({"msg": "JOB_START", "job_path": blockdir.strpath, "job_id": (101,)})
+        ch1.send({"msg": "JOB_START", "job_path": blockdir.strpath, "job_id": (102,)})
+
+        started = {}
+        ended = {}
+        while len(ended) < 10 or len(started) < 12:
+            msg = ch1.receive(10.0)
+            if msg["msg"] == "JOB_START":
+                assert 1 <= msg["semaphore"] <= 2
+                started[msg["job_id"]] = msg
+            else:
+                assert msg["msg"] == "JOB_END"
+                ended[msg["job_id"]] = msg
+
+        assert sorted(ended) == job_ids
+        for (i,), msg in ended.items():
+            assert msg["returncode"] == i
+            assert not msg["killed"]
+            assert tmpdir.join("job%d" % i, "STATUS").read().strip() == str(i)
+
+        assert (102,) not in started
+        ch1.send({"msg": "JOB_KILL", "job_id": (102,)})
+        msg = ch1.receive(10.0)
+        assert msg == {
+            "msg": "JOB_END",
+            "channel_id": channel_id,
+            "returncode": None,
+            "job_id": (102,),
+            "killed": True,
+        }
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
+
+
+def testWorker(execnet_gw, tmpdir, channel_id):
+    """Jobs sent with a worker description should be run by a reused, persistent worker process"""
+    ch1 = execnet_gw.remote_exec(_run_remote_exec)
+    try:
+        ch1.send(
+            {"msg": "START_CHANNEL", "channel_id": channel_id, "nprocesses": 1}
+        )
+        msg = ch1.receive(10.0)
+        assert msg == dict(msg="READY", channel_id=channel_id)
+
+        jobdir = tmpdir.join("job_module")
+        jobdir.ensure_dir()
+        with jobdir.join("workerjob.py").open("w") as outfile:
+            print("import os, sys, time", file=outfile)
+            print("def run(path):", file=outfile)
+            print("    print('in-process', os.getcwd() == path)", file=outfile)
+            print("    return 3", file=outfile)
+            print("def hang(path):", file=outfile)
+            print("    time.sleep(30)", file=outfile)
+
+        jobs = [
+            ((1,), {"entry_point": "workerjob:run"}),
+            ((2,), {"command": ["/bin/echo", "hello world"]}),
+        ]
+
+        pids = []
+        for job_id, worker in jobs:
+            ch1.send(
+                {
+                    "msg": "JOB_START",
+                    "job_path": jobdir.strpath,
+                    "job_id": job_id,
+                    "worker": worker,
+                }
+            )
+            msg = ch1.receive(10.0)
+            assert msg["msg"] == "JOB_START"
+            pids.append(msg["pid"])
+            msg = ch1.receive(10.0)
+            assert msg["msg"] == "JOB_END"
+            assert msg["job_id"] == job_id
+            assert not msg["killed"]
+            if job_id == (1,):
+                assert msg["returncode"] == 3
+                assert jobdir.join("STDOUT").read() == "in-process True\n"
+                assert jobdir.join("STATUS").read() == "3\n"
+            else:
+                assert msg["returncode"] == 0
+                assert jobdir.join("STDOUT").read() == "hello world\n"
+
+        # Both jobs should have been run by the same worker.
+        assert pids[0] == pids[1]
+
+        # Killing a job should discard its worker.
+        ch1.send(
+            {
+                "msg": "JOB_START",
+                "job_path": jobdir.strpath,
+                "job_id": (3,),
+                "worker": {"entry_point": "workerjob:hang"},
+            }
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "JOB_START"
+        assert msg["pid"] == pids[0]
+
+        ch1.send({"msg": "JOB_KILL", "job_id": (3,)})
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "JOB_END"
+        assert msg["killed"]
+
+        ch1.send(
+            {
+                "msg": "JOB_START",
+                "job_path": jobdir.strpath,
+                "job_id": (4,),
+                "worker": {"entry_point": "workerjob:run"},
+            }
+        )
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "JOB_START"
+        assert msg["pid"] != pids[0]
+        msg = ch1.receive(10.0)
+        assert msg["msg"] == "JOB_END"
+        assert msg["returncode"] == 3
+    finally:
+        ch1.send(None)
+        ch1.waitclose(5)
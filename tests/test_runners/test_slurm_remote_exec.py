@@ -1,4 +1,5 @@
 import os
+import subprocess
 import time
 
 import pytest
@@ -293,3 +294,93 @@ def testQDel(clearqueue, channel_id):
     finally:
         ch.send(None)
         ch.waitclose(5)
+
+
+def _mkbundledjobs(tmpdir, njobs):
+    import importlib_resources
+    from atsim.pro_fit.runners import templates
+
+    jobrun = importlib_resources.read_text(templates, "queueing_system_jobrun")
+    jobs = []
+    for i in range(njobs):
+        jobdir = tmpdir.join("job %d" % i)
+        jobdir.join("job_files").ensure_dir()
+        jobdir.join("runjob").write(jobrun)
+        jobdir.join("job_files", "runjob").write(
+            "echo %d > job_output\nexit %d\n" % (i, i % 3)
+        )
+        jobs.append(jobdir.join("runjob").strpath)
+    return jobs
+
+
+def testSubmissionScript_jobs_per_task(tmpdir):
+    """Check that bundled array tasks run each of their jobs and report per-job STATUS"""
+    jobs = _mkbundledjobs(tmpdir, 5)
+    script = _slurm_remote_exec.submission_script(jobs, [], jobs_per_task=2)
+    assert "#SBATCH --array=1-3" in script.splitlines()
+
+    scriptpath = tmpdir.join("submit.sh")
+    scriptpath.write(script)
+
+    # Only run the first two tasks, the last job should not be touched.
+    for task_id in ["1", "2"]:
+        env = dict(os.environ)
+        env.update(
+            SLURM_ARRAY_TASK_ID=task_id, SLURM_CPUS_PER_TASK="2", SHELL="/bin/bash"
+        )
+        subprocess.check_call(["/bin/bash", scriptpath.strpath], env=env)
+
+    for i in range(4):
+        outdir = tmpdir.join("job %d" % i, "output", "job_files")
+        assert outdir.join("job_output").read() == "%d\n" % i
+        assert outdir.join("STATUS").read() == "%d\n" % (i % 3)
+        assert tmpdir.join("job %d" % i, _slurm_remote_exec.COMPLETION_MARKER).exists()
+    assert not tmpdir.join("job 4", "output").exists()
+    assert not tmpdir.join("job 4", _slurm_remote_exec.COMPLETION_MARKER).exists()
+
+    # Default should give one task per job
+    script = _slurm_remote_exec.submission_script(jobs, [])
+    assert "#SBATCH --array=1-5" in script.splitlines()
+
+
+def testCompletionWatcher(tmpdir):
+    """Check that CompletionWatcher reports array jobs once all their completion markers exist"""
+    jobs = _mkbundledjobs(tmpdir, 3)
+
+    class FakeChannel(object):
+        def __init__(self):
+            self.sent = []
+
+        def send(self, msg):
+            self.sent.append(msg)
+
+    channel = FakeChannel()
+    watcher = _slurm_remote_exec.CompletionWatcher(channel, "chid", interval=0.01)
+    watcher.add("1", jobs[:2])
+    watcher.add("2", jobs[2:])
+    watcher.add("3", jobs[2:])
+    watcher.discard(["3"])
+    assert watcher.scan() == []
+
+    marker = _slurm_remote_exec.COMPLETION_MARKER
+    tmpdir.join("job 0", marker).write("")
+    tmpdir.join("job 2", marker).write("")
+    assert watcher.scan() == ["2"]
+    assert watcher.scan() == []
+
+    tmpdir.join("job 1", marker).write("")
+    watcher.add("4", jobs[:1])
+    watcher.start()
+    try:
+        for i in range(500):
+            if len(channel.sent) == 2:
+                break
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+        watcher.join(5)
+
+    assert sorted(channel.sent, key=lambda m: m["job_id"]) == [
+        {"msg": "JOB_COMPLETE", "channel_id": "chid", "job_id": "1"},
+        {"msg": "JOB_COMPLETE", "channel_id": "chid", "job_id": "4"},
+    ]
@@ -968,3 +968,101 @@ class RowComparatorTestCase(unittest.TestCase):
             sorted(expect),
             sorted(comparator._expression.symbol_table.variables.items()),
         )
+
+
+class VectorRowComparatorTestCase(unittest.TestCase):
+    """Tests for atsim.pro_fit.evaluators._table._VectorRowComparator"""
+
+    def _create(self, expression):
+        return pro_fit.evaluators._table._VectorRowComparator.create(
+            pro_fit.evaluators._table._RowComparator(expression)
+        )
+
+    def testCompare(self):
+        import numpy as np
+
+        for expression in [
+            "sqrt((e_fx - r_fx)^2 + (e_fy - r_fy)^2)",
+            "-r_fx^2 + 2^-e_fx",
+            "2^r_fx^e_fy",
+            "abs(r_fx - e_fx) % 0.3 / max(e_fx, r_fy, 1.5)",
+            "log10(r_fx) * pi + exp(-e_fy) - min(r_fx, e_fy)",
+        ]:
+            comparator = self._create(expression)
+            self.assertNotEqual(None, comparator, expression)
+
+            rowComparator = pro_fit.evaluators._table._RowComparator(
+                expression
+            )
+            columns = {
+                "r_fx": np.array([1.0, 2.5, 0.25]),
+                "r_fy": np.array([3.0, -1.0, 0.5]),
+                "e_fx": np.array([0.5, 1.0, 2.0]),
+                "e_fy": np.array([1.0, 1.5, 0.75]),
+            }
+            actual = comparator.compare(columns, 3)
+            for i in range(3):
+                expect = rowComparator.compare(
+                    {"fx": columns["e_fx"][i], "fy": columns["e_fy"][i]},
+                    {"fx": columns["r_fx"][i], "fy": columns["r_fy"][i]},
+                )
+                self.assertAlmostEqual(expect, actual[i], places=12)
+
+        # Constant expressions are broadcast to every row.
+        self.assertEqual(
+            [2.0, 2.0], list(self._create("1+1").compare({}, 2))
+        )
+
+    def testUnsupported(self):
+        for expression in [
+            "if (r_fx > e_fx) r_fx; else e_fx;",
+            "hypot(r_fx, e_fx)",
+            "2r_fx",
+            "r_fx := 2",
+        ]:
+            self.assertEqual(None, self._create(expression), expression)
+
+    def testEvaluatorMatchesRowByRow(self):
+        """Check that vectorised and row-by-row comparison give the same evaluator records"""
+        resdir = os.path.join(_getResourceDir(), "error_conditions")
+        job = pro_fit.jobfactories.Job(mockJobFactory, resdir, None)
+        expectTable = [
+            {"A": "1.0", "B": "2.0", "expect": "3.0", "w": "1.0"},
+            {"A": "1.0", "B": "2.0", "expect": "3.0", "w": "2.0"},
+            {"A": "2.0", "B": "2.0", "expect": "1.0", "w": "0.5"},
+            {"A": "2.0", "B": "2.0", "expect": "1.0", "w": "0.5"},
+        ]
+
+        for filename, expression, numRows, weightColumn in [
+            ("three_rows.csv", "r_A + r_B - e_A", 3, "w"),
+            ("three_rows.csv", "r_A + r_B - e_A", 2, None),
+            ("three_rows.csv", "r_A + r_B - e_A", 4, "w"),
+            ("three_rows.csv", "log(r_A - 1)", 3, "w"),
+            ("bad_value.csv", "r_A * r_B", 3, "w"),
+        ]:
+            for recordPerRow in [True, False]:
+
+                def create():
+                    return pro_fit.evaluators.TableEvaluator(
+                        "Table",
+                        expectTable[:numRows],
+                        filename,
+                        expression,
+                        0.5,
+                        2.0,
+                        recordPerRow,
+                        weight_column=weightColumn,
+                    )
+
+                vectorised = create()
+                self.assertNotEqual(None, vectorised._expectArrays)
+                rowByRow = create()
+                rowByRow._expectArrays = None
+
+                expect = rowByRow(job)
+                actual = vectorised(job)
+                _compareEvaluatorRecords(self, expect, actual)
+                self.assertEqual(
+                    [r.meritValue for r in expect if not r.errorFlag],
+                    [r.meritValue for r in actual if not r.errorFlag],
+                )
@@ -65,6 +65,29 @@ class VariablesTestCase(unittest.TestCase):
         self.assertEqual(["B", "C"], candidate2.fitKeys)
         self.assertEqual([5.0, 6.0], candidate2.fitValues)
 
+    def testCreateUpdatedPopulation(self):
+        """Test atsim.pro_fit.variables.Variables.createUpdatedPopulation()"""
+        initialVariables = atsim.pro_fit.variables.Variables(
+            [("A", 1.0, False), ("B", 2.0, True), ("C", 3.0, True)],
+            [None, (0.0, 10.0), None],
+        )
+
+        population = initialVariables.createUpdatedPopulation(
+            [[5.0, 6.0], [7.0, 8.0]]
+        )
+        self.assertEqual(2, len(population))
+
+        for candidate, fitValues in zip(population, [[5.0, 6.0], [7.0, 8.0]]):
+            expect = initialVariables.createUpdated(fitValues)
+            self.assertEqual(expect.flaggedVariablePairs, candidate.flaggedVariablePairs)
+            self.assertEqual(expect.bounds, candidate.bounds)
+            self.assertEqual(["B", "C"], candidate.fitKeys)
+            self.assertEqual(fitValues, candidate.fitValues)
+            self.assertEqual(None, candidate.id)
+
+        # Initial variables shouldn't have changed
+        self.assertEqual([2.0, 3.0], initialVariables.fitValues)
+
     def testFitVariableBounds(self):
         """Test that Variables class will return a filtered list of bounds for fitting variables"""
 
@@ -157,6 +180,63 @@ class CalculatedVariables(unittest.TestCase):
 
         testutil.compareCollection(self, expect, outVars.bounds)
 
+    def testEvaluatePopulation(self):
+        """Check CalculatedVariables.evaluatePopulation() gives same results as calling CalculatedVariables for each candidate"""
+        initialVariables = atsim.pro_fit.variables.Variables(
+            [("A", 1.0, False), ("B", 2.0, True)], bounds=[None, (0, 10)]
+        )
+        calculatedVariables = atsim.pro_fit.variables.CalculatedVariables(
+            [("C", "A + B"), ("D", "B * 2")]
+        )
+
+        population = initialVariables.createUpdatedPopulation(
+            [[3.0], [4.0], [5.0]]
+        )
+        evaluated = calculatedVariables.evaluatePopulation(population)
+
+        self.assertEqual(3, len(evaluated))
+        for candidate, outVars in zip(population, evaluated):
+            expect = calculatedVariables(candidate)
+            self.assertEqual(
+                expect.flaggedVariablePairs, outVars.flaggedVariablePairs
+            )
+            self.assertEqual([None, (0, 10), None, None], outVars.bounds)
+            self.assertEqual(["B"], outVars.fitKeys)
+
+        self.assertEqual(
+            [("A", 1.0), ("B", 5.0), ("C", 6.0), ("D", 10.0)],
+            evaluated[2].variablePairs,
+        )
+
+        # Input candidates shouldn't have been modified
+        self.assertEqual([("A", 1.0), ("B", 3.0)], population[0].variablePairs)
+        self.assertEqual([None, (0, 10)], population[0].bounds)
+
+        # Expressions are recompiled if variable names change.
+        other = atsim.pro_fit.variables.Variables(
+            [("A", 2.0, False), ("B", 3.0, True), ("E", 1.0, False)]
+        )
+        outVars = calculatedVariables(other)
+        self.assertEqual(
+            [("A", 2.0), ("B", 3.0), ("E", 1.0), ("C", 5.0), ("D", 6.0)],
+            outVars.variablePairs,
+        )
+
+    def testPickle(self):
+        """Check CalculatedVariables can be pickled after expressions have been compiled"""
+        import pickle
+
+        calculatedVariables = atsim.pro_fit.variables.CalculatedVariables(
+            [("C", "A * 2")]
+        )
+        variables = atsim.pro_fit.variables.Variables([("A", 1.5, True)])
+        calculatedVariables(variables)
+
+        unpickled = pickle.loads(pickle.dumps(calculatedVariables))
+        self.assertEqual(
+            [("A", 1.5), ("C", 3.0)], unpickled(variables).variablePairs
+        )
+
     def testCreateFromConfig(self):
         """Test creation of CalculatedVariables from [CalculatedVariables] configuration directives"""
 